@@ -3,8 +3,24 @@ from frappe import _
 from frappe.utils import now_datetime, time_diff_in_seconds, cint, cstr
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Union
+import copy
 import json
-import os
+
+from restaurant_management.restaurant_management.utils.kitchen_analytics import record_item_events
+from restaurant_management.utils.display_config import DEFAULT_DISPLAY_CONFIG, get_screen_config
+from restaurant_management.utils.perf import record_cache_lookup
+
+# Item statuses that no longer belong on a kitchen screen
+KDS_CLOSED_STATUSES = ("Ready", "Delivered", "Served", "Cancelled")
+
+# Ticket SLA colours, keyed by how much of the station preparation time has elapsed
+SLA_COLOR_MAP = {
+    "on_time": "#2ecc71",   # Green
+    "warning": "#f39c12",   # Orange
+    "late": "#e74c3c"       # Red
+}
+SLA_WARNING_RATIO = 0.75
+STATION_TICKETS_CACHE_TTL = 300
 
 def validate_kds_token(token: str) -> bool:
     """
@@ -45,8 +61,8 @@ def get_kitchen_item_queue(kitchen_station: Optional[str] = None, branch_code: O
         return []
     
     try:
-        # Base filters for Waiter Order Item
-        filters = {"status": ["!=", "Ready"]}
+        # Base filters for Waiter Order Item (open kitchen work only)
+        filters = {"status": ["not in", KDS_CLOSED_STATUSES]}
         
         if kitchen_station:
             filters["kitchen_station"] = kitchen_station
@@ -202,19 +218,26 @@ def update_item_status(item_id: str, new_status: str, access_token: Optional[str
         return {"success": False, "error": _(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")}
     
     try:
-        # Check if item exists
-        if not frappe.db.exists("Waiter Order Item", item_id):
+        # Check if item exists and keep its previous state for the event log
+        item = frappe.db.get_value(
+            "Waiter Order Item",
+            item_id,
+            ["name", "parent", "status", "kitchen_station", "creation", "last_update_time"],
+            as_dict=True
+        )
+        if not item:
             return {"success": False, "error": _("Item not found")}
         
         # Update the status
+        event_time = now_datetime()
         frappe.db.set_value("Waiter Order Item", item_id, {
             "status": new_status,
-            "last_update_time": now_datetime(),
+            "last_update_time": event_time,
             "last_update_by": frappe.session.user
         })
+        record_item_events([item], new_status, event_time)
         
         # Check if all items in order are ready or served
-        item = frappe.get_doc("Waiter Order Item", item_id)
         order_id = item.parent
         
         # Update parent order status if needed
@@ -222,6 +245,7 @@ def update_item_status(item_id: str, new_status: str, access_token: Optional[str
             update_parent_order_status(order_id)
         
         frappe.db.commit()
+        clear_station_tickets_cache()
         
         return {
             "success": True,
@@ -234,6 +258,162 @@ def update_item_status(item_id: str, new_status: str, access_token: Optional[str
         )
         return {"success": False, "error": str(e)}
 
+@frappe.whitelist(allow_guest=True)
+def update_items_status(
+    item_ids: Union[str, List[str]],
+    new_status: str,
+    expected_statuses: Optional[Union[str, List[str]]] = None,
+    access_token: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Update the status of several kitchen items in one call (ticket bump)
+
+    All transitions are applied in a single transaction. Each affected
+    Waiter Order is recomputed once and gets one realtime event.
+
+    Args:
+        item_ids: List (or JSON list) of Waiter Order Item IDs
+        new_status: New status (Waiting, Cooking, Ready)
+        expected_statuses: Optional list of statuses the items must currently be in.
+            Items in any other status are reported as conflicts and left untouched.
+        access_token: Token for authentication when accessed as guest
+
+    Returns:
+        Dictionary with overall success flag and per-item results
+    """
+    # Validate token for guest access
+    if frappe.session.user == "Guest" and not validate_guest_access(access_token):
+        return {
+            "success": False,
+            "error": _("Authentication required. Please provide a valid access token.")
+        }
+
+    valid_statuses = ["Waiting", "Cooking", "Ready", "Sent to Kitchen"]
+    if new_status not in valid_statuses:
+        return {"success": False, "error": _(f"Invalid status. Must be one of: {', '.join(valid_statuses)}")}
+
+    if isinstance(item_ids, str):
+        item_ids = json.loads(item_ids)
+    if isinstance(expected_statuses, str):
+        expected_statuses = json.loads(expected_statuses)
+
+    # Keep request order but drop duplicates
+    item_ids = list(dict.fromkeys(item_ids or []))
+    if not item_ids:
+        return {"success": False, "error": _("At least one item is required")}
+
+    try:
+        # Load current state of all requested items with a single query
+        rows = frappe.get_all(
+            "Waiter Order Item",
+            filters={"name": ["in", item_ids]},
+            fields=["name", "status", "parent", "kitchen_station", "creation", "last_update_time"],
+            ignore_permissions=True,
+            limit_page_length=0
+        )
+        current = {row.name: row for row in rows}
+
+        results = {}
+        to_update = []
+        for item_id in item_ids:
+            row = current.get(item_id)
+            if not row:
+                results[item_id] = {"item_id": item_id, "success": False, "error": _("Item not found")}
+            elif expected_statuses and row.status not in expected_statuses:
+                results[item_id] = get_status_conflict(item_id, row.status)
+            else:
+                to_update.append(row)
+
+        event_time = now_datetime()
+        if to_update:
+            conditions = ""
+            values = [new_status, event_time, frappe.session.user, [row.name for row in to_update]]
+            if expected_statuses:
+                # Guard against concurrent bumps from another screen
+                conditions = "AND status IN %s"
+                values.append(list(expected_statuses))
+
+            frappe.db.sql(
+                """
+                UPDATE `tabWaiter Order Item`
+                SET status = %s, last_update_time = %s, last_update_by = %s
+                WHERE name IN %s {conditions}
+                """.format(conditions=conditions),
+                values
+            )
+
+            if expected_statuses:
+                # Items changed by someone else between the read and the update are conflicts
+                applied = dict(frappe.get_all(
+                    "Waiter Order Item",
+                    filters={"name": ["in", [row.name for row in to_update]]},
+                    fields=["name", "status"],
+                    as_list=True,
+                    ignore_permissions=True,
+                    limit_page_length=0
+                ))
+                for row in [row for row in to_update if applied.get(row.name) != new_status]:
+                    results[row.name] = get_status_conflict(row.name, applied.get(row.name))
+                    to_update.remove(row)
+
+            # Log the transitions in the same transaction as the update
+            record_item_events(to_update, new_status, event_time)
+
+        # Recompute each affected order once and notify its screens
+        order_ids = list(dict.fromkeys(row.parent for row in to_update))
+        for order_id in order_ids:
+            if new_status == "Ready":
+                update_parent_order_status(order_id)
+
+            frappe.publish_realtime(
+                "kds_order_update",
+                {
+                    "order_id": order_id,
+                    "status": new_status,
+                    "item_ids": [row.name for row in to_update if row.parent == order_id]
+                },
+                after_commit=True
+            )
+
+        frappe.db.commit()
+        clear_station_tickets_cache()
+
+        for row in to_update:
+            results[row.name] = {"item_id": row.name, "success": True, "status": new_status}
+
+        return {
+            "success": len(to_update) == len(item_ids),
+            "updated": len(to_update),
+            "results": [results[item_id] for item_id in item_ids],
+            "message": _("{0} of {1} items updated to {2}").format(len(to_update), len(item_ids), new_status)
+        }
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(
+            f"Error updating item statuses: {frappe.get_traceback()}",
+            "KDS Update Error"
+        )
+        return {"success": False, "error": str(e)}
+
+def get_status_conflict(item_id: str, current_status: Optional[str]) -> Dict[str, Any]:
+    """
+    Build the per-item result for an item whose status did not match
+
+    Args:
+        item_id: ID of the Waiter Order Item
+        current_status: Status the item is currently in
+
+    Returns:
+        Result dictionary flagged as a conflict
+    """
+    return {
+        "item_id": item_id,
+        "success": False,
+        "conflict": True,
+        "current_status": current_status,
+        "error": _("Item status is {0}").format(current_status)
+    }
+
 def update_parent_order_status(order_id: str) -> None:
     """
     Update parent order status based on items status
@@ -283,6 +463,202 @@ def update_parent_order_status(order_id: str) -> None:
             "KDS Update Error"
         )
 
+@frappe.whitelist(allow_guest=True)
+def get_station_tickets(kitchen_station: Optional[str] = None, branch_code: Optional[str] = None, access_token: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get open kitchen tickets grouped by order and course
+
+    Tickets are grouped on the server and cached per station/branch until the
+    next item change, so screens only receive the ready-to-render structure.
+    Ages and SLA colours are recomputed from the cached timestamps on each call.
+
+    Args:
+        kitchen_station: Filter by kitchen station
+        branch_code: Filter by branch code
+        access_token: Token for guest authentication
+
+    Returns:
+        List of tickets sorted by priority (most overdue first)
+    """
+    # Validate token for guest access
+    if frappe.session.user == "Guest" and not validate_guest_access(access_token):
+        return []
+
+    try:
+        cache_key = f"kds_tickets:{kitchen_station or 'all'}:{branch_code or 'all'}"
+        tickets = frappe.cache().get_value(cache_key)
+        record_cache_lookup(tickets is not None)
+
+        if tickets is None:
+            tickets = build_station_tickets(kitchen_station, branch_code)
+            frappe.cache().set_value(cache_key, tickets, expires_in_sec=STATION_TICKETS_CACHE_TTL)
+
+        return prioritize_tickets(tickets, now_datetime())
+    except Exception as e:
+        frappe.log_error(
+            f"Error getting station tickets: {str(e)}",
+            "KDS Display Error"
+        )
+        return []
+
+def build_station_tickets(kitchen_station: Optional[str] = None, branch_code: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load open kitchen items in one query and group them into tickets
+
+    Args:
+        kitchen_station: Filter by kitchen station
+        branch_code: Filter by branch code
+
+    Returns:
+        List of tickets (without age/SLA information)
+    """
+    conditions = []
+    values = {"closed_statuses": KDS_CLOSED_STATUSES}
+
+    if kitchen_station:
+        conditions.append("AND woi.kitchen_station = %(kitchen_station)s")
+        values["kitchen_station"] = kitchen_station
+
+    if branch_code:
+        conditions.append("AND wo.branch_code = %(branch_code)s")
+        values["branch_code"] = branch_code
+
+    items = frappe.db.sql(
+        """
+        SELECT
+            woi.name AS id,
+            woi.item_code,
+            woi.item_name,
+            woi.qty,
+            woi.status,
+            woi.notes,
+            woi.kitchen_station,
+            woi.creation AS item_time,
+            woi.parent AS order_id,
+            wo.table,
+            wo.branch_code,
+            t.table_number,
+            i.item_group AS course,
+            ks.default_preparation_time
+        FROM
+            `tabWaiter Order Item` woi
+        INNER JOIN
+            `tabWaiter Order` wo ON wo.name = woi.parent
+        LEFT JOIN
+            `tabTable` t ON t.name = wo.table
+        LEFT JOIN
+            `tabItem` i ON i.name = woi.item_code
+        LEFT JOIN
+            `tabKitchen Station` ks ON ks.name = woi.kitchen_station
+        WHERE
+            woi.status NOT IN %(closed_statuses)s
+            AND wo.docstatus < 2
+            {conditions}
+        ORDER BY
+            woi.creation ASC, woi.idx ASC
+        """.format(conditions=" ".join(conditions)),
+        values,
+        as_dict=True
+    )
+
+    return group_ticket_items(items)
+
+def group_ticket_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group flat kitchen item rows into tickets (one per order) and courses
+
+    Args:
+        items: Item rows ordered by creation time
+
+    Returns:
+        List of tickets in first-ordered order
+    """
+    tickets: Dict[str, Dict[str, Any]] = {}
+
+    for item in items:
+        ticket = tickets.get(item["order_id"])
+        if not ticket:
+            ticket = tickets[item["order_id"]] = {
+                "order_id": item["order_id"],
+                "table": item.get("table"),
+                "table_number": item.get("table_number") or "Unknown",
+                "branch_code": item.get("branch_code"),
+                "first_item_time": item["item_time"],
+                "preparation_time": 0,
+                "total_qty": 0,
+                "statuses": [],
+                "courses": []
+            }
+            ticket["_courses"] = {}
+
+        course_name = item.get("course") or _("Other")
+        course = ticket["_courses"].get(course_name)
+        if not course:
+            course = ticket["_courses"][course_name] = {"course": course_name, "items": []}
+            ticket["courses"].append(course)
+
+        course["items"].append({
+            "id": item["id"],
+            "item_code": item["item_code"],
+            "item_name": item["item_name"],
+            "qty": item["qty"],
+            "status": item["status"],
+            "notes": item.get("notes"),
+            "kitchen_station": item.get("kitchen_station")
+        })
+
+        ticket["total_qty"] += cint(item["qty"])
+        ticket["preparation_time"] = max(ticket["preparation_time"], cint(item.get("default_preparation_time")))
+        if item["status"] not in ticket["statuses"]:
+            ticket["statuses"].append(item["status"])
+
+    for ticket in tickets.values():
+        del ticket["_courses"]
+
+    return list(tickets.values())
+
+def prioritize_tickets(tickets: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+    """
+    Add age and SLA colour to each ticket and sort them by priority
+
+    Args:
+        tickets: Tickets as returned by group_ticket_items
+        now: Current time
+
+    Returns:
+        Tickets sorted with the most overdue first
+    """
+    sla_rank = {"late": 0, "warning": 1, "on_time": 2}
+    result = []
+
+    for ticket in tickets:
+        first_item_time = ticket["first_item_time"]
+        if isinstance(first_item_time, str):
+            first_item_time = datetime.fromisoformat(first_item_time.replace('Z', '+00:00'))
+
+        age = max(int(time_diff_in_seconds(now, first_item_time)), 0)
+        sla_seconds = (cint(ticket.get("preparation_time")) or 15) * 60
+
+        if age >= sla_seconds:
+            sla_status = "late"
+        elif age >= sla_seconds * SLA_WARNING_RATIO:
+            sla_status = "warning"
+        else:
+            sla_status = "on_time"
+
+        result.append(dict(ticket, age=age, sla_status=sla_status, sla_color=SLA_COLOR_MAP[sla_status]))
+
+    result.sort(key=lambda ticket: (sla_rank[ticket["sla_status"]], -ticket["age"]))
+    return result
+
+def clear_station_tickets_cache(doc=None, method=None) -> None:
+    """
+    Drop cached station tickets after any kitchen item change
+
+    Can be used directly or as a doc event handler.
+    """
+    frappe.cache().delete_keys("kds_tickets:")
+
 @frappe.whitelist(allow_guest=True)
 def get_kitchen_stations(access_token: Optional[str] = None) -> List[Dict[str, Any]]:
     """
@@ -405,68 +781,31 @@ def get_branches(access_token: Optional[str] = None) -> List[Dict[str, Any]]:
         return []
 
 @frappe.whitelist(allow_guest=True)
-def get_kds_config(access_token: Optional[str] = None) -> Dict[str, Any]:
+def get_kds_config(
+    access_token: Optional[str] = None,
+    kitchen_station: Optional[str] = None,
+    branch_code: Optional[str] = None,
+    version: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Get KDS configuration
     
     Args:
         access_token: Optional access token for guest authentication
+        kitchen_station: Station shown on the screen, for station overrides
+        branch_code: Branch of the screen, for branch overrides
+        version: Configuration version already held by the screen
         
     Returns:
-        KDS configuration settings
+        KDS configuration settings with their version, or only the version
+        and ``unchanged`` when the screen's copy is current
     """
     # Validate guest access if needed
     if frappe.session.user == "Guest" and not validate_guest_access(access_token):
         return get_default_kds_config()
     
-    # Default configuration
-    default_config = get_default_kds_config()
-    
     try:
-        # Try to get configuration from database first
-        if frappe.db.exists("KDS Settings"):
-            settings = frappe.get_single("KDS Settings")
-            
-            # Build config from database settings
-            config = {
-                "refresh_interval": cint(settings.refresh_interval) or 10,
-                "default_kitchen_station": settings.default_kitchen_station or "",
-                "status_color_map": {
-                    "Waiting": settings.waiting_color or "#e74c3c",
-                    "Sent to Kitchen": settings.sent_to_kitchen_color or "#e74c3c",
-                    "Cooking": settings.cooking_color or "#f39c12",
-                    "Ready": settings.ready_color or "#2ecc71"
-                },
-                "enable_sound_on_ready": settings.enable_sound_on_ready or True,
-                "enable_sound_on_new_item": settings.enable_sound_on_new_item or True,
-                "show_item_notes": settings.show_item_notes or True,
-                "auto_refresh": settings.auto_refresh or True
-            }
-            
-            return config
-        
-        # Fallback to file-based config
-        config_path = os.path.join(
-            frappe.get_app_path("restaurant_management"),
-            "config",
-            "kds_display.json"
-        )
-        
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-                
-            # Merge with defaults to ensure all fields are present
-            for key, value in default_config.items():
-                if key not in config:
-                    config[key] = value
-                elif isinstance(value, dict) and isinstance(config.get(key), dict):
-                    # For nested dictionaries like status_color_map
-                    for subkey, subvalue in value.items():
-                        if subkey not in config[key]:
-                            config[key][subkey] = subvalue
-                            
-            return config
+        return get_screen_config("kds", branch_code=branch_code, kitchen_station=kitchen_station, version=version)
     except Exception as e:
         frappe.log_error(
             f"Error loading KDS configuration: {str(e)}", 
@@ -474,7 +813,7 @@ def get_kds_config(access_token: Optional[str] = None) -> Dict[str, Any]:
         )
     
     # Return default config if all else fails
-    return default_config
+    return get_default_kds_config()
 
 def get_default_kds_config() -> Dict[str, Any]:
     """
@@ -483,20 +822,7 @@ def get_default_kds_config() -> Dict[str, Any]:
     Returns:
         Default configuration dictionary
     """
-    return {
-        "refresh_interval": 10,
-        "default_kitchen_station": "",
-        "status_color_map": {
-            "Waiting": "#e74c3c",            # Red
-            "Sent to Kitchen": "#e74c3c",    # Red
-            "Cooking": "#f39c12",            # Orange
-            "Ready": "#2ecc71"               # Green
-        },
-        "enable_sound_on_ready": True,
-        "enable_sound_on_new_item": True,
-        "show_item_notes": True,
-        "auto_refresh": True
-    }
+    return copy.deepcopy(DEFAULT_DISPLAY_CONFIG["kds"])
 
 @frappe.whitelist(allow_guest=True)
 def get_token_status(access_token: str) -> Dict[str, Any]:
@@ -1,6 +1,8 @@
 from typing import Optional, List, Dict, Any
 import frappe
 
+from restaurant_management.utils.perf import record_cache_lookup
+
 def get_kitchen_station_for_item(item_group: str) -> Optional[str]:
     """Get the appropriate kitchen station for an item based on its item group.
     
@@ -13,6 +15,7 @@ def get_kitchen_station_for_item(item_group: str) -> Optional[str]:
     # Check cache first for performance
     cache_key = f"kitchen_station_mapping:{item_group}"
     cached_station = frappe.cache().get_value(cache_key)
+    record_cache_lookup(bool(cached_station))
     if cached_station:
         return cached_station
     
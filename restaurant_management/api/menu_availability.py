@@ -0,0 +1,62 @@
+import frappe
+from frappe import _
+from typing import Any, Dict, Optional
+
+from restaurant_management.utils.availability import get_availability, set_availability
+
+# Roles allowed to 86 items or change countdowns
+AVAILABILITY_ROLES = ["Restaurant Manager", "Restaurant Supervisor", "Restaurant Staff", "System Manager"]
+
+@frappe.whitelist()
+def get_menu_availability(branch_code: str) -> Dict[str, Any]:
+    """
+    Get the sold-out items and countdowns of a branch
+
+    Args:
+        branch_code: Branch code
+
+    Returns:
+        Dict with ``sold_out`` item codes and ``countdown`` (item code -> portions left)
+    """
+    if frappe.session.user == "Guest":
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+    return get_availability(branch_code)
+
+@frappe.whitelist(methods=["POST"])
+def set_item_availability(
+    branch_code: str,
+    item_code: str,
+    sold_out: int = 0,
+    qty: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    86 an item in a branch, put it on a countdown or back on the menu
+
+    Args:
+        branch_code: Branch code
+        item_code: Item to change
+        sold_out: 1 to mark the item sold out
+        qty: Portions left, to sell the item on a countdown
+
+    Returns:
+        Dict with success status and the branch's updated availability
+    """
+    if not frappe.utils.has_common(AVAILABILITY_ROLES, frappe.get_roles(frappe.session.user)):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    if not branch_code or not item_code:
+        return {"success": False, "error": _("Branch code and item code are required")}
+
+    if qty in ("", None):
+        qty = None
+    else:
+        qty = frappe.utils.cint(qty)
+        if qty < 0:
+            return {"success": False, "error": _("Quantity cannot be negative")}
+
+    try:
+        set_availability(branch_code, item_code, sold_out=frappe.utils.cint(sold_out), qty=qty)
+        return {"success": True, **get_availability(branch_code)}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error updating menu availability"))
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,41 @@
+import frappe
+from frappe import _
+from typing import Any, Dict
+
+from restaurant_management.utils.perf import format_prometheus, get_window_stats
+
+def _check_perf_access() -> None:
+    """Perf stats reveal traffic patterns, so keep them to System Managers"""
+    if "System Manager" not in frappe.get_roles():
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+@frappe.whitelist()
+def get_perf_stats(minutes: int = 15) -> Dict[str, Any]:
+    """
+    Get per-method cost of restaurant API calls over a rolling window
+    
+    Args:
+        minutes: Window length in minutes (1-60)
+        
+    Returns:
+        Dict with ``minutes`` and ``methods``: calls, errors, wall time,
+        latency percentiles, SQL statements, rows and cache hit ratio per
+        method, heaviest first
+    """
+    _check_perf_access()
+    minutes = frappe.utils.cint(minutes) or 15
+    return {"minutes": minutes, "methods": get_window_stats(minutes)}
+
+@frappe.whitelist()
+def get_prometheus_metrics(minutes: int = 15) -> None:
+    """
+    Export restaurant API stats in Prometheus text format
+    
+    Args:
+        minutes: Window length in minutes (1-60)
+    """
+    _check_perf_access()
+    minutes = frappe.utils.cint(minutes) or 15
+    frappe.response["type"] = "txt"
+    frappe.response["doctype"] = "restaurant_metrics"
+    frappe.response["result"] = format_prometheus(get_window_stats(minutes), minutes)
@@ -1,6 +1,6 @@
 import frappe
 from frappe import _
-from frappe.utils import cint, nowdate
+from frappe.utils import cint, now_datetime, nowdate
 import json
 
 
@@ -324,6 +324,7 @@ def update_waiter_order_status(waiter_order, status):
         
         # Update status
         order.status = status
+        order.paid_time = (order.paid_time or now_datetime()) if status == "Paid" else None
         order.db_update()
         
         # If status is Paid or Cancelled, update table status
@@ -372,19 +373,16 @@ def create_sales_order_from_waiter_order(waiter_order_id, pos_invoice=None):
         if not frappe.has_permission("Waiter Order", "read", waiter_order_id) or not frappe.has_permission("Sales Order", "create"):
             frappe.throw(_("You don't have permission to create Sales Order from this Waiter Order"))
         
-        # Get waiter order
-        waiter_order = frappe.get_doc("Waiter Order", waiter_order_id)
-        
         # Check if sales order already exists for this waiter order
         existing_so = frappe.db.get_value(
             "Sales Order", 
-            {"restaurant_waiter_order": waiter_order.name, "docstatus": ["<", 2]}, 
+            {"restaurant_waiter_order": waiter_order_id, "docstatus": ["<", 2]}, 
             "name"
         )
         
         if existing_so:
-            # Update existing Sales Order
-            result = update_sales_order_from_waiter_order(existing_so, waiter_order.name)
+            # Update existing Sales Order (incremental, without loading the waiter order)
+            result = update_sales_order_from_waiter_order(existing_so, waiter_order_id)
             
             # Additionally link POS Invoice if provided
             if pos_invoice and result["success"]:
@@ -393,6 +391,9 @@ def create_sales_order_from_waiter_order(waiter_order_id, pos_invoice=None):
             frappe.response["message"] = result
             return
         
+        # Get waiter order
+        waiter_order = frappe.get_doc("Waiter Order", waiter_order_id)
+        
         # Get customer 
         customer = None
         
@@ -421,6 +422,7 @@ def create_sales_order_from_waiter_order(waiter_order_id, pos_invoice=None):
         so = frappe.new_doc("Sales Order")
         so.customer = customer
         so.restaurant_waiter_order = waiter_order.name
+        so.restaurant_items_version = cint(waiter_order.items_version)
         so.restaurant_table = waiter_order.table
         so.delivery_date = nowdate()
         
@@ -450,8 +452,9 @@ def create_sales_order_from_waiter_order(waiter_order_id, pos_invoice=None):
                 "item_code": item.item_code,
                 "item_name": item.item_name,
                 "qty": item.qty,
-                "rate": item.price,
-                "delivery_date": nowdate()
+                "rate": item.rate,
+                "delivery_date": nowdate(),
+                "waiter_order_item": item.name
             })
         
         so.insert()
@@ -476,6 +479,10 @@ def update_sales_order_from_waiter_order(sales_order_id, waiter_order_id):
     """
     Update an existing Sales Order from a Waiter Order
     
+    Only lines added or changed since the last sync are patched, using the
+    Waiter Order's items_version. If nothing changed no document is loaded
+    or saved.
+    
     Args:
         sales_order_id (str): Sales Order ID
         waiter_order_id (str): Waiter Order ID
@@ -486,72 +493,94 @@ def update_sales_order_from_waiter_order(sales_order_id, waiter_order_id):
     try:
         # Validate inputs
         if not sales_order_id or not waiter_order_id:
-            frappe.response["message"] = {"success": False, "message": _("Sales Order ID and Waiter Order ID are required")}
-            return
+            return _set_response({"success": False, "message": _("Sales Order ID and Waiter Order ID are required")})
         
         # Check if documents exist
-        if not frappe.db.exists("Sales Order", sales_order_id):
-            frappe.response["message"] = {"success": False, "message": _("Sales Order not found")}
-            return
+        so_state = frappe.db.get_value(
+            "Sales Order",
+            sales_order_id,
+            ["name", "docstatus", "restaurant_waiter_order", "restaurant_items_version"],
+            as_dict=True
+        )
+        if not so_state:
+            return _set_response({"success": False, "message": _("Sales Order not found")})
             
-        if not frappe.db.exists("Waiter Order", waiter_order_id):
-            frappe.response["message"] = {"success": False, "message": _("Waiter Order not found")}
-            return
+        waiter_order = frappe.db.get_value("Waiter Order", waiter_order_id, ["name", "table", "items_version"], as_dict=True)
+        if not waiter_order:
+            return _set_response({"success": False, "message": _("Waiter Order not found")})
         
         # Check permissions
         if not frappe.has_permission("Sales Order", "write", sales_order_id) or not frappe.has_permission("Waiter Order", "read", waiter_order_id):
             frappe.throw(_("You don't have permission to update this Sales Order"))
         
-        # Get documents
-        so = frappe.get_doc("Sales Order", sales_order_id)
-        waiter_order = frappe.get_doc("Waiter Order", waiter_order_id)
-        
         # Cannot update submitted Sales Order
-        if so.docstatus != 0:
-            frappe.response["message"] = {"success": False, "message": _("Cannot update a submitted Sales Order")}
-            return
+        if so_state.docstatus != 0:
+            return _set_response({"success": False, "message": _("Cannot update a submitted Sales Order")})
+        
+        # Version already applied to this Sales Order (0 = never synced)
+        since = cint(so_state.restaurant_items_version) if so_state.restaurant_waiter_order == waiter_order.name else 0
+        if since and since == cint(waiter_order.items_version):
+            return _set_response({
+                "success": True,
+                "sales_order": sales_order_id,
+                "unchanged": True,
+                "message": _("Sales Order {0} is up to date").format(sales_order_id)
+            })
+        
+        from restaurant_management.restaurant_management.utils.order_sync import (
+            SALES_ORDER_LINE_FIELDS,
+            get_waiter_order_items,
+            plan_sales_order_patch,
+        )
+        
+        so = frappe.get_doc("Sales Order", sales_order_id)
+        plan = plan_sales_order_patch(
+            so.items,
+            get_waiter_order_items(waiter_order.name, SALES_ORDER_LINE_FIELDS),
+            since=since
+        )
         
         # Update restaurant fields
         so.restaurant_waiter_order = waiter_order.name
         so.restaurant_table = waiter_order.table
+        so.restaurant_items_version = cint(waiter_order.items_version)
         
-        # Map of existing items by item code
-        existing_items = {item.item_code: item for item in so.items}
+        for so_item, item in plan["update"]:
+            so_item.qty = item.qty
+            so_item.rate = item.rate
+            so_item.waiter_order_item = item.name
         
-        # Add or update items
-        for item in waiter_order.items:
-            if item.item_code in existing_items:
-                # Update existing item
-                existing_items[item.item_code].qty = item.qty
-                existing_items[item.item_code].rate = item.price
-            else:
-                # Add new item
-                so.append("items", {
-                    "item_code": item.item_code,
-                    "item_name": item.item_name,
-                    "qty": item.qty,
-                    "rate": item.price,
-                    "delivery_date": nowdate()
-                })
+        for item in plan["append"]:
+            so.append("items", {
+                "item_code": item.item_code,
+                "item_name": item.item_name,
+                "qty": item.qty,
+                "rate": item.rate,
+                "delivery_date": nowdate(),
+                "waiter_order_item": item.name
+            })
         
         # Remove items that are no longer in the waiter order
-        waiter_order_item_codes = [item.item_code for item in waiter_order.items]
-        items_to_remove = [item for item in so.items if item.item_code not in waiter_order_item_codes]
-        
-        for item in items_to_remove:
+        for item in plan["remove"]:
             so.remove(item)
         
         so.save()
         
-        frappe.response["message"] = {
+        return _set_response({
             "success": True,
             "sales_order": so.name,
             "message": _("Sales Order {0} updated successfully").format(so.name)
-        }
+        })
     except Exception as e:
         frappe.db.rollback()
         frappe.log_error(frappe.get_traceback(), _("Error updating Sales Order from Waiter Order"))
-        frappe.response["message"] = {"success": False, "message": str(e)}
+        return _set_response({"success": False, "message": str(e)})
+
+
+def _set_response(result):
+    """Report a result through frappe.response and return it for internal callers"""
+    frappe.response["message"] = result
+    return result
 
 
 def link_pos_invoice_to_sales_order(pos_invoice, sales_order):
@@ -0,0 +1,198 @@
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate, now_datetime
+from typing import Any, Dict, List, Optional
+
+from restaurant_management.restaurant_management.utils.table_allocation import (
+    DEFAULT_DURATION_MINUTES,
+    RESERVATION_DOCTYPE,
+    allocate_tables,
+    get_occupied_tables,
+)
+
+# Roles allowed to look up and book tables
+RESERVATION_ROLES = ["Waiter", "Restaurant Staff", "Restaurant Manager", "System Manager"]
+RESERVATION_STATUSES = ("Booked", "Seated", "Completed", "Cancelled", "No Show")
+
+def check_reservation_permission() -> None:
+    if not frappe.utils.has_common(RESERVATION_ROLES, frappe.get_roles(frappe.session.user)):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+@frappe.whitelist()
+def find_table(
+    branch: str,
+    party_size: int,
+    reservation_time: Optional[str] = None,
+    duration_minutes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Suggest the best-fitting free table, or combination of tables, for a party
+
+    Answered from the branch's in-memory booking index; tables seated right
+    now are read with one query only when the party would arrive before
+    they free up.
+
+    Args:
+        branch: Branch to seat the party in
+        party_size: Number of guests
+        reservation_time: Arrival time (defaults to now, for walk-ins)
+        duration_minutes: How long the tables are needed
+
+    Returns:
+        Dict with success status and the ``allocation`` (tables,
+        table_numbers, capacity, combined), or None if nothing fits
+    """
+    check_reservation_permission()
+
+    if not branch or cint(party_size) < 1:
+        return {"success": False, "error": _("Branch and a party size of at least 1 are required")}
+
+    try:
+        start = reservation_time or now_datetime()
+        duration = cint(duration_minutes) or DEFAULT_DURATION_MINUTES
+        allocation = allocate_tables(
+            branch,
+            party_size,
+            start,
+            duration,
+            occupied=get_occupied_tables(branch, start)
+        )
+        return {"success": True, "allocation": allocation}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error finding table"))
+        return {"success": False, "error": str(e)}
+
+@frappe.whitelist(methods=["POST"])
+def create_reservation(
+    branch: str,
+    guest_name: str,
+    party_size: int,
+    reservation_time: str,
+    duration_minutes: Optional[int] = None,
+    tables: Optional[Any] = None,
+    contact_number: Optional[str] = None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Book tables for a party
+
+    Args:
+        branch: Branch to book in
+        guest_name: Name the booking is under
+        party_size: Number of guests
+        reservation_time: Arrival time
+        duration_minutes: How long the tables are needed
+        tables: Table names to book (JSON list); left empty, the allocator picks
+        contact_number: Guest's phone number
+        notes: Free-text notes
+
+    Returns:
+        Dict with success status, reservation name and the booked tables
+    """
+    check_reservation_permission()
+
+    if isinstance(tables, str):
+        tables = frappe.parse_json(tables)
+
+    try:
+        reservation = frappe.get_doc({
+            "doctype": RESERVATION_DOCTYPE,
+            "branch": branch,
+            "guest_name": guest_name,
+            "contact_number": contact_number,
+            "party_size": cint(party_size),
+            "reservation_time": reservation_time,
+            "duration_minutes": cint(duration_minutes) or DEFAULT_DURATION_MINUTES,
+            "notes": notes,
+            "tables": [{"table": table} for table in tables or []]
+        })
+        reservation.insert()
+        frappe.db.commit()
+
+        return {
+            "success": True,
+            "reservation": reservation.name,
+            "tables": [row.table for row in reservation.tables],
+            "end_time": reservation.end_time
+        }
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), _("Error creating reservation"))
+        return {"success": False, "error": str(e)}
+
+@frappe.whitelist()
+def get_reservations(branch: str, date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Get a branch's reservations of one day
+
+    Args:
+        branch: Branch to list
+        date: Day to list (defaults to today)
+
+    Returns:
+        List of reservations with their booked tables, by reservation time
+    """
+    check_reservation_permission()
+
+    day = getdate(date or now_datetime())
+    reservations = frappe.get_all(
+        RESERVATION_DOCTYPE,
+        filters={
+            "branch": branch,
+            "reservation_time": ["between", [day, add_days(day, 1)]]
+        },
+        fields=[
+            "name", "guest_name", "contact_number", "party_size", "status",
+            "reservation_time", "end_time", "notes"
+        ],
+        order_by="reservation_time asc",
+        limit_page_length=0
+    )
+    if not reservations:
+        return []
+
+    tables = frappe.get_all(
+        "Table Reservation Table",
+        filters={
+            "parent": ["in", [reservation.name for reservation in reservations]],
+            "parenttype": RESERVATION_DOCTYPE
+        },
+        fields=["parent", "table", "table_number"],
+        order_by="idx asc",
+        limit_page_length=0
+    )
+    by_reservation = {}
+    for row in tables:
+        by_reservation.setdefault(row.parent, []).append({"table": row.table, "table_number": row.table_number})
+
+    for reservation in reservations:
+        reservation["tables"] = by_reservation.get(reservation.name, [])
+    return reservations
+
+@frappe.whitelist(methods=["POST"])
+def update_reservation_status(reservation: str, status: str) -> Dict[str, Any]:
+    """
+    Seat, complete or cancel a reservation
+
+    Args:
+        reservation: Table Reservation name
+        status: New status
+
+    Returns:
+        Dict with success status and the reservation's new status
+    """
+    check_reservation_permission()
+
+    if status not in RESERVATION_STATUSES:
+        return {"success": False, "error": _("Invalid status {0}").format(status)}
+
+    try:
+        doc = frappe.get_doc(RESERVATION_DOCTYPE, reservation)
+        doc.status = status
+        doc.save()
+        frappe.db.commit()
+        return {"success": True, "status": doc.status}
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), _("Error updating reservation"))
+        return {"success": False, "error": str(e)}
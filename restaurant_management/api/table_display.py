@@ -1,8 +1,13 @@
+import copy
+
 import frappe
 from frappe import _
-import json
 from frappe.utils.caching import redis_cache
 
+from restaurant_management.restaurant_management.utils.table_allocation import get_upcoming_reservations
+from restaurant_management.utils.display_config import DEFAULT_DISPLAY_CONFIG, get_screen_config
+from restaurant_management.utils.perf import record_cache_lookup
+
 
 @frappe.whitelist()
 def get_table_status(branch=None):
@@ -18,9 +23,10 @@ def get_table_status(branch=None):
     # Use caching for frequent reloads
     cache_key = f"table_status:{branch or 'all'}"
     cached_data = frappe.cache().get_value(cache_key)
+    record_cache_lookup(bool(cached_data))
     
     if cached_data:
-        return cached_data
+        return add_upcoming_reservations(cached_data)
     
     # Build filters
     filters = {"is_active": 1}
@@ -101,7 +107,39 @@ def get_table_status(branch=None):
     # Cache the result for 10 seconds (short-lived to maintain freshness)
     frappe.cache().set_value(cache_key, result, expires_in_sec=10)
     
-    return result
+    return add_upcoming_reservations(result)
+
+
+def add_upcoming_reservations(tables):
+    """
+    Add each table's current or next reservation from the in-memory index
+    
+    Runs after the cache so bookings show up as soon as they are made,
+    without a query per refresh.
+    
+    Args:
+        tables (list): Table status rows
+        
+    Returns:
+        The rows, with ``reservation`` set on reserved tables
+    """
+    by_branch = {}
+    for table in tables:
+        table.pop("reservation", None)
+        if table.get("branch"):
+            by_branch.setdefault(table["branch"], []).append(table)
+    
+    for branch, branch_tables in by_branch.items():
+        try:
+            upcoming = get_upcoming_reservations(branch, [table["name"] for table in branch_tables])
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "Table Reservation Index Error")
+            continue
+        for table in branch_tables:
+            if table["name"] in upcoming:
+                table["reservation"] = upcoming[table["name"]]
+    
+    return tables
 
 
 @frappe.whitelist()
@@ -134,31 +172,24 @@ def get_branches():
 
 
 @frappe.whitelist()
-@redis_cache(ttl=300)  # Cache for 5 minutes
-def get_table_display_config():
+def get_table_display_config(branch=None, version=None):
     """
     Get table display configuration
     
+    Args:
+        branch (str, optional): Branch docname, for branch overrides
+        version (str, optional): Configuration version already held by the screen
+        
     Returns:
-        Dictionary with display configuration
+        Dictionary with display configuration and its version, or only the
+        version and ``unchanged`` when the screen's copy is current
     """
-    config_path = frappe.get_app_path("restaurant_management", "config", "table_display.json")
-    
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        return config
-    except (FileNotFoundError, json.JSONDecodeError):
-        # Return default config if file doesn't exist or is invalid
-        return {
-            "refresh_interval": 30,
-            "default_branch_code": "",
-            "status_colors": {
-                "Available": "#2ecc71",  # green
-                "In Progress": "#e74c3c", # red
-                "Paid": "#3498db"        # blue
-            }
-        }
+        return get_screen_config("table", branch=branch, version=version)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Table Display Config Error")
+        # Return default config if the registry is unavailable
+        return copy.deepcopy(DEFAULT_DISPLAY_CONFIG["table"])
 
 
 @frappe.whitelist()
@@ -0,0 +1,146 @@
+import importlib
+import sys
+import types
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+@pytest.fixture
+def kds(monkeypatch):
+    items = {
+        "WOI-1": FrappeDict(name="WOI-1", status="Cooking", parent="WO-1"),
+        "WOI-2": FrappeDict(name="WOI-2", status="Cooking", parent="WO-1"),
+        "WOI-3": FrappeDict(name="WOI-3", status="Waiting", parent="WO-2"),
+        "WOI-4": FrappeDict(name="WOI-4", status="Cooking", parent="WO-2"),
+    }
+
+    branch_codes = {"WO-1": "B1", "WO-2": "B2"}
+
+    def get_all(doctype, filters=None, fields=None, as_list=False, **kwargs):
+        if doctype == "Waiter Order":
+            return [(name, branch_codes[name]) for name in filters["name"][1]]
+        rows = [items[name] for name in filters["name"][1] if name in items]
+        if as_list:
+            return [(row.name, row.status) for row in rows]
+        return rows
+
+    def sql(query, values=None, **kwargs):
+        new_status, _, _, names = values[:4]
+        expected = values[4] if len(values) > 4 else None
+        for name in names:
+            if expected is None or items[name].status in expected:
+                items[name].status = new_status
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.whitelist = lambda *a, **k: (lambda fn: fn)
+    fake_frappe._ = lambda msg: msg
+    fake_frappe.session = SimpleNamespace(user="cook@example.com")
+    fake_frappe.get_all = get_all
+    fake_frappe.publish_realtime = MagicMock()
+    fake_frappe.cache = lambda: SimpleNamespace(delete_keys=lambda key: None)
+    fake_frappe.log_error = lambda *a, **k: None
+    fake_frappe.get_traceback = lambda: "tb"
+    fake_frappe.generate_hash = lambda length=10: "x" * length
+    fake_frappe.db = SimpleNamespace(
+        sql=MagicMock(side_effect=sql), bulk_insert=MagicMock(), commit=MagicMock(), rollback=MagicMock()
+    )
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(
+        sys.modules,
+        "frappe.utils",
+        SimpleNamespace(
+            now_datetime=lambda: datetime(2024, 1, 1, 20, 0, 0),
+            get_datetime=lambda v: v,
+            flt=lambda v, precision=None: float(v or 0),
+            time_diff_in_seconds=lambda a, b: (a - b).total_seconds(),
+            cint=lambda v: int(v or 0),
+            cstr=str,
+        ),
+    )
+    monkeypatch.delitem(sys.modules, "restaurant_management.api.kds_display", raising=False)
+    monkeypatch.delitem(
+        sys.modules, "restaurant_management.restaurant_management.utils.kitchen_analytics", raising=False
+    )
+
+    module = importlib.import_module("restaurant_management.api.kds_display")
+    module.update_parent_order_status = MagicMock()
+    return module, fake_frappe, items
+
+
+def test_update_items_status_reports_per_item_results(kds):
+    module, fake_frappe, items = kds
+
+    result = module.update_items_status(
+        ["WOI-1", "WOI-3", "WOI-4", "WOI-404"], "Ready", expected_statuses=["Cooking"]
+    )
+
+    assert result["updated"] == 2
+    assert result["success"] is False
+    by_id = {row["item_id"]: row for row in result["results"]}
+    assert by_id["WOI-1"]["success"] and by_id["WOI-4"]["success"]
+    assert by_id["WOI-3"]["conflict"] and by_id["WOI-3"]["current_status"] == "Waiting"
+    assert by_id["WOI-404"]["success"] is False
+    assert items["WOI-3"].status == "Waiting"
+
+    # One UPDATE statement, one event insert and one commit for the whole bump
+    assert fake_frappe.db.sql.call_count == 1
+    assert fake_frappe.db.commit.call_count == 1
+    assert fake_frappe.db.bulk_insert.call_count == 1
+    doctype, fields, values = fake_frappe.db.bulk_insert.call_args.args
+    assert doctype == "Kitchen Item Event"
+    events = [dict(zip(fields, row)) for row in values]
+    assert [(e["waiter_order_item"], e["from_status"], e["to_status"]) for e in events] == [
+        ("WOI-1", "Cooking", "Ready"),
+        ("WOI-4", "Cooking", "Ready"),
+    ]
+    # Items carry no branch; events take it from their Waiter Order
+    assert [e["branch_code"] for e in events] == ["B1", "B2"]
+
+
+def test_update_items_status_recomputes_each_order_once(kds):
+    module, fake_frappe, items = kds
+
+    result = module.update_items_status('["WOI-1", "WOI-2", "WOI-4"]', "Ready")
+
+    assert result["success"] is True
+    recomputed = [call.args[0] for call in module.update_parent_order_status.call_args_list]
+    assert recomputed == ["WO-1", "WO-2"]
+    assert fake_frappe.publish_realtime.call_count == 2
+
+
+def test_station_tickets_grouped_and_prioritized(kds):
+    module, fake_frappe, items = kds
+    now = datetime(2024, 1, 1, 20, 0, 0)
+
+    rows = [
+        {"id": "WOI-1", "order_id": "WO-1", "item_code": "SOUP", "item_name": "Soup", "qty": 2,
+         "status": "Cooking", "course": "Starters", "table_number": "T1",
+         "item_time": now - timedelta(minutes=4), "default_preparation_time": 15},
+        {"id": "WOI-2", "order_id": "WO-2", "item_code": "STEAK", "item_name": "Steak", "qty": 1,
+         "status": "Waiting", "course": "Mains", "table_number": "T2",
+         "item_time": now - timedelta(minutes=12), "default_preparation_time": 10},
+        {"id": "WOI-3", "order_id": "WO-1", "item_code": "BURGER", "item_name": "Burger", "qty": 1,
+         "status": "Waiting", "course": "Mains", "table_number": "T1",
+         "item_time": now - timedelta(minutes=3), "default_preparation_time": 15},
+        {"id": "WOI-4", "order_id": "WO-1", "item_code": "SALAD", "item_name": "Salad", "qty": 1,
+         "status": "Waiting", "course": "Starters", "table_number": "T1",
+         "item_time": now - timedelta(minutes=3), "default_preparation_time": 15},
+    ]
+
+    tickets = module.prioritize_tickets(module.group_ticket_items(rows), now)
+
+    assert [ticket["order_id"] for ticket in tickets] == ["WO-2", "WO-1"]
+    assert tickets[0]["sla_status"] == "late"
+    assert tickets[1]["sla_status"] == "on_time"
+    assert tickets[1]["total_qty"] == 4
+    assert [course["course"] for course in tickets[1]["courses"]] == ["Starters", "Mains"]
+    assert [item["id"] for item in tickets[1]["courses"][0]["items"]] == ["WOI-1", "WOI-4"]
@@ -0,0 +1,187 @@
+import importlib
+import importlib.util
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value.encode()
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def batch(monkeypatch):
+    redis = FakeRedis()
+    tables = {
+        "T1": SimpleNamespace(name="T1", current_pos_order=None),
+        "T2": SimpleNamespace(name="T2", current_pos_order="WO-9"),
+    }
+    orders = {"WO-9": SimpleNamespace(name="WO-9", table="T2")}
+
+    def get_doc(doctype, name):
+        return tables[name] if doctype == "Table" else orders[name]
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.local = SimpleNamespace()
+    fake_frappe.session = SimpleNamespace(user="waiter@example.com")
+    fake_frappe.cache = lambda: redis
+    fake_frappe._ = lambda message: message
+    fake_frappe.whitelist = lambda **kwargs: (lambda f: f)
+    fake_frappe.get_roles = lambda user: ["Waiter"]
+    fake_frappe.get_doc = get_doc
+    fake_frappe.log_error = lambda *args, **kwargs: None
+    fake_frappe.get_traceback = lambda: "tb"
+    fake_frappe.db = SimpleNamespace(
+        commit=MagicMock(),
+        rollback=MagicMock(),
+        get_value=lambda doctype, name, field: orders[name].table,
+    )
+    fake_frappe.utils = SimpleNamespace(has_common=lambda a, b: bool(set(a) & set(b)))
+
+    fake_utils = types.ModuleType("frappe.utils")
+    for name in ("now_datetime", "get_url", "cint", "flt", "add_to_date", "format_datetime",
+                 "get_datetime", "time_diff_in_seconds"):
+        setattr(fake_utils, name, None)
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", fake_utils)
+    modules = ("restaurant_management.api.waiter_order", "restaurant_management.utils.idempotency",
+               "restaurant_management.restaurant_management.utils.kitchen_print")
+    for module in modules:
+        monkeypatch.delitem(sys.modules, module, raising=False)
+
+    wo = importlib.import_module("restaurant_management.api.waiter_order")
+    monkeypatch.setattr(importlib.import_module("restaurant_management.utils.idempotency"), "WAIT_SECONDS", 0)
+    monkeypatch.setattr(wo, "get_print_url", lambda order_id, additional=False: {"print_url": None})
+
+    def open_table_order(table, items):
+        table.current_pos_order = "WO-1"
+        orders["WO-1"] = SimpleNamespace(name="WO-1", table=table.name)
+        return orders["WO-1"], len(items)
+
+    monkeypatch.setattr(wo, "open_table_order", open_table_order)
+    monkeypatch.setattr(wo, "append_table_items",
+                        lambda table, items: (orders[table.current_pos_order], len(items)))
+    monkeypatch.setattr(wo, "serve_order_items", lambda order, item_ids, all_ready=False: bool(item_ids))
+    yield wo, fake_frappe, tables
+
+    # Later tests import these modules against their own frappe stub
+    for module in modules:
+        sys.modules.pop(module, None)
+
+
+def test_operations_apply_in_order_with_one_commit_per_table(batch):
+    wo, frappe, tables = batch
+
+    result = wo.sync_order_batch([
+        {"op": "create", "table": "T1", "items": [{"item_code": "A"}], "idempotency_key": "k1"},
+        {"op": "add_items", "table": "T2", "items": [{"item_code": "B"}]},
+        {"op": "add_items", "table": "T1", "items": [{"item_code": "C"}], "idempotency_key": "k2"},
+        {"op": "mark_served", "order_id": "WO-9", "item_ids": ["row-1"]},
+    ])
+
+    assert result["success"] is True
+    assert [r["status"] for r in result["results"]] == ["applied"] * 4
+    assert result["results"][2]["result"]["order_id"] == "WO-1"
+    assert frappe.db.commit.call_count == 2
+
+
+def test_conflict_stops_the_table_and_keeps_the_applied_prefix(batch):
+    wo, frappe, tables = batch
+
+    result = wo.sync_order_batch([
+        {"op": "add_items", "table": "T2", "items": [{"item_code": "B"}]},
+        {"op": "create", "table": "T2", "items": [{"item_code": "A"}]},
+        {"op": "add_items", "table": "T2", "items": [{"item_code": "C"}]},
+    ])
+
+    statuses = [r["status"] for r in result["results"]]
+    assert statuses == ["applied", "conflict", "skipped"]
+    assert result["conflicts"][0]["order_id"] == "WO-9"
+    assert frappe.db.commit.call_count == 1
+    frappe.db.rollback.assert_not_called()
+
+
+def test_synced_keys_replay_and_errors_roll_the_table_back(batch, monkeypatch):
+    wo, frappe, tables = batch
+    create = {"op": "create", "table": "T1", "items": [{"item_code": "A"}], "idempotency_key": "k1"}
+
+    wo.sync_order_batch([create])
+    replay = wo.sync_order_batch([create])
+    assert replay["results"][0]["status"] == "replayed"
+    assert replay["results"][0]["result"]["order_id"] == "WO-1"
+
+    def fail(table, items):
+        raise Exception("Item not found")
+
+    monkeypatch.setattr(wo, "append_table_items", fail)
+    result = wo.sync_order_batch([
+        {"op": "mark_served", "table": "T2", "order_id": "WO-9", "item_ids": ["row-1"], "idempotency_key": "k3"},
+        {"op": "add_items", "table": "T2", "items": [{"item_code": "B"}]},
+    ])
+
+    assert [r["status"] for r in result["results"]] == ["skipped", "error"]
+    frappe.db.rollback.assert_called_once()
+    # The rolled back operation can be synced again with the same key
+    assert not any(key.endswith(":k3") for key in frappe.cache().store)
+
+
+def test_served_items_synced_offline_replay_on_the_endpoint(batch, monkeypatch):
+    wo, frappe, tables = batch
+    serve = MagicMock(return_value=True)
+    monkeypatch.setattr(wo, "serve_order_items", serve)
+
+    wo.sync_order_batch([{"op": "mark_served", "order_id": "WO-9", "item_ids": ["row-1"], "idempotency_key": "k4"}])
+    result = wo.mark_items_as_served("WO-9", ["row-1"], idempotency_key="k4")
+
+    # The tablet retried online after syncing: the items are not served twice
+    assert result["success"] is True and result.get("idempotent_replay")
+    assert serve.call_count == 1
+
+
+def test_serving_items_logs_the_delivered_transition(batch, monkeypatch):
+    wo, frappe, tables = batch
+    # Fresh copy of the module: the fixture replaced serve_order_items
+    spec = importlib.util.find_spec("restaurant_management.api.waiter_order")
+    real = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(real)
+    monkeypatch.setattr(real, "now_datetime", lambda: "20:00")
+
+    analytics = types.ModuleType("restaurant_management.restaurant_management.utils.kitchen_analytics")
+    analytics.record_item_events = MagicMock()
+    monkeypatch.setitem(sys.modules, analytics.__name__, analytics)
+
+    items = [
+        SimpleNamespace(name=f"row-{i}", status=status, kitchen_station="Grill", creation="19:00", last_update_time="19:30")
+        for i, status in enumerate(["Ready", "Cooking", "Ready"])
+    ]
+    order = SimpleNamespace(name="WO-9", branch_code="JKT", items=items, save=MagicMock())
+
+    assert real.serve_order_items(order, ["row-0", "row-1"]) is True
+
+    (events, to_status), kwargs = analytics.record_item_events.call_args
+    assert to_status == "Delivered" and kwargs == {"event_time": "20:00"}
+    assert events == [{
+        "name": "row-0", "parent": "WO-9", "status": "Ready", "kitchen_station": "Grill",
+        "branch_code": "JKT", "creation": "19:00", "last_update_time": "19:30"
+    }]
+    assert [item.status for item in items] == ["Delivered", "Cooking", "Ready"]
@@ -28,11 +28,15 @@ def stub_frappe(monkeypatch):
         log_error=lambda *args, **kwargs: None,
         get_traceback=lambda: "tb",
         whitelist=lambda **kwargs: (lambda f: f),
+        local=SimpleNamespace(),
     )
 
     # expose stub modules
     sys.modules['frappe'] = frappe_stub
-    sys.modules['frappe.utils'] = SimpleNamespace(now_datetime=lambda: "now", get_url=lambda x: "url", cint=int, flt=float)
+    sys.modules['frappe.utils'] = SimpleNamespace(
+        now_datetime=lambda: "now", get_url=lambda x: "url", cint=int, flt=float,
+        add_to_date=None, format_datetime=None, get_datetime=None, time_diff_in_seconds=None,
+    )
 
     yield frappe_stub
 
@@ -4,6 +4,18 @@ from frappe.utils import now_datetime, get_url, cint, flt
 from typing import Dict, List, Any, Optional, Union
 import json
 
+from restaurant_management.restaurant_management.utils import table_moves
+from restaurant_management.restaurant_management.utils.kitchen_print import queue_kitchen_tickets
+from restaurant_management.utils.availability import get_availability, reserve_items
+from restaurant_management.utils.idempotency import (
+    claim_key,
+    get_idempotency_key,
+    get_ledger_key,
+    get_recorded_result,
+    record_result,
+    release_key,
+    run_idempotent,
+)
 from restaurant_management.order_status import (
     VALID_STATUS_TRANSITIONS,
     is_valid_status_transition,
@@ -11,6 +23,8 @@ from restaurant_management.order_status import (
 from restaurant_management.utils.variant import (
     get_item_variant_attributes as _get_item_variant_attributes,
     resolve_item_variant as _resolve_item_variant,
+    resolve_item_variants as _resolve_item_variants,
+    get_variant_catalogue as _get_variant_catalogue,
 )
 
 # REST API methods
@@ -30,10 +44,17 @@ def create_order(**kwargs):
         }
       ]
     - existing_order: Order ID to update (optional)
+    - idempotency_key: Client key of this submission; retries with the same
+      key return the first result (optional, or Idempotency-Key header)
     
     Returns:
         Dict with success status and order details
     """
+    return run_idempotent("create_order", kwargs.pop("idempotency_key", None), lambda: _create_order(**kwargs))
+
+
+def _create_order(**kwargs):
+    """Create or update the waiter order of a create_order request"""
     # Validate permissions
     if not frappe.has_permission("Waiter Order", "write"):
         frappe.throw(_("Not permitted"), frappe.PermissionError)
@@ -82,10 +103,13 @@ def create_order(**kwargs):
                     data.existing_order, data.table))
             
             # Add new items to existing order
-            add_items_to_order(waiter_order, data.items)
+            added_items = add_items_to_order(waiter_order, data.items)
             
             # Save the updated order
             waiter_order.save()
+            if waiter_order.docstatus == 1:
+                # Already in the kitchen: print the additions
+                queue_kitchen_tickets(waiter_order, added_items, table.table_number, additional=True)
             frappe.db.commit()
             
             return {
@@ -99,6 +123,7 @@ def create_order(**kwargs):
             waiter_order = frappe.new_doc("Waiter Order")
             waiter_order.table = table.name
             waiter_order.branch = table.branch
+            waiter_order.branch_code = table.branch_code
             waiter_order.status = "Draft"
             waiter_order.order_time = now_datetime()
             
@@ -112,7 +137,7 @@ def create_order(**kwargs):
             waiter_order.ordered_by = frappe.session.user
             
             # Add items to the order
-            add_items_to_order(waiter_order, data.items)
+            added_items = add_items_to_order(waiter_order, data.items)
 
             try:
                 # Save the new order
@@ -122,6 +147,7 @@ def create_order(**kwargs):
                 if data.get("auto_submit"):
                     waiter_order.status = "Confirmed"
                     waiter_order.submit()
+                    queue_kitchen_tickets(waiter_order, added_items, table.table_number)
 
                 # Update table status
                 set_table_status(table.name, waiter_order.name)
@@ -374,7 +400,17 @@ def add_items_to_order(order_doc, items_list):
     Args:
         order_doc: Waiter Order document
         items_list: List of items to add
+        
+    Returns:
+        The Waiter Order Item rows that were added
     """
+    # Refuse 86'd items and take countdown portions before anything is added
+    reserve_items(
+        order_doc.get("branch_code"),
+        [(item.get("item_code"), item.get("qty", 1)) for item in items_list if item.get("item_code")]
+    )
+
+    added = []
     for item_data in items_list:
         # Skip if item_code is missing
         if not item_data.get("item_code"):
@@ -426,9 +462,13 @@ def add_items_to_order(order_doc, items_list):
         kitchen_station = get_kitchen_station_for_item(item_data.get("item_code"))
         if kitchen_station:
             item.kitchen_station = kitchen_station
+        
+        added.append(item)
     
     # Calculate totals
     calculate_order_totals(order_doc)
+    
+    return added
 
 
 def calculate_order_totals(order_doc):
@@ -551,8 +591,15 @@ def get_available_tables(branch=None, available_only=False):
 
 
 @frappe.whitelist()
-def get_menu_items():
-    """Get list of menu items for waiter order screen."""
+def get_menu_items(branch_code=None, branch=None):
+    """
+    Get list of menu items for waiter order screen.
+    
+    Args:
+        branch_code: Branch whose 86 list marks items as sold out; the
+            waiter page sends its selected branch code as ``branch``
+    """
+    branch_code = branch_code or branch
     try:
         # Get all sellable items
         items = frappe.get_all(
@@ -602,6 +649,12 @@ def get_menu_items():
 
                 item.kitchen_station = kitchen_station_result[0][0] if kitchen_station_result else None
         
+        availability = get_availability(branch_code)
+        sold_out = set(availability["sold_out"])
+        for item in items:
+            item.sold_out = item.item_code in sold_out
+            item.remaining_qty = availability["countdown"].get(item.item_code)
+        
         return items
     
     except Exception as e:
@@ -628,6 +681,12 @@ def get_item_variant_attributes(template_item_code=None, item_code=None):
     return _get_item_variant_attributes(template_item_code, item_code)
 
 
+@frappe.whitelist()
+def get_variant_catalogue(branch_code=None, version=None):
+    """API wrapper for the versioned variant catalogue used by the ordering UI"""
+    return _get_variant_catalogue(branch_code, version)
+
+
 @frappe.whitelist()
 def resolve_item_variant(template_item_code, attributes):
     """API wrapper to resolve variant and include pricing"""
@@ -642,7 +701,51 @@ def resolve_item_variant(template_item_code, attributes):
 
 
 @frappe.whitelist()
-def send_order_to_kitchen(order_data):
+def resolve_item_variants(selections):
+    """API wrapper to resolve all variant selections of an order in one call
+
+    Args:
+        selections: List (or JSON list) of {"template_item_code", "attributes"}
+
+    Returns:
+        List of {"item_code", "item_name", "standard_rate"} in input order,
+        or None for selections without a matching variant
+    """
+    rates = {}
+    results = []
+    for variant in _resolve_item_variants(selections):
+        if not variant:
+            results.append(None)
+            continue
+
+        item_code = getattr(variant, "item_code", None) or variant.get("item_code")
+        item_name = getattr(variant, "item_name", None) or variant.get("item_name")
+        if item_code not in rates:
+            rates[item_code] = get_item_rate(item_code)
+
+        results.append({
+            "item_code": item_code,
+            "item_name": item_name,
+            "standard_rate": rates[item_code],
+        })
+
+    return results
+
+
+@frappe.whitelist()
+def send_order_to_kitchen(order_data, idempotency_key=None):
+    """
+    Create a new order and send it to the kitchen
+    
+    Args:
+        order_data: Dict (or JSON) with table and items
+        idempotency_key: Client key of this submission; retries with the same
+            key return the first result (or Idempotency-Key header)
+    """
+    return run_idempotent("send_order_to_kitchen", idempotency_key, lambda: _send_order_to_kitchen(order_data))
+
+
+def _send_order_to_kitchen(order_data):
     """Create a new order"""
     user = frappe.session.user
     if user == "Guest" or not frappe.utils.has_common(["Waiter", "Restaurant Staff"], frappe.get_roles(user)):
@@ -662,23 +765,8 @@ def send_order_to_kitchen(order_data):
     table = frappe.get_doc("Table", order_data.get("table"))
     
     try:
-        # Create new order
-        waiter_order = frappe.new_doc("Waiter Order")
-        waiter_order.table = table.name
-        waiter_order.branch = table.branch
-        waiter_order.branch_code = table.branch_code
-        waiter_order.status = "Confirmed"  # Start with Confirmed status
-        waiter_order.ordered_by = frappe.session.user
-        waiter_order.order_time = now_datetime()
-
-        # Add items
-        add_items_to_order(waiter_order, order_data.get("items"))
-        calculate_order_totals(waiter_order)
-
         try:
-            waiter_order.insert()
-            waiter_order.submit()
-            set_table_status(table.name, waiter_order.name)
+            waiter_order, print_jobs = open_table_order(table, order_data.get("items"))
             frappe.db.commit()
         except Exception:
             frappe.db.rollback()
@@ -690,7 +778,8 @@ def send_order_to_kitchen(order_data):
         return {
             "success": True, 
             "order_id": waiter_order.name,
-            "print_url": print_url
+            "print_url": print_url,
+            "print_jobs": print_jobs
         }
     
     except Exception as e:
@@ -699,7 +788,19 @@ def send_order_to_kitchen(order_data):
 
 
 @frappe.whitelist()
-def send_additional_items(order_data):
+def send_additional_items(order_data, idempotency_key=None):
+    """
+    Send additional items to the active order of a table
+    
+    Args:
+        order_data: Dict (or JSON) with table and items
+        idempotency_key: Client key of this submission; retries with the same
+            key return the first result (or Idempotency-Key header)
+    """
+    return run_idempotent("send_additional_items", idempotency_key, lambda: _send_additional_items(order_data))
+
+
+def _send_additional_items(order_data):
     """Send additional items to an existing order"""
     user = frappe.session.user
     if user == "Guest" or not frappe.utils.has_common(["Waiter", "Restaurant Staff"], frappe.get_roles(user)):
@@ -722,14 +823,7 @@ def send_additional_items(order_data):
         if not table.current_pos_order:
             return {"success": False, "error": _("No active order found for this table")}
         
-        # Get existing order
-        waiter_order = frappe.get_doc("Waiter Order", table.current_pos_order)
-
-        # Add new items
-        add_items_to_order(waiter_order, order_data.get("items"))
-        calculate_order_totals(waiter_order)
-
-        waiter_order.save()
+        waiter_order, print_jobs = append_table_items(table, order_data.get("items"))
         frappe.db.commit()
         
         # Generate print format URL for additional items only
@@ -737,14 +831,105 @@ def send_additional_items(order_data):
         
         return {
             "success": True,
-            "print_url": print_url
+            "print_url": print_url,
+            "print_jobs": print_jobs
         }
     
     except Exception as e:
+        frappe.db.rollback()
         frappe.log_error(frappe.get_traceback(), _("Error adding items to waiter order"))
         return {"success": False, "error": str(e)}
 
 
+def open_table_order(table, items):
+    """
+    Create, submit and route a new order for a table, without committing
+    
+    Args:
+        table: Table document
+        items: Items to order
+        
+    Returns:
+        Tuple of the Waiter Order and the number of kitchen tickets queued
+    """
+    waiter_order = frappe.new_doc("Waiter Order")
+    waiter_order.table = table.name
+    waiter_order.branch = table.branch
+    waiter_order.branch_code = table.branch_code
+    waiter_order.status = "Confirmed"  # Start with Confirmed status
+    waiter_order.ordered_by = frappe.session.user
+    waiter_order.order_time = now_datetime()
+
+    # Add items
+    added_items = add_items_to_order(waiter_order, items)
+    calculate_order_totals(waiter_order)
+
+    waiter_order.insert()
+    waiter_order.submit()
+    set_table_status(table.name, waiter_order.name)
+    # Kitchen tickets are printed by the spooler after commit
+    print_jobs = queue_kitchen_tickets(waiter_order, added_items, table.table_number)
+    return waiter_order, print_jobs
+
+
+def append_table_items(table, items):
+    """
+    Add items to the active order of a table and route them, without committing
+    
+    Args:
+        table: Table document with an active order
+        items: Items to add
+        
+    Returns:
+        Tuple of the Waiter Order and the number of kitchen tickets queued
+    """
+    waiter_order = frappe.get_doc("Waiter Order", table.current_pos_order)
+
+    added_items = add_items_to_order(waiter_order, items)
+    calculate_order_totals(waiter_order)
+
+    waiter_order.save()
+    print_jobs = queue_kitchen_tickets(waiter_order, added_items, table.table_number, additional=True)
+    return waiter_order, print_jobs
+
+
+def serve_order_items(waiter_order, item_ids, all_ready=False):
+    """
+    Mark Ready items of an order as Delivered and save it, without committing
+    
+    The transitions are logged as Kitchen Item Events in the same transaction.
+    
+    Returns:
+        True if any item was updated
+    """
+    from restaurant_management.restaurant_management.utils.kitchen_analytics import record_item_events
+
+    now = now_datetime()
+    served = []
+    for item in waiter_order.items:
+        # If all_ready is true, mark all ready items as served,
+        # otherwise only the specific items
+        if item.status == "Ready" and (all_ready or item.name in item_ids):
+            # State before the change, for the event log
+            served.append({
+                "name": item.name,
+                "parent": waiter_order.name,
+                "status": item.status,
+                "kitchen_station": item.kitchen_station,
+                "branch_code": waiter_order.branch_code,
+                "creation": item.creation,
+                "last_update_time": item.last_update_time
+            })
+            item.status = "Delivered"
+            item.last_update_by = frappe.session.user
+            item.last_update_time = now
+    
+    if served:
+        waiter_order.save()
+        record_item_events(served, "Delivered", event_time=now)
+    return bool(served)
+
+
 @frappe.whitelist()
 def cancel_order(table):
     """Cancel an active order for a table"""
@@ -788,8 +973,101 @@ def cancel_order(table):
         return {"success": False, "error": str(e)}
 
 
+@frappe.whitelist(methods=["POST"])
+def transfer_order(order_id, table):
+    """
+    Move an active order to another, free table
+    
+    Args:
+        order_id: Waiter Order to move
+        table: Table the party moves to
+        
+    Returns:
+        Dict with success status and the changed orders and tables
+    """
+    return _move_table_order(
+        _("Error transferring order"),
+        lambda: table_moves.transfer_order(order_id, table)
+    )
+
+
+@frappe.whitelist(methods=["POST"])
+def merge_orders(source_order, target_order, release_source_table=True):
+    """
+    Merge the items of one active order into another
+    
+    Args:
+        source_order: Order whose items move; it is closed afterwards
+        target_order: Order receiving the items
+        release_source_table: Free the source table (default) or keep it
+            occupied by the merged order when tables are pushed together
+        
+    Returns:
+        Dict with success status and the changed orders and tables
+    """
+    return _move_table_order(
+        _("Error merging orders"),
+        lambda: table_moves.merge_orders(source_order, target_order, cint(release_source_table))
+    )
+
+
+@frappe.whitelist(methods=["POST"])
+def split_order(order_id, item_ids, table):
+    """
+    Move some items of an active order to another table
+    
+    Args:
+        order_id: Order the items are taken from
+        item_ids: List (or JSON) of Waiter Order Item names to move
+        table: Table the items move to; joins its active order or opens a new one
+        
+    Returns:
+        Dict with success status, the changed orders and tables and the
+        order_id now holding the items
+    """
+    if isinstance(item_ids, str):
+        item_ids = json.loads(item_ids)
+
+    return _move_table_order(
+        _("Error splitting order"),
+        lambda: table_moves.split_order(order_id, item_ids, table)
+    )
+
+
+def _move_table_order(error_title, move):
+    """Run a table move in one transaction and commit it"""
+    user = frappe.session.user
+    if user == "Guest" or not frappe.utils.has_common(["Waiter", "Restaurant Staff"], frappe.get_roles(user)):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    try:
+        result = move()
+        frappe.db.commit()
+        return {"success": True, **result}
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), error_title)
+        return {"success": False, "error": str(e)}
+
+
 @frappe.whitelist()
-def mark_items_as_served(order_id, item_ids, all_ready=False):
+def mark_items_as_served(order_id, item_ids, all_ready=False, idempotency_key=None):
+    """
+    Mark items as served
+    
+    Args:
+        order_id: Waiter Order the items belong to
+        item_ids: List (or JSON) of Waiter Order Item names
+        all_ready: Serve every Ready item of the order instead
+        idempotency_key: Client key of this submission; retries with the same
+            key return the first result (or Idempotency-Key header)
+    """
+    return run_idempotent(
+        "mark_items_as_served", idempotency_key, lambda: _mark_items_as_served(order_id, item_ids, all_ready)
+    )
+
+
+def _mark_items_as_served(order_id, item_ids, all_ready=False):
     """Mark items as served"""
     user = frappe.session.user
     if user == "Guest" or not frappe.utils.has_common(["Waiter", "Restaurant Staff"], frappe.get_roles(user)):
@@ -804,25 +1082,7 @@ def mark_items_as_served(order_id, item_ids, all_ready=False):
     try:
         waiter_order = frappe.get_doc("Waiter Order", order_id)
         
-        # Track if any items were updated
-        updated = False
-        
-        for item in waiter_order.items:
-            # If all_ready is true, mark all ready items as served
-            if all_ready and item.status == "Ready":
-                item.status = "Delivered"
-                item.last_update_by = frappe.session.user
-                item.last_update_time = now_datetime()
-                updated = True
-            # Otherwise only mark specific items
-            elif item.name in item_ids and item.status == "Ready":
-                item.status = "Delivered"
-                item.last_update_by = frappe.session.user
-                item.last_update_time = now_datetime()
-                updated = True
-        
-        if updated:
-            waiter_order.save()
+        if serve_order_items(waiter_order, item_ids, all_ready):
             frappe.db.commit()
             return {"success": True}
         else:
@@ -833,6 +1093,218 @@ def mark_items_as_served(order_id, item_ids, all_ready=False):
         return {"success": False, "error": str(e)}
 
 
+# Batch operation -> idempotency scope, shared with the endpoint doing the same
+# work so a key already used with that endpoint replays here and vice versa
+SYNC_OPERATION_SCOPES = {
+    "create": "send_order_to_kitchen",
+    "add_items": "send_additional_items",
+    "mark_served": "mark_items_as_served",
+}
+
+
+@frappe.whitelist(methods=["POST"])
+def sync_order_batch(operations):
+    """
+    Apply a log of order operations queued by a waiter tablet while offline
+    
+    Operations run in their original order, grouped by table; each table's
+    operations share one transaction. A table stops at its first conflict or
+    error: the operations before it are committed and the rest are reported
+    as skipped so the tablet can resolve them and sync again.
+    
+    Args:
+        operations: List (or JSON) of operations, each a dict with
+            - op: "create", "add_items" or "mark_served"
+            - table: Table name (for mark_served, defaults to the order's table)
+            - items: Items to order (create, add_items)
+            - order_id: Order the operation was queued against (optional for
+              add_items, required for mark_served)
+            - item_ids / all_ready: Items to mark served (mark_served)
+            - idempotency_key: Client key of the operation
+        
+    Returns:
+        Dict with one result per operation (in input order) and the conflicts
+    """
+    user = frappe.session.user
+    if user == "Guest" or not frappe.utils.has_common(["Waiter", "Restaurant Staff"], frappe.get_roles(user)):
+        frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+    if isinstance(operations, str):
+        operations = json.loads(operations)
+
+    if not operations or not isinstance(operations, list):
+        return {"success": False, "error": _("At least one operation is required")}
+
+    results = [None] * len(operations)
+    by_table = {}
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in SYNC_OPERATION_SCOPES:
+            results[index] = {"index": index, "status": "error", "error": _("Unknown operation")}
+            continue
+
+        table = operation.get("table")
+        if not table and operation.get("order_id"):
+            table = frappe.db.get_value("Waiter Order", operation.get("order_id"), "table")
+        if not table:
+            results[index] = {"index": index, "status": "error", "error": _("Table is required")}
+            continue
+
+        by_table.setdefault(table, []).append((index, operation))
+
+    for table_name, table_operations in by_table.items():
+        for index, result in sync_table_operations(table_name, table_operations):
+            results[index] = result
+
+    conflicts = [result for result in results if result["status"] in ("conflict", "error")]
+    return {
+        "success": not conflicts,
+        "results": results,
+        "conflicts": conflicts
+    }
+
+
+def sync_table_operations(table_name, operations):
+    """
+    Apply the queued operations of one table in one transaction
+    
+    Args:
+        table_name: Table the operations belong to
+        operations: List of (index, operation) in client order
+        
+    Returns:
+        List of (index, result)
+    """
+    results = []
+    applied = []  # (index, ledger_key, result) to record once committed
+    stopped = None
+
+    for index, operation in operations:
+        if stopped:
+            results.append((index, {
+                "index": index,
+                "status": "skipped",
+                "error": _("Skipped after operation {0} failed").format(stopped)
+            }))
+            continue
+
+        ledger_key = None
+        key = get_idempotency_key(operation.get("idempotency_key"))
+        if key:
+            ledger_key = get_ledger_key(SYNC_OPERATION_SCOPES[operation["op"]], key)
+            if not claim_key(ledger_key):
+                recorded = get_recorded_result(ledger_key)
+                if recorded.get("success") is False:
+                    # The first attempt is still running or failed meanwhile
+                    stopped = index
+                    results.append((index, {"index": index, "status": "conflict", "error": recorded.get("error")}))
+                else:
+                    results.append((index, {"index": index, "status": "replayed", "result": recorded}))
+                continue
+
+        try:
+            result = apply_sync_operation(table_name, operation)
+        except Exception as e:
+            # Partial writes of the failed operation cannot be kept apart from
+            # the ones before it: drop the table's whole transaction
+            frappe.db.rollback()
+            frappe.log_error(frappe.get_traceback(), _("Error syncing waiter orders"))
+            for _index, claimed_key, _result in applied:
+                release_key(claimed_key)
+            if ledger_key:
+                release_key(ledger_key)
+
+            failed = [{"index": index, "status": "error", "error": str(e)}]
+            failed += [
+                {"index": i, "status": "skipped", "error": _("Rolled back after operation {0} failed").format(index)}
+                for i, _op in operations if i != index
+            ]
+            return [(row["index"], row) for row in failed]
+
+        if result.get("success"):
+            applied.append((index, ledger_key, result))
+            results.append((index, {"index": index, "status": "applied", "result": result}))
+        else:
+            # Conflicts are detected before anything is written
+            if ledger_key:
+                release_key(ledger_key)
+            stopped = index
+            results.append((index, {
+                "index": index,
+                "status": "conflict",
+                "error": result.get("error"),
+                "order_id": result.get("order_id")
+            }))
+
+    if applied:
+        frappe.db.commit()
+        for _index, ledger_key, result in applied:
+            if ledger_key:
+                record_result(ledger_key, result)
+
+    return results
+
+
+def apply_sync_operation(table_name, operation):
+    """
+    Apply one queued operation without committing
+    
+    Returns:
+        Dict with success status; success False marks a conflict with the
+        current state of the table, in which case nothing was written
+    """
+    op = operation.get("op")
+    items = operation.get("items")
+    table = frappe.get_doc("Table", table_name)
+
+    if op in ("create", "add_items") and (not items or not isinstance(items, list)):
+        return {"success": False, "error": _("At least one item is required")}
+
+    if op == "create":
+        if table.current_pos_order:
+            return {
+                "success": False,
+                "error": _("Table already has an active order"),
+                "order_id": table.current_pos_order
+            }
+        waiter_order, print_jobs = open_table_order(table, items)
+        return {
+            "success": True,
+            "order_id": waiter_order.name,
+            "print_url": get_print_url(waiter_order.name),
+            "print_jobs": print_jobs
+        }
+
+    if op == "add_items":
+        if not table.current_pos_order:
+            return {"success": False, "error": _("No active order found for this table")}
+        if operation.get("order_id") and operation.get("order_id") != table.current_pos_order:
+            return {
+                "success": False,
+                "error": _("The order of this table has changed"),
+                "order_id": table.current_pos_order
+            }
+        waiter_order, print_jobs = append_table_items(table, items)
+        return {
+            "success": True,
+            "order_id": waiter_order.name,
+            "print_url": get_print_url(waiter_order.name, additional=True),
+            "print_jobs": print_jobs
+        }
+
+    order_id = operation.get("order_id")
+    if not order_id:
+        return {"success": False, "error": _("Order ID is required")}
+
+    waiter_order = frappe.get_doc("Waiter Order", order_id)
+    if waiter_order.table != table_name:
+        return {"success": False, "error": _("Order {0} does not belong to this table").format(order_id)}
+
+    item_ids = operation.get("item_ids") or []
+    if not serve_order_items(waiter_order, item_ids, operation.get("all_ready")):
+        return {"success": False, "error": _("No items were updated"), "order_id": order_id}
+    return {"success": True, "order_id": order_id}
+
+
 @frappe.whitelist()
 def get_print_url(order_id, additional=False):
     """Get URL for printing order"""
@@ -0,0 +1,157 @@
+import frappe
+from frappe import _
+from frappe.utils import cint, now_datetime
+from typing import Any, Dict, List, Optional
+
+from restaurant_management.api.reservations import check_reservation_permission
+from restaurant_management.restaurant_management.utils.waitlist import (
+    WAITLIST_DOCTYPE,
+    estimate_waits,
+    get_waiting_party_sizes,
+)
+
+WAITLIST_STATUSES = ("Waiting", "Seated", "Left", "Cancelled")
+
+@frappe.whitelist()
+def get_wait_quote(branch: str, party_size: int) -> Dict[str, Any]:
+    """
+    Quote the wait for a party joining the end of the waitlist
+
+    Estimated from the branch's in-memory seated-time model and the tables'
+    live seated durations; no order history is read.
+
+    Args:
+        branch: Branch the party waits in
+        party_size: Number of guests
+
+    Returns:
+        Dict with success status and the ``quote`` (wait_minutes,
+        ready_time, tables), or None if no table or combination seats the party
+    """
+    check_reservation_permission()
+
+    if not branch or cint(party_size) < 1:
+        return {"success": False, "error": _("Branch and a party size of at least 1 are required")}
+
+    try:
+        queue = get_waiting_party_sizes(branch)
+        quote = estimate_waits(branch, queue + [cint(party_size)])[-1]
+        return {"success": True, "quote": quote, "parties_ahead": len(queue)}
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), _("Error quoting wait"))
+        return {"success": False, "error": str(e)}
+
+@frappe.whitelist(methods=["POST"])
+def add_to_waitlist(
+    branch: str,
+    guest_name: str,
+    party_size: int,
+    contact_number: Optional[str] = None,
+    notes: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Put a walk-in party on the waitlist with a quoted wait
+
+    Args:
+        branch: Branch the party waits in
+        guest_name: Name to call the party by
+        party_size: Number of guests
+        contact_number: Guest's phone number
+        notes: Free-text notes
+
+    Returns:
+        Dict with success status, the entry name and the quoted wait in minutes
+    """
+    check_reservation_permission()
+
+    try:
+        joined_at = now_datetime()
+        queue = get_waiting_party_sizes(branch)
+        quote = estimate_waits(branch, queue + [cint(party_size)])[-1]
+
+        entry = frappe.get_doc({
+            "doctype": WAITLIST_DOCTYPE,
+            "branch": branch,
+            "guest_name": guest_name,
+            "contact_number": contact_number,
+            "party_size": cint(party_size),
+            "joined_at": joined_at,
+            "quoted_wait_minutes": quote["wait_minutes"] if quote else None,
+            "quoted_time": quote["ready_time"] if quote else None,
+            "notes": notes
+        })
+        entry.insert()
+        frappe.db.commit()
+
+        return {
+            "success": True,
+            "entry": entry.name,
+            "quoted_wait_minutes": entry.quoted_wait_minutes,
+            "quote": quote
+        }
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), _("Error adding to waitlist"))
+        return {"success": False, "error": str(e)}
+
+@frappe.whitelist()
+def get_waitlist(branch: str) -> List[Dict[str, Any]]:
+    """
+    Get a branch's waiting parties with live wait estimates
+
+    Args:
+        branch: Branch to list
+
+    Returns:
+        Waiting entries in queue order, each with its current ``estimate``
+    """
+    check_reservation_permission()
+
+    entries = frappe.get_all(
+        WAITLIST_DOCTYPE,
+        filters={"branch": branch, "status": "Waiting"},
+        fields=[
+            "name", "guest_name", "contact_number", "party_size", "joined_at",
+            "quoted_wait_minutes", "quoted_time", "notes"
+        ],
+        order_by="joined_at asc",
+        limit_page_length=0
+    )
+    if not entries:
+        return []
+
+    estimates = estimate_waits(branch, [entry.party_size for entry in entries])
+    for entry, estimate in zip(entries, estimates):
+        entry["estimate"] = estimate
+    return entries
+
+@frappe.whitelist(methods=["POST"])
+def update_waitlist_entry(entry: str, status: str, table: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Seat a waiting party or take it off the list
+
+    Args:
+        entry: Waitlist Entry name
+        status: New status
+        table: Table the party was seated at
+
+    Returns:
+        Dict with success status and the entry's new status
+    """
+    check_reservation_permission()
+
+    if status not in WAITLIST_STATUSES:
+        return {"success": False, "error": _("Invalid status {0}").format(status)}
+
+    try:
+        doc = frappe.get_doc(WAITLIST_DOCTYPE, entry)
+        doc.status = status
+        if table:
+            doc.table = table
+        doc.save()
+        frappe.db.commit()
+        return {"success": True, "status": doc.status, "seated_at": doc.seated_at}
+    except Exception as e:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), _("Error updating waitlist entry"))
+        return {"success": False, "error": str(e)}
@@ -1 +1,5 @@
 # Commands module
+from restaurant_management.commands.create_demo_data import commands as demo_data_commands
+from restaurant_management.commands.benchmark import commands as benchmark_commands
+
+commands = demo_data_commands + benchmark_commands
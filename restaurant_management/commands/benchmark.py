@@ -0,0 +1,48 @@
+import json
+
+import click
+import frappe
+from frappe.commands import pass_context
+
+@click.command('restaurant-load-test')
+@click.option('--branches', default=2, help='Branches to seed')
+@click.option('--tables', default=20, help='Tables per branch')
+@click.option('--items', default=30, help='Menu items to seed')
+@click.option('--duration', default=60, help='Length of the simulated service in seconds')
+@click.option('--waiters', default=4, help='Concurrent waiters placing orders')
+@click.option('--kds', default=2, help='Concurrent KDS screens')
+@click.option('--displays', default=2, help='Concurrent table displays')
+@click.option('--cashiers', default=1, help='Concurrent cashiers submitting invoices')
+@click.option('--output', default=None, help='Also write the report as JSON to this file')
+@pass_context
+def restaurant_load_test(context, branches, tables, items, duration, waiters, kds, displays, cashiers, output):
+    """Seed a restaurant and replay a concurrent service, reporting latency per endpoint"""
+    site = context.sites[0] if context.sites else frappe.utils.get_site_name(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        from restaurant_management.setup.service_benchmark import format_report, run_service, seed_load_test_data
+
+        click.echo(f'Seeding {branches} branches x {tables} tables x {items} items...')
+        seed = seed_load_test_data(branches=branches, tables=tables, items=items)
+    except Exception as e:
+        click.secho(f'Error seeding load test data: {str(e)}', fg='red')
+        return
+    finally:
+        frappe.destroy()
+
+    click.echo(f'Running service for {duration}s...')
+    result = run_service(
+        site, seed, duration=duration, waiters=waiters,
+        kds_screens=kds, table_displays=displays, cashiers=cashiers
+    )
+
+    click.echo(format_report(result["rows"]))
+    if output:
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+        click.secho(f'Report written to {output}', fg='green')
+
+commands = [
+    restaurant_load_test
+]
@@ -52,14 +52,71 @@ doc_events = {
         "on_cancel": "restaurant_management.restaurant_management.overrides.payment_entry.revert_restaurant_status"
     },
     "Waiter Order": {
-        "on_update": "restaurant_management.restaurant_management.doctype.waiter_order.waiter_order.update_table_status"
+        "on_update": [
+            "restaurant_management.restaurant_management.doctype.waiter_order.waiter_order.update_table_status",
+            "restaurant_management.api.kds_display.clear_station_tickets_cache"
+        ],
+        "on_submit": "restaurant_management.api.kds_display.clear_station_tickets_cache",
+        "on_cancel": "restaurant_management.api.kds_display.clear_station_tickets_cache",
+        "on_trash": "restaurant_management.api.kds_display.clear_station_tickets_cache"
+    },
+    "Kitchen Station": {
+        "on_update": [
+            "restaurant_management.api.kds_display.clear_station_tickets_cache",
+            "restaurant_management.utils.variant.bump_variant_catalogue_version",
+            "restaurant_management.utils.display_config.bump_display_config_version"
+        ],
+        "on_trash": "restaurant_management.utils.display_config.bump_display_config_version"
+    },
+    "Table": {
+        "after_insert": "restaurant_management.utils.display_config.bump_display_config_version",
+        "on_trash": "restaurant_management.utils.display_config.bump_display_config_version"
+    },
+    "Item Group": {
+        "on_update": "restaurant_management.utils.display_config.bump_display_config_version",
+        "on_trash": "restaurant_management.utils.display_config.bump_display_config_version"
+    },
+    "KDS Settings": {
+        "on_update": "restaurant_management.utils.display_config.bump_display_config_version"
+    },
+    "Item Attribute": {
+        "on_update": "restaurant_management.utils.variant.bump_variant_catalogue_version",
+        "on_trash": "restaurant_management.utils.variant.bump_variant_catalogue_version"
     },
     "Branch": {
         "after_insert": "restaurant_management.restaurant_management.doc_events.branch.after_insert",
-        "on_update": "restaurant_management.restaurant_management.doc_events.branch.on_update"
+        "on_update": [
+            "restaurant_management.restaurant_management.doc_events.branch.on_update",
+            "restaurant_management.utils.display_config.bump_display_config_version"
+        ],
+        "on_trash": "restaurant_management.utils.display_config.bump_display_config_version"
     }
 }
 
+# Scheduled Tasks
+scheduler_events = {
+    "cron": {
+        # Fold new kitchen status events into per-station hourly stats
+        "*/5 * * * *": [
+            "restaurant_management.restaurant_management.utils.kitchen_analytics.aggregate_station_stats",
+            # Fold newly paid orders into per-table seated-time stats for waitlist quotes
+            "restaurant_management.restaurant_management.utils.table_turnover.aggregate_table_turnover"
+        ],
+        # Re-enqueue Sales Order jobs that failed or were lost
+        "* * * * *": [
+            "restaurant_management.restaurant_management.utils.sales_order_jobs.retry_pending_sales_orders",
+            # Retry failed kitchen tickets and restart stalled printer spoolers
+            "restaurant_management.restaurant_management.utils.kitchen_print.retry_print_jobs"
+        ]
+    },
+    "daily_long": [
+        # Issue yesterday's recipe ingredients, one Stock Entry per branch
+        "restaurant_management.restaurant_management.utils.ingredient_depletion.deplete_ingredients",
+        # Move old Paid/Cancelled Waiter Orders out of the live tables
+        "restaurant_management.restaurant_management.utils.archive.archive_waiter_orders"
+    ]
+}
+
 # Fixtures - include all documents defined under fixtures
 fixtures = [
     {"dt": "Custom Field", "filters": [["module", "=", "Restaurant Management"]]},
@@ -73,10 +130,21 @@ fixtures = [
     "Item",
 ]
 
+# Request instrumentation for restaurant API methods
+before_request = ["restaurant_management.utils.perf.start_request"]
+after_request = ["restaurant_management.utils.perf.finish_request"]
+
+# Site config edits to "restaurant_display" apply after bench clear-cache
+clear_cache = ["restaurant_management.utils.display_config.bump_display_config_version"]
+
 # Whitelisted Methods (can be called from frontend)
 whitelisted_methods = [
+    "restaurant_management.api.perf.get_perf_stats",
+    "restaurant_management.api.perf.get_prometheus_metrics",
     "restaurant_management.api.kds_display.get_kitchen_item_queue",
     "restaurant_management.api.kds_display.update_item_status",
+    "restaurant_management.api.kds_display.update_items_status",
+    "restaurant_management.api.kds_display.get_station_tickets",
     "restaurant_management.api.kds_display.get_kitchen_stations",
     "restaurant_management.api.kds_display.get_branches",
     "restaurant_management.api.kds_display.get_kds_config",
@@ -96,22 +164,40 @@ whitelisted_methods = [
     "restaurant_management.api.waiter_order.get_available_tables",
     "restaurant_management.api.waiter_order.get_item_groups",
     "restaurant_management.api.waiter_order.get_item_variant_attributes",
+    "restaurant_management.api.waiter_order.get_variant_catalogue",
     "restaurant_management.api.waiter_order.resolve_item_variant",
+    "restaurant_management.api.waiter_order.resolve_item_variants",
     "restaurant_management.api.waiter_order.send_order_to_kitchen",
     "restaurant_management.api.waiter_order.send_additional_items",
     "restaurant_management.api.waiter_order.mark_items_as_served",
+    "restaurant_management.api.waiter_order.sync_order_batch",
     "restaurant_management.api.waiter_order.get_print_url",
     "restaurant_management.restaurant_management.utils.branch_permissions.assign_all_branches_to_user",
     "restaurant_management.restaurant_management.utils.branch_permissions.get_allowed_branches_query",
     "restaurant_management.api.waiter_order.get_menu_items",
     "restaurant_management.api.waiter_order.get_item_rate",
-    "restaurant_management.api.waiter_order.cancel_order"
+    "restaurant_management.api.waiter_order.cancel_order",
+    "restaurant_management.api.waiter_order.transfer_order",
+    "restaurant_management.api.waiter_order.merge_orders",
+    "restaurant_management.api.waiter_order.split_order",
+    "restaurant_management.api.menu_availability.get_menu_availability",
+    "restaurant_management.api.menu_availability.set_item_availability",
+    "restaurant_management.api.reservations.find_table",
+    "restaurant_management.api.reservations.create_reservation",
+    "restaurant_management.api.reservations.get_reservations",
+    "restaurant_management.api.reservations.update_reservation_status",
+    "restaurant_management.api.waitlist.get_wait_quote",
+    "restaurant_management.api.waitlist.add_to_waitlist",
+    "restaurant_management.api.waitlist.get_waitlist",
+    "restaurant_management.api.waitlist.update_waitlist_entry"
 ]
 
 # Guest Methods (can be called without login)
 guest_methods = [
     "restaurant_management.api.kds_display.get_kitchen_item_queue",
     "restaurant_management.api.kds_display.update_item_status",
+    "restaurant_management.api.kds_display.update_items_status",
+    "restaurant_management.api.kds_display.get_station_tickets",
     "restaurant_management.api.kds_display.get_kitchen_stations",
     "restaurant_management.api.kds_display.get_branches",
     "restaurant_management.api.kds_display.get_kds_config",
@@ -0,0 +1,45 @@
+import frappe
+
+# Composite indexes for the queries behind live screens, scheduler jobs and
+# reports. Single-column indexes come from search_index on the doctypes and
+# custom fields; these cover the multi-column filters and sort orders.
+HOT_QUERY_INDEXES = {
+    "Waiter Order Item": [
+        # KDS queue and station tickets: open items of a station, oldest first
+        ("kitchen_station_status_creation", ["kitchen_station", "status", "creation"]),
+        ("status_creation", ["status", "creation"]),
+    ],
+    "Waiter Order": [
+        # Order lookup by table, newest first
+        ("table_order_time", ["table", "order_time"]),
+        # Branch dashboards and reports by date
+        ("branch_code_order_time", ["branch_code", "order_time"]),
+        # Archive job: closed orders by age
+        ("status_modified", ["status", "modified"]),
+        # Ingredient depletion job: paid orders not yet issued, by day
+        ("status_ingredients_depleted_order_time", ["status", "ingredients_depleted", "order_time"]),
+    ],
+    "Table": [
+        # Table display: active tables of a branch by number
+        ("branch_is_active_table_number", ["branch", "is_active", "table_number"]),
+    ],
+    "POS Invoice": [
+        # Sales Order retry job
+        ("restaurant_sales_order_retry", ["restaurant_sales_order_status", "restaurant_sales_order_retry_at"]),
+    ],
+    "Kitchen Item Event": [
+        # Aggregation job: unaggregated events in time order
+        ("aggregated_event_time", ["aggregated", "event_time"]),
+    ],
+}
+
+def execute():
+    """Add composite indexes used by the restaurant hot queries"""
+    for doctype, indexes in HOT_QUERY_INDEXES.items():
+        if not frappe.db.table_exists(doctype):
+            continue
+
+        columns = set(frappe.db.get_table_columns(doctype))
+        for index_name, fields in indexes:
+            if set(fields) <= columns:
+                frappe.db.add_index(doctype, fields, index_name=index_name)
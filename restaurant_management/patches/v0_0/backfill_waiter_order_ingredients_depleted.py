@@ -0,0 +1,24 @@
+import frappe
+
+def execute():
+    """Start ingredient depletion from the orders paid after this release
+
+    Orders already paid before were never tracked by the nightly depletion
+    job; left at ingredients_depleted = 0 it would post backdated Material
+    Issues for the whole order history, into closed periods or below zero
+    stock. Mark them as handled and index the job's filter.
+    """
+    if not frappe.db.has_column("Waiter Order", "ingredients_depleted"):
+        return
+
+    frappe.db.add_index(
+        "Waiter Order",
+        ["status", "ingredients_depleted", "order_time"],
+        index_name="status_ingredients_depleted_order_time"
+    )
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET ingredients_depleted = 1
+        WHERE status = 'Paid' AND ingredients_depleted = 0
+    """)
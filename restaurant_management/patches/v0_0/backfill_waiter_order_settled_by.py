@@ -0,0 +1,30 @@
+import frappe
+
+LINKED_DOCTYPES = ["Sales Invoice", "POS Invoice", "Sales Order"]
+
+def execute():
+    """Index invoice links to Waiter Order and backfill the settling invoice pointer"""
+    for doctype in LINKED_DOCTYPES:
+        if frappe.db.has_column(doctype, "restaurant_waiter_order"):
+            frappe.db.add_index(doctype, ["restaurant_waiter_order"])
+
+    if not frappe.db.has_column("Waiter Order", "settled_by"):
+        return
+
+    # Latest submitted invoice wins; POS Invoices first so consolidated
+    # Sales Invoices do not take over orders already settled at the POS.
+    # Returns carry the order link too but settle nothing
+    for doctype in ["POS Invoice", "Sales Invoice"]:
+        extra = " AND IFNULL(inv.is_consolidated, 0) = 0" if doctype == "Sales Invoice" else ""
+        frappe.db.sql(f"""
+            UPDATE `tabWaiter Order` wo
+            JOIN (
+                SELECT inv.restaurant_waiter_order, MAX(inv.name) AS name
+                FROM `tab{doctype}` inv
+                WHERE inv.docstatus = 1 AND inv.restaurant_waiter_order IS NOT NULL
+                    AND IFNULL(inv.is_return, 0) = 0{extra}
+                GROUP BY inv.restaurant_waiter_order
+            ) latest ON latest.restaurant_waiter_order = wo.name
+            SET wo.settled_by_doctype = %s, wo.settled_by = latest.name
+            WHERE wo.settled_by IS NULL OR wo.settled_by = ''
+        """, doctype)
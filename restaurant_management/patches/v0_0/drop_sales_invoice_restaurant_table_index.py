@@ -0,0 +1,10 @@
+import frappe
+
+def execute():
+    """Drop the Sales Invoice (restaurant_table, posting_date) index
+
+    No query filters invoices by table: reports reach them through
+    restaurant_waiter_order. The index only slowed down invoice writes.
+    """
+    if frappe.db.has_index("tabSales Invoice", "restaurant_table_posting_date"):
+        frappe.db.sql_ddl("ALTER TABLE `tabSales Invoice` DROP INDEX `restaurant_table_posting_date`")
@@ -0,0 +1,30 @@
+import frappe
+
+def execute():
+    """Move archived Waiter Order rows back into the live table
+
+    Invoices, Sales Orders, Kitchen Item Events and Kitchen Print Jobs link
+    to Waiter Orders, so the archive job now keeps the order rows live and
+    only archives their items. Orders archived earlier come back flagged
+    items_archived; they were closed long ago, so the depletion and turnover
+    jobs must not pick them up again.
+    """
+    archive = "Waiter Order Archive"
+    if not frappe.db.table_exists(archive, cached=False):
+        return
+
+    archived = set(frappe.db.get_table_columns(archive))
+    columns = ", ".join(
+        f"`{column}`" for column in frappe.db.get_table_columns("Waiter Order") if column in archived
+    )
+
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `tabWaiter Order` ({columns})
+        SELECT {columns} FROM `tab{archive}`
+    """)
+    frappe.db.sql(f"""
+        UPDATE `tabWaiter Order` wo
+        JOIN `tab{archive}` archived ON archived.name = wo.name
+        SET wo.items_archived = 1, wo.ingredients_depleted = 1, wo.turnover_recorded = 1
+    """)
+    frappe.db.sql_ddl(f"DROP TABLE `tab{archive}`")
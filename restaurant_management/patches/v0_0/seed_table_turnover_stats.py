@@ -0,0 +1,34 @@
+import frappe
+from frappe.utils import add_days, nowdate
+
+from restaurant_management.restaurant_management.utils.table_turnover import aggregate_table_turnover
+from restaurant_management.restaurant_management.utils.waitlist import HISTORY_DAYS
+
+def execute():
+    """Seed Table Turnover Stat from the orders paid before paid_time existed
+
+    The aggregation job first skipped orders without paid_time and marked
+    them recorded, leaving the waitlist quotes without history. Re-queue
+    the ones inside the window the waitlist reads; the job now falls back
+    to the Payment Entry time, the occupancy end the Table Turnover
+    Analytics report uses. Older orders are outside the window and stay
+    recorded.
+    """
+    if not frappe.db.has_column("Waiter Order", "turnover_recorded"):
+        return
+
+    cutoff = add_days(nowdate(), -HISTORY_DAYS)
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET turnover_recorded = 1
+        WHERE status = 'Paid' AND turnover_recorded = 0 AND order_time < %s
+    """, cutoff)
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET turnover_recorded = 0
+        WHERE status = 'Paid' AND paid_time IS NULL AND order_time >= %s
+    """, cutoff)
+
+    aggregate_table_turnover()
@@ -0,0 +1,227 @@
+import os
+
+import pytest
+
+# Needs a real site: run under bench, or set RESTAURANT_TEST_SITE
+frappe = pytest.importorskip("frappe")
+
+from restaurant_management.patches.v0_0.add_hot_query_indexes import HOT_QUERY_INDEXES, execute
+
+SEED_PREFIX = "HQT-"
+SEED_BRANCHES = 4
+SEED_TABLES = 40
+SEED_ORDERS = 2000
+SEED_EVENTS = 3000
+
+
+def captured_query(call, table):
+    """SQL an app function sends for ``table``, with its parameters filled in
+
+    Only used for read-only functions: the database is not touched while
+    the queries are recorded.
+    """
+    queries = []
+
+    def record(query, values=(), *args, **kwargs):
+        queries.append(frappe.db.mogrify(query, values) if values else query)
+        return []
+
+    original = frappe.db.sql
+    frappe.db.sql = record
+    try:
+        call()
+    finally:
+        frappe.db.sql = original
+
+    return next(query for query in queries if f"`{table}`" in query)
+
+
+def kds_station_tickets():
+    from restaurant_management.api.kds_display import build_station_tickets
+    return captured_query(lambda: build_station_tickets(f"{SEED_PREFIX}KS-1"), "tabWaiter Order Item")
+
+
+def kds_item_queue():
+    from restaurant_management.api.kds_display import get_kitchen_item_queue
+    return captured_query(lambda: get_kitchen_item_queue(), "tabWaiter Order Item")
+
+
+def orders_of_a_table():
+    from restaurant_management.api.waiter_order import get_order
+    return captured_query(lambda: get_order(table=f"{SEED_PREFIX}T-1"), "tabWaiter Order")
+
+
+def table_display():
+    from restaurant_management.api.table_display import get_table_status
+    branch = f"{SEED_PREFIX}B-1"
+    frappe.cache().delete_value(f"table_status:{branch}")
+    return captured_query(lambda: get_table_status(branch), "tabTable")
+
+
+def table_turnover_report():
+    from restaurant_management.restaurant_management.report.table_turnover_analytics.table_turnover_analytics import get_data
+    filters = {"from_date": "2024-01-01", "to_date": "2024-01-31", "branch_code": [f"{SEED_PREFIX}B1"]}
+    return captured_query(lambda: get_data(filters), "tabSales Invoice")
+
+
+# (description, query or function returning it, table alias, index expected to serve it)
+# Jobs that write are not run here; their SELECT is copied from the job.
+HOT_QUERIES = [
+    ("KDS station tickets", kds_station_tickets, "woi", "kitchen_station_status_creation"),
+    ("KDS item queue", kds_item_queue, "tabWaiter Order Item", "status_creation"),
+    ("Orders of a table", orders_of_a_table, "tabWaiter Order", "table_order_time"),
+    (
+        # utils.archive.archive_waiter_orders
+        "Archive candidates",
+        """
+        SELECT wo.name
+        FROM `tabWaiter Order` wo
+        WHERE wo.status IN ('Paid', 'Cancelled')
+            AND wo.modified < '2020-01-01'
+            AND wo.items_archived = 0
+            AND (wo.status != 'Paid' OR (wo.ingredients_depleted = 1 AND wo.turnover_recorded = 1))
+            AND NOT EXISTS (
+                SELECT 1 FROM `tabTable` t WHERE t.current_pos_order = wo.name
+            )
+        ORDER BY wo.modified
+        LIMIT 500
+        """,
+        "wo",
+        "status_modified",
+    ),
+    (
+        # utils.ingredient_depletion.deplete_ingredients
+        "Ingredient depletion groups",
+        """
+        SELECT branch, branch_code, DATE(order_time) AS posting_date
+        FROM `tabWaiter Order`
+        WHERE status = 'Paid' AND ingredients_depleted = 0 AND order_time < '2024-01-02'
+        GROUP BY branch, branch_code, DATE(order_time)
+        ORDER BY posting_date
+        LIMIT 500
+        """,
+        "tabWaiter Order",
+        "status_ingredients_depleted_order_time",
+    ),
+    ("Table display", table_display, "t", "branch_is_active_table_number"),
+    # Invoices are reached through their Waiter Order link (backfill_waiter_order_settled_by)
+    ("Table turnover report", table_turnover_report, "si", "restaurant_waiter_order_index"),
+    (
+        # utils.sales_order_jobs.retry_pending_sales_orders
+        "Sales Order retry job",
+        """
+        SELECT name, restaurant_waiter_order
+        FROM `tabPOS Invoice`
+        WHERE docstatus = 1
+            AND restaurant_waiter_order IS NOT NULL
+            AND restaurant_sales_order_status IN ('Queued', 'Processing', 'Retrying')
+            AND restaurant_sales_order_retry_at <= '2024-01-01'
+        LIMIT 100
+        """,
+        "tabPOS Invoice",
+        "restaurant_sales_order_retry",
+    ),
+    (
+        # utils.kitchen_analytics.aggregate_station_stats
+        "Kitchen stats aggregation",
+        """
+        SELECT name, kitchen_station, branch_code, from_status, to_status,
+            event_time, elapsed_seconds, duration_seconds
+        FROM `tabKitchen Item Event`
+        WHERE aggregated = 0
+        ORDER BY event_time
+        LIMIT 5000
+        """,
+        "tabKitchen Item Event",
+        "aggregated_event_time",
+    ),
+]
+
+
+def seed_rows():
+    """Enough varied rows that the optimizer prefers an index over a scan"""
+    now = frappe.utils.now_datetime()
+    day = frappe.utils.add_days
+
+    tables = [
+        (f"{SEED_PREFIX}T-{i}", str(i), f"{SEED_PREFIX}B-{i % SEED_BRANCHES}", f"{SEED_PREFIX}B{i % SEED_BRANCHES}",
+         1 if i % 10 else 0, "Available")
+        for i in range(SEED_TABLES)
+    ]
+    orders, items, invoices, pos_invoices = [], [], [], []
+    for i in range(SEED_ORDERS):
+        name = f"{SEED_PREFIX}WO-{i}"
+        open_order = i % 50 == 0
+        order_time = day(now, -(i % 400))
+        orders.append((
+            name, f"{SEED_PREFIX}T-{i % SEED_TABLES}", f"{SEED_PREFIX}B-{i % SEED_BRANCHES}",
+            f"{SEED_PREFIX}B{i % SEED_BRANCHES}", "Confirmed" if open_order else "Paid", 1,
+            order_time, order_time, order_time, 0 if open_order or i % 97 == 0 else 1
+        ))
+        for idx in range(1, 3):
+            items.append((
+                f"{name}-{idx}", name, "Waiter Order", "items", idx, f"{SEED_PREFIX}ITEM",
+                f"{SEED_PREFIX}KS-{(i + idx) % 8}", "New" if open_order else "Served", order_time
+            ))
+        invoices.append((f"{SEED_PREFIX}SI-{i}", name, 1, order_time, 100))
+        pos_invoices.append((
+            f"{SEED_PREFIX}POS-{i}", name, 1,
+            "Queued" if i % 200 == 0 else "Created", day(now, -(i % 30))
+        ))
+    events = [
+        (f"{SEED_PREFIX}KIE-{i}", f"{SEED_PREFIX}KS-{i % 8}", 0 if i % 100 == 0 else 1, day(now, -(i % 60)), "Ready")
+        for i in range(SEED_EVENTS)
+    ]
+
+    seeds = [
+        ("Table", ["name", "table_number", "branch", "branch_code", "is_active", "status"], tables),
+        ("Waiter Order", ["name", "table", "branch", "branch_code", "status", "docstatus",
+                          "order_time", "creation", "modified", "ingredients_depleted"], orders),
+        ("Waiter Order Item", ["name", "parent", "parenttype", "parentfield", "idx", "item_code",
+                               "kitchen_station", "status", "creation"], items),
+        ("Sales Invoice", ["name", "restaurant_waiter_order", "docstatus", "posting_date", "base_grand_total"], invoices),
+        ("POS Invoice", ["name", "restaurant_waiter_order", "docstatus",
+                         "restaurant_sales_order_status", "restaurant_sales_order_retry_at"], pos_invoices),
+        ("Kitchen Item Event", ["name", "kitchen_station", "aggregated", "event_time", "to_status"], events),
+    ]
+    for doctype, fields, values in seeds:
+        frappe.db.bulk_insert(doctype, fields, values, ignore_duplicates=True)
+        frappe.db.sql(f"ANALYZE TABLE `tab{doctype}`")
+    frappe.db.commit()
+    return [doctype for doctype, fields, values in seeds]
+
+
+@pytest.fixture(scope="module")
+def db():
+    if not getattr(frappe.local, "db", None):
+        site = os.environ.get("RESTAURANT_TEST_SITE")
+        if not site:
+            pytest.skip("No database connection (set RESTAURANT_TEST_SITE)")
+        frappe.init(site=site)
+        frappe.connect()
+        frappe.set_user("Administrator")
+
+    execute()
+    seeded = seed_rows()
+    yield frappe.db
+
+    for doctype in seeded:
+        frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name LIKE %s", f"{SEED_PREFIX}%")
+    frappe.db.commit()
+
+
+def test_every_declared_index_is_covered_by_a_hot_query():
+    declared = {name for indexes in HOT_QUERY_INDEXES.values() for name, fields in indexes}
+    assert declared <= {index for description, query, alias, index in HOT_QUERIES}
+
+
+@pytest.mark.parametrize("description,query,alias,index", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_is_served_by_an_index(db, description, query, alias, index):
+    if callable(query):
+        query = query()
+
+    plan = db.sql(f"EXPLAIN {query}", as_dict=1)
+    row = next(row for row in plan if row.table == alias)
+
+    # With seeded rows the optimizer must actually use an index, not only list it
+    assert row.key == index or row.type != "ALL", f"{description}: {row}"
@@ -1,6 +1,14 @@
 import frappe
 from frappe import _
 
+# Doctypes storing a denormalized copy of Branch.branch_code, updated in the
+# Branch save transaction
+BRANCH_CODE_DOCTYPES = ("Table", "POS Profile", "Kitchen Station", "User Branch Assignment")
+
+# Waiter Orders updated inline; larger histories go to a background job
+BRANCH_CODE_INLINE_LIMIT = 5000
+BRANCH_CODE_BATCH_SIZE = 5000
+
 def after_insert(doc, method=None):
     """After a new branch is inserted, update associated data"""
     # Create default POS profile for the branch if it's a restaurant
@@ -9,11 +17,9 @@ def after_insert(doc, method=None):
 
 def on_update(doc, method=None):
     """When branch is updated, sync related records"""
-    # Update branch code in Tables linked to this branch
-    update_linked_tables(doc)
-    
-    # Update POS profiles
-    update_pos_profiles(doc)
+    # Copy a new branch code to Tables, POS Profiles, stations and orders
+    if doc.has_value_changed("branch_code"):
+        propagate_branch_code(doc)
 
 def create_default_pos_profile(branch_doc):
     """Create a default POS profile for this branch"""
@@ -60,44 +66,89 @@ def create_default_pos_profile(branch_doc):
         frappe.log_error(frappe.get_traceback(), _("Error creating default POS Profile for branch"))
         frappe.msgprint(_("Failed to create default POS Profile: {0}").format(str(e)))
 
-def update_linked_tables(branch_doc):
-    """Update all tables linked to this branch"""
+def propagate_branch_code(branch_doc):
+    """
+    Copy a changed branch code to the records that store it
+
+    Setup doctypes are updated in place with one UPDATE each, inside the
+    Branch save transaction. Waiter Orders can run into the hundreds of
+    thousands, so large histories are updated by a background job.
+    """
     if not branch_doc.branch_code:
         return
-    
+
     try:
-        # Get all tables for this branch
-        tables = frappe.get_all(
-            "Table",
-            filters={"branch": branch_doc.name},
-            fields=["name"]
-        )
-        
-        for table in tables:
-            frappe.db.set_value("Table", table.name, "branch_code", branch_doc.branch_code)
-        
-        if tables:
-            frappe.db.commit()
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), _("Error updating tables for branch"))
+        for doctype in BRANCH_CODE_DOCTYPES:
+            update_branch_code(doctype, branch_doc.name, branch_doc.branch_code)
 
-def update_pos_profiles(branch_doc):
-    """Update POS profiles linked to this branch"""
-    if not branch_doc.branch_code:
+        # Count at most one row past the limit instead of the whole history
+        pending = frappe.db.sql("""
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM `tabWaiter Order`
+                WHERE branch = %(branch)s
+                    AND (branch_code IS NULL OR branch_code != %(branch_code)s)
+                LIMIT %(limit)s
+            ) pending
+        """, {
+            "branch": branch_doc.name,
+            "branch_code": branch_doc.branch_code,
+            "limit": BRANCH_CODE_INLINE_LIMIT + 1
+        })[0][0]
+
+        if pending > BRANCH_CODE_INLINE_LIMIT:
+            frappe.enqueue(
+                "restaurant_management.restaurant_management.doc_events.branch.update_waiter_order_branch_codes",
+                queue="long",
+                job_id=f"restaurant_branch_code::{branch_doc.name}",
+                deduplicate=True,
+                enqueue_after_commit=True,
+                branch=branch_doc.name
+            )
+        elif pending:
+            update_branch_code("Waiter Order", branch_doc.name, branch_doc.branch_code)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), _("Error updating branch code for branch"))
+
+def update_branch_code(doctype, branch, branch_code):
+    """Set branch_code on every record of a branch with one UPDATE"""
+    frappe.db.sql(
+        """
+        UPDATE `tab{doctype}`
+        SET branch_code = %(branch_code)s
+        WHERE branch = %(branch)s
+            AND (branch_code IS NULL OR branch_code != %(branch_code)s)
+        """.format(doctype=doctype),
+        {"branch": branch, "branch_code": branch_code}
+    )
+
+def update_waiter_order_branch_codes(branch, batch_size=BRANCH_CODE_BATCH_SIZE):
+    """
+    Background job: copy the current branch code to the branch's Waiter Orders
+
+    Runs in batches committed one by one so a large history does not hold
+    row locks for the whole update. Reads the branch code when it runs, so a
+    later change wins.
+    """
+    branch_code = frappe.db.get_value("Branch", branch, "branch_code")
+    if not branch_code:
         return
-    
-    try:
-        # Get all POS profiles for this branch
-        profiles = frappe.get_all(
-            "POS Profile",
-            filters={"branch": branch_doc.name},
-            fields=["name"]
+
+    while True:
+        names = frappe.db.sql("""
+            SELECT name FROM `tabWaiter Order`
+            WHERE branch = %(branch)s
+                AND (branch_code IS NULL OR branch_code != %(branch_code)s)
+            LIMIT %(limit)s
+        """, {"branch": branch, "branch_code": branch_code, "limit": batch_size}, pluck=True)
+
+        if not names:
+            break
+
+        frappe.db.sql(
+            "UPDATE `tabWaiter Order` SET branch_code = %s WHERE name IN %s",
+            (branch_code, names)
         )
-        
-        for profile in profiles:
-            frappe.db.set_value("POS Profile", profile.name, "branch_code", branch_doc.branch_code)
-        
-        if profiles:
-            frappe.db.commit()
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), _("Error updating POS profiles for branch"))
+        frappe.db.commit()
+
+        if len(names) < batch_size:
+            break
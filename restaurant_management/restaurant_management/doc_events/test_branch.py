@@ -0,0 +1,67 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def branch_events(monkeypatch):
+    state = {"pending": 0, "queries": [], "enqueued": [], "commits": 0}
+
+    def sql(query, values=None, **kwargs):
+        state["queries"].append(" ".join(query.split()))
+        if "COUNT(*)" in query:
+            return [(state["pending"],)]
+        return ()
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._ = lambda message: message
+    fake_frappe.db = SimpleNamespace(sql=sql, commit=lambda: state.update(commits=state["commits"] + 1))
+    fake_frappe.enqueue = lambda method, **kwargs: state["enqueued"].append(kwargs)
+    fake_frappe.log_error = lambda *args, **kwargs: None
+    fake_frappe.get_traceback = lambda: ""
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.doc_events.branch", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.doc_events.branch")
+    return module, state
+
+
+def make_branch(changed):
+    return SimpleNamespace(name="Main", branch_code="MN", has_value_changed=lambda field: changed)
+
+
+def test_unchanged_branch_code_touches_nothing(branch_events):
+    module, state = branch_events
+
+    module.on_update(make_branch(changed=False))
+
+    assert state["queries"] == []
+
+
+def test_changed_branch_code_updates_each_doctype_once(branch_events):
+    module, state = branch_events
+    state["pending"] = 3
+
+    module.on_update(make_branch(changed=True))
+
+    updates = [q for q in state["queries"] if q.startswith("UPDATE")]
+    assert [q.split("`")[1] for q in updates] == [
+        "tabTable", "tabPOS Profile", "tabKitchen Station", "tabUser Branch Assignment", "tabWaiter Order"
+    ]
+    assert state["commits"] == 0
+    assert state["enqueued"] == []
+
+
+def test_large_order_history_is_updated_in_background(branch_events):
+    module, state = branch_events
+    state["pending"] = module.BRANCH_CODE_INLINE_LIMIT + 1
+
+    module.on_update(make_branch(changed=True))
+
+    assert not any(q.startswith("UPDATE `tabWaiter Order`") for q in state["queries"])
+    assert state["enqueued"][0]["branch"] == "Main"
+    assert state["enqueued"][0]["enqueue_after_commit"]
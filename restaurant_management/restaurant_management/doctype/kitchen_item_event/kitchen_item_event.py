@@ -0,0 +1,14 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class KitchenItemEvent(Document):
+    """Append-only log of Waiter Order Item kitchen status transitions.
+
+    Rows are written in bulk by the KDS endpoints in the same transaction as
+    the status change and are never edited afterwards, except for the
+    ``aggregated`` flag set by the hourly station aggregator.
+    """
+    pass
@@ -0,0 +1 @@
+# This file is needed to make the directory a Python package
@@ -0,0 +1,14 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class KitchenPrintJob(Document):
+    """Durable queue entry for one kitchen ticket.
+
+    Rows are written in bulk when items are sent to the kitchen, in the same
+    transaction as the order, and drained per printer by the print spooler
+    (see ``utils.kitchen_print``).
+    """
+    pass
@@ -5,6 +5,11 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 
+from restaurant_management.restaurant_management.utils.kitchen_print import (
+    reroute_station_jobs,
+    validate_printer_address,
+)
+
 
 class KitchenStation(Document):
     """Kitchen Station for restaurant order routing.
@@ -48,6 +53,7 @@ class KitchenStation(Document):
         """Validate kitchen station configuration before saving."""
         self.validate_mandatory_fields()
         self.validate_unique_printer()
+        self.validate_printer_address()
 
     def validate_mandatory_fields(self):
         """Ensure all mandatory fields are properly filled."""
@@ -77,12 +83,25 @@ class KitchenStation(Document):
                 )
             )
 
+    def validate_printer_address(self):
+        """Only allow printer addresses the print worker may safely write to."""
+        if not self.printer_address:
+            return
+
+        try:
+            validate_printer_address(self.printer_address)
+        except ValueError as e:
+            frappe.throw(_("Invalid Printer Address: {0}").format(str(e)))
+
     def on_update(self):
         """Hook for actions to perform when kitchen station is updated."""
         self.update_print_service()
 
     def update_print_service(self):
-        """Update routing to print service if applicable."""
-        # This method can be implemented to handle print service integration
-        # Current implementation is a placeholder for future functionality
-        frappe.logger().debug(f"Kitchen Station {self.name} updated. Print service routing may need refresh.")
+        """Send unprinted tickets of this station to its new printer address."""
+        if not self.printer_address or not self.has_value_changed("printer_address"):
+            return
+
+        moved = reroute_station_jobs(self.name, self.printer_address)
+        if moved:
+            frappe.logger().info(f"Kitchen Station {self.name}: {moved} queued tickets moved to {self.printer_address}")
@@ -0,0 +1,13 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class KitchenStationHourlyStat(Document):
+    """Pre-aggregated ticket times for one kitchen station and hour.
+
+    Maintained by ``restaurant_management.restaurant_management.utils.kitchen_analytics``;
+    the histogram field lets reports merge hours into any period.
+    """
+    pass
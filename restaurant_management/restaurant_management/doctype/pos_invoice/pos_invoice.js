@@ -902,22 +902,11 @@ restaurant_management.pos = {
                                     }
                                 });
 
-                                // Automatically create or update Sales Order if needed based on setting
+                                // Sales Order is created by a background job queued on invoice submit
                                 if (cur_pos.pos_profile_data && cur_pos.pos_profile_data.auto_create_sales_order) {
-                                    frappe.call({
-                                        method: 'restaurant_management.api.pos_restaurant.create_sales_order_from_waiter_order',
-                                        args: {
-                                            waiter_order_id: doc.restaurant_waiter_order,
-                                            pos_invoice: result.name
-                                        },
-                                        error: (err) => {
-                                            console.error("Error creating sales order:", err);
-                                            frappe.msgprint({
-                                                title: __("Sales Order Creation Failed"),
-                                                indicator: "orange",
-                                                message: __("Invoice was created but sales order creation failed. This can be handled manually.")
-                                            });
-                                        }
+                                    frappe.show_alert({
+                                        message: __('Sales Order will be created in the background'),
+                                        indicator: 'blue'
                                     });
                                 }
                             }
@@ -5,6 +5,11 @@ import frappe
 from frappe.model.document import Document
 from typing import Optional, List, Dict, Any
 
+# Fields the in-memory reservation index depends on
+RESERVATION_INDEX_FIELDS = ("branch", "seating_capacity", "combine_group", "is_active", "table_number")
+# Fields the cached page shells (per-branch table count) depend on
+PAGE_CONTEXT_FIELDS = ("branch", "is_active")
+
 
 class Table(Document):
     """
@@ -42,6 +47,31 @@ class Table(Document):
         # Sync availability status with order assignment
         self.is_available = 1 if not self.current_pos_order else 0
     
+    def after_insert(self):
+        self.bump_reservation_index()
+    
+    def on_update(self):
+        """Rebuild the branch's reservation index and page shells when seating changed"""
+        if any(self.has_value_changed(field) for field in RESERVATION_INDEX_FIELDS):
+            previous = self.get_doc_before_save()
+            self.bump_reservation_index(previous.branch if previous else None)
+        
+        if any(self.has_value_changed(field) for field in PAGE_CONTEXT_FIELDS):
+            from restaurant_management.utils.display_config import bump_display_config_version
+            bump_display_config_version()
+    
+    def on_trash(self):
+        self.bump_reservation_index()
+    
+    def bump_reservation_index(self, previous_branch: Optional[str] = None):
+        """Make workers reload this table's branch in the reservation index"""
+        # Status updates happen on every order; the allocator is only loaded when seating changes
+        from restaurant_management.restaurant_management.utils.table_allocation import bump_reservation_index
+        
+        bump_reservation_index(self.branch)
+        if previous_branch and previous_branch != self.branch:
+            bump_reservation_index(previous_branch)
+    
     def validate_unique_table_number(self):
         """Ensure table number is unique within a branch"""
         if self.table_number and self.branch:
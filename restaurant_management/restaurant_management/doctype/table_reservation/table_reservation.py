@@ -0,0 +1,106 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_to_date, cint, get_datetime
+from restaurant_management.restaurant_management.utils.table_allocation import (
+    ACTIVE_RESERVATION_STATUSES,
+    DEFAULT_DURATION_MINUTES,
+    allocate_tables,
+    bump_reservation_index,
+    check_table_conflicts,
+    get_occupied_tables,
+)
+
+
+class TableReservation(Document):
+    """
+    Table Reservation books one or more tables of a branch for a party.
+
+    Tables left empty are picked by the allocator (best single fit, else a
+    combination of tables from the same combine group). Saving an active
+    booking locks its tables and rejects overlaps with other bookings.
+    """
+
+    def validate(self):
+        """
+        Validate reservation before saving:
+        - Compute the end time from the duration
+        - Allocate tables when none were chosen
+        - Ensure the tables belong to the branch and are free
+        """
+        if cint(self.party_size) < 1:
+            frappe.throw(_("Party Size must be at least 1"))
+
+        self.duration_minutes = cint(self.duration_minutes) or DEFAULT_DURATION_MINUTES
+        self.end_time = add_to_date(get_datetime(self.reservation_time), minutes=self.duration_minutes)
+
+        if not self.branch_code and self.branch:
+            self.branch_code = frappe.db.get_value("Branch", self.branch, "branch_code")
+
+        if self.status not in ACTIVE_RESERVATION_STATUSES:
+            return
+
+        if not self.tables:
+            self.allocate()
+
+        self.validate_tables()
+
+    def allocate(self):
+        """Fill the tables with the allocator's best fit"""
+        allocation = allocate_tables(
+            self.branch,
+            self.party_size,
+            self.reservation_time,
+            self.duration_minutes,
+            occupied=get_occupied_tables(self.branch, self.reservation_time),
+            ignore=None if self.is_new() else self.name
+        )
+        if not allocation:
+            frappe.throw(_("No free table or table combination seats {0} guests at {1}").format(
+                self.party_size, self.reservation_time
+            ))
+
+        for table in allocation["tables"]:
+            self.append("tables", {"table": table})
+
+    def validate_tables(self):
+        tables = [row.table for row in self.tables]
+        if len(set(tables)) != len(tables):
+            frappe.throw(_("A table is listed more than once"))
+
+        details = frappe.get_all(
+            "Table",
+            filters={"name": ["in", tables]},
+            fields=["name", "branch", "is_active", "seating_capacity"]
+        )
+        for table in details:
+            if table.branch != self.branch:
+                frappe.throw(_("Table {0} does not belong to branch {1}").format(table.name, self.branch))
+            if not table.is_active:
+                frappe.throw(_("Table {0} is not active").format(table.name))
+
+        conflict = check_table_conflicts(self.name, tables, self.reservation_time, self.end_time)
+        if conflict:
+            frappe.throw(_("Table {0} is already booked by reservation {1} at this time").format(
+                conflict.table, conflict.name
+            ))
+
+        capacity = sum(cint(table.seating_capacity) for table in details)
+        if capacity < cint(self.party_size):
+            frappe.msgprint(
+                _("The booked tables seat {0}, fewer than the party of {1}").format(capacity, self.party_size),
+                indicator="orange",
+                alert=True
+            )
+
+    def on_update(self):
+        bump_reservation_index(self.branch)
+        previous = self.get_doc_before_save()
+        if previous and previous.branch != self.branch:
+            bump_reservation_index(previous.branch)
+
+    def on_trash(self):
+        bump_reservation_index(self.branch)
@@ -0,0 +1,13 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class TableReservationTable(Document):
+    """Child table of Table Reservation: one booked table.
+
+    A reservation holds several rows when tables are pushed together for a
+    large party.
+    """
+    pass
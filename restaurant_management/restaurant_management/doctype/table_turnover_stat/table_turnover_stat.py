@@ -0,0 +1,13 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+from frappe.model.document import Document
+
+
+class TableTurnoverStat(Document):
+    """Pre-aggregated seated durations for one table and day.
+
+    Maintained by ``restaurant_management.restaurant_management.utils.table_turnover``;
+    the histogram field is what waitlist quotes are estimated from.
+    """
+    pass
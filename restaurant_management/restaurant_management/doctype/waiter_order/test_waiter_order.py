@@ -18,8 +18,9 @@ def test_invalid_status_transitions():
     assert not is_valid_status_transition("Cancelled", "Draft")
 
 
-def test_resolve_item_variant(monkeypatch):
-    """Ensure resolve_item_variant returns matching variant"""
+@pytest.fixture
+def variant_frappe(monkeypatch):
+    """Stub frappe with two variants of TEMPLATE and an in-memory cache"""
     fake_frappe = types.ModuleType("frappe")
 
     def fake_whitelist(*args, **kwargs):
@@ -36,23 +37,45 @@ def test_resolve_item_variant(monkeypatch):
     ]
     variant_attrs = {
         "ITEM-RED-LARGE": [
-            types.SimpleNamespace(attribute="Color", attribute_value="Red"),
-            types.SimpleNamespace(attribute="Size", attribute_value="Large"),
+            types.SimpleNamespace(parent="ITEM-RED-LARGE", attribute="Color", attribute_value="Red"),
+            types.SimpleNamespace(parent="ITEM-RED-LARGE", attribute="Size", attribute_value="Large"),
         ],
         "ITEM-BLUE-SMALL": [
-            types.SimpleNamespace(attribute="Color", attribute_value="Blue"),
-            types.SimpleNamespace(attribute="Size", attribute_value="Small"),
+            types.SimpleNamespace(parent="ITEM-BLUE-SMALL", attribute="Color", attribute_value="Blue"),
+            types.SimpleNamespace(parent="ITEM-BLUE-SMALL", attribute="Size", attribute_value="Small"),
         ],
     }
+    queries = []
 
     def fake_get_all(doctype, filters=None, fields=None):
+        queries.append(doctype)
         if doctype == "Item":
             return variants
         if doctype == "Item Variant Attribute":
-            return variant_attrs[filters["parent"]]
+            parents = filters["parent"]
+            if isinstance(parents, list) and parents[0] == "in":
+                parents = parents[1]
+            else:
+                parents = [parents]
+            return [row for parent in parents for row in variant_attrs[parent]]
         return []
 
+    class FakeCache:
+        def __init__(self):
+            self.store = {}
+
+        def hget(self, name, key):
+            return self.store.get(name, {}).get(key)
+
+        def hset(self, name, key, value):
+            self.store.setdefault(name, {})[key] = value
+
+        def hdel(self, name, key):
+            self.store.get(name, {}).pop(key, None)
+
+    cache = FakeCache()
     fake_frappe.get_all = fake_get_all
+    fake_frappe.cache = lambda: cache
     fake_frappe.db = types.SimpleNamespace()
     fake_frappe.get_doc = lambda *a, **k: None
     fake_frappe.logger = lambda *a, **k: types.SimpleNamespace(
@@ -74,9 +97,14 @@ def test_resolve_item_variant(monkeypatch):
     monkeypatch.setitem(
         sys.modules,
         "frappe.utils",
-        types.SimpleNamespace(now_datetime=lambda: None, flt=float),
+        types.SimpleNamespace(now_datetime=lambda: None, flt=float, cint=int),
     )
 
+    return fake_frappe, queries
+
+
+def test_resolve_item_variant(variant_frappe):
+    """Ensure resolve_item_variant returns matching variant"""
     module = importlib.import_module(
         "restaurant_management.restaurant_management.doctype.waiter_order.waiter_order"
     )
@@ -87,3 +115,37 @@ def test_resolve_item_variant(monkeypatch):
 
     assert result.item_code == "ITEM-RED-LARGE"
     assert result.item_name == "Red Large"
+
+
+def test_variant_index_is_built_once_and_invalidated(variant_frappe):
+    """Resolution uses the cached index until the template is invalidated"""
+    _, queries = variant_frappe
+    from restaurant_management.utils import variant
+
+    first = variant.resolve_item_variant("TEMPLATE", {"Color": "Blue", "Size": "Small"})
+    second = variant.resolve_item_variant("TEMPLATE", '{"Size": "Large", "Color": "Red"}')
+
+    assert (first.item_code, second.item_code) == ("ITEM-BLUE-SMALL", "ITEM-RED-LARGE")
+    # One Item and one Item Variant Attribute query for the whole template
+    assert queries == ["Item", "Item Variant Attribute"]
+
+    variant.clear_variant_index("TEMPLATE")
+    variant.resolve_item_variant("TEMPLATE", {"Color": "Red"})
+    assert len(queries) == 4
+
+
+def test_resolve_item_variants_batch(variant_frappe):
+    """Batch resolution keeps input order and reports misses as None"""
+    _, queries = variant_frappe
+    from restaurant_management.utils import variant
+
+    results = variant.resolve_item_variants([
+        {"template_item_code": "TEMPLATE", "attributes": {"Color": "Red", "Size": "Large"}},
+        {"template_item_code": "TEMPLATE", "attributes": {"Color": "Green"}},
+        {"template_item_code": "TEMPLATE", "attributes": {"Size": "Small"}},
+    ])
+
+    assert [getattr(row, "item_code", None) for row in results] == [
+        "ITEM-RED-LARGE", None, "ITEM-BLUE-SMALL"
+    ]
+    assert queries == ["Item", "Item Variant Attribute"]
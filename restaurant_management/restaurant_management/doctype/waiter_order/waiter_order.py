@@ -1,7 +1,7 @@
 import frappe
 from frappe.model.document import Document
 from frappe.model.naming import make_autoname
-from frappe.utils import now_datetime, flt
+from frappe.utils import now_datetime, flt, cint
 from restaurant_management.restaurant_management.doctype.table.table import update_table_status
 from restaurant_management.order_status import VALID_STATUS_TRANSITIONS
 from restaurant_management.utils.variant import (
@@ -68,6 +68,15 @@ class WaiterOrder(Document):
         # Validate all order items
         self.validate_order_items()
 
+        # Version item changes for incremental Sales Order sync
+        self.track_item_changes()
+
+        # Record when the order was paid, for table turnover analytics
+        if self.status == "Paid":
+            self.paid_time = self.paid_time or now_datetime()
+        else:
+            self.paid_time = None
+
         # Update table status when order status changes to Paid
         if self.status == "Paid" and self.table:
             logger.info(f"Order {self.name} marked as Paid, updating table {self.table}")
@@ -112,6 +121,28 @@ class WaiterOrder(Document):
                 item_name = item.item_name or frappe.db.get_value("Item", item.item_code, "item_name")
                 frappe.throw(f"Variant selection is required for item '{item_name}' at row {i}")
     
+    def track_item_changes(self):
+        """
+        Bump items_version when items were added, changed or removed.
+        Changed rows are stamped with the new version so a sync can pick
+        only the rows it has not seen yet.
+        """
+        previous = self.get_doc_before_save()
+        before = {
+            row.name: (row.item_code, flt(row.qty), flt(row.rate))
+            for row in (previous.items if previous else [])
+        }
+
+        version = cint(self.items_version) + 1
+        changed = bool(set(before) - {row.name for row in self.items})
+        for row in self.items:
+            if before.get(row.name) != (row.item_code, flt(row.qty), flt(row.rate)):
+                row.changed_in_version = version
+                changed = True
+
+        if changed:
+            self.items_version = version
+
     def on_submit(self):
         """
         When order is submitted, update the linked table status to In Progress.
@@ -0,0 +1,35 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import cint, now_datetime
+
+
+class WaitlistEntry(Document):
+    """
+    Waitlist Entry is a walk-in party waiting for a table.
+
+    The wait quoted when the party joined is kept for comparison with when
+    it was actually seated; live estimates come from
+    ``restaurant_management.restaurant_management.utils.waitlist``.
+    """
+
+    def validate(self):
+        if cint(self.party_size) < 1:
+            frappe.throw(_("Party Size must be at least 1"))
+
+        if not self.joined_at:
+            self.joined_at = now_datetime()
+
+        if not self.branch_code and self.branch:
+            self.branch_code = frappe.db.get_value("Branch", self.branch, "branch_code")
+
+        if self.table and frappe.db.get_value("Table", self.table, "branch") != self.branch:
+            frappe.throw(_("Table {0} does not belong to branch {1}").format(self.table, self.branch))
+
+        if self.status == "Seated":
+            self.seated_at = self.seated_at or now_datetime()
+        else:
+            self.seated_at = None
@@ -4,6 +4,8 @@
 import frappe
 from erpnext.stock.doctype.item.item import Item as ERPNextItem
 
+from restaurant_management.utils.variant import bump_variant_catalogue_version, clear_variant_index
+
 
 class RestaurantItem(ERPNextItem):
     def after_insert(self):
@@ -15,6 +17,21 @@ class RestaurantItem(ERPNextItem):
         if not self._item_price_exists():
             # Only call super().after_insert() if Item Price doesn't exist
             super().after_insert()
+
+    def on_update(self):
+        super().on_update()
+        self._clear_variant_index()
+
+    def on_trash(self):
+        super().on_trash()
+        self._clear_variant_index()
+
+    def _clear_variant_index(self):
+        """Invalidate the cached variant index and catalogue for this item's template."""
+        template = self.variant_of or (self.name if self.has_variants else None)
+        if template:
+            clear_variant_index(template)
+            bump_variant_catalogue_version()
     
     def _item_price_exists(self):
         """Check if Item Price already exists for this item with default price list."""
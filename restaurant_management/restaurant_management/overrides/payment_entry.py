@@ -2,6 +2,107 @@ import frappe
 from frappe import _
 from erpnext.accounts.doctype.payment_entry.payment_entry import PaymentEntry
 
+from restaurant_management.restaurant_management.utils.settlement import (
+    settle_waiter_orders,
+    unsettle_waiter_orders,
+)
+
+RESTAURANT_REFERENCE_DOCTYPES = ["Sales Invoice", "POS Invoice", "Sales Order"]
+INVOICE_DOCTYPES = ["Sales Invoice", "POS Invoice"]
+
+def get_reference_context(doc, refresh=False):
+    """
+    Resolve the restaurant documents behind a payment's references
+
+    Invoices, Waiter Orders and Tables are read with one projection query per
+    doctype and kept on ``doc.flags`` so validate and submit hooks for the
+    same payment share them instead of loading each document per reference.
+
+    Args:
+        doc: Payment Entry
+        refresh: Re-read even if already resolved for this document
+
+    Returns:
+        Dict with ``references`` keyed by (doctype, name), ``waiter_orders``
+        and ``tables`` keyed by name
+    """
+    context = doc.flags.get("restaurant_reference_context")
+    if context is not None and not refresh:
+        return context
+
+    names_by_doctype = {}
+    for ref in doc.references or []:
+        if ref.reference_doctype in RESTAURANT_REFERENCE_DOCTYPES and ref.reference_name:
+            names_by_doctype.setdefault(ref.reference_doctype, set()).add(ref.reference_name)
+
+    references = {}
+    for doctype, names in names_by_doctype.items():
+        fields = ["name", "branch", "branch_code", "restaurant_waiter_order"]
+        if doctype in INVOICE_DOCTYPES:
+            fields.append("outstanding_amount")
+
+        for row in frappe.get_all(doctype, filters={"name": ["in", list(names)]}, fields=fields):
+            references[(doctype, row.name)] = row
+
+    waiter_order_names = {row.restaurant_waiter_order for row in references.values() if row.restaurant_waiter_order}
+    waiter_orders = {}
+    if waiter_order_names:
+        waiter_orders = {
+            row.name: row
+            for row in frappe.get_all(
+                "Waiter Order",
+                filters={"name": ["in", list(waiter_order_names)]},
+                fields=["name", "status", "table", "branch", "branch_code"]
+            )
+        }
+
+    table_names = {row.table for row in waiter_orders.values() if row.table}
+    tables = {}
+    if table_names:
+        tables = {
+            row.name: row
+            for row in frappe.get_all(
+                "Table",
+                filters={"name": ["in", list(table_names)]},
+                fields=["name", "branch", "branch_code"]
+            )
+        }
+
+    context = {"references": references, "waiter_orders": waiter_orders, "tables": tables}
+    doc.flags.restaurant_reference_context = context
+    return context
+
+def get_invoice_waiter_orders(doc, context):
+    """
+    Yield (reference, invoice row, waiter order row) for invoice references
+
+    Missing invoices and Waiter Orders are logged and skipped.
+    """
+    for ref in doc.references or []:
+        if ref.reference_doctype not in INVOICE_DOCTYPES:
+            continue
+
+        invoice = context["references"].get((ref.reference_doctype, ref.reference_name))
+        if not invoice:
+            frappe.log_error(
+                f"Referenced {ref.reference_doctype} {ref.reference_name} not found",
+                "Reference Error in Payment Entry"
+            )
+            continue
+
+        if not invoice.restaurant_waiter_order:
+            continue
+
+        waiter_order = context["waiter_orders"].get(invoice.restaurant_waiter_order)
+        if not waiter_order:
+            frappe.log_error(
+                f"Referenced Waiter Order {invoice.restaurant_waiter_order} not found for {ref.reference_doctype} {ref.reference_name}",
+                "Waiter Order Reference Error"
+            )
+            continue
+
+        yield ref, invoice, waiter_order
+
 def update_restaurant_status(doc, method=None):
     """Update waiter order status when a payment is submitted"""
     try:
@@ -10,45 +111,17 @@ def update_restaurant_status(doc, method=None):
         
         # Check if payment is against a Sales Invoice or POS Invoice
         if doc.docstatus == 1 and doc.references:
-            for ref in doc.references:
-                if ref.reference_doctype in ["Sales Invoice", "POS Invoice"]:
-                    invoice = frappe.get_doc(ref.reference_doctype, ref.reference_name)
-                    
-                    # Check if this invoice has a restaurant waiter order
-                    if hasattr(invoice, "restaurant_waiter_order") and invoice.restaurant_waiter_order:
-                        # Check if payment completes the invoice
-                        outstanding_amount = frappe.db.get_value(ref.reference_doctype, ref.reference_name, "outstanding_amount")
-                        if outstanding_amount <= 0:
-                            # Check if waiter order exists
-                            if not frappe.db.exists("Waiter Order", invoice.restaurant_waiter_order):
-                                frappe.log_error(
-                                    f"Referenced Waiter Order {invoice.restaurant_waiter_order} not found for {ref.reference_doctype} {ref.reference_name}",
-                                    "Waiter Order Reference Error"
-                                )
-                                continue
-                                
-                            # Update waiter order status to Paid if not already paid
-                            waiter_order = frappe.get_doc("Waiter Order", invoice.restaurant_waiter_order)
-                            if waiter_order.status != "Paid":
-                                frappe.logger().info(f"Updating Waiter Order {waiter_order.name} status to Paid via Payment Entry {doc.name}")
-                                waiter_order.status = "Paid"
-                                waiter_order.save()
-                                
-                                # Update table status
-                                if waiter_order.table:
-                                    if frappe.db.exists("Table", waiter_order.table):
-                                        table = frappe.get_doc("Table", waiter_order.table)
-                                        table.status = "Available"
-                                        table.current_pos_order = None
-                                        table.is_available = 1
-                                        table.save()
-                                    else:
-                                        frappe.log_error(
-                                            f"Referenced Table {waiter_order.table} not found for Waiter Order {waiter_order.name}",
-                                            "Table Reference Error"
-                                        )
-                            else:
-                                frappe.logger().info(f"Waiter Order {waiter_order.name} already has Paid status, no update needed")
+            # Outstanding amounts change on submit, so read them fresh
+            context = get_reference_context(doc, refresh=True)
+
+            # Collect every fully paid order and settle them together
+            paid_orders = [
+                order.name
+                for ref, invoice, order in get_invoice_waiter_orders(doc, context)
+                if invoice.outstanding_amount <= 0
+            ]
+            if paid_orders:
+                settle_waiter_orders(paid_orders, source=f"Payment Entry {doc.name}")
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), f"Error in update_restaurant_status: {str(e)}")
 
@@ -57,51 +130,16 @@ def revert_restaurant_status(doc, method=None):
     try:
         # Check if cancelled payment was against a Sales Invoice or POS Invoice
         if doc.docstatus == 2 and doc.references:
-            for ref in doc.references:
-                if ref.reference_doctype in ["Sales Invoice", "POS Invoice"]:
-                    # Validate if reference document exists
-                    if not frappe.db.exists(ref.reference_doctype, ref.reference_name):
-                        frappe.log_error(
-                            f"Referenced {ref.reference_doctype} {ref.reference_name} not found during payment cancellation",
-                            "Reference Error in Payment Cancellation"
-                        )
-                        continue
-                        
-                    invoice = frappe.get_doc(ref.reference_doctype, ref.reference_name)
-                    
-                    # Check if this invoice has a restaurant waiter order
-                    if hasattr(invoice, "restaurant_waiter_order") and invoice.restaurant_waiter_order:
-                        # Check if waiter order exists
-                        if not frappe.db.exists("Waiter Order", invoice.restaurant_waiter_order):
-                            frappe.log_error(
-                                f"Referenced Waiter Order {invoice.restaurant_waiter_order} not found during payment cancellation",
-                                "Waiter Order Reference Error"
-                            )
-                            continue
-                            
-                        # Check if invoice is now unpaid again
-                        outstanding_amount = frappe.db.get_value(ref.reference_doctype, ref.reference_name, "outstanding_amount")
-                        if outstanding_amount > 0:
-                            # Revert waiter order status to In Progress
-                            waiter_order = frappe.get_doc("Waiter Order", invoice.restaurant_waiter_order)
-                            if waiter_order.status == "Paid":
-                                frappe.logger().info(f"Reverting Waiter Order {waiter_order.name} status from Paid to In Progress due to payment cancellation")
-                                waiter_order.status = "In Progress"
-                                waiter_order.save()
-                                
-                                # Update table status back to In Progress
-                                if waiter_order.table:
-                                    if frappe.db.exists("Table", waiter_order.table):
-                                        table = frappe.get_doc("Table", waiter_order.table)
-                                        table.status = "In Progress"
-                                        table.current_pos_order = waiter_order.name
-                                        table.is_available = 0
-                                        table.save()
-                                    else:
-                                        frappe.log_error(
-                                            f"Referenced Table {waiter_order.table} not found during payment cancellation",
-                                            "Table Reference Error"
-                                        )
+            context = get_reference_context(doc, refresh=True)
+
+            # Orders whose invoice is unpaid again go back to In Progress
+            unpaid_orders = [
+                order.name
+                for ref, invoice, order in get_invoice_waiter_orders(doc, context)
+                if invoice.outstanding_amount > 0
+            ]
+            if unpaid_orders:
+                unsettle_waiter_orders(unpaid_orders, source=f"Payment Entry {doc.name}")
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), f"Error in revert_restaurant_status: {str(e)}")
 
@@ -109,55 +147,37 @@ def set_branch_from_reference(doc):
     """Set branch and branch_code from reference document"""
     try:
         if not doc.branch and doc.references:
+            context = get_reference_context(doc)
+
             for ref in doc.references:
-                if ref.reference_doctype in ["Sales Invoice", "POS Invoice", "Sales Order"]:
-                    # Validate if reference document exists
-                    if not frappe.db.exists(ref.reference_doctype, ref.reference_name):
-                        continue
-                        
-                    ref_doc = frappe.get_doc(ref.reference_doctype, ref.reference_name)
+                ref_doc = context["references"].get((ref.reference_doctype, ref.reference_name))
+                if not ref_doc:
+                    continue
+                    
+                # If reference document has branch, use it
+                if ref_doc.branch:
+                    doc.branch = ref_doc.branch
                     
-                    # If reference document has branch, use it
-                    if hasattr(ref_doc, "branch") and ref_doc.branch:
-                        doc.branch = ref_doc.branch
-                        
-                        # Set branch_code if not automatically fetched
-                        if not doc.branch_code and hasattr(ref_doc, "branch_code") and ref_doc.branch_code:
-                            doc.branch_code = ref_doc.branch_code
-                        
-                        break
+                    # Set branch_code if not automatically fetched
+                    if not doc.branch_code and ref_doc.branch_code:
+                        doc.branch_code = ref_doc.branch_code
                     
-                    # If reference document has restaurant_waiter_order, get branch from there
-                    elif hasattr(ref_doc, "restaurant_waiter_order") and ref_doc.restaurant_waiter_order:
-                        # Check if waiter order exists
-                        if not frappe.db.exists("Waiter Order", ref_doc.restaurant_waiter_order):
-                            continue
-                            
-                        waiter_order = frappe.get_doc("Waiter Order", ref_doc.restaurant_waiter_order)
-                        
-                        if waiter_order.table:
-                            # Check if table exists
-                            if not frappe.db.exists("Table", waiter_order.table):
-                                continue
-                                
-                            table = frappe.get_doc("Table", waiter_order.table)
-                            if table.branch_code:
-                                # Find branch based on branch code
-                                branch = frappe.get_all(
-                                    "Branch",
-                                    filters={"branch_code": table.branch_code},
-                                    fields=["name"],
-                                    limit=1
-                                )
-                                
-                                if branch:
-                                    doc.branch = branch[0].name
-                                    doc.branch_code = table.branch_code
-                                else:
-                                    # Set just branch code if branch not found
-                                    doc.branch_code = table.branch_code
-                                
-                                break
+                    break
+                
+                # If reference document has restaurant_waiter_order, get branch from its table
+                waiter_order = context["waiter_orders"].get(ref_doc.restaurant_waiter_order)
+                table = context["tables"].get(waiter_order.table) if waiter_order else None
+                if table and table.branch_code:
+                    branch = table.branch
+                    if not branch:
+                        # Find branch based on branch code
+                        branch = frappe.db.get_value("Branch", {"branch_code": table.branch_code}, "name")
+
+                    if branch:
+                        doc.branch = branch
+                    # Set branch code even if branch not found
+                    doc.branch_code = table.branch_code
+                    break
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), f"Error in set_branch_from_reference: {str(e)}")
 
@@ -188,29 +208,18 @@ class CustomPaymentEntry(PaymentEntry):
         """Prevent payment against already paid waiter orders"""
         try:
             if self.docstatus == 0 and self.references:  # Draft payment being validated
-                for ref in self.references:
-                    if ref.reference_doctype in ["Sales Invoice", "POS Invoice"]:
-                        # Check if reference exists
-                        if not frappe.db.exists(ref.reference_doctype, ref.reference_name):
-                            continue
-                            
-                        invoice = frappe.get_doc(ref.reference_doctype, ref.reference_name)
-                        
-                        # Check if this invoice has a restaurant waiter order
-                        if hasattr(invoice, "restaurant_waiter_order") and invoice.restaurant_waiter_order:
-                            # Check if waiter order exists
-                            if not frappe.db.exists("Waiter Order", invoice.restaurant_waiter_order):
-                                continue
-                                
-                            waiter_order = frappe.get_doc("Waiter Order", invoice.restaurant_waiter_order)
-                            
-                            # If waiter order is already paid, show warning
-                            if waiter_order.status == "Paid":
-                                frappe.msgprint(
-                                    _("Warning: Waiter Order {0} is already marked as Paid.").format(waiter_order.name),
-                                    title=_("Duplicate Payment Warning"),
-                                    indicator="orange"
-                                )
+                context = get_reference_context(self)
+                warned = set()
+
+                for ref, invoice, waiter_order in get_invoice_waiter_orders(self, context):
+                    # If waiter order is already paid, show warning
+                    if waiter_order.status == "Paid" and waiter_order.name not in warned:
+                        warned.add(waiter_order.name)
+                        frappe.msgprint(
+                            _("Warning: Waiter Order {0} is already marked as Paid.").format(waiter_order.name),
+                            title=_("Duplicate Payment Warning"),
+                            indicator="orange"
+                        )
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), f"Error in validate_waiter_order_payment: {str(e)}")
     
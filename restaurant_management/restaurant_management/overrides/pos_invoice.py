@@ -38,37 +38,30 @@ class RestaurantPOSInvoice(POSInvoice):
         """Validate that we're not creating an invoice for an already paid waiter order"""
         try:
             if self.docstatus == 0 and self.restaurant_waiter_order:  # Draft invoice being validated
-                # Check if waiter order exists
-                if not frappe.db.exists("Waiter Order", self.restaurant_waiter_order):
+                waiter_order = frappe.db.get_value(
+                    "Waiter Order",
+                    self.restaurant_waiter_order,
+                    ["status", "settled_by_doctype", "settled_by"],
+                    as_dict=True
+                )
+                if not waiter_order:
                     return
                 
-                waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
-                
-                # If waiter order is already paid, show warning
-                if waiter_order.status == "Paid":
-                    # Check if there are other submitted invoices for this waiter order
-                    existing_invoices = frappe.get_all(
-                        "POS Invoice", 
-                        filters={
-                            "restaurant_waiter_order": self.restaurant_waiter_order,
-                            "docstatus": 1,
-                            "name": ["!=", self.name]
-                        }
+                # One lookup on the settling invoice pointer instead of scanning invoices
+                if waiter_order.settled_by and (waiter_order.settled_by_doctype, waiter_order.settled_by) != (self.doctype, self.name):
+                    frappe.msgprint(
+                        _("Warning: This Waiter Order is already settled by {0} {1}").format(
+                            waiter_order.settled_by_doctype, waiter_order.settled_by
+                        ),
+                        title=_("Duplicate Invoice Warning"),
+                        indicator="orange"
+                    )
+                elif waiter_order.status == "Paid" and not waiter_order.settled_by:
+                    frappe.msgprint(
+                        _("Warning: This Waiter Order is already marked as Paid but no other invoice was found."),
+                        title=_("Status Inconsistency"),
+                        indicator="orange"
                     )
-                    
-                    if existing_invoices:
-                        invoice_list = ", ".join([inv.name for inv in existing_invoices])
-                        frappe.msgprint(
-                            _("Warning: This Waiter Order is already marked as Paid and has existing invoices: {0}").format(invoice_list),
-                            title=_("Duplicate Invoice Warning"),
-                            indicator="orange"
-                        )
-                    else:
-                        frappe.msgprint(
-                            _("Warning: This Waiter Order is already marked as Paid but no other invoice was found."),
-                            title=_("Status Inconsistency"),
-                            indicator="orange"
-                        )
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), f"Error validating already paid waiter order: {str(e)}")
     
@@ -137,6 +130,7 @@ class RestaurantPOSInvoice(POSInvoice):
         """Handle submission of POS Invoice"""
         try:
             super(RestaurantPOSInvoice, self).on_submit()
+            self.claim_waiter_order()
             self.update_restaurant_status()
             
             # Check if we need to automatically create Sales Order
@@ -144,28 +138,27 @@ class RestaurantPOSInvoice(POSInvoice):
                 auto_create = frappe.db.get_value("POS Profile", self.pos_profile, "auto_create_sales_order")
                 
                 if auto_create:
-                    frappe.logger().info(f"Auto-creating Sales Order from Waiter Order {self.restaurant_waiter_order} for POS Invoice {self.name}")
+                    # Built in the background so payment does not wait on the Sales Order
+                    frappe.logger().info(f"Queueing Sales Order creation from Waiter Order {self.restaurant_waiter_order} for POS Invoice {self.name}")
                     try:
-                        from restaurant_management.api.pos_restaurant import create_sales_order_from_waiter_order
-                        result = create_sales_order_from_waiter_order(self.restaurant_waiter_order, self.name)
-                        
-                        if result and result.get("success"):
-                            frappe.logger().info(f"Successfully created Sales Order {result.get('sales_order')} from Waiter Order {self.restaurant_waiter_order}")
-                        else:
-                            error_msg = result.get("message") if result else "Unknown error"
-                            frappe.log_error(
-                                f"Failed to create Sales Order from Waiter Order {self.restaurant_waiter_order}: {error_msg}",
-                                "Sales Order Creation Failed"
-                            )
+                        from restaurant_management.restaurant_management.utils.sales_order_jobs import enqueue_sales_order_creation
+                        enqueue_sales_order_creation(self.name, self.restaurant_waiter_order)
                     except Exception as e:
                         frappe.log_error(
                             frappe.get_traceback(),
-                            f"Error creating Sales Order from Waiter Order {self.restaurant_waiter_order}: {str(e)}"
+                            f"Error queueing Sales Order from Waiter Order {self.restaurant_waiter_order}: {str(e)}"
                         )
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), f"Error in on_submit: {str(e)}")
             raise
 
+    def claim_waiter_order(self):
+        """Mark this invoice as the one settling its Waiter Order (rejects double payment)"""
+        # Returns copy the order link from the invoice they reverse but settle nothing
+        if self.restaurant_waiter_order and not self.get("is_consolidated") and not self.get("is_return"):
+            from restaurant_management.restaurant_management.utils.settlement import claim_waiter_order
+            claim_waiter_order(self.restaurant_waiter_order, self.doctype, self.name)
+
     def update_restaurant_status(self):
         """Update waiter order status when POS invoice is submitted"""
         try:
@@ -223,6 +216,8 @@ class RestaurantPOSInvoice(POSInvoice):
         """If POS invoice is cancelled, revert waiter order status"""
         try:
             if self.restaurant_waiter_order and self.docstatus == 2:
+                from restaurant_management.restaurant_management.utils.settlement import release_waiter_order
+                
                 # Check if waiter order exists
                 if not frappe.db.exists("Waiter Order", self.restaurant_waiter_order):
                     frappe.log_error(
@@ -231,19 +226,12 @@ class RestaurantPOSInvoice(POSInvoice):
                     )
                     return
                 
+                # Only revert if this invoice was the one settling the order
+                released = release_waiter_order(self.restaurant_waiter_order, self.doctype, self.name)
+                
                 waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
-
-                # Check if there are other submitted invoices for this waiter order before reverting
-                other_invoices = frappe.db.exists(
-                    "POS Invoice", 
-                    {
-                        "restaurant_waiter_order": self.restaurant_waiter_order,
-                        "docstatus": 1,
-                        "name": ["!=", self.name]
-                    }
-                )
                 
-                if not other_invoices and waiter_order.status == "Paid":
+                if released and waiter_order.status == "Paid":
                     frappe.logger().info(f"Reverting Waiter Order {waiter_order.name} status from Paid to In Progress due to POS Invoice {self.name} cancellation")
                     waiter_order.status = "In Progress"
                     waiter_order.save()
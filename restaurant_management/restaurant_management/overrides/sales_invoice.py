@@ -38,48 +38,30 @@ class RestaurantSalesInvoice(SalesInvoice):
         """Validate that we're not creating an invoice for an already paid waiter order"""
         try:
             if self.docstatus == 0 and self.restaurant_waiter_order:  # Draft invoice being validated
-                # Check if waiter order exists
-                if not frappe.db.exists("Waiter Order", self.restaurant_waiter_order):
+                waiter_order = frappe.db.get_value(
+                    "Waiter Order",
+                    self.restaurant_waiter_order,
+                    ["status", "settled_by_doctype", "settled_by"],
+                    as_dict=True
+                )
+                if not waiter_order:
                     return
                 
-                waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
-                
-                # If waiter order is already paid, show warning
-                if waiter_order.status == "Paid":
-                    # Check if there are other submitted invoices for this waiter order
-                    existing_invoices = frappe.get_all(
-                        "Sales Invoice", 
-                        filters={
-                            "restaurant_waiter_order": self.restaurant_waiter_order,
-                            "docstatus": 1,
-                            "name": ["!=", self.name]
-                        }
+                # One lookup on the settling invoice pointer instead of scanning invoices
+                if waiter_order.settled_by and (waiter_order.settled_by_doctype, waiter_order.settled_by) != (self.doctype, self.name):
+                    frappe.msgprint(
+                        _("Warning: This Waiter Order is already settled by {0} {1}").format(
+                            waiter_order.settled_by_doctype, waiter_order.settled_by
+                        ),
+                        title=_("Duplicate Invoice Warning"),
+                        indicator="orange"
                     )
-                    
-                    # Also check POS Invoices
-                    pos_invoices = frappe.get_all(
-                        "POS Invoice", 
-                        filters={
-                            "restaurant_waiter_order": self.restaurant_waiter_order,
-                            "docstatus": 1
-                        }
+                elif waiter_order.status == "Paid" and not waiter_order.settled_by:
+                    frappe.msgprint(
+                        _("Warning: This Waiter Order is already marked as Paid but no other invoice was found."),
+                        title=_("Status Inconsistency"),
+                        indicator="orange"
                     )
-                    
-                    all_invoices = existing_invoices + pos_invoices
-                    
-                    if all_invoices:
-                        invoice_list = ", ".join([inv.name for inv in all_invoices])
-                        frappe.msgprint(
-                            _("Warning: This Waiter Order is already marked as Paid and has existing invoices: {0}").format(invoice_list),
-                            title=_("Duplicate Invoice Warning"),
-                            indicator="orange"
-                        )
-                    else:
-                        frappe.msgprint(
-                            _("Warning: This Waiter Order is already marked as Paid but no other invoice was found."),
-                            title=_("Status Inconsistency"),
-                            indicator="orange"
-                        )
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), f"Error validating already paid waiter order: {str(e)}")
     
@@ -148,6 +130,7 @@ class RestaurantSalesInvoice(SalesInvoice):
         """Handle submission of Sales Invoice"""
         try:
             super(RestaurantSalesInvoice, self).on_submit()
+            self.claim_waiter_order()
             self.update_restaurant_status()
             
             # Optionally create Sales Order from Waiter Order if needed
@@ -180,6 +163,13 @@ class RestaurantSalesInvoice(SalesInvoice):
             frappe.log_error(frappe.get_traceback(), f"Error in on_submit: {str(e)}")
             raise
     
+    def claim_waiter_order(self):
+        """Mark this invoice as the one settling its Waiter Order (rejects double payment)"""
+        # Returns copy the order link from the invoice they reverse but settle nothing
+        if self.restaurant_waiter_order and not self.get("is_consolidated") and not self.get("is_return"):
+            from restaurant_management.restaurant_management.utils.settlement import claim_waiter_order
+            claim_waiter_order(self.restaurant_waiter_order, self.doctype, self.name)
+
     def update_restaurant_status(self):
         """Update waiter order status when invoice is submitted (if fully paid)"""
         try:
@@ -237,6 +227,8 @@ class RestaurantSalesInvoice(SalesInvoice):
         """If invoice is cancelled, revert waiter order status"""
         try:
             if self.restaurant_waiter_order and self.docstatus == 2:
+                from restaurant_management.restaurant_management.utils.settlement import release_waiter_order
+                
                 # Check if waiter order exists
                 if not frappe.db.exists("Waiter Order", self.restaurant_waiter_order):
                     frappe.log_error(
@@ -245,28 +237,12 @@ class RestaurantSalesInvoice(SalesInvoice):
                     )
                     return
                 
-                waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
-                
-                # Check if there are other submitted invoices for this waiter order before reverting
-                other_invoices = frappe.db.exists(
-                    "Sales Invoice", 
-                    {
-                        "restaurant_waiter_order": self.restaurant_waiter_order,
-                        "docstatus": 1,
-                        "name": ["!=", self.name]
-                    }
-                )
+                # Only revert if this invoice was the one settling the order
+                released = release_waiter_order(self.restaurant_waiter_order, self.doctype, self.name)
                 
-                # Also check POS Invoices
-                pos_invoices = frappe.db.exists(
-                    "POS Invoice", 
-                    {
-                        "restaurant_waiter_order": self.restaurant_waiter_order,
-                        "docstatus": 1
-                    }
-                )
+                waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
                 
-                if not (other_invoices or pos_invoices) and waiter_order.status == "Paid":
+                if released and waiter_order.status == "Paid":
                     frappe.logger().info(f"Reverting Waiter Order {waiter_order.name} status from Paid to In Progress due to Sales Invoice {self.name} cancellation")
                     waiter_order.status = "In Progress"
                     waiter_order.save()
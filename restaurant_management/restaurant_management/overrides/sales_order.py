@@ -1,7 +1,7 @@
 import frappe
 from frappe import _
 from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
-from frappe.utils import now_datetime, nowdate
+from frappe.utils import nowdate
 
 class RestaurantSalesOrder(SalesOrder):
     def validate(self):
@@ -156,49 +156,38 @@ class RestaurantSalesOrder(SalesOrder):
     def sync_waiter_order_items(self):
         """Sync item statuses between Sales Order and Waiter Order"""
         try:
-            waiter_order = frappe.get_doc("Waiter Order", self.restaurant_waiter_order)
-            
-            # Create mapping of items by item_code
-            so_items = {item.item_code: item for item in self.items}
-            waiter_items = {item.item_code: item for item in waiter_order.items}
-            
-            # Track if any items were updated
-            items_updated = False
-            
-            # Update delivery status in waiter order based on Sales Order
+            from restaurant_management.api.kds_display import clear_station_tickets_cache
+            from restaurant_management.restaurant_management.utils.order_sync import (
+                apply_item_sync,
+                diff_sales_order_items,
+                get_waiter_order_items,
+            )
+
+            waiter_order_status = frappe.db.get_value("Waiter Order", self.restaurant_waiter_order, "status")
+            fully_delivered = self.per_delivered == 100 and waiter_order_status != "Paid"
+
+            # Pair rows by their waiter_order_item link and only write what changed
+            diff = diff_sales_order_items(
+                self.items,
+                get_waiter_order_items(self.restaurant_waiter_order),
+                fully_delivered=fully_delivered
+            )
             for so_item in self.items:
-                if so_item.item_code in waiter_items:
-                    waiter_item = waiter_items[so_item.item_code]
-                    
-                    # Set waiter_order_item reference in sales order item if not already set
-                    if hasattr(so_item, "waiter_order_item") and not so_item.waiter_order_item:
-                        so_item.waiter_order_item = waiter_item.name
-                        frappe.db.set_value("Sales Order Item", so_item.name, "waiter_order_item", waiter_item.name)
-                    
-                    # Update status based on delivery
-                    if so_item.delivered_qty >= so_item.qty and waiter_item.status != "Served":
-                        waiter_item.status = "Served"
-                        waiter_item.last_update_time = now_datetime()
-                        waiter_item.last_update_by = frappe.session.user
-                        items_updated = True
-            
-            # If Sales Order is fully delivered, ensure all waiter order items are served
-            if self.per_delivered == 100 and waiter_order.status != "Paid":
-                for item in waiter_order.items:
-                    if item.status != "Served":
-                        item.status = "Served"
-                        item.last_update_time = now_datetime()
-                        item.last_update_by = frappe.session.user
-                        items_updated = True
-                
-                # If all items are served, update waiter order status to "Served"
-                waiter_order.status = "Served"
-                items_updated = True
-            
-            # Save waiter order if any items were updated
-            if items_updated:
-                waiter_order.save()
-                frappe.logger().info(f"Updated Waiter Order {waiter_order.name} items based on Sales Order {self.name}")
+                if so_item.name in diff["links"]:
+                    so_item.waiter_order_item = diff["links"][so_item.name]
+
+            apply_item_sync(diff["links"], diff["served"])
+
+            # If Sales Order is fully delivered, the whole waiter order is served
+            order_served = fully_delivered and waiter_order_status not in ("Served", "Cancelled")
+            if order_served:
+                frappe.db.set_value("Waiter Order", self.restaurant_waiter_order, "status", "Served")
+
+            if diff["served"] or order_served:
+                clear_station_tickets_cache()
+                frappe.logger().info(
+                    f"Updated {len(diff['served'])} items of Waiter Order {self.restaurant_waiter_order} based on Sales Order {self.name}"
+                )
         except Exception as e:
             frappe.log_error(frappe.get_traceback(), f"Error syncing waiter order items: {str(e)}")
 
@@ -0,0 +1,96 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+class Document:
+    def get(self, key):
+        return getattr(self, key, None)
+
+
+class DuplicatePayment(Exception):
+    pass
+
+
+INVOICE_MODULES = {
+    "Sales Invoice": (
+        "restaurant_management.restaurant_management.overrides.sales_invoice",
+        "erpnext.accounts.doctype.sales_invoice.sales_invoice",
+        "SalesInvoice",
+        "RestaurantSalesInvoice",
+    ),
+    "POS Invoice": (
+        "restaurant_management.restaurant_management.overrides.pos_invoice",
+        "erpnext.accounts.doctype.pos_invoice.pos_invoice",
+        "POSInvoice",
+        "RestaurantPOSInvoice",
+    ),
+}
+
+
+@pytest.fixture
+def invoices(monkeypatch):
+    # WO-1 was paid by SINV-1
+    def sql(query, values=None, as_dict=False):
+        if "FOR UPDATE" in query:
+            return [FrappeDict(settled_by_doctype="Sales Invoice", settled_by="SINV-1")]
+        return None
+
+    def throw(message, title=None):
+        raise DuplicatePayment(message)
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._ = lambda text: text
+    fake_frappe.throw = throw
+    fake_frappe.db = SimpleNamespace(sql=MagicMock(side_effect=sql))
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(now_datetime=lambda: "now"))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.settlement", raising=False)
+
+    classes = {}
+    for doctype, (module_name, erpnext_module, base, cls) in INVOICE_MODULES.items():
+        parts = erpnext_module.split(".")
+        for i in range(1, len(parts)):
+            monkeypatch.setitem(sys.modules, ".".join(parts[:i]), types.ModuleType(".".join(parts[:i])))
+        stub = types.ModuleType(erpnext_module)
+        setattr(stub, base, Document)
+        monkeypatch.setitem(sys.modules, erpnext_module, stub)
+        monkeypatch.delitem(sys.modules, module_name, raising=False)
+        classes[doctype] = getattr(importlib.import_module(module_name), cls)
+
+    yield classes, fake_frappe
+
+    for module_name, *_rest in INVOICE_MODULES.values():
+        sys.modules.pop(module_name, None)
+
+
+def make_invoice(cls, doctype, name, **values):
+    invoice = cls()
+    invoice.doctype = doctype
+    invoice.name = name
+    invoice.restaurant_waiter_order = "WO-1"
+    for key, value in values.items():
+        setattr(invoice, key, value)
+    return invoice
+
+
+@pytest.mark.parametrize("doctype", list(INVOICE_MODULES))
+def test_return_against_settled_order_is_not_a_duplicate_payment(invoices, doctype):
+    classes, fake_frappe = invoices
+
+    # The return carries the order link copied from the invoice it reverses
+    make_invoice(classes[doctype], doctype, "RET-1", is_return=1, return_against="SINV-1").claim_waiter_order()
+    assert fake_frappe.db.sql.call_count == 0
+
+    with pytest.raises(DuplicatePayment):
+        make_invoice(classes[doctype], doctype, "INV-2").claim_waiter_order()
@@ -0,0 +1,107 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+@pytest.fixture
+def payment_entry(monkeypatch):
+    invoices = {
+        f"SINV-{i}": FrappeDict(
+            name=f"SINV-{i}", branch=None, branch_code=None,
+            restaurant_waiter_order=f"WO-{i}", outstanding_amount=0
+        )
+        for i in range(1, 6)
+    }
+    orders = {
+        f"WO-{i}": FrappeDict(name=f"WO-{i}", status="Paid" if i == 1 else "Served", table=f"T{i}")
+        for i in range(1, 6)
+    }
+    tables = {f"T{i}": FrappeDict(name=f"T{i}", branch="Jakarta", branch_code="JKT") for i in range(1, 6)}
+    sources = {"Sales Invoice": invoices, "Waiter Order": orders, "Table": tables}
+
+    def get_all(doctype, filters=None, fields=None, **kwargs):
+        return [FrappeDict(sources[doctype][name]) for name in filters["name"][1] if name in sources[doctype]]
+
+    def get_doc(doctype, name):
+        doc = MagicMock()
+        doc.name = name
+        return doc
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._ = lambda msg: msg
+    fake_frappe.get_all = MagicMock(side_effect=get_all)
+    fake_frappe.get_doc = MagicMock(side_effect=get_doc)
+    fake_frappe.msgprint = MagicMock()
+    fake_frappe.log_error = MagicMock()
+    fake_frappe.get_traceback = lambda: "tb"
+    fake_frappe.logger = lambda: SimpleNamespace(info=lambda *a, **k: None)
+    fake_frappe.db = SimpleNamespace(get_value=MagicMock(), exists=MagicMock())
+
+    payment_module = types.ModuleType("erpnext.accounts.doctype.payment_entry.payment_entry")
+    payment_module.PaymentEntry = object
+    for name in ["erpnext", "erpnext.accounts", "erpnext.accounts.doctype", "erpnext.accounts.doctype.payment_entry"]:
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "erpnext.accounts.doctype.payment_entry.payment_entry", payment_module)
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(now_datetime=lambda: "now"))
+    for name in [
+        "restaurant_management.restaurant_management.overrides.payment_entry",
+        "restaurant_management.restaurant_management.utils.settlement",
+    ]:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.overrides.payment_entry")
+
+    doc = SimpleNamespace(
+        name="PE-1",
+        branch=None,
+        branch_code=None,
+        docstatus=0,
+        flags=FrappeDict(),
+        references=[
+            SimpleNamespace(reference_doctype="Sales Invoice", reference_name=name) for name in invoices
+        ],
+    )
+    return module, fake_frappe, doc
+
+
+def test_validate_hooks_share_batched_reference_lookups(payment_entry):
+    module, fake_frappe, doc = payment_entry
+
+    module.set_branch_from_reference(doc)
+    module.CustomPaymentEntry.validate_waiter_order_payment(doc)
+
+    assert (doc.branch, doc.branch_code) == ("Jakarta", "JKT")
+    assert fake_frappe.msgprint.call_count == 1
+
+    # One projection per doctype for five invoices, shared across both hooks
+    queried = [call.args[0] for call in fake_frappe.get_all.call_args_list]
+    assert queried == ["Sales Invoice", "Waiter Order", "Table"]
+    assert fake_frappe.get_doc.call_count == 0
+    assert fake_frappe.db.exists.call_count == 0
+
+
+def test_submit_settles_all_paid_orders_in_one_batch(payment_entry):
+    module, fake_frappe, doc = payment_entry
+    module.settle_waiter_orders = MagicMock()
+    doc.branch = "Jakarta"
+    doc.docstatus = 1
+
+    module.update_restaurant_status(doc)
+
+    module.settle_waiter_orders.assert_called_once()
+    assert module.settle_waiter_orders.call_args.args[0] == ["WO-1", "WO-2", "WO-3", "WO-4", "WO-5"]
+    assert fake_frappe.get_doc.call_count == 0
+    assert fake_frappe.get_all.call_count == 3
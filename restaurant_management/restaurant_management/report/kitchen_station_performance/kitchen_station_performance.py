@@ -0,0 +1,180 @@
+# Copyright (c) 2023, PT. Inovasi Terbaik Bangsa and contributors
+# For license information, please see license.txt
+
+import frappe
+import json
+from frappe import _
+from frappe.utils import flt, cint
+
+from restaurant_management.utils.metrics import histogram_percentile, merge_histograms
+
+def execute(filters=None):
+    if not filters:
+        filters = {}
+
+    columns = get_columns()
+    data = get_data(filters)
+    chart = get_chart_data(data)
+
+    return columns, data, None, chart
+
+
+def get_columns():
+    return [
+        {
+            "label": _("Kitchen Station"),
+            "fieldname": "kitchen_station",
+            "fieldtype": "Link",
+            "options": "Kitchen Station",
+            "width": 160
+        },
+        {
+            "label": _("Branch"),
+            "fieldname": "branch_code",
+            "fieldtype": "Data",
+            "width": 100
+        },
+        {
+            "label": _("Items Completed"),
+            "fieldname": "ticket_count",
+            "fieldtype": "Int",
+            "width": 120
+        },
+        {
+            "label": _("Avg. Ticket Time (min)"),
+            "fieldname": "avg_minutes",
+            "fieldtype": "Float",
+            "precision": 1,
+            "width": 150
+        },
+        {
+            "label": _("P50 (min)"),
+            "fieldname": "p50_minutes",
+            "fieldtype": "Float",
+            "precision": 1,
+            "width": 100
+        },
+        {
+            "label": _("P95 (min)"),
+            "fieldname": "p95_minutes",
+            "fieldtype": "Float",
+            "precision": 1,
+            "width": 100
+        },
+        {
+            "label": _("Avg. Cook Time (min)"),
+            "fieldname": "avg_cook_minutes",
+            "fieldtype": "Float",
+            "precision": 1,
+            "width": 150
+        },
+        {
+            "label": _("Busiest Hour"),
+            "fieldname": "busiest_hour",
+            "fieldtype": "Datetime",
+            "width": 160
+        }
+    ]
+
+
+def get_data(filters):
+    conditions, values = get_conditions(filters)
+
+    # Reads only the pre-aggregated hourly rows, never the raw event log
+    hourly_stats = frappe.db.sql("""
+        SELECT
+            kitchen_station, branch_code, hour, ticket_count, total_seconds,
+            cook_count, total_cook_seconds, histogram
+        FROM
+            `tabKitchen Station Hourly Stat`
+        WHERE
+            1 = 1
+            {conditions}
+        ORDER BY
+            kitchen_station, hour
+    """.format(conditions=conditions), values, as_dict=1)
+
+    stations = {}
+    for stat in hourly_stats:
+        row = stations.setdefault(stat.kitchen_station, {
+            "kitchen_station": stat.kitchen_station,
+            "branch_code": stat.branch_code,
+            "ticket_count": 0,
+            "total_seconds": 0,
+            "cook_count": 0,
+            "total_cook_seconds": 0,
+            "histogram": {},
+            "busiest_hour": None,
+            "busiest_count": 0
+        })
+        row["ticket_count"] += cint(stat.ticket_count)
+        row["total_seconds"] += flt(stat.total_seconds)
+        row["cook_count"] += cint(stat.cook_count)
+        row["total_cook_seconds"] += flt(stat.total_cook_seconds)
+        row["histogram"] = merge_histograms(row["histogram"], json.loads(stat.histogram or "{}"))
+
+        if cint(stat.ticket_count) > row["busiest_count"]:
+            row["busiest_count"] = cint(stat.ticket_count)
+            row["busiest_hour"] = stat.hour
+
+    data = []
+    for row in stations.values():
+        data.append({
+            "kitchen_station": row["kitchen_station"],
+            "branch_code": row["branch_code"],
+            "ticket_count": row["ticket_count"],
+            "avg_minutes": flt(row["total_seconds"] / row["ticket_count"] / 60, 1) if row["ticket_count"] else 0,
+            "p50_minutes": flt(flt(histogram_percentile(row["histogram"], 50)) / 60, 1),
+            "p95_minutes": flt(flt(histogram_percentile(row["histogram"], 95)) / 60, 1),
+            "avg_cook_minutes": flt(row["total_cook_seconds"] / row["cook_count"] / 60, 1) if row["cook_count"] else 0,
+            "busiest_hour": row["busiest_hour"]
+        })
+
+    # Slowest stations first
+    return sorted(data, key=lambda x: x["p95_minutes"], reverse=True)
+
+
+def get_conditions(filters):
+    conditions = []
+    values = {}
+
+    if filters.get("from_date"):
+        conditions.append("hour >= %(from_date)s")
+        values["from_date"] = filters.get("from_date")
+    if filters.get("to_date"):
+        conditions.append("hour < DATE_ADD(%(to_date)s, INTERVAL 1 DAY)")
+        values["to_date"] = filters.get("to_date")
+    if filters.get("kitchen_station"):
+        conditions.append("kitchen_station = %(kitchen_station)s")
+        values["kitchen_station"] = filters.get("kitchen_station")
+    if filters.get("branch_code"):
+        branch_code = filters.get("branch_code")
+        conditions.append("branch_code IN %(branch_code)s")
+        values["branch_code"] = branch_code if isinstance(branch_code, (list, tuple)) else [branch_code]
+
+    return (" AND " + " AND ".join(conditions) if conditions else ""), values
+
+
+def get_chart_data(data):
+    if not data:
+        return None
+
+    top_stations = data[:10]
+
+    return {
+        "data": {
+            "labels": [row["kitchen_station"] for row in top_stations],
+            "datasets": [
+                {
+                    "name": _("P50 (min)"),
+                    "values": [row["p50_minutes"] for row in top_stations]
+                },
+                {
+                    "name": _("P95 (min)"),
+                    "values": [row["p95_minutes"] for row in top_stations]
+                }
+            ]
+        },
+        "type": "bar",
+        "colors": ["#5e64ff", "#ff5858"]
+    }
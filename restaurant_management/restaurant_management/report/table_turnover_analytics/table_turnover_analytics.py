@@ -5,6 +5,8 @@ import frappe
 from frappe import _
 from frappe.utils import flt, time_diff_in_hours
 
+from restaurant_management.restaurant_management.utils.archive import get_union_source
+
 def execute(filters=None):
     if not filters:
         filters = {}
@@ -81,6 +83,8 @@ def get_columns(filters):
 
 def get_data(filters):
     conditions = get_conditions(filters)
+    # Live and archived orders alike
+    waiter_orders = get_union_source("Waiter Order", ["name", "table", "order_time", "docstatus"])
     
     # Get sales data by table
     sales_data = frappe.db.sql("""
@@ -92,7 +96,7 @@ def get_data(filters):
             SUM(si.base_grand_total) as total_sales,
             SUM(si.base_grand_total) / COUNT(DISTINCT wo.name) as average_order
         FROM 
-            `tabWaiter Order` wo
+            {waiter_orders} wo
         JOIN 
             `tabTable` t ON t.name = wo.table
         LEFT JOIN 
@@ -105,7 +109,7 @@ def get_data(filters):
             wo.table, t.branch_code
         ORDER BY 
             total_sales DESC
-    """.format(conditions=conditions), as_dict=1)
+    """.format(conditions=conditions, waiter_orders=waiter_orders), as_dict=1)
     
     # Get occupancy data by table
     occupancy_data = frappe.db.sql("""
@@ -119,7 +123,7 @@ def get_data(filters):
                 )
             )) / 60 as average_occupancy
         FROM 
-            `tabWaiter Order` wo
+            {waiter_orders} wo
         JOIN 
             `tabTable` t ON t.name = wo.table
         LEFT JOIN 
@@ -130,7 +134,7 @@ def get_data(filters):
             {conditions}
         GROUP BY 
             wo.table
-    """.format(conditions=conditions), as_dict=1)
+    """.format(conditions=conditions, waiter_orders=waiter_orders), as_dict=1)
     
     # Combine both datasets
     occupancy_dict = {d.table: d.average_occupancy for d in occupancy_data}
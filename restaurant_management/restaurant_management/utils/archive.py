@@ -0,0 +1,149 @@
+import frappe
+from frappe.utils import add_days, cint, now_datetime
+from typing import Iterable, List
+
+# Items of closed orders older than this many days are moved out of the live table.
+# Override per site with "restaurant_archive_after_days" in site_config.json.
+DEFAULT_ARCHIVE_AFTER_DAYS = 90
+ARCHIVE_BATCH_SIZE = 500
+# Upper bound per scheduler run so a large backlog is worked off over several nights
+MAX_BATCHES_PER_RUN = 200
+
+ARCHIVABLE_STATUSES = ("Paid", "Cancelled")
+
+# Archive tables are plain tables (not doctypes) cloned from the live schema,
+# so migrate and link validation never touch them. Waiter Order headers stay
+# live: invoices, Sales Orders, Kitchen Item Events and Kitchen Print Jobs
+# link to them, and the bulk of the rows is in the items anyway.
+ARCHIVE_TABLES = {
+    "Waiter Order Item": "Waiter Order Item Archive",
+}
+
+def get_archive_after_days() -> int:
+    """Age in days after which closed Waiter Orders are archived"""
+    return cint(frappe.conf.get("restaurant_archive_after_days")) or DEFAULT_ARCHIVE_AFTER_DAYS
+
+def ensure_archive_tables() -> None:
+    """
+    Create the archive tables, or add columns the live tables gained since
+
+    The archive keeps the live column layout so rows are copied with a plain
+    INSERT ... SELECT.
+    """
+    for doctype, archive in ARCHIVE_TABLES.items():
+        if not frappe.db.table_exists(archive, cached=False):
+            frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `tab{archive}` LIKE `tab{doctype}`")
+            continue
+
+        missing = set(frappe.db.get_table_columns(doctype)) - set(frappe.db.get_table_columns(archive))
+        if missing:
+            live_columns = {
+                row.Field: row for row in frappe.db.sql(f"SHOW COLUMNS FROM `tab{doctype}`", as_dict=1)
+            }
+            for column in sorted(missing):
+                frappe.db.sql_ddl(
+                    f"ALTER TABLE `tab{archive}` ADD COLUMN `{column}` {live_columns[column].Type} NULL"
+                )
+
+def get_shared_columns(doctype: str) -> List[str]:
+    """Columns present in both the live and the archive table, in live order"""
+    archived = set(frappe.db.get_table_columns(ARCHIVE_TABLES[doctype]))
+    return [column for column in frappe.db.get_table_columns(doctype) if column in archived]
+
+def archive_waiter_orders(batch_size: int = ARCHIVE_BATCH_SIZE, max_batches: int = MAX_BATCHES_PER_RUN) -> int:
+    """
+    Move the items of Paid and Cancelled Waiter Orders past the retention window into the archive
+
+    Runs from the scheduler. Each batch copies the items, deletes them from
+    the live table, flags their orders items_archived and commits, so locks
+    are held briefly and an interrupted run simply resumes on the next one.
+    The order rows stay live so documents linking to them keep validating.
+    Orders a table still points at, and paid orders the ingredient depletion
+    or table turnover jobs have not processed yet, are left in place.
+
+    Args:
+        batch_size: Orders moved per transaction
+        max_batches: Maximum number of batches in one run
+
+    Returns:
+        Number of orders archived
+    """
+    ensure_archive_tables()
+
+    item_columns = ", ".join(f"`{column}`" for column in get_shared_columns("Waiter Order Item"))
+    cutoff = add_days(now_datetime(), -get_archive_after_days())
+
+    archived = 0
+    for _batch in range(max_batches):
+        names = frappe.db.sql("""
+            SELECT wo.name
+            FROM `tabWaiter Order` wo
+            WHERE wo.status IN %(statuses)s
+                AND wo.modified < %(cutoff)s
+                AND wo.items_archived = 0
+                AND (wo.status != 'Paid' OR (wo.ingredients_depleted = 1 AND wo.turnover_recorded = 1))
+                AND NOT EXISTS (
+                    SELECT 1 FROM `tabTable` t WHERE t.current_pos_order = wo.name
+                )
+            ORDER BY wo.modified
+            LIMIT %(limit)s
+        """, {"statuses": ARCHIVABLE_STATUSES, "cutoff": cutoff, "limit": batch_size}, pluck=True)
+
+        if not names:
+            break
+
+        try:
+            move_rows("Waiter Order Item", item_columns, "parenttype = 'Waiter Order' AND parent IN %s", names)
+            frappe.db.sql("""
+                UPDATE `tabWaiter Order`
+                SET items_archived = 1
+                WHERE name IN %s
+            """, [names])
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                f"Error archiving Waiter Orders: {frappe.get_traceback()}",
+                "Waiter Order Archive Error"
+            )
+            break
+
+        archived += len(names)
+        if len(names) < batch_size:
+            break
+
+    if archived:
+        frappe.logger().info(f"Archived the items of {archived} Waiter Orders older than {cutoff}")
+
+    return archived
+
+def move_rows(doctype: str, columns: str, condition: str, names: List[str]) -> None:
+    """Copy matching rows into the archive table and delete them from the live one"""
+    archive = ARCHIVE_TABLES[doctype]
+    frappe.db.sql(f"""
+        INSERT IGNORE INTO `tab{archive}` ({columns})
+        SELECT {columns} FROM `tab{doctype}` WHERE {condition}
+    """, [names])
+    frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE {condition}", [names])
+
+def get_union_source(doctype: str, fields: Iterable[str]) -> str:
+    """
+    SQL source for reports that should see live and archived rows alike
+
+    Use in place of the table name, e.g. ``FROM {source} wo``. Falls back to
+    the live table until the archive exists.
+
+    Args:
+        doctype: "Waiter Order" or "Waiter Order Item"; Waiter Order rows are
+            never archived, so it is always the live table
+        fields: Columns the query needs
+
+    Returns:
+        A table name or a parenthesised UNION ALL subquery
+    """
+    archive = ARCHIVE_TABLES.get(doctype)
+    if not archive or not frappe.db.table_exists(archive):
+        return f"`tab{doctype}`"
+
+    columns = ", ".join(f"`{field}`" for field in fields)
+    return f"(SELECT {columns} FROM `tab{doctype}` UNION ALL SELECT {columns} FROM `tab{archive}`)"
@@ -0,0 +1,166 @@
+import frappe
+from frappe.utils import add_days, cint, flt, getdate, nowdate
+from typing import Any, Dict, List, Optional
+
+# Paid orders are depleted once their day is over, one Stock Entry per branch and day
+DEPLETION_STOCK_ENTRY_TYPE = "Material Issue"
+# Posting time of the daily entry: after the last sale of the day
+DEPLETION_POSTING_TIME = "23:59:59"
+# Upper bound of branch-days per scheduler run so a backlog is worked off over several nights
+MAX_GROUPS_PER_RUN = 500
+
+def deplete_ingredients(up_to: Optional[str] = None, max_groups: int = MAX_GROUPS_PER_RUN) -> int:
+    """
+    Issue the recipe ingredients of paid Waiter Orders from stock
+
+    Runs from the scheduler. Paid orders of each finished day are expanded
+    through the default BOM (recipe) of every item sold and summed per
+    ingredient in SQL, then written as one Material Issue per branch and day
+    from the branch's default warehouse. Checkout never writes to the stock
+    ledger. Each branch-day commits on its own, so a failing one (no
+    warehouse, insufficient stock) is retried on the next run without
+    holding up the others. Items without a default BOM issue nothing, and
+    orders paid after their day was depleted go into an extra entry.
+
+    Args:
+        up_to: Last day to deplete (defaults to yesterday)
+        max_groups: Maximum number of branch-days handled in this run
+
+    Returns:
+        Number of Stock Entries submitted
+    """
+    up_to = getdate(up_to or add_days(nowdate(), -1))
+    groups = frappe.db.sql("""
+        SELECT branch, branch_code, DATE(order_time) AS posting_date
+        FROM `tabWaiter Order`
+        WHERE status = 'Paid' AND ingredients_depleted = 0 AND order_time < %s
+        GROUP BY branch, branch_code, DATE(order_time)
+        ORDER BY posting_date
+        LIMIT %s
+    """, (add_days(up_to, 1), cint(max_groups)), as_dict=1)
+    if not groups:
+        return 0
+
+    warehouses = get_branch_warehouses({group.branch for group in groups if group.branch})
+
+    submitted = 0
+    for group in groups:
+        try:
+            if deplete_branch_day(group, warehouses.get(group.branch)):
+                submitted += 1
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                f"Ingredient depletion failed for branch {group.branch} on {group.posting_date}: "
+                f"{frappe.get_traceback()}",
+                "Ingredient Depletion Error"
+            )
+
+    return submitted
+
+def deplete_branch_day(group: Dict[str, Any], warehouse: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Issue the ingredients of one branch's paid orders of one day
+
+    Args:
+        group: Row with branch, branch_code and posting_date
+        warehouse: Row with name and company of the branch's default warehouse
+
+    Returns:
+        Name of the submitted Stock Entry, or None if no item had a recipe
+    """
+    start = getdate(group.posting_date)
+    order_ids = frappe.db.sql("""
+        SELECT name FROM `tabWaiter Order`
+        WHERE status = 'Paid' AND ingredients_depleted = 0
+            AND branch <=> %s AND branch_code <=> %s
+            AND order_time >= %s AND order_time < %s
+        FOR UPDATE
+    """, (group.branch, group.branch_code, start, add_days(start, 1)), pluck=True)
+    if not order_ids:
+        return None
+
+    ingredients = get_ingredient_usage(order_ids)
+
+    stock_entry = None
+    if ingredients:
+        if not warehouse:
+            frappe.throw(f"Branch {group.branch} has no default warehouse to issue ingredients from")
+        stock_entry = make_stock_entry(group, warehouse, ingredients, len(order_ids))
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET ingredients_depleted = 1, ingredient_stock_entry = %s
+        WHERE name IN %s
+    """, (stock_entry, order_ids))
+    return stock_entry
+
+def get_ingredient_usage(order_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Expand sold items into ingredient quantities with one aggregate query
+
+    Each item sold contributes qty x (BOM item stock qty / BOM quantity) of
+    every ingredient in the default, active BOM of its item code. Cancelled
+    items are not counted.
+
+    Returns:
+        Rows with item_code, stock_uom and qty (in stock UOM) per ingredient
+    """
+    rows = frappe.db.sql("""
+        SELECT bom_item.item_code, bom_item.stock_uom,
+            SUM(woi.qty * bom_item.stock_qty / bom.quantity) AS qty
+        FROM `tabWaiter Order Item` woi
+        INNER JOIN `tabBOM` bom
+            ON bom.item = woi.item_code AND bom.is_default = 1 AND bom.is_active = 1 AND bom.docstatus = 1
+        INNER JOIN `tabBOM Item` bom_item
+            ON bom_item.parent = bom.name AND bom_item.parenttype = 'BOM'
+        WHERE woi.parent IN %s AND woi.parenttype = 'Waiter Order'
+            AND woi.status != 'Cancelled' AND bom.quantity > 0
+        GROUP BY bom_item.item_code, bom_item.stock_uom
+        ORDER BY bom_item.item_code
+    """, [order_ids], as_dict=1)
+    return [row for row in rows if flt(row.qty) > 0]
+
+def make_stock_entry(group: Dict[str, Any], warehouse: Dict[str, Any], ingredients: List[Dict[str, Any]], order_count: int) -> str:
+    """Submit one Material Issue for a branch-day's ingredient usage"""
+    stock_entry = frappe.new_doc("Stock Entry")
+    stock_entry.update({
+        "stock_entry_type": DEPLETION_STOCK_ENTRY_TYPE,
+        "purpose": DEPLETION_STOCK_ENTRY_TYPE,
+        "company": warehouse.company,
+        "set_posting_time": 1,
+        "posting_date": group.posting_date,
+        "posting_time": DEPLETION_POSTING_TIME,
+        "from_warehouse": warehouse.name,
+        "remarks": (
+            f"Recipe ingredients of {order_count} paid Waiter Orders "
+            f"of branch {group.branch_code or group.branch} on {group.posting_date}"
+        ),
+    })
+    for ingredient in ingredients:
+        stock_entry.append("items", {
+            "item_code": ingredient.item_code,
+            "qty": flt(ingredient.qty, 6),
+            "uom": ingredient.stock_uom,
+            "stock_uom": ingredient.stock_uom,
+            "conversion_factor": 1,
+            "s_warehouse": warehouse.name,
+        })
+
+    stock_entry.insert(ignore_permissions=True)
+    stock_entry.submit()
+    return stock_entry.name
+
+def get_branch_warehouses(branches) -> Dict[str, Any]:
+    """Default warehouse (name and company) per branch, read with one query"""
+    if not branches:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT branch.name AS branch, warehouse.name, warehouse.company
+        FROM `tabBranch` branch
+        INNER JOIN `tabWarehouse` warehouse ON warehouse.name = branch.default_warehouse
+        WHERE branch.name IN %s
+    """, [list(branches)], as_dict=1)
+    return {row.branch: row for row in rows}
@@ -0,0 +1,222 @@
+import frappe
+import json
+from typing import Any, Dict, Iterable, List, Optional
+from frappe.utils import get_datetime, now_datetime, time_diff_in_seconds, flt, cint
+
+from restaurant_management.utils.metrics import (
+    add_to_histogram,
+    histogram_percentile,
+    merge_histograms,
+    new_histogram,
+)
+
+EVENT_DOCTYPE = "Kitchen Item Event"
+STAT_DOCTYPE = "Kitchen Station Hourly Stat"
+
+# Number of unaggregated events folded per transaction by the scheduler job
+AGGREGATION_BATCH_SIZE = 5000
+
+EVENT_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "waiter_order_item", "waiter_order", "kitchen_station", "branch_code",
+    "from_status", "to_status", "event_time", "user",
+    "elapsed_seconds", "duration_seconds", "aggregated"
+]
+
+def record_item_events(items: Iterable[Dict[str, Any]], to_status: str, event_time=None, user: Optional[str] = None) -> int:
+    """
+    Append one Kitchen Item Event per item status transition
+
+    Must be called before the caller commits so the events land in the same
+    transaction as the status change itself.
+
+    Args:
+        items: Rows with name, parent, status (before the change), kitchen_station,
+            creation, last_update_time and optionally branch_code; without it
+            the branch_code of the parent Waiter Order is used
+        to_status: Status the items were moved to
+        event_time: Time of the transition (defaults to now)
+        user: User that made the change (defaults to session user)
+
+    Returns:
+        Number of events written
+    """
+    event_time = event_time or now_datetime()
+    user = user or frappe.session.user
+
+    items = [item for item in items if item.get("status") != to_status]
+    branch_codes = get_order_branch_codes(
+        {item.get("parent") for item in items if not item.get("branch_code") and item.get("parent")}
+    )
+
+    values = []
+    for item in items:
+        created = get_datetime(item.get("creation")) if item.get("creation") else event_time
+        last_change = get_datetime(item.get("last_update_time")) if item.get("last_update_time") else created
+
+        values.append((
+            frappe.generate_hash(length=12), event_time, event_time, user, user, 0,
+            item.get("name"), item.get("parent"), item.get("kitchen_station"),
+            item.get("branch_code") or branch_codes.get(item.get("parent")),
+            item.get("status"), to_status, event_time, user,
+            max(time_diff_in_seconds(event_time, created), 0),
+            max(time_diff_in_seconds(event_time, last_change), 0),
+            0
+        ))
+
+    if values:
+        frappe.db.bulk_insert(EVENT_DOCTYPE, EVENT_FIELDS, values)
+
+    return len(values)
+
+def get_order_branch_codes(order_ids) -> Dict[str, str]:
+    """Branch code of each Waiter Order, read in one query"""
+    if not order_ids:
+        return {}
+
+    return dict(frappe.get_all(
+        "Waiter Order",
+        filters={"name": ["in", list(order_ids)]},
+        fields=["name", "branch_code"],
+        as_list=True,
+        ignore_permissions=True,
+        limit_page_length=0
+    ))
+
+def get_hour_start(value) -> Any:
+    """Truncate a datetime to the start of its hour"""
+    return get_datetime(value).replace(minute=0, second=0, microsecond=0)
+
+def fold_events(stat: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fold Ready events into an hourly station stat
+
+    Args:
+        stat: Existing stat values (may be empty for a new hour)
+        events: Kitchen Item Events that moved an item to Ready
+
+    Returns:
+        Updated stat values including recomputed average and percentiles
+    """
+    histogram = stat.get("histogram") or new_histogram()
+    if isinstance(histogram, str):
+        histogram = json.loads(histogram)
+    histogram = merge_histograms(histogram)
+
+    ticket_count = cint(stat.get("ticket_count"))
+    total_seconds = flt(stat.get("total_seconds"))
+    cook_count = cint(stat.get("cook_count"))
+    total_cook_seconds = flt(stat.get("total_cook_seconds"))
+
+    for event in events:
+        elapsed = flt(event.get("elapsed_seconds"))
+        add_to_histogram(histogram, elapsed)
+        ticket_count += 1
+        total_seconds += elapsed
+
+        if event.get("from_status") == "Cooking":
+            cook_count += 1
+            total_cook_seconds += flt(event.get("duration_seconds"))
+
+    return {
+        "ticket_count": ticket_count,
+        "total_seconds": total_seconds,
+        "cook_count": cook_count,
+        "total_cook_seconds": total_cook_seconds,
+        "avg_seconds": flt(total_seconds / ticket_count, 2) if ticket_count else 0,
+        "p50_seconds": flt(histogram_percentile(histogram, 50), 2),
+        "p95_seconds": flt(histogram_percentile(histogram, 95), 2),
+        "avg_cook_seconds": flt(total_cook_seconds / cook_count, 2) if cook_count else 0,
+        "histogram": json.dumps(histogram, sort_keys=True)
+    }
+
+def aggregate_station_stats(batch_size: int = AGGREGATION_BATCH_SIZE) -> int:
+    """
+    Fold new Kitchen Item Events into Kitchen Station Hourly Stat
+
+    Runs from the scheduler. Only events not yet aggregated are read, so each
+    run costs time proportional to the new events rather than the full log.
+
+    Args:
+        batch_size: Maximum number of events processed per transaction
+
+    Returns:
+        Number of events processed
+    """
+    processed = 0
+
+    while True:
+        events = frappe.db.sql("""
+            SELECT name, kitchen_station, branch_code, from_status, to_status,
+                event_time, elapsed_seconds, duration_seconds
+            FROM `tabKitchen Item Event`
+            WHERE aggregated = 0
+            ORDER BY event_time
+            LIMIT %s
+        """, batch_size, as_dict=1)
+
+        if not events:
+            break
+
+        try:
+            groups = {}
+            for event in events:
+                if event.to_status != "Ready" or not event.kitchen_station:
+                    continue
+                key = (event.kitchen_station, get_hour_start(event.event_time))
+                groups.setdefault(key, []).append(event)
+
+            for (kitchen_station, hour), group in groups.items():
+                update_hourly_stat(kitchen_station, hour, group)
+
+            frappe.db.sql("""
+                UPDATE `tabKitchen Item Event`
+                SET aggregated = 1
+                WHERE name IN %s
+            """, [[event.name for event in events]])
+
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                f"Error aggregating kitchen station stats: {frappe.get_traceback()}",
+                "Kitchen Analytics Error"
+            )
+            break
+
+        processed += len(events)
+        if len(events) < batch_size:
+            break
+
+    return processed
+
+def update_hourly_stat(kitchen_station: str, hour, events: List[Dict[str, Any]]) -> None:
+    """
+    Merge a group of Ready events into the stat row for one station and hour
+
+    Args:
+        kitchen_station: Kitchen Station name
+        hour: Start of the hour
+        events: Ready events for that station and hour
+    """
+    existing = frappe.db.get_value(
+        STAT_DOCTYPE,
+        {"kitchen_station": kitchen_station, "hour": hour},
+        ["name", "ticket_count", "total_seconds", "cook_count", "total_cook_seconds", "histogram"],
+        as_dict=True
+    )
+
+    values = fold_events(existing or {}, events)
+
+    if existing:
+        frappe.db.set_value(STAT_DOCTYPE, existing.name, values)
+    else:
+        stat = frappe.get_doc(dict(
+            values,
+            doctype=STAT_DOCTYPE,
+            kitchen_station=kitchen_station,
+            branch_code=events[0].get("branch_code")
+                or frappe.db.get_value("Kitchen Station", kitchen_station, "branch_code"),
+            hour=hour
+        ))
+        stat.insert(ignore_permissions=True)
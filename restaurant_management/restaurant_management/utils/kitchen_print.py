@@ -0,0 +1,418 @@
+import ipaddress
+import json
+import os
+import socket
+import textwrap
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import frappe
+from frappe.utils import add_to_date, flt, format_datetime, get_datetime, now_datetime, time_diff_in_seconds
+
+PRINT_JOB_DOCTYPE = "Kitchen Print Job"
+PRINT_QUEUE = "short"
+
+# Tickets for one printer arriving within this window print as one batch
+BATCH_WINDOW_SECONDS = 2
+PRINT_BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+# Failed batches are retried after attempts x this delay
+RETRY_BASE_SECONDS = 60
+# Jobs left in Printing this long are assumed lost with their worker
+STALE_PRINTING_MINUTES = 5
+SOCKET_TIMEOUT_SECONDS = 5
+DEFAULT_TCP_PORT = 9100
+
+# site_config keys: directory file:// printers may write into, and network
+# printers allowed by hostname or outside the private address ranges
+PRINTER_SPOOL_DIR_KEY = "restaurant_printer_spool_dir"
+PRINTER_HOSTS_KEY = "restaurant_printer_hosts"
+# Spool directory (inside the site) used in developer mode when none is configured
+DEV_SPOOL_DIR = "printer_spool"
+
+# Characters per line of an 80mm printer in the default font
+TICKET_WIDTH = 42
+
+PRINT_JOB_FIELDS = [
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "kitchen_station", "waiter_order", "branch_code", "printer",
+    "status", "attempts", "ticket"
+]
+
+# ESC/POS control sequences
+ESC_INIT = b"\x1b@"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+GS_DOUBLE_SIZE = b"\x1d!\x11"
+GS_NORMAL_SIZE = b"\x1d!\x00"
+GS_FEED_AND_CUT = b"\x1dVA\x03"
+
+def render_ticket(
+    order: Any,
+    items: Iterable[Any],
+    station_name: str,
+    table_number: Optional[str] = None,
+    additional: bool = False
+) -> List[List[str]]:
+    """
+    Render the kitchen ticket of one station as styled lines
+
+    Args:
+        order: Waiter Order the items belong to
+        items: Waiter Order Items routed to the station
+        station_name: Station printed in the header
+        table_number: Table number printed in the header (defaults to the Table name)
+        additional: Whether the items were added to an order already in the kitchen
+
+    Returns:
+        List of [style, text] pairs; style is title, bold, text or rule
+    """
+    lines = [["title", station_name]]
+    if additional:
+        lines.append(["bold", "** ADDITIONAL **"])
+    lines += [
+        ["bold", f"Table {table_number or order.table}"],
+        ["text", order.name],
+        ["text", format_datetime(order.get("order_time") or now_datetime(), "dd-MM HH:mm")],
+        ["rule", ""],
+    ]
+
+    for item in items:
+        lines.append(["bold", f"{flt(item.qty):g} x {item.item_name or item.item_code}"])
+
+        attributes = item.get("variant_attributes")
+        if isinstance(attributes, str):
+            try:
+                attributes = json.loads(attributes)
+            except ValueError:
+                attributes = None
+        for attribute, value in (attributes or {}).items():
+            lines.append(["text", f"   {attribute}: {value}"])
+
+        if item.get("notes"):
+            lines.append(["text", f"   * {item.notes}"])
+
+    lines.append(["rule", ""])
+    return lines
+
+def encode_tickets(tickets: List[List[List[str]]], ticket_format: str = "ESC/POS", width: int = TICKET_WIDTH) -> bytes:
+    """
+    Encode a batch of rendered tickets for a printer
+
+    ESC/POS output prints the header in double size, item lines in bold and
+    cuts after each ticket. Plain text separates tickets with a rule and is
+    meant for file spools and printers without ESC/POS support.
+    """
+    if ticket_format == "Plain Text":
+        blocks = []
+        for ticket in tickets:
+            text = []
+            for style, value in ticket:
+                if style == "rule":
+                    text.append("-" * width)
+                else:
+                    text += wrap(value.upper() if style == "title" else value, width)
+            blocks.append("\n".join(text))
+        return ("\n" + "=" * width + "\n\n").join(blocks).encode("utf-8") + b"\n\n"
+
+    payload = bytearray(ESC_INIT)
+    for ticket in tickets:
+        for style, value in ticket:
+            if style == "rule":
+                payload += b"-" * width + b"\n"
+                continue
+
+            # Double size halves the characters per line
+            line_width = width // 2 if style == "title" else width
+            text = "\n".join(wrap(value, line_width)).encode("ascii", "replace") + b"\n"
+            if style == "title":
+                payload += GS_DOUBLE_SIZE + text + GS_NORMAL_SIZE
+            elif style == "bold":
+                payload += ESC_BOLD_ON + text + ESC_BOLD_OFF
+            else:
+                payload += text
+        payload += b"\n\n\n" + GS_FEED_AND_CUT
+    return bytes(payload)
+
+def wrap(text: str, width: int) -> List[str]:
+    """Wrap one ticket line, keeping its indent on continuation lines"""
+    indent = text[:len(text) - len(text.lstrip())]
+    return textwrap.wrap(text, width, subsequent_indent=indent) or [""]
+
+def queue_kitchen_tickets(order: Any, items: Iterable[Any], table_number: Optional[str] = None, additional: bool = False) -> int:
+    """
+    Queue one ticket per kitchen station for items sent to the kitchen
+
+    Must be called before the caller commits so the tickets are durable with
+    the order itself. Printing happens in a background job per printer,
+    started once the transaction commits.
+
+    Args:
+        order: Waiter Order the items were added to
+        items: Newly added Waiter Order Items (as returned by add_items_to_order)
+        table_number: Table number for the ticket header
+        additional: Whether the items were added to an existing order
+
+    Returns:
+        Number of tickets queued
+    """
+    by_station: Dict[str, List[Any]] = {}
+    for item in items:
+        if item.get("kitchen_station"):
+            by_station.setdefault(item.kitchen_station, []).append(item)
+
+    if not by_station:
+        return 0
+
+    stations = frappe.get_all(
+        "Kitchen Station",
+        filters={"name": ["in", list(by_station)], "printer_address": ["is", "set"]},
+        fields=["name", "station_name", "printer_address"]
+    )
+
+    now = now_datetime()
+    user = frappe.session.user
+    values = []
+    for station in stations:
+        ticket = render_ticket(order, by_station[station.name], station.station_name or station.name, table_number, additional)
+        values.append((
+            frappe.generate_hash(length=12), now, now, user, user, 0,
+            station.name, order.name, order.get("branch_code"), station.printer_address,
+            "Queued", 0, json.dumps(ticket)
+        ))
+
+    if values:
+        frappe.db.bulk_insert(PRINT_JOB_DOCTYPE, PRINT_JOB_FIELDS, values)
+        for printer in {station.printer_address for station in stations}:
+            enqueue_printer(printer)
+
+    return len(values)
+
+def enqueue_printer(printer: str) -> None:
+    """Start the spooler job of a printer once the current transaction commits"""
+    frappe.enqueue(
+        "restaurant_management.restaurant_management.utils.kitchen_print.process_printer_queue",
+        queue=PRINT_QUEUE,
+        job_id=f"kitchen_print::{printer}",
+        deduplicate=True,
+        enqueue_after_commit=True,
+        printer=printer
+    )
+
+def process_printer_queue(printer: str, batch_window: float = BATCH_WINDOW_SECONDS) -> int:
+    """
+    Background job: print the queued tickets of one printer
+
+    Waits until the oldest queued ticket is ``batch_window`` seconds old so
+    tickets sent together go out in one connection, then drains the queue
+    batch by batch. Stops at the first failed batch; the scheduler retries it.
+
+    Returns:
+        Number of tickets printed
+    """
+    printed = 0
+    while True:
+        oldest = frappe.db.sql(f"""
+            SELECT MIN(creation) FROM `tab{PRINT_JOB_DOCTYPE}`
+            WHERE printer = %s AND status = 'Queued'
+        """, printer)[0][0]
+        if not oldest:
+            break
+
+        wait = batch_window - time_diff_in_seconds(now_datetime(), get_datetime(oldest))
+        if wait > 0:
+            time.sleep(wait)
+
+        jobs = frappe.db.sql(f"""
+            SELECT job.name, job.ticket, job.attempts, ks.ticket_format
+            FROM `tab{PRINT_JOB_DOCTYPE}` job
+            LEFT JOIN `tabKitchen Station` ks ON ks.name = job.kitchen_station
+            WHERE job.printer = %s AND job.status = 'Queued'
+            ORDER BY job.creation
+            LIMIT %s
+        """, (printer, PRINT_BATCH_SIZE), as_dict=1)
+        if not jobs:
+            break
+
+        names = [job.name for job in jobs]
+        set_job_status(names, "Printing", attempts=True)
+        frappe.db.commit()
+
+        try:
+            # Stations sharing a printer may use different formats
+            by_format: Dict[str, List[Any]] = {}
+            for job in jobs:
+                by_format.setdefault(job.ticket_format or "ESC/POS", []).append(json.loads(job.ticket))
+            for ticket_format, tickets in by_format.items():
+                send_to_printer(printer, encode_tickets(tickets, ticket_format))
+        except Exception as e:
+            frappe.db.rollback()
+            set_job_status(names, "Failed", error=str(e))
+            frappe.db.commit()
+            frappe.log_error(
+                f"Error printing kitchen tickets on {printer}: {frappe.get_traceback()}",
+                "Kitchen Print Error"
+            )
+            break
+
+        set_job_status(names, "Printed", printed_at=now_datetime())
+        frappe.db.commit()
+        printed += len(names)
+
+    return printed
+
+def set_job_status(names: List[str], status: str, attempts: bool = False, error: Optional[str] = None, printed_at=None) -> None:
+    """Update the status of print jobs with one statement"""
+    frappe.db.sql(f"""
+        UPDATE `tab{PRINT_JOB_DOCTYPE}`
+        SET status = %(status)s,
+            attempts = attempts + %(attempt)s,
+            error = %(error)s,
+            printed_at = %(printed_at)s,
+            modified = %(now)s
+        WHERE name IN %(names)s
+    """, {
+        "status": status,
+        "attempt": 1 if attempts else 0,
+        "error": error,
+        "printed_at": printed_at,
+        "now": now_datetime(),
+        "names": names
+    })
+
+def get_spool_dir() -> Optional[str]:
+    """Directory file:// printers may write into, or None if they are disabled"""
+    spool_dir = frappe.conf.get(PRINTER_SPOOL_DIR_KEY)
+    if not spool_dir and frappe.conf.get("developer_mode"):
+        spool_dir = frappe.get_site_path(DEV_SPOOL_DIR)
+    return os.path.realpath(spool_dir) if spool_dir else None
+
+def validate_printer_address(address: str) -> Any:
+    """
+    Check that a printer address is safe for the print worker to write to
+
+    Printer addresses are set by restaurant managers but written to by the
+    background worker, so they are restricted:
+
+    - tcp://host[:port]: the host must be listed in ``restaurant_printer_hosts``
+      in site_config, or, when no list is set, be a private network IP
+      (loopback and link-local addresses are refused)
+    - file:///path: only inside ``restaurant_printer_spool_dir`` from
+      site_config, or the site's printer_spool folder in developer mode
+
+    Raises:
+        ValueError: If the address is not allowed
+
+    Returns:
+        The parsed address, with ``path`` resolved for file printers
+    """
+    parsed = urlparse(address or "")
+
+    if parsed.scheme == "tcp":
+        host = parsed.hostname
+        if not host:
+            raise ValueError(f"Printer address {address} has no host")
+        parsed.port  # Raises ValueError for an invalid port
+
+        allowed_hosts = frappe.conf.get(PRINTER_HOSTS_KEY)
+        if allowed_hosts:
+            if host not in allowed_hosts:
+                raise ValueError(f"Printer host {host} is not listed in {PRINTER_HOSTS_KEY}")
+            return parsed
+
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            raise ValueError(f"Printer host {host} must be a private IP address or listed in {PRINTER_HOSTS_KEY}")
+        if not ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_unspecified:
+            raise ValueError(f"Printer host {host} must be a private IP address or listed in {PRINTER_HOSTS_KEY}")
+        return parsed
+
+    if parsed.scheme == "file":
+        spool_dir = get_spool_dir()
+        if not spool_dir:
+            raise ValueError(f"File printers are disabled; set {PRINTER_SPOOL_DIR_KEY} in site_config")
+        if parsed.netloc:
+            raise ValueError(f"Printer address {address} must be a local file:/// path")
+        path = os.path.realpath(parsed.path)
+        if os.path.commonpath([path, spool_dir]) != spool_dir or path == spool_dir:
+            raise ValueError(f"File printers must write inside {spool_dir}")
+        return parsed._replace(path=path)
+
+    raise ValueError(f"Unsupported printer address: {address}")
+
+def send_to_printer(address: str, payload: bytes) -> None:
+    """
+    Send encoded tickets to a printer address
+
+    tcp://host[:port] writes to a raw network printer (port 9100 by default);
+    file:///path appends to a spool file, which stands in for a printer on
+    test and demo sites. The address is validated again here because queued
+    jobs keep the address they were created with.
+    """
+    parsed = validate_printer_address(address)
+    if parsed.scheme == "tcp":
+        with socket.create_connection((parsed.hostname, parsed.port or DEFAULT_TCP_PORT), timeout=SOCKET_TIMEOUT_SECONDS) as conn:
+            conn.sendall(payload)
+    else:
+        with open(parsed.path, "ab") as spool:
+            spool.write(payload)
+
+def retry_print_jobs() -> int:
+    """
+    Scheduler job: requeue failed and lost tickets and restart their printers
+
+    Failed batches wait attempts x RETRY_BASE_SECONDS before printing again
+    and give up after MAX_ATTEMPTS. Tickets stuck in Printing after a worker
+    died are queued again; they may print twice, which beats not at all.
+
+    Returns:
+        Number of printers restarted
+    """
+    now = now_datetime()
+    frappe.db.sql(f"""
+        UPDATE `tab{PRINT_JOB_DOCTYPE}`
+        SET status = 'Queued', modified = %(now)s
+        WHERE (status = 'Failed' AND attempts < %(max_attempts)s
+                AND modified <= %(now)s - INTERVAL attempts * %(retry_base)s SECOND)
+            OR (status = 'Printing' AND modified <= %(stale)s)
+    """, {
+        "now": now,
+        "max_attempts": MAX_ATTEMPTS,
+        "retry_base": RETRY_BASE_SECONDS,
+        "stale": add_to_date(now, minutes=-STALE_PRINTING_MINUTES)
+    })
+
+    printers = frappe.db.sql(f"""
+        SELECT DISTINCT printer FROM `tab{PRINT_JOB_DOCTYPE}`
+        WHERE status = 'Queued'
+    """, pluck=True)
+
+    for printer in printers:
+        enqueue_printer(printer)
+
+    frappe.db.commit()
+    return len(printers)
+
+def reroute_station_jobs(kitchen_station: str, printer: str) -> int:
+    """
+    Move the unprinted tickets of a station to its new printer
+
+    Returns:
+        Number of tickets moved
+    """
+    names = frappe.db.sql(f"""
+        SELECT name FROM `tab{PRINT_JOB_DOCTYPE}`
+        WHERE kitchen_station = %s AND status IN ('Queued', 'Failed') AND printer != %s
+    """, (kitchen_station, printer), pluck=True)
+
+    if names:
+        frappe.db.sql(f"""
+            UPDATE `tab{PRINT_JOB_DOCTYPE}`
+            SET printer = %s, status = 'Queued', attempts = 0, error = NULL
+            WHERE name IN %s
+        """, (printer, names))
+        enqueue_printer(printer)
+
+    return len(names)
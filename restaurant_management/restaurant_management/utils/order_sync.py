@@ -0,0 +1,163 @@
+import frappe
+from collections import deque
+from frappe.utils import cint, flt, now_datetime
+from typing import Any, Dict, Iterable, List
+
+WAITER_ITEM_FIELDS = [
+    "name", "parent", "item_code", "status", "kitchen_station", "creation", "last_update_time"
+]
+SALES_ORDER_LINE_FIELDS = ["name", "item_code", "item_name", "qty", "rate", "changed_in_version"]
+
+def diff_sales_order_items(so_items: Iterable[Any], waiter_items: Iterable[Any], fully_delivered: bool = False) -> Dict[str, Any]:
+    """
+    Work out the minimal changes that bring a Waiter Order in line with its Sales Order
+
+    Sales Order Items are paired with Waiter Order Items through their
+    ``waiter_order_item`` link. Rows without a (valid) link are paired with
+    the first unclaimed waiter item of the same item code, in row order, so
+    repeated item codes map one-to-one instead of collapsing onto one row.
+    Runs in O(n) over both item lists.
+
+    Args:
+        so_items: Sales Order Items (name, item_code, qty, delivered_qty, waiter_order_item)
+        waiter_items: Waiter Order Items in row order (name, item_code, status)
+        fully_delivered: Whether the whole Sales Order is delivered
+
+    Returns:
+        Dict with ``links`` (Sales Order Item -> Waiter Order Item to store)
+        and ``served`` (waiter items to mark Served, in row order)
+    """
+    waiter_items = list(waiter_items)
+    by_name = {item.name: item for item in waiter_items}
+
+    pairs = []
+    claimed = set()
+    unlinked = []
+    for so_item in so_items:
+        linked = so_item.get("waiter_order_item")
+        if linked in by_name and linked not in claimed:
+            claimed.add(linked)
+            pairs.append((so_item, by_name[linked]))
+        else:
+            unlinked.append(so_item)
+
+    # Unclaimed waiter items queued per item code for FIFO pairing
+    queues = {}
+    for item in waiter_items:
+        if item.name not in claimed:
+            queues.setdefault(item.item_code, deque()).append(item)
+
+    links = {}
+    for so_item in unlinked:
+        queue = queues.get(so_item.item_code)
+        if not queue:
+            continue
+        waiter_item = queue.popleft()
+        links[so_item.name] = waiter_item.name
+        pairs.append((so_item, waiter_item))
+
+    if fully_delivered:
+        delivered = {item.name for item in waiter_items}
+    else:
+        delivered = {
+            waiter_item.name
+            for so_item, waiter_item in pairs
+            if flt(so_item.qty) > 0 and flt(so_item.delivered_qty) >= flt(so_item.qty)
+        }
+
+    served = [item for item in waiter_items if item.name in delivered and item.status != "Served"]
+
+    return {"links": links, "served": served}
+
+def apply_item_sync(links: Dict[str, str], served: List[Any]) -> None:
+    """
+    Write a computed item diff with one statement per child table
+
+    Does not load or save the Waiter Order, and does not commit.
+
+    Args:
+        links: Sales Order Item name -> Waiter Order Item name
+        served: Waiter Order Items to mark Served
+    """
+    if links:
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(links))
+        case_values = [value for pair in links.items() for value in pair]
+        frappe.db.sql(f"""
+            UPDATE `tabSales Order Item`
+            SET waiter_order_item = CASE name {case_sql} END
+            WHERE name IN %s
+        """, case_values + [list(links)])
+
+    if served:
+        from restaurant_management.restaurant_management.utils.kitchen_analytics import record_item_events
+
+        now = now_datetime()
+        frappe.db.sql("""
+            UPDATE `tabWaiter Order Item`
+            SET status = 'Served', last_update_time = %s, last_update_by = %s, modified = %s
+            WHERE name IN %s
+        """, (now, frappe.session.user, now, [item.name for item in served]))
+        record_item_events(served, "Served", event_time=now)
+
+def plan_sales_order_patch(so_items: Iterable[Any], waiter_items: Iterable[Any], since: int = 0) -> Dict[str, Any]:
+    """
+    Work out which Sales Order lines to add, update or remove after a Waiter Order changed
+
+    Only waiter items stamped with a ``changed_in_version`` newer than
+    ``since`` (the version the Sales Order was last synced at) are applied.
+    Sales Order lines are keyed on ``waiter_order_item``; unlinked lines are
+    paired FIFO by item code, as in diff_sales_order_items.
+
+    Args:
+        so_items: Sales Order Items (item_code, waiter_order_item)
+        waiter_items: Current Waiter Order Items in row order
+            (name, item_code, changed_in_version)
+        since: Items version already applied to the Sales Order
+
+    Returns:
+        Dict with ``update`` ((Sales Order Item, waiter item) pairs),
+        ``append`` (waiter items without a line) and ``remove`` (stale lines)
+    """
+    waiter_items = list(waiter_items)
+    current = {item.name for item in waiter_items}
+
+    linked = {}
+    unlinked = {}
+    remove = []
+    for so_item in so_items:
+        link = so_item.get("waiter_order_item")
+        if link in current and link not in linked:
+            linked[link] = so_item
+        elif link:
+            # Line of a waiter item that was removed (or a duplicate link)
+            remove.append(so_item)
+        else:
+            unlinked.setdefault(so_item.item_code, deque()).append(so_item)
+
+    update = []
+    append = []
+    for item in waiter_items:
+        so_item = linked.get(item.name)
+        if so_item is None:
+            queue = unlinked.get(item.item_code)
+            so_item = queue.popleft() if queue else None
+        elif cint(item.changed_in_version) <= since:
+            continue
+
+        if so_item is None:
+            append.append(item)
+        else:
+            update.append((so_item, item))
+
+    remove.extend(so_item for queue in unlinked.values() for so_item in queue)
+
+    return {"update": update, "append": append, "remove": remove}
+
+def get_waiter_order_items(waiter_order: str, fields: List[str] = None) -> List[Any]:
+    """Read the rows needed for syncing a Waiter Order's items, in row order"""
+    return frappe.get_all(
+        "Waiter Order Item",
+        filters={"parent": waiter_order, "parenttype": "Waiter Order"},
+        fields=fields or WAITER_ITEM_FIELDS,
+        order_by="idx asc"
+    )
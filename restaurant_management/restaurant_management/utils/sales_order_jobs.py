@@ -0,0 +1,164 @@
+import frappe
+from frappe.utils import add_to_date, cint, now_datetime
+from typing import Optional
+
+# Dedicated RQ queue for Sales Order creation. Configure a worker for it in
+# common_site_config.json ("workers": {"restaurant_sales_order": {"timeout": 600}});
+# until then jobs fall back to the default long queue.
+SALES_ORDER_QUEUE = "restaurant_sales_order"
+FALLBACK_QUEUE = "long"
+
+MAX_ATTEMPTS = 5
+# Retry delay doubles after each failed attempt: 1, 2, 4, 8 minutes
+RETRY_BASE_SECONDS = 60
+# Jobs still queued or running after this long are assumed lost (e.g. Redis restart)
+STALE_QUEUED_MINUTES = 15
+
+STATUS_FIELD = "restaurant_sales_order_status"
+ATTEMPTS_FIELD = "restaurant_sales_order_attempts"
+RETRY_AT_FIELD = "restaurant_sales_order_retry_at"
+
+def get_sales_order_queue() -> str:
+    """Return the dedicated queue if a worker is configured for it"""
+    workers = frappe.conf.get("workers") or {}
+    return SALES_ORDER_QUEUE if SALES_ORDER_QUEUE in workers else FALLBACK_QUEUE
+
+def get_stale_after():
+    """Time after which a queued or running job is considered lost"""
+    return add_to_date(now_datetime(), minutes=STALE_QUEUED_MINUTES)
+
+def get_job_id(waiter_order: str) -> str:
+    """Job id used to deduplicate Sales Order jobs for one waiter order"""
+    return f"restaurant_sales_order::{waiter_order}"
+
+def enqueue_sales_order_creation(pos_invoice: str, waiter_order: str) -> None:
+    """
+    Queue Sales Order creation for a submitted POS Invoice
+
+    The job is enqueued after the invoice transaction commits, so the
+    cashier's request only pays for setting the status field.
+
+    Args:
+        pos_invoice: Submitted POS Invoice name
+        waiter_order: Waiter Order linked to the invoice
+    """
+    frappe.db.set_value("POS Invoice", pos_invoice, {
+        STATUS_FIELD: "Queued",
+        RETRY_AT_FIELD: get_stale_after()
+    }, update_modified=False)
+
+    frappe.enqueue(
+        "restaurant_management.restaurant_management.utils.sales_order_jobs.create_sales_order_for_invoice",
+        queue=get_sales_order_queue(),
+        job_id=get_job_id(waiter_order),
+        deduplicate=True,
+        enqueue_after_commit=True,
+        pos_invoice=pos_invoice,
+        waiter_order=waiter_order
+    )
+
+def create_sales_order_for_invoice(pos_invoice: str, waiter_order: str) -> Optional[str]:
+    """
+    Background job: create or update the Sales Order of a waiter order
+
+    Idempotent per waiter order: an existing Sales Order is updated instead of
+    creating a second one, and invoices already marked Completed are skipped.
+    Failures are rescheduled with exponential backoff up to MAX_ATTEMPTS.
+
+    Args:
+        pos_invoice: POS Invoice that triggered the job
+        waiter_order: Waiter Order to build the Sales Order from
+
+    Returns:
+        Sales Order name, or None if it could not be created
+    """
+    invoice = frappe.db.get_value(
+        "POS Invoice",
+        pos_invoice,
+        ["docstatus", STATUS_FIELD, ATTEMPTS_FIELD],
+        as_dict=True
+    )
+    if not invoice or invoice.docstatus != 1 or invoice.get(STATUS_FIELD) == "Completed":
+        return None
+
+    attempts = cint(invoice.get(ATTEMPTS_FIELD)) + 1
+    frappe.db.set_value("POS Invoice", pos_invoice, {
+        STATUS_FIELD: "Processing",
+        ATTEMPTS_FIELD: attempts,
+        RETRY_AT_FIELD: get_stale_after()
+    }, update_modified=False)
+    frappe.db.commit()
+
+    result = None
+    try:
+        from restaurant_management.api.pos_restaurant import create_sales_order_from_waiter_order
+
+        # The API helper reports its result through frappe.response
+        frappe.response.pop("message", None)
+        create_sales_order_from_waiter_order(waiter_order, pos_invoice)
+        result = frappe.response.pop("message", None)
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f"Error creating Sales Order for POS Invoice {pos_invoice}")
+
+    if result and result.get("success"):
+        frappe.db.set_value("POS Invoice", pos_invoice, {
+            STATUS_FIELD: "Completed",
+            RETRY_AT_FIELD: None
+        }, update_modified=False)
+        frappe.db.commit()
+        return result.get("sales_order")
+
+    if result:
+        frappe.log_error(
+            f"Failed to create Sales Order from Waiter Order {waiter_order}: {result.get('message')}",
+            "Sales Order Creation Failed"
+        )
+
+    schedule_retry(pos_invoice, attempts)
+    return None
+
+def schedule_retry(pos_invoice: str, attempts: int) -> None:
+    """
+    Mark a failed attempt for retry with exponential backoff, or give up
+
+    Args:
+        pos_invoice: POS Invoice name
+        attempts: Number of attempts made so far
+    """
+    if attempts >= MAX_ATTEMPTS:
+        values = {STATUS_FIELD: "Failed", RETRY_AT_FIELD: None}
+    else:
+        delay = RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        values = {STATUS_FIELD: "Retrying", RETRY_AT_FIELD: add_to_date(now_datetime(), seconds=delay)}
+
+    frappe.db.set_value("POS Invoice", pos_invoice, values, update_modified=False)
+    frappe.db.commit()
+
+def retry_pending_sales_orders() -> int:
+    """
+    Scheduler job: re-enqueue due retries and jobs that were lost
+
+    Queued and Processing invoices carry a deadline in the retry field, so a
+    job dropped by a worker or Redis restart is picked up here as well.
+
+    Returns:
+        Number of invoices re-enqueued
+    """
+    pending = frappe.db.sql(f"""
+        SELECT name, restaurant_waiter_order
+        FROM `tabPOS Invoice`
+        WHERE docstatus = 1
+            AND restaurant_waiter_order IS NOT NULL
+            AND {STATUS_FIELD} IN ('Queued', 'Processing', 'Retrying')
+            AND {RETRY_AT_FIELD} <= %s
+        LIMIT 100
+    """, now_datetime(), as_dict=1)
+
+    for invoice in pending:
+        enqueue_sales_order_creation(invoice.name, invoice.restaurant_waiter_order)
+
+    if pending:
+        frappe.db.commit()
+
+    return len(pending)
@@ -0,0 +1,220 @@
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+from typing import Any, Dict, Iterable
+
+# Realtime event emitted once per settlement batch for table and order screens
+SETTLEMENT_EVENT = "restaurant_table_update"
+
+def settle_waiter_orders(order_names: Iterable[str], source: str = None) -> Dict[str, Any]:
+    """
+    Mark many Waiter Orders as Paid and release their tables in one pass
+
+    Uses one UPDATE per doctype instead of saving each order and table, so a
+    payment covering many tables costs the same handful of queries as one.
+    Runs inside the caller's transaction and does not commit.
+
+    Args:
+        order_names: Waiter Orders settled by the payment
+        source: Name of the document that settled them (for logging)
+
+    Returns:
+        Dict with the ``orders`` and ``tables`` that were changed
+    """
+    orders = _lock_orders(order_names)
+    orders = [order for order in orders if order.status != "Paid"]
+    if not orders:
+        return {"orders": [], "tables": []}
+
+    order_ids = [order.name for order in orders]
+    now = now_datetime()
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET status = 'Paid', paid_time = %s, modified = %s, modified_by = %s
+        WHERE name IN %s
+    """, (now, now, frappe.session.user, order_ids))
+
+    # Only release tables still attached to a settled order (or to none)
+    table_ids = list({order.table for order in orders if order.table})
+    released = []
+    if table_ids:
+        released = [row[0] for row in frappe.db.sql("""
+            SELECT name FROM `tabTable`
+            WHERE name IN %(tables)s
+                AND (current_pos_order IS NULL OR current_pos_order = '' OR current_pos_order IN %(orders)s)
+        """, {"tables": table_ids, "orders": order_ids})]
+
+    if released:
+        frappe.db.sql("""
+            UPDATE `tabTable`
+            SET status = 'Available', current_pos_order = NULL,
+                modified = %s, modified_by = %s
+            WHERE name IN %s
+        """, (now, frappe.session.user, released))
+
+    frappe.logger().info(
+        f"Settled {len(order_ids)} Waiter Orders and released {len(released)} tables via {source}"
+    )
+    notify_settlement(order_ids, released, "Paid")
+
+    return {"orders": order_ids, "tables": released}
+
+def unsettle_waiter_orders(order_names: Iterable[str], source: str = None) -> Dict[str, Any]:
+    """
+    Revert Paid Waiter Orders to In Progress and re-occupy their tables
+
+    Counterpart of settle_waiter_orders used when a payment is cancelled.
+    Tables already taken by another order are left alone.
+
+    Args:
+        order_names: Waiter Orders whose payment was cancelled
+        source: Name of the cancelled document (for logging)
+
+    Returns:
+        Dict with the ``orders`` and ``tables`` that were changed
+    """
+    orders = [order for order in _lock_orders(order_names) if order.status == "Paid"]
+    if not orders:
+        return {"orders": [], "tables": []}
+
+    order_ids = [order.name for order in orders]
+    now = now_datetime()
+
+    # Drop the seated time sampled at payment; it is sampled again once re-paid
+    from restaurant_management.restaurant_management.utils.table_turnover import retract_table_turnover
+    retract_table_turnover(order_ids)
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET status = 'In Progress', paid_time = NULL, turnover_recorded = 0,
+            modified = %s, modified_by = %s
+        WHERE name IN %s
+    """, (now, frappe.session.user, order_ids))
+
+    # A table can only point at one order; the first one wins
+    order_by_table = {}
+    for order in orders:
+        if order.table:
+            order_by_table.setdefault(order.table, order.name)
+
+    occupied = []
+    if order_by_table:
+        occupied = [row[0] for row in frappe.db.sql("""
+            SELECT name FROM `tabTable`
+            WHERE name IN %s AND (current_pos_order IS NULL OR current_pos_order = '')
+        """, [list(order_by_table)])]
+
+    if occupied:
+        case_sql = " ".join(["WHEN %s THEN %s"] * len(occupied))
+        case_values = [value for table in occupied for value in (table, order_by_table[table])]
+        frappe.db.sql(f"""
+            UPDATE `tabTable`
+            SET status = 'In Progress',
+                current_pos_order = CASE name {case_sql} END,
+                modified = %s, modified_by = %s
+            WHERE name IN %s
+        """, case_values + [now, frappe.session.user, occupied])
+
+    frappe.logger().info(
+        f"Reverted {len(order_ids)} Waiter Orders and re-occupied {len(occupied)} tables via {source}"
+    )
+    notify_settlement(order_ids, occupied, "In Progress")
+
+    return {"orders": order_ids, "tables": occupied}
+
+def notify_settlement(order_ids, table_ids, status: str) -> None:
+    """
+    Invalidate cached table/KDS views and emit one realtime event for a batch
+
+    Args:
+        order_ids: Waiter Orders that changed
+        table_ids: Tables that changed
+        status: New Waiter Order status
+    """
+    from restaurant_management.api.kds_display import clear_station_tickets_cache
+
+    frappe.cache().delete_keys("table_status:")
+    clear_station_tickets_cache()
+
+    frappe.publish_realtime(
+        SETTLEMENT_EVENT,
+        {"orders": order_ids, "tables": table_ids, "status": status},
+        after_commit=True
+    )
+
+def get_settling_invoice(waiter_order: str):
+    """
+    Return (doctype, name) of the invoice that settles a Waiter Order, if any
+
+    Single primary-key lookup used for duplicate-payment checks.
+    """
+    settled = frappe.db.get_value(
+        "Waiter Order", waiter_order, ["settled_by_doctype", "settled_by"], as_dict=True
+    )
+    if settled and settled.settled_by:
+        return settled.settled_by_doctype, settled.settled_by
+    return None
+
+def claim_waiter_order(waiter_order: str, doctype: str, name: str) -> None:
+    """
+    Record an invoice as the one settling a Waiter Order
+
+    Called from invoice submit. The order row is locked first, so if two
+    terminals submit invoices for the same order concurrently, the second
+    waits for the first to commit and is then rejected.
+
+    Raises:
+        frappe.ValidationError: If another invoice already settles the order
+    """
+    row = frappe.db.sql("""
+        SELECT settled_by_doctype, settled_by
+        FROM `tabWaiter Order`
+        WHERE name = %s
+        FOR UPDATE
+    """, waiter_order, as_dict=1)
+    if not row:
+        return
+
+    current = row[0]
+    if current.settled_by and (current.settled_by_doctype, current.settled_by) != (doctype, name):
+        frappe.throw(
+            _("Waiter Order {0} is already settled by {1} {2}").format(
+                waiter_order, current.settled_by_doctype, current.settled_by
+            ),
+            title=_("Duplicate Payment")
+        )
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET settled_by_doctype = %s, settled_by = %s
+        WHERE name = %s
+    """, (doctype, name, waiter_order))
+
+def release_waiter_order(waiter_order: str, doctype: str, name: str) -> bool:
+    """
+    Clear the settlement pointer if it still points at the given invoice
+
+    Returns:
+        True if no invoice settles the order any more
+    """
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET settled_by_doctype = NULL, settled_by = NULL
+        WHERE name = %s AND settled_by_doctype = %s AND settled_by = %s
+    """, (waiter_order, doctype, name))
+
+    return not frappe.db.get_value("Waiter Order", waiter_order, "settled_by")
+
+def _lock_orders(order_names: Iterable[str]):
+    """Read and row-lock the given Waiter Orders for the rest of the transaction"""
+    order_names = list({name for name in order_names or [] if name})
+    if not order_names:
+        return []
+
+    return frappe.db.sql("""
+        SELECT name, status, `table`
+        FROM `tabWaiter Order`
+        WHERE name IN %s AND docstatus < 2
+        FOR UPDATE
+    """, [order_names], as_dict=1)
@@ -0,0 +1,257 @@
+import bisect
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional
+
+import frappe
+from frappe.utils import add_to_date, cint, get_datetime, now_datetime
+
+RESERVATION_DOCTYPE = "Table Reservation"
+ACTIVE_RESERVATION_STATUSES = ("Booked", "Seated")
+DEFAULT_DURATION_MINUTES = 90
+# Largest number of tables pushed together for one party
+MAX_COMBINED_TABLES = 3
+# Bookings that ended longer ago than this are left out of the index
+INDEX_LOOKBACK_HOURS = 12
+# Redis key (per branch) of the token identifying the current bookings
+RESERVATION_INDEX_VERSION_KEY = "restaurant_reservation_index_version"
+
+# site -> {branch: BranchIndex}, rebuilt when the branch's version changes
+_indexes: Dict[str, Dict[str, "BranchIndex"]] = {}
+
+class BranchIndex:
+    """
+    Tables of one branch with their bookings as sorted interval lists
+
+    Per table, bookings are kept sorted by start together with a running
+    maximum of their ends, so whether a table is free over [start, end) is a
+    binary search plus a walk over the few bookings that actually overlap.
+    """
+
+    def __init__(self, version: str, tables: Iterable[Dict[str, Any]], bookings: Iterable[Dict[str, Any]]):
+        self.version = version
+        # Smallest tables first: the first free table that fits is the best fit
+        self.tables = sorted(
+            (frappe._dict(table) for table in tables),
+            key=lambda table: (cint(table.seating_capacity), str(table.table_number or table.name))
+        )
+        self.starts: Dict[str, List[Any]] = {}
+        self.max_ends: Dict[str, List[Any]] = {}
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+
+        for booking in sorted(bookings, key=lambda booking: booking["reservation_time"]):
+            table = booking["table"]
+            starts = self.starts.setdefault(table, [])
+            max_ends = self.max_ends.setdefault(table, [])
+            starts.append(booking["reservation_time"])
+            max_ends.append(max(max_ends[-1], booking["end_time"]) if max_ends else booking["end_time"])
+            self.entries.setdefault(table, []).append(booking)
+
+    def get_overlapping(self, table: str, start, end) -> List[Dict[str, Any]]:
+        """Bookings of a table overlapping [start, end)"""
+        starts = self.starts.get(table)
+        if not starts:
+            return []
+
+        max_ends = self.max_ends[table]
+        entries = self.entries[table]
+        overlapping = []
+        i = bisect.bisect_left(starts, end)
+        while i > 0 and max_ends[i - 1] > start:
+            i -= 1
+            if entries[i]["end_time"] > start:
+                overlapping.append(entries[i])
+        return overlapping
+
+    def is_free(self, table: str, start, end, ignore: Optional[str] = None) -> bool:
+        return all(booking["name"] == ignore for booking in self.get_overlapping(table, start, end))
+
+    def get_next_booking(self, table: str, now) -> Optional[Dict[str, Any]]:
+        """The booking a table is held for now, or its next one"""
+        # Bookings started before now and not yet over
+        current = self.get_overlapping(table, now, now)
+        if not current:
+            starts = self.starts.get(table) or []
+            i = bisect.bisect_left(starts, now)
+            return self.entries[table][i] if i < len(starts) else None
+        return min(current, key=lambda booking: booking["reservation_time"])
+
+def get_index_version(branch: str) -> str:
+    """Return the branch's booking version, creating one if needed"""
+    cache = frappe.cache()
+    key = f"{RESERVATION_INDEX_VERSION_KEY}:{branch}"
+    version = cache.get_value(key)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        cache.set_value(key, version)
+    return version
+
+def bump_reservation_index(branch: Optional[str]) -> None:
+    """Make every worker rebuild the branch's index on its next read"""
+    if branch:
+        frappe.cache().set_value(f"{RESERVATION_INDEX_VERSION_KEY}:{branch}", frappe.generate_hash(length=10))
+
+def get_branch_index(branch: str) -> BranchIndex:
+    """
+    Return the in-memory booking index of a branch
+
+    Costs one cache lookup while the branch's bookings and tables are
+    unchanged; after a change the worker reloads them with two queries.
+    """
+    version = get_index_version(branch)
+    indexes = _indexes.setdefault(frappe.local.site, {})
+    index = indexes.get(branch)
+    if index is None or index.version != version:
+        # Read the version before the data: a change during the load leaves
+        # this index stale and the next read rebuilds it
+        index = build_branch_index(branch, version)
+        indexes[branch] = index
+    return index
+
+def build_branch_index(branch: str, version: str) -> BranchIndex:
+    tables = frappe.get_all(
+        "Table",
+        filters={"branch": branch, "is_active": 1},
+        fields=["name", "table_number", "seating_capacity", "combine_group"],
+        limit_page_length=0
+    )
+    bookings = frappe.db.sql("""
+        SELECT reservation.name, reservation.party_size,
+            reservation.status, reservation.reservation_time, reservation.end_time,
+            booked.`table`
+        FROM `tabTable Reservation` reservation
+        INNER JOIN `tabTable Reservation Table` booked
+            ON booked.parent = reservation.name AND booked.parenttype = 'Table Reservation'
+        WHERE reservation.branch = %s AND reservation.status IN %s AND reservation.end_time >= %s
+    """, (branch, ACTIVE_RESERVATION_STATUSES, add_to_date(now_datetime(), hours=-INDEX_LOOKBACK_HOURS)), as_dict=1)
+
+    for booking in bookings:
+        booking.reservation_time = get_datetime(booking.reservation_time)
+        booking.end_time = get_datetime(booking.end_time)
+    return BranchIndex(version, tables, bookings)
+
+def get_occupied_tables(branch: str, start, duration_minutes: int = DEFAULT_DURATION_MINUTES) -> set:
+    """
+    Tables seated right now, when the requested start is close enough to clash
+
+    A party seated now is assumed to stay for the default duration; bookings
+    starting later ignore current occupancy.
+    """
+    if get_datetime(start) >= add_to_date(now_datetime(), minutes=duration_minutes):
+        return set()
+
+    return set(frappe.get_all(
+        "Table",
+        filters={"branch": branch, "is_active": 1, "current_pos_order": ["is", "set"]},
+        pluck="name"
+    ))
+
+def allocate_tables(
+    branch: str,
+    party_size: int,
+    start,
+    duration_minutes: Optional[int] = None,
+    occupied: Iterable[str] = (),
+    ignore: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the best-fitting free table, or combination of tables, for a party
+
+    A single table with the fewest spare seats wins. Otherwise tables of the
+    same ``combine_group`` are combined (up to MAX_COMBINED_TABLES), choosing
+    the fewest spare seats, then the fewest tables.
+
+    Args:
+        branch: Branch to seat the party in
+        party_size: Number of guests
+        start: Reservation time
+        duration_minutes: How long the tables are needed
+        occupied: Tables to treat as taken (e.g. seated right now)
+        ignore: Reservation being re-allocated, whose own bookings do not count
+
+    Returns:
+        Dict with ``tables`` (names), ``table_numbers``, ``capacity`` and
+        ``combined``, or None if nothing fits
+    """
+    party_size = cint(party_size)
+    start = get_datetime(start)
+    end = add_to_date(start, minutes=cint(duration_minutes) or DEFAULT_DURATION_MINUTES)
+    occupied = set(occupied or ())
+
+    index = get_branch_index(branch)
+    free = [
+        table for table in index.tables
+        if cint(table.seating_capacity) > 0 and table.name not in occupied
+        and index.is_free(table.name, start, end, ignore)
+    ]
+
+    for table in free:
+        if cint(table.seating_capacity) >= party_size:
+            return format_allocation([table])
+
+    groups: Dict[str, List[Any]] = {}
+    for table in free:
+        if table.combine_group:
+            groups.setdefault(table.combine_group, []).append(table)
+
+    best, best_key = None, None
+    for tables in groups.values():
+        for size in range(2, min(MAX_COMBINED_TABLES, len(tables)) + 1):
+            for combo in combinations(tables, size):
+                capacity = sum(cint(table.seating_capacity) for table in combo)
+                if capacity >= party_size and (best_key is None or (capacity, size) < best_key):
+                    best, best_key = combo, (capacity, size)
+
+    return format_allocation(best) if best else None
+
+def format_allocation(tables) -> Dict[str, Any]:
+    return {
+        "tables": [table.name for table in tables],
+        "table_numbers": [table.table_number for table in tables],
+        "capacity": sum(cint(table.seating_capacity) for table in tables),
+        "combined": len(tables) > 1
+    }
+
+def get_upcoming_reservations(branch: str, table_names: Iterable[str], within_hours: int = 3) -> Dict[str, Dict[str, Any]]:
+    """
+    Current or next booking per table within the coming hours, from the index
+
+    Returns:
+        Dict of table name -> booking (name, party_size, status,
+        reservation_time); guest details stay out, the table display is public
+    """
+    index = get_branch_index(branch)
+    now = now_datetime()
+    horizon = add_to_date(now, hours=within_hours)
+
+    upcoming = {}
+    for table in table_names:
+        booking = index.get_next_booking(table, now)
+        if booking and booking["reservation_time"] <= horizon:
+            upcoming[table] = {
+                field: booking[field]
+                for field in ("name", "party_size", "status", "reservation_time")
+            }
+    return upcoming
+
+def check_table_conflicts(reservation_name: str, tables: List[str], start, end) -> Optional[Dict[str, Any]]:
+    """
+    Authoritative overlap check run when a reservation is saved
+
+    Locks the table rows first so two hosts booking the same table at once
+    are serialized; the in-memory index only serves lookups.
+
+    Returns:
+        The first conflicting booking (name, table), if any
+    """
+    frappe.db.sql("SELECT name FROM `tabTable` WHERE name IN %s FOR UPDATE", [tables])
+    conflicts = frappe.db.sql("""
+        SELECT reservation.name, booked.`table`
+        FROM `tabTable Reservation` reservation
+        INNER JOIN `tabTable Reservation Table` booked
+            ON booked.parent = reservation.name AND booked.parenttype = 'Table Reservation'
+        WHERE booked.`table` IN %s AND reservation.name != %s
+            AND reservation.status IN %s
+            AND reservation.reservation_time < %s AND reservation.end_time > %s
+        LIMIT 1
+    """, (tables, reservation_name or "", ACTIVE_RESERVATION_STATUSES, end, start), as_dict=1)
+    return conflicts[0] if conflicts else None
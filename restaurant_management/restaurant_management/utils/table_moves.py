@@ -0,0 +1,303 @@
+import frappe
+from frappe import _
+from frappe.utils import cint, now_datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+# Table screens refresh on the same event as for settlements
+from restaurant_management.restaurant_management.utils.settlement import SETTLEMENT_EVENT
+
+# Orders in these states are closed and cannot be moved, merged or split
+CLOSED_ORDER_STATUSES = ("Paid", "Cancelled")
+
+def transfer_order(order_id: str, target_table: str) -> Dict[str, Any]:
+    """
+    Move an order to another, free table of the same branch
+
+    Updates the order and both tables with one statement each instead of
+    cancelling and re-creating the order. Runs inside the caller's
+    transaction and does not commit.
+
+    Returns:
+        Dict with the ``orders`` and ``tables`` that were changed
+    """
+    order = _lock_open_orders([order_id])[order_id]
+    if order.table == target_table:
+        frappe.throw(_("Order {0} is already on table {1}").format(order_id, target_table))
+
+    tables = _lock_tables([order.table, target_table])
+    target = _get_table(tables, target_table)
+    _validate_target_table(target, order)
+
+    now = now_datetime()
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET `table` = %s, modified = %s, modified_by = %s
+        WHERE name = %s
+    """, (target_table, now, frappe.session.user, order_id))
+
+    source = tables.get(order.table)
+    occupy = {target_table: order_id}
+    release = [source.name] if source and source.current_pos_order == order_id else []
+    _set_tables(occupy, release, now)
+
+    changed_tables = list(occupy) + release
+    notify_table_move("transfer", [order_id], changed_tables)
+    return {"orders": [order_id], "tables": changed_tables}
+
+def merge_orders(source_order: str, target_order: str, release_source_table: bool = True) -> Dict[str, Any]:
+    """
+    Move every item of one order into another and close the emptied order
+
+    Item rows are re-parented in one UPDATE, keeping their names and kitchen
+    status, so tickets already in the kitchen are not sent again. The source
+    order is cancelled without running its cancel hooks; its table is either
+    released or, for tables pushed together, pointed at the merged order.
+
+    Args:
+        source_order: Order whose items move
+        target_order: Order receiving the items
+        release_source_table: Free the source table instead of joining it to the target order
+
+    Returns:
+        Dict with the ``orders`` and ``tables`` that were changed
+    """
+    if source_order == target_order:
+        frappe.throw(_("Cannot merge an order into itself"))
+
+    orders = _lock_open_orders([source_order, target_order])
+    source, target = orders[source_order], orders[target_order]
+    if source.branch != target.branch:
+        frappe.throw(_("Orders of different branches cannot be merged"))
+
+    tables = _lock_tables([source.table, target.table])
+    moved = _move_items(source_order, target, None)
+
+    now = now_datetime()
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order`
+        SET status = 'Cancelled', docstatus = 2, modified = %s, modified_by = %s
+        WHERE name = %s
+    """, (now, frappe.session.user, source_order))
+    _update_order_totals([source_order, target_order], now)
+
+    occupy, release = {}, []
+    source_table = tables.get(source.table)
+    if source_table and source_table.current_pos_order == source_order:
+        if release_source_table:
+            release.append(source_table.name)
+        else:
+            occupy[source_table.name] = target_order
+    _set_tables(occupy, release, now)
+
+    changed_tables = list(occupy) + release
+    notify_table_move("merge", [source_order, target_order], changed_tables)
+    return {"orders": [source_order, target_order], "tables": changed_tables, "moved_items": moved}
+
+def split_order(order_id: str, item_ids: Iterable[str], target_table: str) -> Dict[str, Any]:
+    """
+    Move some items of an order to another table
+
+    The items join the target table's open order, or a new order created for
+    the table when it is free. At least one item must stay on the source order.
+
+    Args:
+        order_id: Order the items are taken from
+        item_ids: Waiter Order Item names to move
+        target_table: Table the items move to
+
+    Returns:
+        Dict with the ``orders`` and ``tables`` that were changed and the
+        ``order_id`` now holding the items
+    """
+    item_ids = list(dict.fromkeys(item_ids or []))
+    if not item_ids:
+        frappe.throw(_("Select the items to move"))
+
+    order = _lock_open_orders([order_id])[order_id]
+    if order.table == target_table:
+        frappe.throw(_("Order {0} is already on table {1}").format(order_id, target_table))
+
+    rows = frappe.db.sql("""
+        SELECT name FROM `tabWaiter Order Item`
+        WHERE parent = %s AND parenttype = 'Waiter Order'
+    """, order_id, pluck=True)
+    unknown = set(item_ids) - set(rows)
+    if unknown:
+        frappe.throw(_("Items {0} do not belong to order {1}").format(", ".join(sorted(unknown)), order_id))
+    if len(item_ids) == len(rows):
+        frappe.throw(_("Use transfer to move every item of an order"))
+
+    tables = _lock_tables([order.table, target_table])
+    target_table_row = _get_table(tables, target_table)
+
+    now = now_datetime()
+    occupy = {}
+    if target_table_row.current_pos_order == order_id:
+        frappe.throw(_("Table {0} already holds order {1}").format(target_table, order_id))
+    if target_table_row.current_pos_order:
+        target = _lock_open_orders([target_table_row.current_pos_order])[target_table_row.current_pos_order]
+        if target.branch != order.branch:
+            frappe.throw(_("Orders of different branches cannot be merged"))
+    else:
+        _validate_target_table(target_table_row, order)
+        target = _insert_order_header(order, target_table_row, now)
+        occupy[target_table] = target.name
+
+    moved = _move_items(order_id, target, item_ids)
+    _update_order_totals([order_id, target.name], now)
+    _set_tables(occupy, [], now)
+
+    changed_tables = list(occupy)
+    notify_table_move("split", [order_id, target.name], changed_tables or [target_table])
+    return {
+        "orders": [order_id, target.name],
+        "tables": changed_tables,
+        "order_id": target.name,
+        "moved_items": moved
+    }
+
+def notify_table_move(action: str, order_ids: List[str], table_ids: List[str]) -> None:
+    """Invalidate cached table/KDS views and emit one realtime event for the move"""
+    from restaurant_management.api.kds_display import clear_station_tickets_cache
+
+    frappe.cache().delete_keys("table_status:")
+    clear_station_tickets_cache()
+
+    frappe.publish_realtime(
+        SETTLEMENT_EVENT,
+        {"orders": order_ids, "tables": table_ids, "action": action},
+        after_commit=True
+    )
+
+def _lock_open_orders(order_names: List[str]) -> Dict[str, Any]:
+    """Row-lock submitted, open Waiter Orders, failing if any is missing or closed"""
+    rows = frappe.db.sql("""
+        SELECT name, status, docstatus, `table`, branch, branch_code, items_version
+        FROM `tabWaiter Order`
+        WHERE name IN %s
+        FOR UPDATE
+    """, [list(order_names)], as_dict=1)
+    orders = {row.name: row for row in rows}
+
+    for name in order_names:
+        order = orders.get(name)
+        if not order:
+            frappe.throw(_("Waiter Order {0} not found").format(name))
+        if order.docstatus != 1 or order.status in CLOSED_ORDER_STATUSES:
+            frappe.throw(_("Waiter Order {0} is {1} and cannot be changed").format(name, order.status))
+    return orders
+
+def _lock_tables(table_names: List[str]) -> Dict[str, Any]:
+    """Row-lock tables for the rest of the transaction"""
+    table_names = [name for name in table_names if name]
+    rows = frappe.db.sql("""
+        SELECT name, branch, status, current_pos_order, is_active
+        FROM `tabTable`
+        WHERE name IN %s
+        FOR UPDATE
+    """, [table_names], as_dict=1)
+    return {row.name: row for row in rows}
+
+def _get_table(tables: Dict[str, Any], name: str):
+    if name not in tables:
+        frappe.throw(_("Table {0} not found").format(name))
+    return tables[name]
+
+def _validate_target_table(table, order) -> None:
+    """A table can take a moved order when it is active, free and in the order's branch"""
+    if not cint(table.is_active):
+        frappe.throw(_("Table {0} is not active").format(table.name))
+    if table.current_pos_order:
+        frappe.throw(_("Table {0} already has order {1}").format(table.name, table.current_pos_order))
+    if table.branch != order.branch:
+        frappe.throw(_("Table {0} belongs to another branch").format(table.name))
+
+def _insert_order_header(order, table, now):
+    """Insert a submitted Waiter Order without items to receive split items"""
+    new_order = frappe.new_doc("Waiter Order")
+    new_order.update({
+        "table": table.name,
+        "branch": order.branch,
+        "branch_code": order.branch_code,
+        "status": order.status,
+        "ordered_by": frappe.session.user,
+        "order_time": now,
+        "docstatus": 1,
+        "items_version": 0,
+    })
+    new_order.set_new_name()
+    # Header only: the items are re-parented into it right after
+    new_order.db_insert()
+    return frappe._dict(name=new_order.name, items_version=0)
+
+def _move_items(source_order: str, target, item_ids: Optional[List[str]]) -> int:
+    """
+    Re-parent item rows (all of them when ``item_ids`` is None) to ``target`` with one UPDATE
+
+    Moved rows keep their relative order after the target's rows and are
+    stamped with the target's next items_version, so Sales Order sync picks
+    them up as new lines there and drops them from the source.
+    """
+    max_idx = frappe.db.sql("""
+        SELECT COALESCE(MAX(idx), 0) FROM `tabWaiter Order Item`
+        WHERE parent = %s AND parenttype = 'Waiter Order'
+    """, target.name)[0][0]
+
+    if item_ids is None:
+        item_ids = frappe.db.sql("""
+            SELECT name FROM `tabWaiter Order Item`
+            WHERE parent = %s AND parenttype = 'Waiter Order'
+        """, source_order, pluck=True)
+        if not item_ids:
+            frappe.throw(_("Waiter Order {0} has no items to move").format(source_order))
+
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order Item`
+        SET parent = %(target)s, waiter_order_id = %(target)s, idx = idx + %(offset)s,
+            changed_in_version = %(version)s, modified = %(now)s, modified_by = %(user)s
+        WHERE parent = %(source)s AND parenttype = 'Waiter Order' AND name IN %(items)s
+    """, {
+        "source": source_order,
+        "target": target.name,
+        "offset": cint(max_idx),
+        "version": cint(target.items_version) + 1,
+        "now": now_datetime(),
+        "user": frappe.session.user,
+        "items": item_ids,
+    })
+    return len(item_ids)
+
+def _update_order_totals(order_names: List[str], now) -> None:
+    """Recompute totals and bump items_version of orders that gained or lost items"""
+    frappe.db.sql("""
+        UPDATE `tabWaiter Order` wo
+        SET total_qty = (
+                SELECT COALESCE(SUM(item.qty), 0) FROM `tabWaiter Order Item` item
+                WHERE item.parent = wo.name AND item.parenttype = 'Waiter Order'
+            ),
+            total_amount = (
+                SELECT COALESCE(SUM(item.amount), 0) FROM `tabWaiter Order Item` item
+                WHERE item.parent = wo.name AND item.parenttype = 'Waiter Order'
+            ),
+            items_version = COALESCE(items_version, 0) + 1,
+            modified = %s, modified_by = %s
+        WHERE wo.name IN %s
+    """, (now, frappe.session.user, order_names))
+
+def _set_tables(occupy: Dict[str, str], release: List[str], now) -> None:
+    """Point tables at their new orders and free the others with one UPDATE"""
+    names = list(occupy) + list(release)
+    if not names:
+        return
+
+    order_case = " ".join(["WHEN %s THEN %s"] * len(occupy)) if occupy else ""
+    order_values = [value for table, order in occupy.items() for value in (table, order)]
+    current_order = f"CASE name {order_case} ELSE NULL END" if occupy else "NULL"
+
+    frappe.db.sql(f"""
+        UPDATE `tabTable`
+        SET current_pos_order = {current_order},
+            status = IF(name IN %s, 'In Progress', 'Available'),
+            modified = %s, modified_by = %s
+        WHERE name IN %s
+    """, order_values + [list(occupy) or [""], now, frappe.session.user, names])
@@ -0,0 +1,211 @@
+import frappe
+import json
+from typing import Any, Dict, List
+from frappe.utils import cint, flt, get_datetime, getdate, time_diff_in_seconds
+
+from restaurant_management.utils.metrics import (
+    add_to_histogram,
+    histogram_percentile,
+    merge_histograms,
+    new_histogram,
+)
+
+STAT_DOCTYPE = "Table Turnover Stat"
+
+# Number of newly paid orders folded per transaction by the scheduler job
+AGGREGATION_BATCH_SIZE = 2000
+
+# Seated-time bucket upper bounds in seconds: 5 min steps up to 4 h
+DWELL_HISTOGRAM_BOUNDS = list(range(300, 14401, 300))
+
+# Redis key (per branch) bumped whenever the branch's stats change
+TURNOVER_VERSION_KEY = "restaurant_table_turnover_version"
+
+# When an order was paid, for orders settled before paid_time was recorded:
+# the latest Payment Entry against its Sales Invoice, as in the Table
+# Turnover Analytics report
+PAYMENT_TIME_SQL = """
+    (SELECT MAX(per.creation)
+     FROM `tabPayment Entry Reference` per
+     INNER JOIN `tabSales Invoice` si ON si.name = per.reference_name
+     WHERE per.reference_doctype = 'Sales Invoice'
+        AND si.restaurant_waiter_order = wo.name
+        AND si.docstatus = 1)
+"""
+
+def fold_dwell_times(stat: Dict[str, Any], dwell_seconds: List[float], count: int = 1) -> Dict[str, Any]:
+    """
+    Fold seated durations into a daily table stat
+
+    Args:
+        stat: Existing stat values (may be empty for a new day)
+        dwell_seconds: Seconds from order to payment of each new party
+        count: 1 to add the durations, -1 to take back ones folded in before
+
+    Returns:
+        Updated stat values including recomputed average and percentiles
+    """
+    histogram = stat.get("histogram") or new_histogram()
+    if isinstance(histogram, str):
+        histogram = json.loads(histogram)
+    histogram = merge_histograms(histogram)
+
+    order_count = cint(stat.get("order_count"))
+    total_seconds = flt(stat.get("total_seconds"))
+
+    for seconds in dwell_seconds:
+        add_to_histogram(histogram, seconds, count=count, bounds=DWELL_HISTOGRAM_BOUNDS)
+        order_count += count
+        total_seconds += seconds * count
+    histogram = {key: value for key, value in histogram.items() if value > 0}
+    order_count = max(order_count, 0)
+    total_seconds = max(total_seconds, 0) if order_count else 0
+
+    return {
+        "order_count": order_count,
+        "total_seconds": total_seconds,
+        "avg_minutes": flt(total_seconds / order_count / 60, 2) if order_count else 0,
+        "p50_minutes": flt(flt(histogram_percentile(histogram, 50, DWELL_HISTOGRAM_BOUNDS)) / 60, 2),
+        "p90_minutes": flt(flt(histogram_percentile(histogram, 90, DWELL_HISTOGRAM_BOUNDS)) / 60, 2),
+        "histogram": json.dumps(histogram, sort_keys=True)
+    }
+
+def aggregate_table_turnover(batch_size: int = AGGREGATION_BATCH_SIZE) -> int:
+    """
+    Fold newly paid Waiter Orders into Table Turnover Stat
+
+    Runs from the scheduler. Only orders not yet recorded are read, so each
+    run costs time proportional to the new payments rather than the order
+    history. Branches whose stats changed get a new turnover version, which
+    makes the waitlist models pull just the changed rows.
+
+    Args:
+        batch_size: Maximum number of orders processed per transaction
+
+    Returns:
+        Number of orders processed
+    """
+    processed = 0
+    branches = set()
+
+    while True:
+        orders = frappe.db.sql("""
+            SELECT wo.name, wo.`table`, wo.branch, wo.order_time,
+                IFNULL(wo.paid_time, {payment_time}) AS paid_time
+            FROM `tabWaiter Order` wo
+            WHERE wo.status = 'Paid' AND wo.turnover_recorded = 0
+            LIMIT %s
+        """.format(payment_time=PAYMENT_TIME_SQL), batch_size, as_dict=1)
+
+        if not orders:
+            break
+
+        try:
+            groups = group_dwell_times(orders)
+            for (table, date), group in groups.items():
+                update_daily_stat(table, group["branch"], date, group["seconds"])
+                branches.add(group["branch"])
+
+            frappe.db.sql("""
+                UPDATE `tabWaiter Order`
+                SET turnover_recorded = 1
+                WHERE name IN %s
+            """, [[order.name for order in orders]])
+
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(
+                f"Error aggregating table turnover: {frappe.get_traceback()}",
+                "Table Turnover Error"
+            )
+            break
+
+        processed += len(orders)
+        if len(orders) < batch_size:
+            break
+
+    bump_turnover_versions(branches)
+
+    return processed
+
+def retract_table_turnover(order_names: List[str]) -> None:
+    """
+    Take the seated time of orders whose payment was cancelled back out of the stats
+
+    Must run before the caller clears paid_time and turnover_recorded, in
+    the same transaction, so the order is folded in again once re-paid.
+
+    Args:
+        order_names: Waiter Orders reverted from Paid
+    """
+    if not order_names:
+        return
+
+    orders = frappe.db.sql("""
+        SELECT wo.name, wo.`table`, wo.branch, wo.order_time,
+            IFNULL(wo.paid_time, {payment_time}) AS paid_time
+        FROM `tabWaiter Order` wo
+        WHERE wo.name IN %s AND wo.turnover_recorded = 1
+    """.format(payment_time=PAYMENT_TIME_SQL), [list(order_names)], as_dict=1)
+
+    groups = group_dwell_times(orders)
+    for (table, date), group in groups.items():
+        update_daily_stat(table, group["branch"], date, group["seconds"], count=-1)
+
+    bump_turnover_versions({group["branch"] for group in groups.values()})
+
+def group_dwell_times(orders: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, Any]]:
+    """Seated durations of paid orders grouped by table and day seated"""
+    groups = {}
+    for order in orders:
+        # Orders paid without a Payment Entry carry no seated time
+        if not order.table or not order.order_time or not order.paid_time:
+            continue
+        seconds = time_diff_in_seconds(order.paid_time, order.order_time)
+        if seconds <= 0:
+            continue
+        key = (order.table, getdate(get_datetime(order.order_time)))
+        groups.setdefault(key, {"branch": order.branch, "seconds": []})["seconds"].append(seconds)
+    return groups
+
+def bump_turnover_versions(branches) -> None:
+    """Make the waitlist models of these branches re-read their changed stats"""
+    for branch in branches:
+        if branch:
+            frappe.cache().set_value(f"{TURNOVER_VERSION_KEY}:{branch}", frappe.generate_hash(length=10))
+
+def update_daily_stat(table: str, branch: str, date, dwell_seconds: List[float], count: int = 1) -> None:
+    """
+    Merge a group of seated durations into the stat row for one table and day
+
+    Args:
+        table: Table name
+        branch: Branch of the table
+        date: Day the parties were seated
+        dwell_seconds: Seated durations in seconds
+        count: 1 to add the durations, -1 to take them back out
+    """
+    existing = frappe.db.get_value(
+        STAT_DOCTYPE,
+        {"table": table, "date": date},
+        ["name", "order_count", "total_seconds", "histogram"],
+        as_dict=True
+    )
+
+    if not existing and count < 0:
+        return
+
+    values = fold_dwell_times(existing or {}, dwell_seconds, count)
+
+    if existing:
+        frappe.db.set_value(STAT_DOCTYPE, existing.name, values)
+    else:
+        stat = frappe.get_doc(dict(
+            values,
+            doctype=STAT_DOCTYPE,
+            table=table,
+            branch=branch,
+            date=date
+        ))
+        stat.insert(ignore_permissions=True)
@@ -0,0 +1,85 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    backlog = [f"WO-{i}" for i in range(1200)]
+    statements = []
+
+    def sql(query, values=None, as_dict=False, pluck=False):
+        statements.append(" ".join(query.split()))
+        if query.strip().startswith("SELECT wo.name"):
+            return backlog[:values["limit"]]
+        if query.strip().startswith("UPDATE `tabWaiter Order`"):
+            del backlog[:len(values[0])]
+        return None
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.conf = {"restaurant_archive_after_days": 30}
+    fake_frappe.db = SimpleNamespace(
+        sql=MagicMock(side_effect=sql),
+        sql_ddl=MagicMock(),
+        table_exists=MagicMock(return_value=True),
+        get_table_columns=lambda doctype: ["name", "status", "modified"],
+        commit=MagicMock(),
+        rollback=MagicMock(),
+    )
+    fake_frappe.logger = lambda: SimpleNamespace(info=lambda *a, **k: None)
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        add_days=lambda date, days: days,
+        cint=lambda value: int(value or 0),
+        now_datetime=lambda: 0
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.archive", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.archive")
+    return module, fake_frappe, backlog, statements
+
+
+def test_archive_moves_backlog_in_committed_batches(archive):
+    module, fake_frappe, backlog, statements = archive
+
+    assert module.archive_waiter_orders(batch_size=500) == 1200
+    assert backlog == []
+    assert fake_frappe.db.commit.call_count == 3
+
+    # Items move to the archive; the orders stay live and are only flagged
+    moves = [statement.split(" (")[0] for statement in statements if not statement.startswith("SELECT")]
+    assert moves[:3] == [
+        "INSERT IGNORE INTO `tabWaiter Order Item Archive`",
+        "DELETE FROM `tabWaiter Order Item` WHERE parenttype = 'Waiter Order' AND parent IN %s",
+        "UPDATE `tabWaiter Order` SET items_archived = 1 WHERE name IN %s",
+    ]
+    assert not any(statement.startswith("DELETE FROM `tabWaiter Order` ") for statement in statements)
+    # Retention comes from site config
+    assert statements[0].count("wo.modified < %(cutoff)s") == 1
+    assert fake_frappe.db.sql.call_args_list[0].args[1]["cutoff"] == -30
+
+
+def test_union_source_falls_back_to_live_table(archive):
+    module, fake_frappe, backlog, statements = archive
+
+    assert "UNION ALL" in module.get_union_source("Waiter Order Item", ["name", "parent"])
+    # Orders are never archived
+    assert module.get_union_source("Waiter Order", ["name", "table"]) == "`tabWaiter Order`"
+    fake_frappe.db.table_exists.return_value = False
+    assert module.get_union_source("Waiter Order Item", ["name"]) == "`tabWaiter Order Item`"
+
+
+def test_archive_skips_orders_still_waiting_for_jobs(archive):
+    module, fake_frappe, backlog, statements = archive
+
+    module.archive_waiter_orders(batch_size=500, max_batches=1)
+
+    # Depletion reads the items and turnover the order, so both must have run first
+    candidates = statements[0]
+    assert "wo.items_archived = 0" in candidates
+    assert "wo.ingredients_depleted = 1 AND wo.turnover_recorded = 1" in candidates
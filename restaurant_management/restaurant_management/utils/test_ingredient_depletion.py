@@ -0,0 +1,104 @@
+import datetime
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+@pytest.fixture
+def depletion(monkeypatch):
+    day = datetime.date(2026, 10, 18)
+    groups = [
+        FrappeDict(branch="Main", branch_code="MN", posting_date=day),
+        FrappeDict(branch="Harbour", branch_code="HB", posting_date=day),
+        FrappeDict(branch="Airport", branch_code="AP", posting_date=day),
+    ]
+    orders = {"MN": ["WO-1", "WO-2"], "HB": ["WO-3"], "AP": ["WO-4"]}
+    usage = {
+        ("WO-1", "WO-2"): [FrappeDict(item_code="FLOUR", stock_uom="Kg", qty=0.75)],
+        ("WO-3",): [],  # No item with a recipe
+        ("WO-4",): [FrappeDict(item_code="RICE", stock_uom="Kg", qty=2)],
+    }
+    marked = {}
+
+    def sql(query, values=None, as_dict=False, pluck=False):
+        query = " ".join(query.split())
+        if query.startswith("SELECT branch, branch_code, DATE(order_time)"):
+            return groups
+        if query.startswith("SELECT branch.name AS branch"):
+            # Airport has no default warehouse
+            return [FrappeDict(branch=b, name=f"Kitchen - {b}", company="Resto") for b in values[0] if b != "Airport"]
+        if query.startswith("SELECT name FROM `tabWaiter Order`"):
+            return orders[values[1]]
+        if query.startswith("SELECT bom_item.item_code"):
+            return usage[tuple(values[0])]
+        if query.startswith("UPDATE `tabWaiter Order`"):
+            for name in values[1]:
+                marked[name] = values[0]
+        return None
+
+    entries = []
+
+    def new_doc(doctype):
+        doc = FrappeDict(items=[])
+        doc.update = lambda values: dict.update(doc, values)
+        doc.append = lambda field, row: doc[field].append(row)
+        doc.insert = lambda ignore_permissions=False: dict.__setitem__(doc, "name", f"STE-{len(entries) + 1}")
+        doc.submit = lambda: entries.append(doc)
+        return doc
+
+    def throw(message):
+        raise ValueError(message)
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.db = SimpleNamespace(sql=MagicMock(side_effect=sql), commit=MagicMock(), rollback=MagicMock())
+    fake_frappe.new_doc = new_doc
+    fake_frappe.throw = throw
+    fake_frappe.log_error = MagicMock()
+    fake_frappe.get_traceback = lambda: "tb"
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        add_days=lambda date, days: date + datetime.timedelta(days=days),
+        cint=lambda value: int(value or 0),
+        flt=lambda value, precision=None: round(float(value or 0), precision) if precision else float(value or 0),
+        getdate=lambda value: value,
+        nowdate=lambda: datetime.date(2026, 10, 19),
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.ingredient_depletion", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.ingredient_depletion")
+    return module, fake_frappe, entries, marked
+
+
+def test_one_stock_entry_per_branch_day(depletion):
+    module, fake_frappe, entries, marked = depletion
+
+    assert module.deplete_ingredients() == 1
+
+    entry = entries[0]
+    assert entry.from_warehouse == "Kitchen - Main"
+    assert entry.posting_date == datetime.date(2026, 10, 18)
+    assert [(row["item_code"], row["qty"]) for row in entry["items"]] == [("FLOUR", 0.75)]
+
+    # Orders without recipe items are marked too, without an entry
+    assert marked == {"WO-1": "STE-1", "WO-2": "STE-1", "WO-3": None}
+    assert fake_frappe.db.commit.call_count == 2
+
+
+def test_branch_without_warehouse_is_retried_later(depletion):
+    module, fake_frappe, entries, marked = depletion
+
+    module.deplete_ingredients()
+
+    assert "WO-4" not in marked
+    fake_frappe.db.rollback.assert_called_once()
+    fake_frappe.log_error.assert_called_once()
@@ -0,0 +1,125 @@
+import importlib
+import json
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class Row(SimpleNamespace):
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+@pytest.fixture
+def kitchen_print(monkeypatch):
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.session = SimpleNamespace(user="waiter@example.com")
+    fake_frappe.generate_hash = lambda length=12: "hash"
+    fake_frappe.enqueue = MagicMock()
+    fake_frappe.get_all = MagicMock(return_value=[
+        Row(name="KS-1", station_name="Grill", printer_address="file:///tmp/grill.txt"),
+    ])
+    fake_frappe.db = SimpleNamespace(bulk_insert=MagicMock())
+    fake_frappe.conf = {}
+    fake_frappe.get_site_path = lambda *path: "/sites/site1/" + "/".join(path)
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        add_to_date=lambda date, **kwargs: date,
+        flt=lambda value: float(value or 0),
+        format_datetime=lambda value, fmt: "01-06 12:30",
+        get_datetime=lambda value: value,
+        now_datetime=lambda: 0,
+        time_diff_in_seconds=lambda a, b: a - b,
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.kitchen_print", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.kitchen_print")
+    return module, fake_frappe
+
+
+def make_order():
+    order = Row(name="WO-0001", table="TBL-1", branch_code="MN", order_time=None)
+    items = [
+        Row(item_code="STEAK", item_name="Ribeye", qty=2, kitchen_station="KS-1",
+            variant_attributes='{"Doneness": "Medium"}', notes="no salt"),
+        Row(item_code="SODA", item_name="Soda", qty=1, kitchen_station="KS-2", notes=""),
+        Row(item_code="WATER", item_name="Water", qty=1, kitchen_station=None),
+    ]
+    return order, items
+
+
+def test_one_ticket_per_printing_station_is_queued_in_bulk(kitchen_print):
+    module, fake_frappe = kitchen_print
+    order, items = make_order()
+
+    assert module.queue_kitchen_tickets(order, items, table_number="7") == 1
+
+    filters = fake_frappe.get_all.call_args.kwargs["filters"]
+    assert sorted(filters["name"][1]) == ["KS-1", "KS-2"]
+
+    doctype, fields, values = fake_frappe.db.bulk_insert.call_args.args
+    row = dict(zip(fields, values[0]))
+    assert doctype == "Kitchen Print Job"
+    assert row["printer"] == "file:///tmp/grill.txt" and row["status"] == "Queued"
+    assert ["bold", "2 x Ribeye"] in json.loads(row["ticket"])
+
+    kwargs = fake_frappe.enqueue.call_args.kwargs
+    assert kwargs["printer"] == "file:///tmp/grill.txt"
+    assert kwargs["enqueue_after_commit"] and kwargs["deduplicate"]
+
+
+def test_tickets_print_to_a_file_printer(kitchen_print, tmp_path):
+    module, fake_frappe = kitchen_print
+    order, items = make_order()
+    ticket = module.render_ticket(order, items[:1], "Grill", table_number="7", additional=True)
+    spool = tmp_path / "grill.txt"
+    fake_frappe.conf["restaurant_printer_spool_dir"] = str(tmp_path)
+
+    module.send_to_printer(f"file://{spool}", module.encode_tickets([ticket, ticket], "Plain Text"))
+    text = spool.read_text()
+    assert text.count("GRILL") == 2
+    assert "** ADDITIONAL **" in text and "Table 7" in text
+    assert "   Doneness: Medium" in text and "   * no salt" in text
+
+    payload = module.encode_tickets([ticket, ticket])
+    assert payload.startswith(module.ESC_INIT)
+    assert payload.count(module.GS_FEED_AND_CUT) == 2
+    assert module.ESC_BOLD_ON + b"2 x Ribeye\n" + module.ESC_BOLD_OFF in payload
+
+    with pytest.raises(ValueError):
+        module.send_to_printer("lpt1", b"")
+
+
+def test_printer_addresses_are_restricted(kitchen_print, tmp_path):
+    module, fake_frappe = kitchen_print
+
+    # File printers are off unless a spool directory is configured
+    with pytest.raises(ValueError, match="disabled"):
+        module.validate_printer_address("file:///tmp/grill.txt")
+
+    fake_frappe.conf["restaurant_printer_spool_dir"] = str(tmp_path)
+    assert module.validate_printer_address(f"file://{tmp_path}/grill.txt").path == str(tmp_path / "grill.txt")
+    for address in ("file:///root/.ssh/authorized_keys", f"file://{tmp_path}/../.bashrc", f"file://{tmp_path}"):
+        with pytest.raises(ValueError):
+            module.validate_printer_address(address)
+    with pytest.raises(ValueError):
+        module.send_to_printer("file:///root/.bashrc", b"x")
+
+    # Developer mode falls back to a folder inside the site
+    fake_frappe.conf = {"developer_mode": 1}
+    assert module.validate_printer_address("file:///sites/site1/printer_spool/grill.txt")
+
+    # Network printers: private addresses only, unless hosts are listed
+    assert module.validate_printer_address("tcp://192.168.1.50:9100").hostname == "192.168.1.50"
+    for address in ("tcp://127.0.0.1:6379", "tcp://169.254.169.254", "tcp://8.8.8.8", "tcp://printer.example.com", "http://10.0.0.5"):
+        with pytest.raises(ValueError):
+            module.validate_printer_address(address)
+
+    fake_frappe.conf["restaurant_printer_hosts"] = ["printer.example.com"]
+    assert module.validate_printer_address("tcp://printer.example.com:9100")
+    with pytest.raises(ValueError):
+        module.validate_printer_address("tcp://192.168.1.50")
@@ -0,0 +1,88 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+@pytest.fixture
+def order_sync(monkeypatch):
+    fake_frappe = types.ModuleType("frappe")
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        cint=lambda value: int(value or 0),
+        flt=lambda value, precision=None: float(value or 0),
+        now_datetime=lambda: "now"
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.order_sync", raising=False)
+
+    return importlib.import_module("restaurant_management.restaurant_management.utils.order_sync")
+
+
+def test_repeated_item_codes_pair_one_to_one(order_sync):
+    waiter_items = [
+        FrappeDict(name=f"WOI-{i}", item_code="COFFEE", status="Ready") for i in range(3)
+    ] + [FrappeDict(name="WOI-3", item_code="TEA", status="Served")]
+    so_items = [
+        # Already linked to the last coffee row
+        FrappeDict(name="SOI-0", item_code="COFFEE", qty=1, delivered_qty=0, waiter_order_item="WOI-2"),
+        FrappeDict(name="SOI-1", item_code="COFFEE", qty=1, delivered_qty=1),
+        FrappeDict(name="SOI-2", item_code="COFFEE", qty=1, delivered_qty=0),
+        FrappeDict(name="SOI-3", item_code="TEA", qty=1, delivered_qty=1),
+    ]
+
+    diff = order_sync.diff_sales_order_items(so_items, waiter_items)
+
+    assert diff["links"] == {"SOI-1": "WOI-0", "SOI-2": "WOI-1", "SOI-3": "WOI-3"}
+    # Only the delivered coffee changes; the tea row is already Served
+    assert [item.name for item in diff["served"]] == ["WOI-0"]
+
+
+def test_fully_delivered_serves_every_open_item(order_sync):
+    waiter_items = [FrappeDict(name=f"WOI-{i}", item_code="RICE", status="Cooking") for i in range(500)]
+    so_items = [FrappeDict(name=f"SOI-{i}", item_code="RICE", qty=1, delivered_qty=0) for i in range(500)]
+
+    diff = order_sync.diff_sales_order_items(so_items, waiter_items, fully_delivered=True)
+
+    assert len(diff["links"]) == 500 and diff["links"]["SOI-499"] == "WOI-499"
+    assert len(diff["served"]) == 500
+
+
+def test_patch_only_touches_lines_changed_since_last_sync(order_sync):
+    waiter_items = [
+        FrappeDict(name="WOI-0", item_code="SOUP", changed_in_version=1),
+        FrappeDict(name="WOI-1", item_code="SOUP", changed_in_version=3),
+        FrappeDict(name="WOI-2", item_code="BREAD", changed_in_version=3),
+    ]
+    so_items = [
+        FrappeDict(name="SOI-0", item_code="SOUP", waiter_order_item="WOI-0"),
+        FrappeDict(name="SOI-1", item_code="SOUP", waiter_order_item="WOI-1"),
+        # Waiter item removed since the last sync
+        FrappeDict(name="SOI-2", item_code="SALAD", waiter_order_item="WOI-9"),
+    ]
+
+    plan = order_sync.plan_sales_order_patch(so_items, waiter_items, since=2)
+
+    assert [(so.name, item.name) for so, item in plan["update"]] == [("SOI-1", "WOI-1")]
+    assert [item.name for item in plan["append"]] == ["WOI-2"]
+    assert [so.name for so in plan["remove"]] == ["SOI-2"]
+
+
+def test_first_sync_pairs_unlinked_lines_by_item_code(order_sync):
+    waiter_items = [FrappeDict(name=f"WOI-{i}", item_code="TEA", changed_in_version=1) for i in range(2)]
+    so_items = [
+        FrappeDict(name="SOI-0", item_code="TEA"),
+        FrappeDict(name="SOI-1", item_code="CAKE"),
+    ]
+
+    plan = order_sync.plan_sales_order_patch(so_items, waiter_items)
+
+    assert [(so.name, item.name) for so, item in plan["update"]] == [("SOI-0", "WOI-0")]
+    assert [item.name for item in plan["append"]] == ["WOI-1"]
+    assert [so.name for so in plan["remove"]] == ["SOI-1"]
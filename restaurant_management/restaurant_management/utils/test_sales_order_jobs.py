@@ -0,0 +1,101 @@
+import importlib
+import sys
+import types
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    invoices = {"POS-1": FrappeDict(docstatus=1, restaurant_sales_order_status="Queued")}
+
+    def get_value(doctype, name, fields, as_dict=False):
+        return invoices.get(name)
+
+    def set_value(doctype, name, values, update_modified=True):
+        invoices[name].update(values)
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.conf = {}
+    fake_frappe.response = {}
+    fake_frappe.enqueue = MagicMock()
+    fake_frappe.log_error = MagicMock()
+    fake_frappe.get_traceback = lambda: "tb"
+    fake_frappe.db = SimpleNamespace(
+        get_value=get_value, set_value=set_value, commit=MagicMock(), rollback=MagicMock()
+    )
+
+    now = datetime(2024, 1, 1, 20, 0, 0)
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(
+        sys.modules,
+        "frappe.utils",
+        SimpleNamespace(
+            now_datetime=lambda: now,
+            add_to_date=lambda d, seconds=0, minutes=0: d + timedelta(seconds=seconds, minutes=minutes),
+            cint=lambda v: int(v or 0),
+        ),
+    )
+
+    creator = MagicMock()
+    monkeypatch.setitem(
+        sys.modules,
+        "restaurant_management.api.pos_restaurant",
+        SimpleNamespace(create_sales_order_from_waiter_order=creator),
+    )
+    monkeypatch.delitem(
+        sys.modules, "restaurant_management.restaurant_management.utils.sales_order_jobs", raising=False
+    )
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.sales_order_jobs")
+    return module, fake_frappe, invoices, creator, now
+
+
+def test_enqueue_is_deduplicated_per_waiter_order(jobs):
+    module, fake_frappe, invoices, _, _ = jobs
+
+    module.enqueue_sales_order_creation("POS-1", "WO-1")
+
+    kwargs = fake_frappe.enqueue.call_args.kwargs
+    assert kwargs["job_id"] == "restaurant_sales_order::WO-1"
+    assert kwargs["deduplicate"] and kwargs["enqueue_after_commit"]
+    assert kwargs["queue"] == module.FALLBACK_QUEUE
+    assert invoices["POS-1"]["restaurant_sales_order_status"] == "Queued"
+
+
+def test_success_marks_invoice_completed_and_is_not_repeated(jobs):
+    module, fake_frappe, invoices, creator, _ = jobs
+    creator.side_effect = lambda *a: fake_frappe.response.update(
+        message={"success": True, "sales_order": "SO-1"}
+    )
+
+    assert module.create_sales_order_for_invoice("POS-1", "WO-1") == "SO-1"
+    assert invoices["POS-1"]["restaurant_sales_order_status"] == "Completed"
+
+    # A duplicate delivery of the same job is a no-op
+    assert module.create_sales_order_for_invoice("POS-1", "WO-1") is None
+    assert creator.call_count == 1
+
+
+def test_failures_back_off_then_give_up(jobs):
+    module, fake_frappe, invoices, creator, now = jobs
+    creator.side_effect = RuntimeError("boom")
+
+    module.create_sales_order_for_invoice("POS-1", "WO-1")
+    assert invoices["POS-1"]["restaurant_sales_order_status"] == "Retrying"
+    assert invoices["POS-1"]["restaurant_sales_order_retry_at"] == now + timedelta(seconds=60)
+
+    module.create_sales_order_for_invoice("POS-1", "WO-1")
+    assert invoices["POS-1"]["restaurant_sales_order_retry_at"] == now + timedelta(seconds=120)
+
+    for _ in range(module.MAX_ATTEMPTS - 2):
+        module.create_sales_order_for_invoice("POS-1", "WO-1")
+    assert invoices["POS-1"]["restaurant_sales_order_status"] == "Failed"
+    assert fake_frappe.db.rollback.call_count == module.MAX_ATTEMPTS
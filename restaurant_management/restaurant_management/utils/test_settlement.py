@@ -0,0 +1,151 @@
+import importlib
+import json
+import os
+import re
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+DOCTYPE_DIR = os.path.join(os.path.dirname(__file__), "..", "doctype")
+STANDARD_COLUMNS = {"name", "modified", "modified_by"}
+
+
+def doctype_columns(doctype):
+    folder = doctype.lower().replace(" ", "_")
+    with open(os.path.join(DOCTYPE_DIR, folder, f"{folder}.json")) as f:
+        return {field["fieldname"] for field in json.load(f)["fields"]} | STANDARD_COLUMNS
+
+
+def updated_columns(query):
+    """Doctype and column names assigned by an UPDATE statement"""
+    match = re.search(r"UPDATE `tab([^`]+)`\s+SET (.*?)\s+WHERE", query, re.S)
+    assignments, depth, current = [], 0, ""
+    for char in match.group(2):
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and not depth:
+            assignments.append(current)
+            current = ""
+        else:
+            current += char
+    assignments.append(current)
+    return match.group(1), {assignment.split("=")[0].strip() for assignment in assignments}
+
+
+@pytest.fixture
+def settlement(monkeypatch):
+    orders = [FrappeDict(name=f"WO-{i}", status="Served", table=f"T{i}") for i in range(40)]
+    orders[0].status = "Paid"
+
+    def sql(query, values=None, as_dict=False):
+        if "FOR UPDATE" in query:
+            return [order for order in orders if order.name in values[0]]
+        if query.strip().startswith("SELECT name FROM `tabTable`"):
+            # T5 has been re-seated with a new order since
+            tables = values["tables"] if isinstance(values, dict) else values[0]
+            return [(table,) for table in tables if table != "T5"]
+        return None
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._ = lambda text: text
+    fake_frappe.session = SimpleNamespace(user="cashier@example.com")
+    fake_frappe.db = SimpleNamespace(sql=MagicMock(side_effect=sql))
+    fake_frappe.cache = MagicMock()
+    fake_frappe.publish_realtime = MagicMock()
+    fake_frappe.logger = lambda: SimpleNamespace(info=lambda *a, **k: None)
+
+    kds = types.ModuleType("restaurant_management.api.kds_display")
+    kds.clear_station_tickets_cache = MagicMock()
+    turnover = types.ModuleType("restaurant_management.restaurant_management.utils.table_turnover")
+    turnover.retract_table_turnover = MagicMock()
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(now_datetime=lambda: "now"))
+    monkeypatch.setitem(sys.modules, "restaurant_management.api.kds_display", kds)
+    monkeypatch.setitem(sys.modules, "restaurant_management.restaurant_management.utils.table_turnover", turnover)
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.settlement", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.settlement")
+    return module, fake_frappe, orders
+
+
+def test_settling_forty_tables_uses_constant_queries(settlement):
+    module, fake_frappe, orders = settlement
+
+    result = module.settle_waiter_orders([order.name for order in orders], source="PE-1")
+
+    assert len(result["orders"]) == 39
+    assert "WO-0" not in result["orders"]
+    assert "T5" not in result["tables"] and len(result["tables"]) == 38
+    # Lock, order update, table check, table update
+    assert fake_frappe.db.sql.call_count == 4
+    assert fake_frappe.publish_realtime.call_count == 1
+
+
+def test_nothing_to_settle_is_a_no_op(settlement):
+    module, fake_frappe, orders = settlement
+
+    assert module.settle_waiter_orders(["WO-0"]) == {"orders": [], "tables": []}
+    assert fake_frappe.db.sql.call_count == 1
+    fake_frappe.publish_realtime.assert_not_called()
+
+
+def test_second_invoice_cannot_claim_a_settled_order(settlement):
+    module, fake_frappe, orders = settlement
+
+    class DuplicatePayment(Exception):
+        pass
+
+    def throw(message, title=None):
+        raise DuplicatePayment(message)
+
+    fake_frappe.throw = throw
+    fake_frappe.db.sql = MagicMock(return_value=[FrappeDict(settled_by_doctype="POS Invoice", settled_by="POS-1")])
+
+    # Re-submitting the settling invoice is allowed, a different one is not
+    module.claim_waiter_order("WO-1", "POS Invoice", "POS-1")
+    with pytest.raises(DuplicatePayment):
+        module.claim_waiter_order("WO-1", "Sales Invoice", "SI-1")
+
+
+def test_updates_only_write_existing_columns(settlement):
+    module, fake_frappe, orders = settlement
+    orders[1].status = "Paid"
+
+    def sql(query, values=None, as_dict=False):
+        if "FOR UPDATE" in query:
+            return [order for order in orders if order.name in values[0]]
+        if query.strip().startswith("SELECT name FROM `tabTable`"):
+            tables = values["tables"] if isinstance(values, dict) else values[0]
+            return [(table,) for table in tables]
+        return None
+
+    fake_frappe.db.sql = MagicMock(side_effect=sql)
+    module.settle_waiter_orders(["WO-2"])
+    module.unsettle_waiter_orders(["WO-1"])
+
+    updates = [c.args[0] for c in fake_frappe.db.sql.call_args_list if c.args[0].strip().startswith("UPDATE")]
+    assert len(updates) == 4
+    for query in updates:
+        doctype, columns = updated_columns(query)
+        assert columns <= doctype_columns(doctype), (doctype, columns - doctype_columns(doctype))
+
+
+def test_unsettling_takes_the_order_out_of_turnover_stats(settlement):
+    module, fake_frappe, orders = settlement
+    turnover = sys.modules["restaurant_management.restaurant_management.utils.table_turnover"]
+
+    module.unsettle_waiter_orders(["WO-0"], source="PE-1")
+
+    # The stale seated time is retracted before paid_time is cleared
+    turnover.retract_table_turnover.assert_called_once_with(["WO-0"])
+    update = next(c.args[0] for c in fake_frappe.db.sql.call_args_list if c.args[0].strip().startswith("UPDATE"))
+    assert "paid_time = NULL, turnover_recorded = 0" in " ".join(update.split())
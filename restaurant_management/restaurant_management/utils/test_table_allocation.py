@@ -0,0 +1,106 @@
+import datetime
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+NOW = datetime.datetime(2026, 10, 19, 18, 0)
+
+
+def at(hour, minute=0):
+    return NOW.replace(hour=hour, minute=minute)
+
+
+@pytest.fixture
+def allocation(monkeypatch):
+    tables = [
+        FrappeDict(name="T1", table_number="1", seating_capacity=2, combine_group=None),
+        FrappeDict(name="T2", table_number="2", seating_capacity=4, combine_group="Window"),
+        FrappeDict(name="T3", table_number="3", seating_capacity=4, combine_group="Window"),
+        FrappeDict(name="T4", table_number="4", seating_capacity=6, combine_group=None),
+        FrappeDict(name="T5", table_number="5", seating_capacity=2, combine_group="Window"),
+    ]
+    bookings = []
+    cache = {}
+
+    def add_booking(name, table, start, end, status="Booked"):
+        bookings.append(FrappeDict(
+            name=name, table=table, party_size=2, status=status, reservation_time=start, end_time=end
+        ))
+        cache.clear()
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._dict = FrappeDict
+    fake_frappe.local = SimpleNamespace(site="site1")
+    fake_frappe.cache = lambda: SimpleNamespace(get_value=cache.get, set_value=cache.__setitem__)
+    fake_frappe.generate_hash = lambda length=10: str(len(bookings)) + str(id(bookings))
+    fake_frappe.get_all = MagicMock(side_effect=lambda *args, **kwargs: [FrappeDict(table) for table in tables])
+    fake_frappe.db = SimpleNamespace(sql=MagicMock(side_effect=lambda *args, **kwargs: [FrappeDict(b) for b in bookings]))
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        add_to_date=lambda date, minutes=0, hours=0: date + datetime.timedelta(minutes=minutes, hours=hours),
+        cint=lambda value: int(value or 0),
+        get_datetime=lambda value: value,
+        now_datetime=lambda: NOW,
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.utils.table_allocation", raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.table_allocation")
+    return module, fake_frappe, add_booking
+
+
+def test_smallest_sufficient_table_wins(allocation):
+    module, fake_frappe, add_booking = allocation
+
+    assert module.allocate_tables("Main", 2, at(19))["tables"] == ["T1"]
+    assert module.allocate_tables("Main", 3, at(19))["tables"] == ["T2"]
+
+    # T1 is booked 18:30-20:00, so the other two-top is next
+    add_booking("RES-1", "T1", at(18, 30), at(20))
+    assert module.allocate_tables("Main", 2, at(19))["tables"] == ["T5"]
+    # Free again once that booking ends
+    assert module.allocate_tables("Main", 2, at(20), 60)["tables"] == ["T1"]
+    # The reservation being moved does not block itself
+    assert module.allocate_tables("Main", 2, at(19), ignore="RES-1")["tables"] == ["T1"]
+
+
+def test_large_party_combines_tables_of_one_group(allocation):
+    module, fake_frappe, add_booking = allocation
+
+    # T4 seats six; a party of seven needs combined tables
+    result = module.allocate_tables("Main", 7, at(19))
+    assert result["tables"] == ["T2", "T3"]
+    assert result["combined"] and result["capacity"] == 8
+
+    # Fewest spare seats first: T5 + T2 (6) beats T2 + T3 (8) for a party of six
+    add_booking("RES-2", "T4", at(18), at(21))
+    assert module.allocate_tables("Main", 6, at(19))["tables"] == ["T5", "T2"]
+
+    # Seated tables count as taken; T1 is not in a group
+    assert module.allocate_tables("Main", 10, at(19), occupied={"T3"}) is None
+
+
+def test_index_is_reused_until_bookings_change(allocation):
+    module, fake_frappe, add_booking = allocation
+
+    module.allocate_tables("Main", 2, at(19))
+    module.allocate_tables("Main", 4, at(20))
+    assert fake_frappe.db.sql.call_count == 1
+
+    add_booking("RES-3", "T1", at(17), at(18, 30), status="Seated")
+    upcoming = module.get_upcoming_reservations("Main", ["T1", "T2"])
+    assert fake_frappe.db.sql.call_count == 2
+    assert upcoming == {"T1": {"name": "RES-3", "party_size": 2, "status": "Seated", "reservation_time": at(17)}}
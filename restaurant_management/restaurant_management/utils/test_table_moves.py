@@ -0,0 +1,177 @@
+import importlib
+import json
+import os
+import re
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+
+DOCTYPE_DIR = os.path.join(os.path.dirname(__file__), "..", "doctype")
+STANDARD_COLUMNS = {"name", "modified", "modified_by", "docstatus", "idx", "parent", "parenttype", "parentfield"}
+
+
+def doctype_columns(doctype):
+    folder = doctype.lower().replace(" ", "_")
+    with open(os.path.join(DOCTYPE_DIR, folder, f"{folder}.json")) as f:
+        return {field["fieldname"] for field in json.load(f)["fields"]} | STANDARD_COLUMNS
+
+
+def updated_columns(query):
+    """Doctype and column names assigned by an UPDATE statement"""
+    match = re.match(r"\s*UPDATE `tab([^`]+)`(?: \w+)? SET ", query)
+    assignments, depth, current = [], 0, ""
+    rest = query[match.end():]
+    for position, char in enumerate(rest):
+        depth += char == "("
+        depth -= char == ")"
+        if not depth and rest.startswith(" WHERE ", position):
+            break
+        if char == "," and not depth:
+            assignments.append(current)
+            current = ""
+        else:
+            current += char
+    assignments.append(current)
+    return match.group(1), {assignment.split("=")[0].strip(" `") for assignment in assignments}
+
+
+@pytest.fixture
+def moves(monkeypatch):
+    orders = {
+        "WO-1": FrappeDict(name="WO-1", status="Confirmed", docstatus=1, table="T1", branch="Main",
+                           branch_code="MN", items_version=3),
+        "WO-2": FrappeDict(name="WO-2", status="Confirmed", docstatus=1, table="T2", branch="Main",
+                           branch_code="MN", items_version=1),
+        "WO-3": FrappeDict(name="WO-3", status="Paid", docstatus=1, table="T3", branch="Main",
+                           branch_code="MN", items_version=1),
+    }
+    tables = {
+        "T1": FrappeDict(name="T1", branch="Main", current_pos_order="WO-1", is_active=1),
+        "T2": FrappeDict(name="T2", branch="Main", current_pos_order="WO-2", is_active=1),
+        "T4": FrappeDict(name="T4", branch="Main", current_pos_order=None, is_active=1),
+    }
+    items = {"WO-1": ["ROW-1", "ROW-2", "ROW-3"], "WO-2": ["ROW-4"]}
+
+    def sql(query, values=None, as_dict=False, pluck=False):
+        query = " ".join(query.split())
+        if query.startswith("SELECT name, status, docstatus"):
+            return [orders[name] for name in values[0] if name in orders]
+        if query.startswith("SELECT name, branch, status"):
+            return [tables[name] for name in values[0] if name in tables]
+        if query.startswith("SELECT name FROM `tabWaiter Order Item`"):
+            return list(items.get(values, []))
+        if query.startswith("SELECT COALESCE(MAX(idx)"):
+            return [[len(items.get(values, []))]]
+        return None
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._ = lambda text: text
+    fake_frappe._dict = FrappeDict
+    fake_frappe.session = SimpleNamespace(user="waiter@example.com")
+    fake_frappe.db = SimpleNamespace(sql=MagicMock(side_effect=sql))
+    fake_frappe.cache = MagicMock()
+    fake_frappe.publish_realtime = MagicMock()
+
+    def throw(message, exc=None):
+        raise ValueError(message)
+
+    fake_frappe.throw = throw
+
+    def new_doc(doctype):
+        doc = FrappeDict()
+        doc.update = lambda values: dict.update(doc, values)
+        doc.set_new_name = lambda: dict.__setitem__(doc, "name", "WO-NEW")
+        doc.db_insert = MagicMock()
+        return doc
+
+    fake_frappe.new_doc = new_doc
+
+    kds = types.ModuleType("restaurant_management.api.kds_display")
+    kds.clear_station_tickets_cache = MagicMock()
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(now_datetime=lambda: "now", cint=int))
+    monkeypatch.setitem(sys.modules, "restaurant_management.api.kds_display", kds)
+    for module in ("restaurant_management.restaurant_management.utils.table_moves",
+                   "restaurant_management.restaurant_management.utils.settlement"):
+        monkeypatch.delitem(sys.modules, module, raising=False)
+
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.table_moves")
+    return module, fake_frappe
+
+
+def updates(fake_frappe):
+    return [" ".join(call.args[0].split()) for call in fake_frappe.db.sql.call_args_list
+            if call.args[0].strip().startswith("UPDATE")]
+
+
+def test_transfer_moves_the_order_and_swaps_both_tables_at_once(moves):
+    module, fake_frappe = moves
+
+    result = module.transfer_order("WO-1", "T4")
+
+    assert result == {"orders": ["WO-1"], "tables": ["T4", "T1"]}
+    statements = updates(fake_frappe)
+    assert len(statements) == 2
+    assert statements[1].startswith("UPDATE `tabTable`")
+    assert fake_frappe.publish_realtime.call_count == 1
+
+
+def test_merge_reparents_all_items_and_closes_the_source(moves):
+    module, fake_frappe = moves
+
+    result = module.merge_orders("WO-2", "WO-1", release_source_table=False)
+
+    assert result["moved_items"] == 1
+    assert result["tables"] == ["T2"]
+    statements = updates(fake_frappe)
+    # Items, source order, totals, tables
+    assert len(statements) == 4
+    assert statements[0].startswith("UPDATE `tabWaiter Order Item` SET parent")
+    move_values = fake_frappe.db.sql.call_args_list[4].args[1]
+    assert move_values["offset"] == 3 and move_values["version"] == 4
+    assert fake_frappe.publish_realtime.call_count == 1
+
+
+def test_split_opens_an_order_on_a_free_table(moves):
+    module, fake_frappe = moves
+
+    result = module.split_order("WO-1", ["ROW-2"], "T4")
+
+    assert result["order_id"] == "WO-NEW"
+    assert result["tables"] == ["T4"]
+    assert result["moved_items"] == 1
+
+
+def test_closed_orders_and_full_splits_are_refused(moves):
+    module, fake_frappe = moves
+
+    with pytest.raises(ValueError):
+        module.transfer_order("WO-3", "T4")
+    with pytest.raises(ValueError):
+        module.split_order("WO-1", ["ROW-1", "ROW-2", "ROW-3"], "T4")
+    with pytest.raises(ValueError):
+        module.transfer_order("WO-1", "T2")
+    assert updates(fake_frappe) == []
+
+
+def test_updates_only_write_existing_columns(moves):
+    module, fake_frappe = moves
+
+    module.transfer_order("WO-1", "T4")
+    module.merge_orders("WO-2", "WO-1")
+    module.split_order("WO-1", ["ROW-2"], "T4")
+
+    statements = updates(fake_frappe)
+    assert any(query.startswith("UPDATE `tabTable`") for query in statements)
+    for query in statements:
+        doctype, columns = updated_columns(query)
+        assert columns <= doctype_columns(doctype), (doctype, columns - doctype_columns(doctype))
@@ -0,0 +1,147 @@
+import datetime
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+
+class FrappeDict(dict):
+    def __getattr__(self, item):
+        return self.get(item)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+NOW = datetime.datetime(2026, 10, 19, 19, 0)
+MODULES = (
+    "restaurant_management.restaurant_management.utils.table_allocation",
+    "restaurant_management.restaurant_management.utils.table_turnover",
+    "restaurant_management.restaurant_management.utils.waitlist",
+)
+
+
+@pytest.fixture
+def waitlist(monkeypatch):
+    tables = [
+        FrappeDict(name="T1", table_number="1", seating_capacity=4, combine_group="Patio", order_time=NOW - datetime.timedelta(minutes=45)),
+        FrappeDict(name="T2", table_number="2", seating_capacity=2, combine_group="Patio", order_time=None),
+        FrappeDict(name="T3", table_number="3", seating_capacity=4, combine_group=None, order_time=None),
+    ]
+    # T3 is booked from 19:20 for 90 minutes
+    bookings = [FrappeDict(
+        name="RES-1", table="T3", party_size=4, status="Booked",
+        reservation_time=NOW + datetime.timedelta(minutes=20), end_time=NOW + datetime.timedelta(minutes=110)
+    )]
+    stats = []
+    cache = {}
+
+    def get_all(doctype, filters=None, **kwargs):
+        if doctype == "Table":
+            return [FrappeDict(table) for table in tables]
+        rows = [row for row in stats if row.date >= filters["date"][1]]
+        if "modified" in filters:
+            rows = [row for row in rows if row.modified > filters["modified"][1]]
+        return rows
+
+    def sql(query, values=None, as_dict=False):
+        if "`tabTable Reservation`" in query:
+            return [FrappeDict(booking) for booking in bookings]
+        return [FrappeDict(table) for table in tables]
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe._dict = FrappeDict
+    fake_frappe.local = SimpleNamespace(site="site1")
+    fake_frappe.cache = lambda: SimpleNamespace(get_value=cache.get, set_value=cache.__setitem__)
+    fake_frappe.generate_hash = lambda length=10: f"v{len(cache)}-{len(stats)}"
+    fake_frappe.get_all = MagicMock(side_effect=get_all)
+    fake_frappe.db = SimpleNamespace(sql=sql)
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        add_days=lambda date, days: date + datetime.timedelta(days=days),
+        add_to_date=lambda date, minutes=0, hours=0, seconds=0: date + datetime.timedelta(minutes=minutes, hours=hours, seconds=seconds),
+        cint=lambda value: int(value or 0),
+        flt=lambda value, precision=None: round(float(value or 0), precision) if precision else float(value or 0),
+        get_datetime=lambda value: value,
+        getdate=lambda value: value.date() if isinstance(value, datetime.datetime) else value,
+        now_datetime=lambda: NOW,
+        time_diff_in_seconds=lambda end, start: (end - start).total_seconds(),
+    ))
+    for name in MODULES:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    turnover = importlib.import_module("restaurant_management.restaurant_management.utils.table_turnover")
+    module = importlib.import_module("restaurant_management.restaurant_management.utils.waitlist")
+
+    def add_stat(name, table, minutes, days_ago=1):
+        values = turnover.fold_dwell_times({}, [minutes * 60] * 10)
+        stats.append(FrappeDict(
+            name=name, table=table, date=NOW.date() - datetime.timedelta(days=days_ago),
+            histogram=values["histogram"], modified=NOW + datetime.timedelta(seconds=len(stats))
+        ))
+        cache.pop(f"{turnover.TURNOVER_VERSION_KEY}:Main", None)
+
+    yield module, fake_frappe, add_stat
+
+    for name in MODULES:
+        sys.modules.pop(name, None)
+
+
+def test_seated_table_frees_up_after_its_remaining_median(waitlist):
+    module, fake_frappe, add_stat = waitlist
+    add_stat("S1", "T1", 60)
+
+    model = module.get_dwell_model("Main")
+    # Parties stay about an hour; seated 45 minutes, roughly 15 are left
+    remaining = model.expected_remaining("T1", 45 * 60) / 60
+    assert 5 < remaining < 20
+    # Past anything on record the party is expected to leave shortly
+    assert model.expected_remaining("T1", 5 * 3600) == module.OVERSTAY_MINUTES * 60
+    # T2 has no history of its own and falls back to the branch
+    assert model.expected_dwell("T2") == model.expected_dwell("T1")
+
+
+def test_queue_takes_tables_in_order_and_skips_booked_turns(waitlist):
+    module, fake_frappe, add_stat = waitlist
+    add_stat("S1", "T1", 60)
+
+    couple, four, six = module.estimate_waits("Main", [2, 4, 6])
+
+    assert couple == {"wait_minutes": 0, "ready_time": NOW, "tables": ["T2"]}
+    # T3 is free but booked in 20 minutes, so the party waits for T1
+    assert four["tables"] == ["T1"] and 5 < four["wait_minutes"] < 20
+    # Six seats only by pushing the patio tables together, once both are free again
+    assert six["tables"] == ["T2", "T1"]
+    assert six["wait_minutes"] > four["wait_minutes"]
+    assert module.estimate_waits("Main", [12]) == [None]
+
+
+def test_model_reads_only_changed_stats(waitlist):
+    module, fake_frappe, add_stat = waitlist
+    add_stat("S1", "T1", 60)
+    add_stat("S2", "T2", 30)
+
+    module.get_dwell_model("Main")
+    module.get_dwell_model("Main")
+    stat_reads = [call for call in fake_frappe.get_all.call_args_list if call.args[0] == "Table Turnover Stat"]
+    assert len(stat_reads) == 1
+
+    add_stat("S3", "T2", 90, days_ago=0)
+    model = module.get_dwell_model("Main")
+    last_read = [call for call in fake_frappe.get_all.call_args_list if call.args[0] == "Table Turnover Stat"][-1]
+    assert "modified" in last_read.kwargs["filters"]
+    assert sorted(model.rows) == ["S1", "S2", "S3"]
+    assert model.expected_dwell("T2") > model.expected_dwell("T1") / 2
+
+
+def test_cancelled_payment_is_taken_back_out_of_a_stat(waitlist):
+    turnover = sys.modules["restaurant_management.restaurant_management.utils.table_turnover"]
+
+    stat = turnover.fold_dwell_times({}, [3600, 1800])
+    stat = turnover.fold_dwell_times(stat, [1800], count=-1)
+
+    assert stat == turnover.fold_dwell_times({}, [3600])
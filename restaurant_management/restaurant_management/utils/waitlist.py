@@ -0,0 +1,266 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+import frappe
+from frappe.utils import add_days, add_to_date, cint, get_datetime, getdate, now_datetime, time_diff_in_seconds
+
+from restaurant_management.restaurant_management.utils.table_allocation import (
+    MAX_COMBINED_TABLES,
+    get_branch_index,
+)
+from restaurant_management.restaurant_management.utils.table_turnover import (
+    DWELL_HISTOGRAM_BOUNDS,
+    STAT_DOCTYPE,
+    TURNOVER_VERSION_KEY,
+)
+from restaurant_management.utils.metrics import (
+    histogram_count,
+    histogram_percentile_above,
+    merge_histograms,
+)
+
+WAITLIST_DOCTYPE = "Waitlist Entry"
+# Days of Table Turnover Stat the dwell distributions are built from
+HISTORY_DAYS = 28
+# A table needs this many recorded parties before its own distribution is trusted
+MIN_TABLE_SAMPLES = 5
+# Seated time assumed when a branch has no history yet
+DEFAULT_DWELL_MINUTES = 60
+# Time still expected from a party seated longer than anything on record
+OVERSTAY_MINUTES = 10
+
+# site -> {branch: DwellModel}, refreshed when the branch's turnover version changes
+_models: Dict[str, Dict[str, "DwellModel"]] = {}
+
+class DwellModel:
+    """
+    Seated-time distributions of one branch's tables
+
+    Built from the daily Table Turnover Stat rows of the last HISTORY_DAYS
+    days. A refresh reads only rows modified since the last one and re-merges
+    just the tables they belong to.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.watermark = None
+        self.day = None
+        # stat name -> (table, date, histogram)
+        self.rows: Dict[str, tuple] = {}
+        self.tables: Dict[str, Dict[str, int]] = {}
+        self.branch_histogram: Dict[str, int] = {}
+
+    def apply(self, rows: List[Dict[str, Any]], today) -> None:
+        """Merge new or changed stat rows and drop days out of the window"""
+        cutoff = add_days(today, -HISTORY_DAYS)
+        changed = set()
+
+        for row in rows:
+            histogram = row.histogram
+            if isinstance(histogram, str):
+                histogram = json.loads(histogram or "{}")
+            previous = self.rows.get(row.name)
+            if previous:
+                changed.add(previous[0])
+            self.rows[row.name] = (row.table, getdate(row.date), histogram or {})
+            changed.add(row.table)
+            if self.watermark is None or row.modified > self.watermark:
+                self.watermark = row.modified
+
+        for name, (table, date, _histogram) in list(self.rows.items()):
+            if date < cutoff:
+                del self.rows[name]
+                changed.add(table)
+
+        if not changed:
+            return
+
+        by_table: Dict[str, List[Dict[str, int]]] = {}
+        for table, _date, histogram in self.rows.values():
+            if table in changed:
+                by_table.setdefault(table, []).append(histogram)
+        for table in changed:
+            if table in by_table:
+                self.tables[table] = merge_histograms(*by_table[table])
+            else:
+                self.tables.pop(table, None)
+        self.branch_histogram = merge_histograms(*self.tables.values())
+
+    def get_histogram(self, table: str) -> Dict[str, int]:
+        histogram = self.tables.get(table)
+        if histogram_count(histogram) >= MIN_TABLE_SAMPLES:
+            return histogram
+        return self.branch_histogram
+
+    def expected_remaining(self, table: str, seated_seconds: float) -> float:
+        """Median seconds left for a party seated ``seated_seconds`` ago"""
+        histogram = self.get_histogram(table)
+        if not histogram_count(histogram):
+            return max(DEFAULT_DWELL_MINUTES * 60 - seated_seconds, OVERSTAY_MINUTES * 60)
+
+        total = histogram_percentile_above(histogram, seated_seconds, 50, DWELL_HISTOGRAM_BOUNDS)
+        if total is None:
+            return OVERSTAY_MINUTES * 60
+        return max(total - seated_seconds, 0)
+
+    def expected_dwell(self, table: str) -> float:
+        """Median seconds a newly seated party stays"""
+        return self.expected_remaining(table, 0)
+
+def get_turnover_version(branch: str) -> str:
+    cache = frappe.cache()
+    key = f"{TURNOVER_VERSION_KEY}:{branch}"
+    version = cache.get_value(key)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        cache.set_value(key, version)
+    return version
+
+def get_dwell_model(branch: str) -> DwellModel:
+    """
+    Return the in-memory dwell model of a branch
+
+    Costs one cache lookup while the branch's turnover stats are unchanged.
+    After the aggregation job changed them only the modified rows are read;
+    the full window is read once per worker, or when the day rolls over.
+    """
+    version = get_turnover_version(branch)
+    models = _models.setdefault(frappe.local.site, {})
+    model = models.get(branch)
+    today = getdate(now_datetime())
+
+    if model is None or model.day != today:
+        model = DwellModel()
+        models[branch] = model
+
+    if model.version != version:
+        filters = {"branch": branch, "date": [">=", add_days(today, -HISTORY_DAYS)]}
+        if model.watermark:
+            filters["modified"] = [">", model.watermark]
+        rows = frappe.get_all(
+            STAT_DOCTYPE,
+            filters=filters,
+            fields=["name", "table", "date", "histogram", "modified"],
+            limit_page_length=0
+        )
+        model.apply(rows, today)
+        model.version = version
+        model.day = today
+
+    return model
+
+def get_live_tables(branch: str) -> List[Dict[str, Any]]:
+    """Active tables of a branch with the time their current party sat down"""
+    return frappe.db.sql("""
+        SELECT t.name, t.table_number, t.seating_capacity, t.combine_group, wo.order_time
+        FROM `tabTable` t
+        LEFT JOIN `tabWaiter Order` wo ON wo.name = t.current_pos_order
+        WHERE t.branch = %s AND t.is_active = 1
+    """, branch, as_dict=1)
+
+def estimate_waits(branch: str, party_sizes: Sequence[int]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Estimate the wait of each party in a queue, served in order
+
+    Each table gets a free-at time: now if empty, otherwise now plus the
+    median remaining seated time given how long its party has been seated.
+    A booking from the reservation index overlapping a table's next turn
+    pushes the turn past the booking. Every party then takes the table that
+    fits and frees up first (the smallest on ties), or the first tables of a
+    combine group to free up when no single table seats it, and occupies
+    them for the median seated time.
+
+    Args:
+        branch: Branch the parties wait in
+        party_sizes: Party sizes in queue order
+
+    Returns:
+        Per party, a dict with ``wait_minutes``, ``ready_time`` and the
+        expected ``tables``, or None if no table or combination seats it
+    """
+    model = get_dwell_model(branch)
+    reservations = get_branch_index(branch)
+    now = now_datetime()
+
+    tables = []
+    for table in get_live_tables(branch):
+        free_at = now
+        if table.order_time:
+            seated = max(time_diff_in_seconds(now, get_datetime(table.order_time)), 0)
+            free_at = add_to_date(now, seconds=model.expected_remaining(table.name, seated))
+        tables.append(frappe._dict(
+            name=table.name,
+            table_number=table.table_number,
+            capacity=cint(table.seating_capacity),
+            combine_group=table.combine_group,
+            free_at=free_at,
+            dwell=model.expected_dwell(table.name)
+        ))
+
+    def next_turn(table):
+        # Skip past bookings that would cut the next party's stay short
+        start = table.free_at
+        for _attempt in range(5):
+            overlapping = reservations.get_overlapping(table.name, start, add_to_date(start, seconds=table.dwell))
+            if not overlapping:
+                break
+            start = max(booking["end_time"] for booking in overlapping)
+        return start
+
+    estimates = []
+    for party_size in party_sizes:
+        party_size = cint(party_size)
+        fitting = [table for table in tables if table.capacity >= party_size]
+        if fitting:
+            turns = [(next_turn(table), table.capacity, table) for table in fitting]
+            start, _capacity, table = min(turns, key=lambda turn: (turn[0], turn[1]))
+            chosen = [table]
+        else:
+            start, chosen = combine_tables(tables, party_size, next_turn)
+            if not chosen:
+                estimates.append(None)
+                continue
+
+        for table in chosen:
+            table.free_at = add_to_date(start, seconds=max(t.dwell for t in chosen))
+        estimates.append({
+            "wait_minutes": max(int(round(time_diff_in_seconds(start, now) / 60.0)), 0),
+            "ready_time": start,
+            "tables": [table.name for table in chosen]
+        })
+
+    return estimates
+
+def combine_tables(tables, party_size: int, next_turn):
+    """Earliest-freeing tables of one combine group that together seat a party"""
+    groups: Dict[str, List[Any]] = {}
+    for table in tables:
+        if table.combine_group and table.capacity > 0:
+            groups.setdefault(table.combine_group, []).append(table)
+
+    best_start, best = None, None
+    for members in groups.values():
+        turns = sorted(((next_turn(table), table) for table in members), key=lambda turn: turn[0])
+        chosen, capacity = [], 0
+        for start, table in turns[:MAX_COMBINED_TABLES]:
+            chosen.append(table)
+            capacity += table.capacity
+            if capacity >= party_size:
+                if best_start is None or start < best_start:
+                    best_start, best = start, chosen
+                break
+
+    return best_start, best
+
+def get_waiting_party_sizes(branch: str, before=None) -> List[int]:
+    """Party sizes of the branch's waiting entries in queue order"""
+    filters = {"branch": branch, "status": "Waiting"}
+    if before:
+        filters["joined_at"] = ["<", before]
+    return frappe.get_all(
+        WAITLIST_DOCTYPE,
+        filters=filters,
+        fields=["party_size"],
+        order_by="joined_at asc",
+        pluck="party_size"
+    )
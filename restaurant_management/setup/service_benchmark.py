@@ -0,0 +1,307 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import frappe
+from frappe.utils import flt, nowdate
+
+from restaurant_management.utils.metrics import percentile
+from restaurant_management.utils.perf import install_query_counter
+
+# Everything seeded by the load test is prefixed so it can be found and removed
+LOAD_TEST_PREFIX = "LT"
+LOAD_TEST_ITEM_GROUP = "Load Test Items"
+LOAD_TEST_CUSTOMER = "Load Test Customer"
+
+ENDPOINTS = ["create_order", "kds_items", "update_item_status", "get_table_status", "invoice_submit"]
+
+# Next kitchen status an item is moved to by a simulated KDS screen
+NEXT_KITCHEN_STATUS = {"New": "Cooking", "Waiting": "Cooking", "Cooking": "Ready"}
+
+def seed_load_test_data(branches: int = 2, tables: int = 20, items: int = 30) -> Dict[str, Any]:
+    """
+    Create (or reuse) branches, tables, items and kitchen stations for a load test
+
+    Safe to run repeatedly: existing records with the same names are reused.
+
+    Args:
+        branches: Number of branches
+        tables: Tables per branch
+        items: Menu items shared by all branches
+
+    Returns:
+        Dict with ``branches`` (name, branch_code, tables, station) and ``items``
+    """
+    _get_or_insert("Item Group", LOAD_TEST_ITEM_GROUP, {
+        "item_group_name": LOAD_TEST_ITEM_GROUP,
+        "parent_item_group": frappe.db.get_value("Item Group", {"is_group": 1}, "name") or "All Item Groups"
+    })
+
+    item_codes = []
+    for i in range(items):
+        item_code = f"{LOAD_TEST_PREFIX}-ITEM-{i:04d}"
+        _get_or_insert("Item", item_code, {
+            "item_code": item_code,
+            "item_name": f"Load Test Item {i}",
+            "item_group": LOAD_TEST_ITEM_GROUP,
+            "stock_uom": "Nos",
+            "is_stock_item": 0,
+            "standard_rate": 10 + i % 40
+        })
+        item_codes.append(item_code)
+
+    if not frappe.db.get_single_value("Selling Settings", "customer"):
+        _get_or_insert("Customer", LOAD_TEST_CUSTOMER, {"customer_name": LOAD_TEST_CUSTOMER})
+
+    seeded = []
+    for b in range(branches):
+        branch_code = f"{LOAD_TEST_PREFIX}{b:02d}"
+        branch = _get_or_insert("Branch", f"Load Test Branch {b}", {
+            "branch": f"Load Test Branch {b}",
+            "branch_code": branch_code,
+            "is_restaurant": 1
+        })
+
+        station = _get_or_insert("Kitchen Station", f"{branch_code} Kitchen", {
+            "station_name": f"{branch_code} Kitchen",
+            "branch": branch,
+            "branch_code": branch_code,
+            "is_active": 1,
+            "default_preparation_time": 10,
+            "item_groups": [{"item_group": LOAD_TEST_ITEM_GROUP}]
+        })
+
+        table_names = []
+        for t in range(tables):
+            table_number = f"{branch_code}-{t:03d}"
+            name = frappe.db.get_value("Table", {"table_number": table_number, "branch": branch})
+            if not name:
+                table = frappe.get_doc({
+                    "doctype": "Table",
+                    "table_number": table_number,
+                    "branch": branch,
+                    "branch_code": branch_code,
+                    "seating_capacity": 4,
+                    "is_active": 1,
+                    "status": "Available"
+                })
+                table.insert(ignore_permissions=True)
+                name = table.name
+            table_names.append(name)
+
+        seeded.append({"name": branch, "branch_code": branch_code, "tables": table_names, "station": station})
+
+    frappe.db.commit()
+    return {"branches": seeded, "items": item_codes}
+
+def _get_or_insert(doctype: str, name: str, values: Dict[str, Any]) -> str:
+    """Return the name of an existing record, inserting it first if needed"""
+    if frappe.db.exists(doctype, name):
+        return name
+
+    doc = frappe.get_doc(dict(values, doctype=doctype))
+    doc.insert(ignore_permissions=True)
+    return doc.name
+
+class Recorder:
+    """Thread-safe collection of per-endpoint timings, query counts and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {endpoint: {"durations": [], "queries": [], "errors": 0} for endpoint in ENDPOINTS}
+
+    def record(self, endpoint: str, seconds: float, queries: int, failed: bool = False) -> None:
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, {"durations": [], "queries": [], "errors": 0})
+            stats["durations"].append(seconds)
+            stats["queries"].append(queries)
+            if failed:
+                stats["errors"] += 1
+
+def summarize(endpoints: Dict[str, Dict[str, Any]], elapsed: float) -> List[Dict[str, Any]]:
+    """
+    Turn raw samples into one report row per endpoint
+
+    Args:
+        endpoints: Recorder.endpoints
+        elapsed: Wall-clock duration of the run in seconds
+
+    Returns:
+        Rows with calls, errors, throughput, latency percentiles (ms) and queries per call
+    """
+    rows = []
+    for endpoint, stats in endpoints.items():
+        durations = stats["durations"]
+        calls = len(durations)
+        rows.append({
+            "endpoint": endpoint,
+            "calls": calls,
+            "errors": stats["errors"],
+            "throughput": flt(calls / elapsed, 2) if elapsed else 0,
+            "p50_ms": flt((percentile(durations, 50) or 0) * 1000, 1),
+            "p95_ms": flt((percentile(durations, 95) or 0) * 1000, 1),
+            "p99_ms": flt((percentile(durations, 99) or 0) * 1000, 1),
+            "queries_per_call": flt(sum(stats["queries"]) / calls, 1) if calls else 0
+        })
+    return rows
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Render summary rows as a fixed-width text table"""
+    header = f"{'endpoint':<20}{'calls':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['endpoint']:<20}{row['calls']:>8}{row['errors']:>8}{row['throughput']:>9}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['queries_per_call']:>9}"
+        )
+    return "\n".join(lines)
+
+def run_service(site: str, seed: Dict[str, Any], duration: int = 60, waiters: int = 4,
+        kds_screens: int = 2, table_displays: int = 2, cashiers: int = 1) -> Dict[str, Any]:
+    """
+    Replay a service against seeded data with concurrent simulated staff
+
+    Every actor runs in its own thread with its own site connection and
+    commits after each call, like a request would.
+
+    Args:
+        site: Site to run against
+        seed: Result of seed_load_test_data
+        duration: Length of the run in seconds
+        waiters: Actors placing orders
+        kds_screens: Actors polling and advancing kitchen items
+        table_displays: Actors polling table status
+        cashiers: Actors submitting invoices for served orders
+
+    Returns:
+        Dict with ``elapsed`` seconds and summary ``rows``
+    """
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+
+    actors = (
+        [_waiter] * waiters
+        + [_kds_screen] * kds_screens
+        + [_table_display] * table_displays
+        + [_cashier] * cashiers
+    )
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(actors)) as pool:
+        futures = [
+            pool.submit(_run_actor, site, actor, seed, deadline, recorder, index)
+            for index, actor in enumerate(actors)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - started
+
+    return {"elapsed": elapsed, "rows": summarize(recorder.endpoints, elapsed)}
+
+def _run_actor(site: str, actor: Callable, seed: Dict[str, Any], deadline: float, recorder: Recorder, index: int) -> None:
+    """Connect to the site in this thread and run one actor until the deadline"""
+    frappe.init(site=site)
+    frappe.connect()
+    frappe.set_user("Administrator")
+    frappe.local.benchmark_counts = {"queries": 0, "rows": 0}
+    install_query_counter(frappe.db, frappe.local.benchmark_counts)
+
+    rng = random.Random(index)
+    branch = seed["branches"][index % len(seed["branches"])]
+    try:
+        while time.monotonic() < deadline:
+            actor(branch, seed, recorder, rng)
+    finally:
+        frappe.destroy()
+
+def _timed(recorder: Recorder, endpoint: str, fn: Callable, *args, **kwargs) -> Any:
+    """Call an endpoint, commit like a request would and record the sample"""
+    counts = frappe.local.benchmark_counts
+    counts["queries"] = 0
+    frappe.local.response = frappe._dict()
+    started = time.perf_counter()
+    result, failed = None, False
+    try:
+        result = fn(*args, **kwargs)
+        frappe.db.commit()
+        failed = isinstance(result, dict) and result.get("success") is False
+    except Exception:
+        frappe.db.rollback()
+        failed = True
+    recorder.record(endpoint, time.perf_counter() - started, counts["queries"], failed)
+    return result
+
+def _waiter(branch, seed, recorder, rng) -> None:
+    from restaurant_management.api.waiter_order import create_order
+
+    items = [
+        {"item_code": rng.choice(seed["items"]), "qty": rng.randint(1, 3)}
+        for _i in range(rng.randint(1, 5))
+    ]
+    _timed(recorder, "create_order", create_order, table=rng.choice(branch["tables"]), items=items, auto_submit=1)
+    time.sleep(rng.uniform(0.5, 2))
+
+def _kds_screen(branch, seed, recorder, rng) -> None:
+    from restaurant_management.api.kds_display import kds_items, update_item_status
+
+    items = _timed(recorder, "kds_items", kds_items, branch["station"], branch["branch_code"]) or []
+    open_items = [item for item in items if item.get("status") in NEXT_KITCHEN_STATUS]
+    if open_items:
+        item = rng.choice(open_items)
+        _timed(recorder, "update_item_status", update_item_status, item["id"], NEXT_KITCHEN_STATUS[item["status"]])
+    time.sleep(rng.uniform(0.2, 1))
+
+def _table_display(branch, seed, recorder, rng) -> None:
+    from restaurant_management.api.table_display import get_table_status
+
+    _timed(recorder, "get_table_status", get_table_status, branch["name"])
+    time.sleep(rng.uniform(1, 3))
+
+def _cashier(branch, seed, recorder, rng) -> None:
+    order = frappe.db.get_value(
+        "Waiter Order",
+        {
+            "branch_code": branch["branch_code"],
+            "status": ["in", ["Confirmed", "Served"]],
+            "docstatus": 1,
+            # Orders billed by another cashier loop are waiting for their payment
+            "settled_by": ["is", "not set"]
+        },
+        "name"
+    )
+    if order:
+        _timed(recorder, "invoice_submit", _submit_invoice, order)
+    time.sleep(rng.uniform(1, 4))
+
+def _submit_invoice(waiter_order: str) -> Dict[str, Any]:
+    """
+    Bill a waiter order with a Sales Invoice and take the payment, as a cashier would
+
+    The Payment Entry marks the order Paid and releases its table, so the
+    next cashier round picks a different order.
+    """
+    from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+
+    order = frappe.get_doc("Waiter Order", waiter_order)
+
+    invoice = frappe.new_doc("Sales Invoice")
+    invoice.customer = frappe.db.get_single_value("Selling Settings", "customer") or LOAD_TEST_CUSTOMER
+    invoice.branch = order.branch
+    invoice.restaurant_waiter_order = order.name
+    invoice.restaurant_table = order.table
+    invoice.posting_date = nowdate()
+    for item in order.items:
+        invoice.append("items", {"item_code": item.item_code, "qty": item.qty, "rate": item.rate})
+
+    invoice.set_missing_values()
+    invoice.insert(ignore_permissions=True)
+    invoice.submit()
+
+    payment = get_payment_entry("Sales Invoice", invoice.name)
+    payment.reference_no = invoice.name
+    payment.reference_date = nowdate()
+    payment.insert(ignore_permissions=True)
+    payment.submit()
+    return {"success": True, "invoice": invoice.name, "payment_entry": payment.name}
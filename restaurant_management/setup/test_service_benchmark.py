@@ -0,0 +1,51 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def benchmark(monkeypatch):
+    monkeypatch.setitem(sys.modules, "frappe", types.ModuleType("frappe"))
+    monkeypatch.setitem(sys.modules, "frappe.utils", SimpleNamespace(
+        flt=lambda value, precision=None: round(float(value or 0), precision or 9),
+        nowdate=lambda: "2024-01-01"
+    ))
+    monkeypatch.delitem(sys.modules, "restaurant_management.setup.service_benchmark", raising=False)
+
+    return importlib.import_module("restaurant_management.setup.service_benchmark")
+
+
+def test_summary_reports_throughput_percentiles_and_queries(benchmark):
+    recorder = benchmark.Recorder()
+    for i in range(1, 101):
+        recorder.record("kds_items", i / 1000, queries=3, failed=(i == 100))
+
+    rows = {row["endpoint"]: row for row in benchmark.summarize(recorder.endpoints, elapsed=10)}
+
+    assert rows["kds_items"] == {
+        "endpoint": "kds_items",
+        "calls": 100,
+        "errors": 1,
+        "throughput": 10.0,
+        "p50_ms": 50.0,
+        "p95_ms": 95.0,
+        "p99_ms": 99.0,
+        "queries_per_call": 3.0,
+    }
+    # Endpoints without samples are still listed
+    assert rows["invoice_submit"]["calls"] == 0
+    assert "kds_items" in benchmark.format_report(list(rows.values()))
+
+
+def test_cashier_only_bills_unsettled_orders(benchmark, monkeypatch):
+    filters = []
+    benchmark.frappe.db = SimpleNamespace(get_value=lambda doctype, conditions, field: filters.append(conditions))
+    monkeypatch.setattr(benchmark.time, "sleep", lambda seconds: None)
+
+    benchmark._cashier({"branch_code": "LT00"}, {}, benchmark.Recorder(), benchmark.random.Random(1))
+
+    # An order billed in an earlier round must not be billed again
+    assert filters[0]["settled_by"] == ["is", "not set"]
@@ -0,0 +1,164 @@
+"""Per-branch menu availability (the "86 list").
+
+Each branch has two Redis structures:
+
+- a set of item codes that are sold out ("86'd")
+- a hash of item code -> portions left, for items sold on a countdown
+
+Order entry checks both with one pipelined round trip and no SQL. Countdown
+portions are taken with ``HINCRBY`` (the hash form of ``DECRBY``), so two
+tablets can never both take the last portion: a decrement that goes below
+zero is put back and the order is refused. Portions taken by a request whose
+transaction rolls back are returned too. An item whose countdown reaches zero
+counts as sold out until it is restocked.
+"""
+
+import math
+from collections import OrderedDict
+
+import frappe
+
+SOLD_OUT_KEY_PREFIX = "restaurant_86"
+COUNTDOWN_KEY_PREFIX = "restaurant_86_countdown"
+
+
+def get_keys(branch_code):
+    """Redis keys of a branch's sold-out set and countdown hash."""
+    cache = frappe.cache()
+    return (
+        cache.make_key(f"{SOLD_OUT_KEY_PREFIX}:{branch_code}"),
+        cache.make_key(f"{COUNTDOWN_KEY_PREFIX}:{branch_code}"),
+    )
+
+
+def get_availability(branch_code):
+    """
+    Return the sold-out items and countdowns of a branch.
+
+    Returns:
+        Dict with ``sold_out`` (item codes, including countdowns at zero) and
+        ``countdown`` (item code -> portions left)
+    """
+    if not branch_code:
+        return {"sold_out": [], "countdown": {}}
+
+    sold_out_key, countdown_key = get_keys(branch_code)
+    pipe = frappe.cache().pipeline()
+    pipe.smembers(sold_out_key)
+    pipe.hgetall(countdown_key)
+    members, counts = pipe.execute()
+
+    countdown = {decode(item): int(left) for item, left in (counts or {}).items()}
+    sold_out = {decode(item) for item in members or ()}
+    sold_out.update(item for item, left in countdown.items() if left <= 0)
+    return {"sold_out": sorted(sold_out), "countdown": countdown}
+
+
+def set_availability(branch_code, item_code, sold_out=False, qty=None):
+    """
+    Change the availability of an item in a branch.
+
+    Args:
+        branch_code: Branch the change applies to
+        item_code: Item to change
+        sold_out: Mark the item sold out
+        qty: Portions left; starts (or resets) a countdown. Without ``qty``
+            and ``sold_out`` the item is back on the menu without a countdown
+    """
+    sold_out_key, countdown_key = get_keys(branch_code)
+    pipe = frappe.cache().pipeline()
+    if sold_out:
+        pipe.sadd(sold_out_key, item_code)
+        pipe.hdel(countdown_key, item_code)
+    else:
+        pipe.srem(sold_out_key, item_code)
+        if qty is None:
+            pipe.hdel(countdown_key, item_code)
+        else:
+            pipe.hset(countdown_key, item_code, max(int(qty), 0))
+    pipe.execute()
+
+
+def reserve_items(branch_code, items):
+    """
+    Check ordered items against the 86 list and take countdown portions.
+
+    Args:
+        branch_code: Branch the order belongs to
+        items: Iterable of (item_code, qty)
+
+    Raises:
+        frappe.ValidationError: If any item is sold out or short; nothing is
+            taken in that case
+    """
+    wanted = OrderedDict()
+    for item_code, qty in items:
+        wanted[item_code] = wanted.get(item_code, 0) + portions(qty)
+    if not branch_code or not wanted:
+        return
+
+    cache = frappe.cache()
+    sold_out_key, countdown_key = get_keys(branch_code)
+    codes = list(wanted)
+
+    pipe = cache.pipeline()
+    for item_code in codes:
+        pipe.sismember(sold_out_key, item_code)
+    pipe.hmget(countdown_key, codes)
+    *flags, counts = pipe.execute()
+
+    unavailable = [code for code, flag in zip(codes, flags) if flag]
+    counted = [code for code, left in zip(codes, counts) if left is not None and code not in unavailable]
+    unavailable += [code for code, left in zip(codes, counts) if left is not None and int(left) < wanted[code]]
+
+    if not unavailable and counted:
+        pipe = cache.pipeline()
+        for item_code in counted:
+            pipe.hincrby(countdown_key, item_code, -wanted[item_code])
+        remaining = pipe.execute()
+
+        # Another order took the portions between the check and the decrement
+        unavailable = [code for code, left in zip(counted, remaining) if left < 0]
+        if unavailable:
+            release_items(branch_code, [(code, wanted[code]) for code in counted])
+        else:
+            taken = [(code, wanted[code]) for code in counted]
+            frappe.db.after_rollback.add(lambda: release_items(branch_code, taken))
+
+    if unavailable:
+        frappe.throw(
+            frappe._("Sold out: {0}").format(", ".join(dict.fromkeys(unavailable))),
+            title=frappe._("Item Unavailable"),
+        )
+
+
+def release_items(branch_code, items):
+    """Give countdown portions back, e.g. when the order taking them rolled back.
+
+    Args:
+        branch_code: Branch the portions were taken in
+        items: Iterable of (item_code, portions)
+    """
+    _sold_out_key, countdown_key = get_keys(branch_code)
+    items = list(items)
+
+    cache = frappe.cache()
+    pipe = cache.pipeline()
+    pipe.hmget(countdown_key, [code for code, _qty in items])
+    counted = pipe.execute()[0]
+
+    # Items taken off the countdown meanwhile stay off it
+    pipe = cache.pipeline()
+    for (item_code, qty), left in zip(items, counted):
+        if left is not None:
+            pipe.hincrby(countdown_key, item_code, qty)
+    pipe.execute()
+
+
+def portions(qty):
+    """Countdowns count whole portions; a half portion still takes one."""
+    return max(int(math.ceil(float(qty or 0))), 1)
+
+
+def decode(value):
+    return value.decode() if isinstance(value, bytes) else value
@@ -0,0 +1,231 @@
+"""Display configuration registry for the KDS and table screens.
+
+Each screen's configuration is merged from layers, later layers winning:
+
+1. built-in defaults (``DEFAULT_DISPLAY_CONFIG``)
+2. ``config/<screen>_display.json`` shipped with the app
+3. site settings: ``KDS Settings`` and ``restaurant_display`` in site_config.json
+4. ``restaurant_display_overrides`` of the screen's Branch
+5. ``display_overrides`` of the Kitchen Station (KDS only)
+
+The layers are compiled once per worker and kept in memory together with a
+version token held in Redis. Doc events on the source doctypes issue a new
+token, so every worker recompiles on its next read; a screen refresh only
+costs one cache lookup. Screens send the version they hold and get
+``{"version": ..., "unchanged": True}`` back while it is still current.
+"""
+
+import copy
+import json
+import os
+
+import frappe
+
+DISPLAY_CONFIG_VERSION_KEY = "restaurant_display_config_version"
+
+DEFAULT_DISPLAY_CONFIG = {
+    "kds": {
+        "refresh_interval": 10,
+        "default_kitchen_station": "",
+        "status_color_map": {
+            "Waiting": "#e74c3c",            # Red
+            "Sent to Kitchen": "#e74c3c",    # Red
+            "Cooking": "#f39c12",            # Orange
+            "Ready": "#2ecc71"               # Green
+        },
+        "enable_sound_on_ready": True,
+        "enable_sound_on_new_item": True,
+        "show_item_notes": True,
+        "auto_refresh": True
+    },
+    "table": {
+        "refresh_interval": 30,
+        "default_branch_code": "",
+        "status_colors": {
+            "Available": "#2ecc71",  # green
+            "In Progress": "#e74c3c", # red
+            "Paid": "#3498db"        # blue
+        }
+    },
+}
+
+# KDS Settings field -> config path
+KDS_SETTINGS_FIELDS = {
+    "refresh_interval": ("refresh_interval",),
+    "default_kitchen_station": ("default_kitchen_station",),
+    "waiting_color": ("status_color_map", "Waiting"),
+    "sent_to_kitchen_color": ("status_color_map", "Sent to Kitchen"),
+    "cooking_color": ("status_color_map", "Cooking"),
+    "ready_color": ("status_color_map", "Ready"),
+    "enable_sound_on_ready": ("enable_sound_on_ready",),
+    "enable_sound_on_new_item": ("enable_sound_on_new_item",),
+    "show_item_notes": ("show_item_notes",),
+    "auto_refresh": ("auto_refresh",),
+}
+
+# site -> {"version": ..., "layers": ..., "resolved": {...}}
+_registry = {}
+
+
+def get_display_config_version():
+    """Return the current display configuration version, creating one if needed."""
+    cache = frappe.cache()
+    version = cache.get_value(DISPLAY_CONFIG_VERSION_KEY)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        cache.set_value(DISPLAY_CONFIG_VERSION_KEY, version)
+    return version
+
+
+def bump_display_config_version(doc=None, method=None):
+    """Invalidate the compiled display configuration in every worker.
+
+    Used as a doc event handler for KDS Settings, Kitchen Station and Branch,
+    and for Table and Item Group whose setup data is part of the cached page
+    shells (see ``page_context``; Table also calls it when a table changes
+    branch or is (de)activated). Also a clear_cache hook so site_config.json
+    edits apply after ``bench clear-cache``.
+    """
+    frappe.cache().set_value(DISPLAY_CONFIG_VERSION_KEY, frappe.generate_hash(length=10))
+
+
+def get_screen_config(screen, branch=None, branch_code=None, kitchen_station=None, version=None):
+    """
+    Return the merged configuration of one screen.
+
+    Args:
+        screen: "kds" or "table"
+        branch: Branch docname of the screen
+        branch_code: Branch code of the screen, used when ``branch`` is not given
+        kitchen_station: Kitchen Station shown on a KDS screen
+        version: Configuration version already held by the client
+
+    Returns:
+        Config dict including its ``version``, or ``{"version": ..., "unchanged": True}``
+        when ``version`` is still current
+    """
+    current = get_display_config_version()
+    if version and version == current:
+        return {"version": current, "unchanged": True}
+
+    entry = _registry.get(frappe.local.site)
+    if not entry or entry["version"] != current:
+        # Read the version before the sources: a bump during compilation
+        # leaves this entry stale and the next read recompiles
+        entry = {"version": current, "layers": compile_layers(), "resolved": {}}
+        _registry[frappe.local.site] = entry
+
+    key = (screen, branch or "", branch_code or "", kitchen_station or "")
+    if key not in entry["resolved"]:
+        entry["resolved"][key] = resolve_config(entry["layers"], *key)
+
+    config = copy.deepcopy(entry["resolved"][key])
+    config["version"] = current
+    return config
+
+
+def resolve_config(layers, screen, branch=None, branch_code=None, kitchen_station=None):
+    """Apply the branch and station overrides of ``layers`` to a screen's base config."""
+    config = layers["screens"][screen]
+    station = layers["stations"].get(kitchen_station) or {}
+
+    branch_code = branch_code or layers["branch_codes"].get(branch) or station.get("branch_code")
+    branch_overrides = layers["branches"].get(branch_code) or {}
+    config = merge_config(config, branch_overrides.get(screen))
+
+    if screen == "kds":
+        config = merge_config(config, station.get("overrides"))
+    return config
+
+
+def compile_layers():
+    """Read every configuration source once."""
+    site_config = frappe.conf.get("restaurant_display") or {}
+    screens = {}
+    for screen, defaults in DEFAULT_DISPLAY_CONFIG.items():
+        config = merge_config(defaults, load_config_file(screen))
+        if screen == "kds":
+            config = merge_config(config, get_kds_settings())
+        screens[screen] = merge_config(config, site_config.get(screen))
+
+    branches, branch_codes = {}, {}
+    for row in get_override_rows("Branch", ["name", "branch_code", "restaurant_display_overrides as overrides"]):
+        branch_codes[row.name] = row.branch_code
+        branches[row.branch_code] = parse_overrides(row.overrides, f"Branch {row.name}")
+
+    stations = {}
+    for row in get_override_rows("Kitchen Station", ["name", "branch_code", "display_overrides as overrides"]):
+        stations[row.name] = {
+            "branch_code": row.branch_code,
+            "overrides": parse_overrides(row.overrides, f"Kitchen Station {row.name}"),
+        }
+
+    return {"screens": screens, "branches": branches, "branch_codes": branch_codes, "stations": stations}
+
+
+def load_config_file(screen):
+    """Return the app's ``config/<screen>_display.json``, or an empty dict."""
+    path = os.path.join(frappe.get_app_path("restaurant_management"), "config", f"{screen}_display.json")
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        frappe.log_error(frappe.get_traceback(), "Display Config Error")
+        return {}
+
+
+def get_kds_settings():
+    """Return the values set in KDS Settings as a config layer."""
+    if not frappe.db.exists("DocType", "KDS Settings"):
+        return {}
+
+    settings = frappe.get_single("KDS Settings")
+    layer = {}
+    for fieldname, path in KDS_SETTINGS_FIELDS.items():
+        value = settings.get(fieldname)
+        if value in (None, ""):
+            continue
+        target = layer
+        for part in path[:-1]:
+            target = target.setdefault(part, {})
+        target[path[-1]] = value
+    return layer
+
+
+def get_override_rows(doctype, fields):
+    """Return the rows of ``doctype`` carrying display overrides."""
+    try:
+        return frappe.get_all(doctype, fields=fields, limit_page_length=0, ignore_permissions=True)
+    except Exception:
+        # Override fields not synced yet
+        frappe.log_error(frappe.get_traceback(), "Display Config Error")
+        return []
+
+
+def parse_overrides(value, source):
+    """Parse a JSON overrides field, ignoring invalid values."""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return value
+
+    try:
+        overrides = json.loads(value)
+    except ValueError:
+        frappe.log_error(f"Invalid display overrides on {source}", "Display Config Error")
+        return {}
+    return overrides if isinstance(overrides, dict) else {}
+
+
+def merge_config(base, override):
+    """Return ``base`` with ``override`` merged in; nested dicts merge key by key."""
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
@@ -0,0 +1,126 @@
+"""Idempotency keys for order submission endpoints.
+
+Tablets on flaky Wi-Fi retry requests whose response they never saw. A
+client sends the same key with every retry of one submission, either as an
+``idempotency_key`` argument or an ``Idempotency-Key`` header. The first
+request claims the key in Redis with ``SET NX`` and, once it has committed,
+stores its result there; retries get that result back without validating,
+naming or saving anything again. Keys are scoped per endpoint and user and
+expire after a day.
+"""
+
+import json
+import time
+
+import frappe
+
+IDEMPOTENCY_KEY_PREFIX = "restaurant_idempotency"
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 128
+
+# How long a finished request's result is replayed
+RESULT_TTL_SECONDS = 24 * 60 * 60
+# Claim held while the first request runs; a crashed worker frees it after this
+IN_PROGRESS_TTL_SECONDS = 60
+IN_PROGRESS = "__in_progress__"
+
+# How long a retry waits for the first request to finish
+WAIT_SECONDS = 5
+POLL_SECONDS = 0.2
+
+
+def get_idempotency_key(key=None):
+    """Return the key passed as argument or request header, if any."""
+    if not key and getattr(frappe.local, "request", None):
+        key = frappe.get_request_header(IDEMPOTENCY_HEADER)
+    if not key:
+        return None
+
+    key = str(key).strip()
+    if len(key) > MAX_KEY_LENGTH:
+        frappe.throw(frappe._("Idempotency key must be at most {0} characters").format(MAX_KEY_LENGTH))
+    return key
+
+
+def run_idempotent(scope, key, fn):
+    """
+    Run ``fn`` once per idempotency key and replay its result to retries.
+
+    Failed runs (an exception, or a result with ``success`` False) release
+    the key so the client can retry for real.
+
+    Args:
+        scope: Endpoint name the key belongs to
+        key: Client idempotency key; ``fn`` simply runs when empty
+        fn: Callable doing the work, committing before it returns
+
+    Returns:
+        The result of ``fn``, or the recorded result with ``idempotent_replay``
+        set for a retry
+    """
+    key = get_idempotency_key(key)
+    if not key:
+        return fn()
+
+    ledger_key = get_ledger_key(scope, key)
+    if not claim_key(ledger_key):
+        return get_recorded_result(ledger_key)
+
+    try:
+        result = fn()
+    except Exception:
+        release_key(ledger_key)
+        raise
+
+    record_result(ledger_key, result)
+    return result
+
+
+def get_ledger_key(scope, key):
+    """Redis key of an idempotency key, scoped per endpoint and user."""
+    return frappe.cache().make_key(f"{IDEMPOTENCY_KEY_PREFIX}:{scope}:{frappe.session.user}:{key}")
+
+
+def claim_key(ledger_key):
+    """Claim a key for a request about to run; False if it was seen before."""
+    return bool(frappe.cache().set(ledger_key, IN_PROGRESS, nx=True, ex=IN_PROGRESS_TTL_SECONDS))
+
+
+def release_key(ledger_key):
+    """Forget a claimed key so the request can run again."""
+    frappe.cache().delete(ledger_key)
+
+
+def record_result(ledger_key, result):
+    """Store the result of a committed request, or release the key if it failed."""
+    if isinstance(result, dict) and result.get("success") is False:
+        release_key(ledger_key)
+    else:
+        frappe.cache().set(ledger_key, json.dumps(result, default=str), ex=RESULT_TTL_SECONDS)
+
+
+def get_recorded_result(ledger_key):
+    """Return the result stored for a key, waiting briefly while it is in progress."""
+    cache = frappe.cache()
+    deadline = time.monotonic() + WAIT_SECONDS
+    while True:
+        value = cache.get(ledger_key)
+        if isinstance(value, bytes):
+            value = value.decode()
+
+        if value and value != IN_PROGRESS:
+            result = json.loads(value)
+            if isinstance(result, dict):
+                result["idempotent_replay"] = True
+            return result
+
+        if not value or time.monotonic() >= deadline:
+            # Still running (or the first attempt failed meanwhile): let the
+            # client retry with the same key later
+            return {
+                "success": False,
+                "in_progress": bool(value),
+                "error": frappe._("This request is already being processed. Please retry shortly."),
+            }
+
+        time.sleep(POLL_SECONDS)
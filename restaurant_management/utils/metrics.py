@@ -0,0 +1,120 @@
+"""Small, dependency-free helpers for latency statistics.
+
+Histograms are plain ``{upper_bound: count}`` dictionaries (bounds in seconds,
+stored as strings so they survive a JSON round trip). They can be merged and
+queried for percentiles without keeping the raw samples around.
+"""
+
+import math
+
+# Bucket upper bounds in seconds: 30s steps up to 10 min, 1 min steps up to
+# 30 min, 5 min steps up to 2 h. Anything slower lands in the "inf" bucket.
+HISTOGRAM_BOUNDS = (
+    list(range(30, 601, 30))
+    + list(range(660, 1801, 60))
+    + list(range(2100, 7201, 300))
+)
+OVERFLOW_BUCKET = "inf"
+
+
+def new_histogram():
+    """Return an empty histogram."""
+    return {}
+
+
+def bucket_for(seconds, bounds=HISTOGRAM_BOUNDS):
+    """Return the histogram key of the bucket that holds ``seconds``."""
+    for bound in bounds:
+        if seconds <= bound:
+            return str(bound)
+    return OVERFLOW_BUCKET
+
+
+def add_to_histogram(histogram, seconds, count=1, bounds=HISTOGRAM_BOUNDS):
+    """Add ``count`` observations of ``seconds`` to ``histogram`` in place."""
+    key = bucket_for(max(seconds or 0, 0), bounds)
+    histogram[key] = histogram.get(key, 0) + count
+    return histogram
+
+
+def merge_histograms(*histograms):
+    """Return a new histogram holding the counts of all given histograms."""
+    merged = new_histogram()
+    for histogram in histograms:
+        for key, count in (histogram or {}).items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def histogram_count(histogram):
+    """Return the number of observations in ``histogram``."""
+    return sum((histogram or {}).values())
+
+
+def histogram_percentile(histogram, q, bounds=HISTOGRAM_BOUNDS):
+    """Estimate the ``q`` percentile (0-100) of a histogram.
+
+    The value is interpolated linearly inside the bucket that contains the
+    requested rank. Returns None for an empty histogram.
+    """
+    total = histogram_count(histogram)
+    if not total:
+        return None
+
+    rank = total * q / 100.0
+    seen = 0
+    lower = 0
+    for bound in bounds:
+        count = histogram.get(str(bound), 0)
+        if count and seen + count >= rank:
+            return lower + (bound - lower) * (rank - seen) / count
+        seen += count
+        lower = bound
+
+    # Rank falls in the overflow bucket; the best estimate is its lower edge
+    return float(lower)
+
+
+def histogram_percentile_above(histogram, floor, q, bounds=HISTOGRAM_BOUNDS):
+    """Estimate the ``q`` percentile of the observations larger than ``floor``.
+
+    Answers "given it already took ``floor`` seconds, how long in total?":
+    observations are assumed spread evenly inside their bucket, so only the
+    part of the bucket above ``floor`` counts. Returns None when no
+    observation is larger than ``floor``.
+    """
+    remaining = []
+    lower = 0
+    for bound in bounds:
+        count = histogram.get(str(bound), 0)
+        if count and bound > floor:
+            start = max(lower, floor)
+            remaining.append((start, bound, count * (bound - start) / (bound - lower)))
+        lower = bound
+
+    overflow = histogram.get(OVERFLOW_BUCKET, 0)
+    total = sum(weight for _, _, weight in remaining) + overflow
+    if not total:
+        return None
+
+    rank = total * q / 100.0
+    seen = 0
+    for start, bound, weight in remaining:
+        if seen + weight >= rank:
+            return start + (bound - start) * (rank - seen) / weight
+        seen += weight
+
+    # Rank falls in the overflow bucket; the best estimate is its lower edge
+    return float(max(lower, floor))
+
+
+def percentile(values, q):
+    """Return the ``q`` percentile (0-100) of raw samples, or None if empty.
+
+    Uses the nearest-rank method so the result is always an observed value.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(math.ceil(q / 100.0 * len(ordered))), 1)
+    return ordered[rank - 1]
@@ -0,0 +1,91 @@
+"""Cached page shells for the internal UI pages.
+
+The station display, table display and waiter order pages only need the
+slow-changing setup data (branches, kitchen stations, table counts, item
+groups) to render. It is built once per page, branch and display
+configuration version and kept in Redis; live data is loaded by the page's
+APIs after it renders. Saving a Branch, Kitchen Station, Table or Item Group
+issues a new version (see ``display_config.bump_display_config_version``).
+"""
+
+import frappe
+
+from restaurant_management.utils.display_config import get_display_config_version
+
+PAGE_CONTEXT_CACHE_PREFIX = "restaurant_page_context"
+PAGE_CONTEXT_CACHE_TTL = 24 * 60 * 60
+
+
+def get_page_data(page, branch=None):
+    """
+    Return the cached shell data of an internal UI page.
+
+    Args:
+        page: "station_display", "table_display" or "waiter_order"
+        branch: Branch docname to limit the shell to, if any
+
+    Returns:
+        Dict with the page's ``branches`` and setup data
+    """
+    cache = frappe.cache()
+    cache_key = "{0}:{1}:{2}:{3}".format(
+        PAGE_CONTEXT_CACHE_PREFIX, page, branch or "all", get_display_config_version()
+    )
+
+    data = cache.get_value(cache_key)
+    if data is None:
+        data = PAGE_BUILDERS[page](branch)
+        cache.set_value(cache_key, data, expires_in_sec=PAGE_CONTEXT_CACHE_TTL)
+    return data
+
+
+def get_branches(branch=None):
+    filters = {"name": branch} if branch else {}
+    branches = frappe.get_all("Branch", filters=filters, fields=["name", "branch_code"], order_by="name")
+    return [{"name": b.name, "branch_code": b.branch_code or ""} for b in branches]
+
+
+def build_station_display(branch=None):
+    filters = {"branch": branch} if branch else {}
+    stations = frappe.get_all(
+        "Kitchen Station",
+        filters=filters,
+        fields=["name", "station_name", "branch"],
+        order_by="station_name",
+    )
+    return {
+        "branches": get_branches(branch),
+        "kitchen_stations": [
+            {"name": s.name, "station_name": s.station_name or "", "branch": s.branch} for s in stations
+        ],
+    }
+
+
+def build_table_display(branch=None):
+    filters = {"branch": branch} if branch else {}
+    return {
+        "branches": get_branches(branch),
+        "table_count": frappe.db.count("Table", filters),
+    }
+
+
+def build_waiter_order(branch=None):
+    filters = {"branch": branch} if branch else {}
+    item_groups = frappe.get_all(
+        "Item Group",
+        filters={"show_in_website": 1},
+        fields=["name", "item_group_name"],
+        order_by="name",
+    )
+    return {
+        "branches": get_branches(branch),
+        "table_count": frappe.db.count("Table", filters),
+        "item_groups": [{"name": g.name, "item_group_name": g.item_group_name or ""} for g in item_groups],
+    }
+
+
+PAGE_BUILDERS = {
+    "station_display": build_station_display,
+    "table_display": build_table_display,
+    "waiter_order": build_waiter_order,
+}
@@ -0,0 +1,197 @@
+"""Per-endpoint cost accounting for restaurant whitelisted methods.
+
+``start_request``/``finish_request`` run as before/after request hooks. For
+every call to a ``restaurant_management.*`` method they count SQL
+statements, rows returned, cache hits/misses and wall time, and fold them
+into one Redis hash per minute. Buckets expire after the rolling window, so
+stats always describe the last hour of traffic.
+"""
+
+import time
+
+import frappe
+
+from restaurant_management.utils.metrics import bucket_for, histogram_percentile, merge_histograms
+
+PERF_KEY_PREFIX = "restaurant_perf"
+INSTRUMENTED_PREFIX = "restaurant_management."
+BUCKET_SECONDS = 60
+WINDOW_MINUTES = 60
+
+# Latency bucket upper bounds in milliseconds
+LATENCY_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+COUNTERS = ("calls", "errors", "time_ms", "queries", "rows", "cache_hits", "cache_misses")
+
+
+def get_request_method():
+    """Return the whitelisted method of the current request if it is instrumented."""
+    request = getattr(frappe.local, "request", None)
+    path = getattr(request, "path", "") or ""
+    method = path[len("/api/method/"):] if path.startswith("/api/method/") else frappe.local.form_dict.get("cmd")
+    if method and method.startswith(INSTRUMENTED_PREFIX):
+        return method
+    return None
+
+
+def start_request():
+    """before_request hook: start measuring an instrumented call."""
+    method = get_request_method()
+    if not method or not getattr(frappe.local, "db", None):
+        return
+
+    frappe.local.restaurant_perf = state = {
+        "method": method,
+        "started": time.perf_counter(),
+        "queries": 0,
+        "rows": 0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+    }
+    install_query_counter(frappe.local.db, state)
+
+
+def install_query_counter(db, state):
+    """Wrap ``db.sql`` of this connection so statements and rows land in ``state``."""
+    sql = db.sql
+
+    def counted(*args, **kwargs):
+        result = sql(*args, **kwargs)
+        state["queries"] += 1
+        if isinstance(result, (list, tuple)):
+            state["rows"] += len(result)
+        return result
+
+    db.sql = counted
+
+
+def record_cache_lookup(hit):
+    """Count a cache hit or miss against the current instrumented call, if any."""
+    state = getattr(frappe.local, "restaurant_perf", None)
+    if state is not None:
+        state["cache_hits" if hit else "cache_misses"] += 1
+
+
+def finish_request(response=None, request=None):
+    """after_request hook: store the measurements of an instrumented call."""
+    state = getattr(frappe.local, "restaurant_perf", None)
+    if state is None:
+        return
+
+    frappe.local.restaurant_perf = None
+    failed = bool(response is not None and getattr(response, "status_code", 200) >= 400)
+    try:
+        record_call(state["method"], (time.perf_counter() - state["started"]) * 1000, state, failed)
+    except Exception:
+        # Instrumentation must never break the request
+        frappe.log_error(frappe.get_traceback(), "Restaurant Perf Stats Error")
+
+
+def get_bucket_key(timestamp=None):
+    """Redis key of the one-minute bucket holding ``timestamp``."""
+    bucket = int((timestamp or time.time()) // BUCKET_SECONDS)
+    return f"{PERF_KEY_PREFIX}:{bucket}"
+
+
+def record_call(method, elapsed_ms, counts, failed=False):
+    """Fold one call into the current minute bucket with a single pipeline."""
+    cache = frappe.cache()
+    key = cache.make_key(get_bucket_key())
+
+    pipe = cache.pipeline()
+    pipe.hincrby(key, f"{method}|calls", 1)
+    pipe.hincrbyfloat(key, f"{method}|time_ms", elapsed_ms)
+    pipe.hincrby(key, f"{method}|latency|{bucket_for(elapsed_ms, LATENCY_BOUNDS_MS)}", 1)
+    if failed:
+        pipe.hincrby(key, f"{method}|errors", 1)
+    for counter in ("queries", "rows", "cache_hits", "cache_misses"):
+        if counts.get(counter):
+            pipe.hincrby(key, f"{method}|{counter}", counts[counter])
+    pipe.expire(key, (WINDOW_MINUTES + 1) * BUCKET_SECONDS)
+    pipe.execute()
+
+
+def get_window_stats(minutes=15, now=None):
+    """
+    Aggregate the last ``minutes`` buckets into per-method stats.
+
+    Returns:
+        Dict keyed by method with totals, per-call averages and latency
+        percentiles, sorted by total time spent (heaviest first)
+    """
+    cache = frappe.cache()
+    now = now or time.time()
+    minutes = max(1, min(int(minutes or 15), WINDOW_MINUTES))
+    keys = [cache.make_key(get_bucket_key(now - offset * BUCKET_SECONDS)) for offset in range(minutes)]
+
+    pipe = cache.pipeline()
+    for key in keys:
+        pipe.hgetall(key)
+
+    raw = {}
+    for bucket in pipe.execute():
+        for field, value in (bucket or {}).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            method, _, metric = field.partition("|")
+            entry = raw.setdefault(method, {"latency": {}})
+            if metric.startswith("latency|"):
+                bound = metric.split("|", 1)[1]
+                entry["latency"] = merge_histograms(entry["latency"], {bound: int(value)})
+            else:
+                entry[metric] = entry.get(metric, 0) + float(value)
+
+    return summarize_stats(raw)
+
+
+def summarize_stats(raw):
+    """Turn raw counter totals into the reported per-method stats."""
+    stats = {}
+    for method, entry in raw.items():
+        calls = int(entry.get("calls", 0))
+        row = {counter: round(entry.get(counter, 0), 1) for counter in COUNTERS}
+        row["calls"] = calls
+        row["avg_ms"] = round(entry.get("time_ms", 0) / calls, 1) if calls else 0
+        row["queries_per_call"] = round(entry.get("queries", 0) / calls, 1) if calls else 0
+        row["rows_per_call"] = round(entry.get("rows", 0) / calls, 1) if calls else 0
+        lookups = entry.get("cache_hits", 0) + entry.get("cache_misses", 0)
+        row["cache_hit_ratio"] = round(entry.get("cache_hits", 0) / lookups, 3) if lookups else None
+        for q in (50, 95, 99):
+            value = histogram_percentile(entry["latency"], q, bounds=LATENCY_BOUNDS_MS)
+            row[f"p{q}_ms"] = round(value, 1) if value is not None else None
+        row["latency"] = entry["latency"]
+        stats[method] = row
+
+    return dict(sorted(stats.items(), key=lambda item: item[1]["time_ms"], reverse=True))
+
+
+def format_prometheus(stats, minutes=15):
+    """
+    Render per-method stats in the Prometheus text exposition format.
+
+    Values describe the rolling window rather than process lifetime, so they
+    are exported as gauges labelled with the window length.
+    """
+    window = f'window="{int(minutes)}m"'
+    metrics = [
+        ("calls", "restaurant_api_calls", "Calls per method"),
+        ("errors", "restaurant_api_errors", "Failed calls per method"),
+        ("queries", "restaurant_api_queries", "SQL statements per method"),
+        ("rows", "restaurant_api_rows", "Rows returned by SQL per method"),
+        ("cache_hits", "restaurant_api_cache_hits", "Cache hits per method"),
+        ("cache_misses", "restaurant_api_cache_misses", "Cache misses per method"),
+        ("time_ms", "restaurant_api_time_milliseconds", "Total wall time per method"),
+    ]
+
+    lines = []
+    for field, name, help_text in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f'{name}{{method="{method}",{window}}} {row[field]:g}' for method, row in stats.items()]
+
+    name = "restaurant_api_latency_milliseconds"
+    lines += [f"# HELP {name} Latency percentiles per method", f"# TYPE {name} gauge"]
+    for method, row in stats.items():
+        for q in (50, 95, 99):
+            if row[f"p{q}_ms"] is not None:
+                lines.append(f'{name}{{method="{method}",quantile="0.{q}",{window}}} {row[f"p{q}_ms"]:g}')
+
+    return "\n".join(lines) + "\n"
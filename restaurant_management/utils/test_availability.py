@@ -0,0 +1,130 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        results = [getattr(self.redis, name)(*args) for name, args in self.calls]
+        self.redis.round_trips += 1
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.sets = {}
+        self.hashes = {}
+        self.round_trips = 0
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member.encode())
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member.encode())
+
+    def sismember(self, key, member):
+        return member.encode() in self.sets.get(key, set())
+
+    def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = str(value).encode()
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field.encode(), None)
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field.encode()) for field in fields]
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hincrby(self, key, field, amount):
+        value = int(self.hashes.setdefault(key, {}).get(field.encode(), b"0")) + amount
+        self.hashes[key][field.encode()] = str(value).encode()
+        return value
+
+
+class Unavailable(Exception):
+    pass
+
+
+@pytest.fixture
+def availability(monkeypatch):
+    redis = FakeRedis()
+    rollback_callbacks = []
+
+    def throw(message, title=None):
+        raise Unavailable(message)
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.cache = lambda: redis
+    fake_frappe._ = lambda message: message
+    fake_frappe.throw = throw
+    fake_frappe.db = SimpleNamespace(after_rollback=SimpleNamespace(add=rollback_callbacks.append))
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.delitem(sys.modules, "restaurant_management.utils.availability", raising=False)
+
+    module = importlib.import_module("restaurant_management.utils.availability")
+    return module, redis, rollback_callbacks
+
+
+def test_sold_out_items_are_refused_without_taking_portions(availability):
+    module, redis, callbacks = availability
+    module.set_availability("MN", "SOUP", sold_out=True)
+    module.set_availability("MN", "CAKE", qty=5)
+
+    with pytest.raises(Unavailable, match="SOUP"):
+        module.reserve_items("MN", [("CAKE", 2), ("SOUP", 1)])
+
+    assert module.get_availability("MN")["countdown"] == {"CAKE": 5}
+    assert callbacks == []
+
+
+def test_countdown_takes_portions_and_returns_them_on_rollback(availability):
+    module, redis, callbacks = availability
+    module.set_availability("MN", "CAKE", qty=3)
+    redis.round_trips = 0
+
+    # Unlisted items are only checked: one round trip
+    module.reserve_items("MN", [("TEA", 4)])
+    assert redis.round_trips == 1
+
+    module.reserve_items("MN", [("CAKE", 1), ("CAKE", 1.5)])
+    assert module.get_availability("MN") == {"sold_out": ["CAKE"], "countdown": {"CAKE": 0}}
+
+    with pytest.raises(Unavailable, match="CAKE"):
+        module.reserve_items("MN", [("CAKE", 1)])
+
+    # The order taking the portions rolled back
+    callbacks[0]()
+    assert module.get_availability("MN") == {"sold_out": [], "countdown": {"CAKE": 3}}
+
+
+def test_restocking_clears_the_sold_out_flag(availability):
+    module, redis, callbacks = availability
+    module.set_availability("MN", "SOUP", sold_out=True)
+    module.set_availability("MN", "SOUP")
+
+    module.reserve_items("MN", [("SOUP", 2)])
+    assert module.get_availability("MN") == {"sold_out": [], "countdown": {}}
+    # Other branches are unaffected
+    assert module.get_availability("BR") == {"sold_out": [], "countdown": {}}
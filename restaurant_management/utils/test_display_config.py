@@ -0,0 +1,86 @@
+import importlib
+import itertools
+import os
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+APP_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    store = {}
+    hashes = itertools.count()
+    calls = []
+    rows = {
+        "Branch": [
+            SimpleNamespace(name="Main", branch_code="MN", restaurant_display_overrides='{"kds": {"refresh_interval": 5}, "table": {"refresh_interval": 15}}'),
+            SimpleNamespace(name="Beach", branch_code="BC", restaurant_display_overrides=None),
+        ],
+        "Kitchen Station": [
+            SimpleNamespace(name="Grill", branch_code="MN", display_overrides='{"status_color_map": {"Cooking": "#000000"}}'),
+            SimpleNamespace(name="Bar", branch_code="BC", display_overrides="not json"),
+        ],
+    }
+
+    def get_all(doctype, fields=None, **kwargs):
+        calls.append(doctype)
+        overrides = fields[-1].split(" as ")[0]
+        return [
+            SimpleNamespace(name=row.name, branch_code=row.branch_code, overrides=getattr(row, overrides))
+            for row in rows[doctype]
+        ]
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.local = SimpleNamespace(site="test.local")
+    fake_frappe.conf = {"restaurant_display": {"table": {"default_branch_code": "MN"}}}
+    fake_frappe.cache = lambda: SimpleNamespace(get_value=store.get, set_value=store.__setitem__)
+    fake_frappe.generate_hash = lambda length=10: f"v{next(hashes)}"
+    fake_frappe.get_app_path = lambda app, *parts: os.path.join(APP_PATH, *parts)
+    fake_frappe.db = SimpleNamespace(exists=lambda *args: False)
+    fake_frappe.get_all = get_all
+    fake_frappe.log_error = lambda *args, **kwargs: None
+    fake_frappe.get_traceback = lambda: ""
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.delitem(sys.modules, "restaurant_management.utils.display_config", raising=False)
+
+    module = importlib.import_module("restaurant_management.utils.display_config")
+    return module, calls
+
+
+def test_layers_merge_in_order(registry):
+    module, calls = registry
+
+    kds = module.get_screen_config("kds", kitchen_station="Grill")
+    # JSON file, branch (via the station) and station layers all apply
+    assert kds["refresh_interval"] == 5
+    assert kds["status_color_map"]["Cooking"] == "#000000"
+    assert kds["status_color_map"]["Sent to Kitchen"] == "#e74c3c"
+
+    table = module.get_screen_config("table", branch="Main")
+    assert table["refresh_interval"] == 15
+    assert table["default_branch_code"] == "MN"
+
+    # Invalid station overrides are ignored
+    assert module.get_screen_config("kds", kitchen_station="Bar")["refresh_interval"] == 10
+
+
+def test_compiled_once_until_version_bump(registry):
+    module, calls = registry
+
+    first = module.get_screen_config("kds", branch_code="MN")
+    first["refresh_interval"] = 99
+    second = module.get_screen_config("kds", branch_code="MN")
+    assert second["refresh_interval"] == 5
+    assert calls == ["Branch", "Kitchen Station"]
+
+    assert module.get_screen_config("kds", version=second["version"]) == {"version": second["version"], "unchanged": True}
+
+    module.bump_display_config_version()
+    third = module.get_screen_config("kds", version=second["version"])
+    assert third["version"] != second["version"] and "unchanged" not in third
+    assert calls == ["Branch", "Kitchen Station"] * 2
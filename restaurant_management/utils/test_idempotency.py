@@ -0,0 +1,87 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return False
+        self.store[key] = value.encode()
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture
+def idempotency(monkeypatch):
+    redis = FakeRedis()
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.local = SimpleNamespace()
+    fake_frappe.session = SimpleNamespace(user="waiter@example.com")
+    fake_frappe.cache = lambda: redis
+    fake_frappe._ = lambda message: message
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.delitem(sys.modules, "restaurant_management.utils.idempotency", raising=False)
+
+    module = importlib.import_module("restaurant_management.utils.idempotency")
+    monkeypatch.setattr(module, "WAIT_SECONDS", 0)
+    return module, redis
+
+
+def test_retry_replays_the_first_result(idempotency):
+    module, redis = idempotency
+    calls = []
+
+    def create():
+        calls.append(1)
+        return {"success": True, "order_id": f"WO-{len(calls)}"}
+
+    first = module.run_idempotent("send_order_to_kitchen", "key-1", create)
+    retry = module.run_idempotent("send_order_to_kitchen", "key-1", create)
+
+    assert first == {"success": True, "order_id": "WO-1"}
+    assert retry == {"success": True, "order_id": "WO-1", "idempotent_replay": True}
+    assert len(calls) == 1
+
+    # Other keys and calls without a key run normally
+    assert module.run_idempotent("send_order_to_kitchen", "key-2", create)["order_id"] == "WO-2"
+    assert module.run_idempotent("send_order_to_kitchen", None, create)["order_id"] == "WO-3"
+
+
+def test_failures_release_the_key(idempotency):
+    module, redis = idempotency
+
+    assert module.run_idempotent("create_order", "k", lambda: {"success": False}) == {"success": False}
+
+    with pytest.raises(RuntimeError):
+        module.run_idempotent("create_order", "k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+    assert module.run_idempotent("create_order", "k", lambda: {"success": True}) == {"success": True}
+
+
+def test_retry_during_the_first_request_is_told_to_wait(idempotency):
+    module, redis = idempotency
+    retries = []
+
+    def first():
+        # A retry arriving while the first request is still running
+        retries.append(module.run_idempotent("create_order", "k", lambda: {"success": True, "order_id": "WO-2"}))
+        return {"success": True, "order_id": "WO-1"}
+
+    assert module.run_idempotent("create_order", "k", first)["order_id"] == "WO-1"
+    assert retries[0]["success"] is False and retries[0]["in_progress"] is True
@@ -0,0 +1,64 @@
+from restaurant_management.utils.metrics import (
+    add_to_histogram,
+    bucket_for,
+    histogram_count,
+    histogram_percentile,
+    histogram_percentile_above,
+    merge_histograms,
+    new_histogram,
+    percentile,
+)
+
+
+def test_bucket_for_uses_upper_bounds():
+    assert bucket_for(0) == "30"
+    assert bucket_for(30) == "30"
+    assert bucket_for(31) == "60"
+    assert bucket_for(10 ** 6) == "inf"
+
+
+def test_merged_histograms_match_single_histogram():
+    samples = [45, 200, 310, 320, 330, 600, 900, 1500]
+    whole = new_histogram()
+    first, second = new_histogram(), new_histogram()
+    for index, seconds in enumerate(samples):
+        add_to_histogram(whole, seconds)
+        add_to_histogram(first if index % 2 else second, seconds)
+
+    merged = merge_histograms(first, second)
+
+    assert merged == whole
+    assert histogram_count(merged) == len(samples)
+    assert histogram_percentile(merged, 50) == histogram_percentile(whole, 50)
+
+
+def test_histogram_percentile_stays_within_bucket_of_exact_value():
+    samples = list(range(10, 1210, 10))
+    histogram = new_histogram()
+    for seconds in samples:
+        add_to_histogram(histogram, seconds)
+
+    for q in (50, 95):
+        exact = percentile(samples, q)
+        estimate = histogram_percentile(histogram, q)
+        assert abs(estimate - exact) <= 60
+
+
+def test_empty_inputs_return_none():
+    assert histogram_percentile(new_histogram(), 95) is None
+    assert percentile([], 50) is None
+
+
+def test_percentile_above_conditions_on_elapsed_time():
+    histogram = new_histogram()
+    for seconds in (100, 200, 300, 400, 500, 600):
+        add_to_histogram(histogram, seconds)
+
+    # Nothing elapsed: same as the plain percentile
+    assert histogram_percentile_above(histogram, 0, 50) == histogram_percentile(histogram, 50)
+    # Past 450s only the two slowest observations remain
+    assert 450 < histogram_percentile_above(histogram, 450, 50) <= 600
+    assert histogram_percentile_above(histogram, 600, 50) is None
+
+    add_to_histogram(histogram, 10 ** 6)
+    assert histogram_percentile_above(histogram, 10 ** 5, 50) == 10 ** 5
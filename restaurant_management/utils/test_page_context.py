@@ -0,0 +1,90 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def page_context(monkeypatch):
+    store = {"restaurant_display_config_version": "v1"}
+    calls = []
+
+    def get_all(doctype, filters=None, **kwargs):
+        calls.append((doctype, filters))
+        rows = {
+            "Branch": [SimpleNamespace(name="Main", branch_code="MN")],
+            "Kitchen Station": [SimpleNamespace(name="Grill", station_name="Grill", branch="Main")],
+        }
+        return rows[doctype]
+
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.local = SimpleNamespace(site="test.local")
+    fake_frappe.cache = lambda: SimpleNamespace(
+        get_value=store.get,
+        set_value=lambda key, value, expires_in_sec=None: store.__setitem__(key, value),
+    )
+    fake_frappe.get_all = get_all
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    for name in ("restaurant_management.utils.page_context", "restaurant_management.utils.display_config"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+    module = importlib.import_module("restaurant_management.utils.page_context")
+    return module, store, calls
+
+
+def test_page_data_is_built_once_per_branch_and_version(page_context):
+    module, store, calls = page_context
+
+    data = module.get_page_data("station_display", "Main")
+    assert data == {
+        "branches": [{"name": "Main", "branch_code": "MN"}],
+        "kitchen_stations": [{"name": "Grill", "station_name": "Grill", "branch": "Main"}],
+    }
+    assert calls == [("Kitchen Station", {"branch": "Main"}), ("Branch", {"name": "Main"})]
+
+    module.get_page_data("station_display", "Main")
+    assert len(calls) == 2
+
+    store["restaurant_display_config_version"] = "v2"
+    module.get_page_data("station_display", "Main")
+    assert len(calls) == 4
+
+
+def test_moving_or_deactivating_a_table_invalidates_page_data(page_context, monkeypatch):
+    module, store, calls = page_context
+    fake_frappe = sys.modules["frappe"]
+    fake_frappe.generate_hash = lambda length=10: "v2"
+
+    class Document:
+        def has_value_changed(self, field):
+            return self.before.get(field) != getattr(self, field)
+
+        def get_doc_before_save(self):
+            return SimpleNamespace(**self.before)
+
+    allocation = types.ModuleType("restaurant_management.restaurant_management.utils.table_allocation")
+    allocation.bump_reservation_index = lambda branch: None
+    monkeypatch.setitem(sys.modules, "frappe.model.document", SimpleNamespace(Document=Document))
+    monkeypatch.setitem(sys.modules, allocation.__name__, allocation)
+    monkeypatch.delitem(sys.modules, "restaurant_management.restaurant_management.doctype.table.table", raising=False)
+    table_module = importlib.import_module("restaurant_management.restaurant_management.doctype.table.table")
+
+    def save(**changes):
+        table = table_module.Table()
+        table.before = {"branch": "Main", "is_active": 1, "seating_capacity": 4, "combine_group": None,
+                        "table_number": "1", "status": "Available"}
+        for field, value in dict(table.before, **changes).items():
+            setattr(table, field, value)
+        table.on_update()
+        return store["restaurant_display_config_version"]
+
+    # Status changes on every order and must not flush the page shells
+    assert save(status="In Progress") == "v1"
+    assert save(branch="Patio") != "v1"
+    store["restaurant_display_config_version"] = "v1"
+    assert save(is_active=0) != "v1"
+
+    sys.modules.pop("restaurant_management.restaurant_management.doctype.table.table", None)
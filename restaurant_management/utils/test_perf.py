@@ -0,0 +1,77 @@
+import importlib
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.results = []
+
+    def hincrby(self, key, field, amount):
+        bucket = self.store.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def expire(self, key, seconds):
+        pass
+
+    def hgetall(self, key):
+        self.results.append(dict(self.store.get(key, {})))
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+@pytest.fixture
+def perf(monkeypatch):
+    store = {}
+    fake_frappe = types.ModuleType("frappe")
+    fake_frappe.local = SimpleNamespace()
+    fake_frappe.cache = lambda: SimpleNamespace(
+        make_key=lambda key: f"site|{key}",
+        pipeline=lambda: FakePipeline(store),
+    )
+
+    monkeypatch.setitem(sys.modules, "frappe", fake_frappe)
+    monkeypatch.delitem(sys.modules, "restaurant_management.utils.perf", raising=False)
+
+    module = importlib.import_module("restaurant_management.utils.perf")
+    return module, fake_frappe, store
+
+
+def test_query_counter_counts_statements_and_rows(perf):
+    module, fake_frappe, store = perf
+    db = SimpleNamespace(sql=lambda query, *args, **kwargs: [(1,), (2,)] if query.startswith("SELECT") else None)
+    state = {"queries": 0, "rows": 0}
+
+    module.install_query_counter(db, state)
+    db.sql("SELECT name FROM `tabTable`")
+    db.sql("UPDATE `tabTable` SET status = 'Available'")
+
+    assert state == {"queries": 2, "rows": 2}
+
+
+def test_window_stats_and_prometheus_export(perf):
+    module, fake_frappe, store = perf
+    method = "restaurant_management.api.table_display.get_table_status"
+
+    for elapsed in (4, 8, 40, 400):
+        module.record_call(method, elapsed, {"queries": 3, "rows": 20, "cache_misses": 1})
+    module.record_call(method, 2, {"cache_hits": 1}, failed=True)
+
+    stats = module.get_window_stats(minutes=5)[method]
+
+    assert stats["calls"] == 5 and stats["errors"] == 1
+    assert stats["queries_per_call"] == 2.4
+    assert stats["cache_hit_ratio"] == 0.2
+    assert stats["p50_ms"] <= 10 < stats["p99_ms"] <= 500
+
+    text = module.format_prometheus({method: stats}, minutes=5)
+    assert f'restaurant_api_calls{{method="{method}",window="5m"}} 5' in text
+    assert 'quantile="0.95"' in text
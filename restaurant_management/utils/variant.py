@@ -1,5 +1,13 @@
 import json
 
+# Redis hash of template item code -> attribute index (see build_variant_index)
+VARIANT_INDEX_CACHE_KEY = "restaurant_item_variant_index"
+
+# Opaque token that changes whenever templates, variants or attributes change
+VARIANT_CATALOGUE_VERSION_KEY = "restaurant_variant_catalogue_version"
+VARIANT_CATALOGUE_CACHE_PREFIX = "restaurant_variant_catalogue"
+VARIANT_CATALOGUE_CACHE_TTL = 24 * 60 * 60
+
 
 def get_item_variant_attributes(template_item_code=None, item_code=None):
     """Get variant attributes for a template item.
@@ -34,45 +42,337 @@ def get_item_variant_attributes(template_item_code=None, item_code=None):
     return attributes
 
 
-def resolve_item_variant(template_item_code, attributes):
-    """Resolve the appropriate variant based on selected attributes."""
+def _get_frappe():
     import importlib
 
+    return importlib.import_module("frappe")
+
+
+def _get_cache(frappe):
+    cache = getattr(frappe, "cache", None)
+    return cache() if callable(cache) else None
+
+
+def _attribute_key(attributes):
+    """Normalise selected attributes into a hashable index key."""
+    return frozenset(
+        (str(attr), str(value))
+        for attr, value in (attributes or {}).items()
+        if value not in (None, "")
+    )
+
+
+def build_variant_index(template_item_code):
+    """Build the attribute index of all enabled variants of a template.
+
+    Uses two queries regardless of the number of variants.
+
+    Args:
+        template_item_code: Code of the template item.
+
+    Returns:
+        Dict with ``variants`` mapping ``frozenset((attribute, value), ...)`` to
+        the variant row (in database order) and ``aliases`` mapping attribute
+        field names to attribute names.
+    """
+    frappe = _get_frappe()
+
+    variants = frappe.get_all(
+        "Item",
+        filters={"variant_of": template_item_code, "disabled": 0},
+        fields=["item_code", "item_name"],
+    )
+    if not variants:
+        return {"variants": {}, "aliases": {}}
+
+    attributes_by_variant = {}
+    aliases = {}
+    for row in frappe.get_all(
+        "Item Variant Attribute",
+        fields=["parent", "attribute", "field_name", "attribute_value"],
+        filters={"parent": ["in", [variant.item_code for variant in variants]]},
+    ):
+        attributes_by_variant.setdefault(row.parent, {})[row.attribute] = row.attribute_value
+        field_name = getattr(row, "field_name", None)
+        if field_name:
+            aliases[field_name] = row.attribute
+
+    return {
+        "variants": {
+            _attribute_key(attributes_by_variant.get(variant.item_code)): variant
+            for variant in variants
+        },
+        "aliases": aliases,
+    }
+
+
+def get_variant_index(template_item_code):
+    """Return the cached variant index for a template, building it on a miss."""
+    frappe = _get_frappe()
+    cache = _get_cache(frappe)
+
+    index = cache.hget(VARIANT_INDEX_CACHE_KEY, template_item_code) if cache else None
+    if index is None:
+        index = build_variant_index(template_item_code)
+        if cache:
+            cache.hset(VARIANT_INDEX_CACHE_KEY, template_item_code, index)
+
+    return index
+
+
+def clear_variant_index(template_item_code=None):
+    """Drop the cached variant index of one template, or of all templates."""
+    cache = _get_cache(_get_frappe())
+    if not cache:
+        return
+
+    if template_item_code:
+        cache.hdel(VARIANT_INDEX_CACHE_KEY, template_item_code)
+    else:
+        cache.delete_key(VARIANT_INDEX_CACHE_KEY)
+
+
+def _match_variant(index, attributes):
+    aliases = index["aliases"]
+    key = _attribute_key(
+        {aliases.get(attr, attr): value for attr, value in (attributes or {}).items()}
+    )
+    variant = index["variants"].get(key)
+    if variant is None:
+        # Partial selection: first variant carrying every selected attribute
+        variant = next(
+            (
+                candidate
+                for variant_key, candidate in index["variants"].items()
+                if key <= variant_key
+            ),
+            None,
+        )
+    return variant
+
+
+def resolve_item_variant(template_item_code, attributes):
+    """Resolve the appropriate variant based on selected attributes."""
     if isinstance(attributes, str):
         attributes = json.loads(attributes)
 
-    frappe = importlib.import_module("frappe")
+    frappe = _get_frappe()
     _ = getattr(frappe, "_", lambda m: m)
 
-    db_exists = getattr(getattr(frappe, "db", None), "exists", None)
-    if callable(db_exists) and not db_exists("Item", template_item_code):
-        frappe.throw(_("Item template not found"))
+    index = get_variant_index(template_item_code)
+    if not index["variants"]:
+        db_exists = getattr(getattr(frappe, "db", None), "exists", None)
+        if callable(db_exists) and not db_exists("Item", template_item_code):
+            frappe.throw(_("Item template not found"))
+
+    variant = _match_variant(index, attributes)
+    if variant is None:
+        frappe.throw(_("No matching variant found for selected attributes"))
+
+    return variant
+
+
+def resolve_item_variants(selections):
+    """Resolve variants for many template/attribute selections at once.
+
+    Each template's index is loaded once, however many lines use it.
+
+    Args:
+        selections: List of dicts with ``template_item_code`` and ``attributes``.
+
+    Returns:
+        List of matching variant rows (None where nothing matched), in input order.
+    """
+    if isinstance(selections, str):
+        selections = json.loads(selections)
+
+    indexes = {}
+    variants = []
+    for selection in selections or []:
+        template_item_code = selection.get("template_item_code") or selection.get("item_code")
+        attributes = selection.get("attributes") or {}
+        if isinstance(attributes, str):
+            attributes = json.loads(attributes)
+
+        if template_item_code not in indexes:
+            indexes[template_item_code] = get_variant_index(template_item_code)
+
+        variants.append(_match_variant(indexes[template_item_code], attributes))
+
+    return variants
+
+
+def get_variant_catalogue_version():
+    """Return the current variant catalogue version, creating one if needed."""
+    frappe = _get_frappe()
+    cache = _get_cache(frappe)
+    if not cache:
+        return None
+
+    version = cache.get_value(VARIANT_CATALOGUE_VERSION_KEY)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        cache.set_value(VARIANT_CATALOGUE_VERSION_KEY, version)
+    return version
+
+
+def bump_variant_catalogue_version(doc=None, method=None):
+    """Invalidate every cached variant catalogue by issuing a new version.
+
+    Used as a doc event handler for Item Attribute and Kitchen Station and
+    called from the Item override when a template or variant changes.
+    """
+    frappe = _get_frappe()
+    cache = _get_cache(frappe)
+    if cache:
+        cache.set_value(VARIANT_CATALOGUE_VERSION_KEY, frappe.generate_hash(length=10))
+
+
+def get_variant_catalogue(branch_code=None, version=None):
+    """Return all variant templates with their attributes and variants.
+
+    The result is cached per branch and catalogue version. Clients send the
+    version they hold and get ``{"version": ..., "unchanged": True}`` back
+    when it is still current.
+
+    Args:
+        branch_code: Limit templates to item groups routed to this branch's
+            active kitchen stations. Branches without stations get everything.
+        version: Catalogue version already held by the client.
+
+    Returns:
+        Dict with ``version`` and ``templates``.
+    """
+    frappe = _get_frappe()
+    cache = _get_cache(frappe)
+
+    current = get_variant_catalogue_version()
+    if version and version == current:
+        return {"version": current, "unchanged": True}
+
+    cache_key = "{0}:{1}:{2}".format(VARIANT_CATALOGUE_CACHE_PREFIX, branch_code or "all", current)
+    templates = cache.get_value(cache_key) if cache else None
+    if templates is None:
+        templates = build_variant_catalogue(branch_code)
+        if cache:
+            cache.set_value(cache_key, templates, expires_in_sec=VARIANT_CATALOGUE_CACHE_TTL)
+
+    return {"version": current, "templates": templates}
+
+
+def build_variant_catalogue(branch_code=None):
+    """Build the variant catalogue with a fixed number of queries.
+
+    Args:
+        branch_code: Optional branch used to limit the item groups.
+
+    Returns:
+        List of templates, each with ``attributes`` (name, field name and
+        ordered option list) and ``variants`` (item code, name, rate and
+        attribute values). The variants are the valid combinations.
+    """
+    frappe = _get_frappe()
+
+    filters = {"has_variants": 1, "disabled": 0}
+    if branch_code:
+        item_groups = frappe.get_all(
+            "Kitchen Station Item Group",
+            filters={"parent": ["in", frappe.get_all(
+                "Kitchen Station",
+                filters={"branch_code": branch_code, "is_active": 1},
+                pluck="name",
+            ) or [""]]},
+            pluck="item_group",
+        )
+        if item_groups:
+            filters["item_group"] = ["in", list(set(item_groups))]
+
+    templates = frappe.get_all(
+        "Item",
+        filters=filters,
+        fields=["item_code", "item_name", "item_group", "standard_rate"],
+        order_by="item_name",
+    )
+    if not templates:
+        return []
+
+    template_codes = [template.item_code for template in templates]
+
+    template_attributes = frappe.get_all(
+        "Item Variant Attribute",
+        fields=["parent", "attribute", "field_name", "options"],
+        filters={"parent": ["in", template_codes]},
+        order_by="idx",
+    )
+
+    # Option lists come from the attribute master when the template row has none
+    attribute_values = {}
+    attribute_names = list({row.attribute for row in template_attributes})
+    if attribute_names:
+        for row in frappe.get_all(
+            "Item Attribute Value",
+            fields=["parent", "attribute_value"],
+            filters={"parent": ["in", attribute_names]},
+            order_by="idx",
+        ):
+            attribute_values.setdefault(row.parent, []).append(row.attribute_value)
 
     variants = frappe.get_all(
         "Item",
-        filters={"variant_of": template_item_code, "disabled": 0},
-        fields=["item_code", "item_name"],
+        filters={"variant_of": ["in", template_codes], "disabled": 0},
+        fields=["item_code", "item_name", "variant_of", "standard_rate"],
+        order_by="item_name",
     )
 
-    for variant in variants:
-        variant_attributes = frappe.get_all(
+    variant_attributes = {}
+    rates = {}
+    if variants:
+        variant_codes = [variant.item_code for variant in variants]
+        for row in frappe.get_all(
             "Item Variant Attribute",
-            fields=["attribute", "field_name", "attribute_value"],
-            filters={"parent": variant.item_code},
-        )
+            fields=["parent", "attribute", "attribute_value"],
+            filters={"parent": ["in", variant_codes]},
+        ):
+            variant_attributes.setdefault(row.parent, {})[row.attribute] = row.attribute_value
+
+        price_list = frappe.db.get_single_value("POS Settings", "selling_price_list") or \
+            frappe.db.get_single_value("Selling Settings", "selling_price_list")
+        if price_list:
+            rates = dict(frappe.get_all(
+                "Item Price",
+                filters={"item_code": ["in", variant_codes], "price_list": price_list, "selling": 1},
+                fields=["item_code", "price_list_rate"],
+                as_list=True,
+            ))
+
+    catalogue = {
+        template.item_code: {
+            "item_code": template.item_code,
+            "item_name": template.item_name,
+            "item_group": template.item_group,
+            "rate": template.standard_rate or 0,
+            "attributes": [],
+            "variants": [],
+        }
+        for template in templates
+    }
+
+    for row in template_attributes:
+        options = [option.strip() for option in (row.options or "").split("\n") if option.strip()]
+        catalogue[row.parent]["attributes"].append({
+            "attribute": row.attribute,
+            "field_name": row.field_name,
+            "options": options or attribute_values.get(row.attribute, []),
+        })
+
+    template_rates = {template.item_code: template.standard_rate for template in templates}
+    for variant in variants:
+        catalogue[variant.variant_of]["variants"].append({
+            "item_code": variant.item_code,
+            "item_name": variant.item_name,
+            "rate": rates.get(variant.item_code) or variant.standard_rate
+            or template_rates.get(variant.variant_of) or 0,
+            "attributes": variant_attributes.get(variant.item_code, {}),
+        })
 
-        match = True
-        for attr, value in attributes.items():
-            found = False
-            for va in variant_attributes:
-                field_name = getattr(va, "field_name", None)
-                if (va.attribute == attr or field_name == attr) and va.attribute_value == value:
-                    found = True
-                    break
-            if not found:
-                match = False
-                break
-        if match:
-            return variant
-
-    frappe.throw(_("No matching variant found for selected attributes"))
+    return list(catalogue.values())
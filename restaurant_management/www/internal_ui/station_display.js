@@ -25,6 +25,7 @@ const state = {
     stations: [],
     branches: [],
     queueItems: [],
+    tickets: [],
     isGuest: false,
     accessToken: null,
     hasError: false,
@@ -437,30 +438,37 @@ async function safeApiCall(method, args = {}, options = {}) {
 
 /**
  * Load KDS configuration from server
+ * 
+ * The cached copy is revalidated with its version; the server only sends the
+ * full configuration when it has changed.
  * @returns {Promise<Object>} Configuration object
  */
 async function loadConfig() {
-    // Try to get config from cache first
-    const cachedConfig = localStorage.getItem('kds_config');
+    const { kitchenStation, branchCode } = getSelectedValues();
+    const cacheKey = `kds_config:${branchCode}:${kitchenStation}`;
+    
+    // Get the cached config and its version
+    let cached = null;
+    const cachedConfig = localStorage.getItem(cacheKey);
     if (cachedConfig) {
         try {
-            const parsedConfig = JSON.parse(cachedConfig);
-            // Check if cache is recent (less than 1 hour old)
-            if (parsedConfig.timestamp && (Date.now() - parsedConfig.timestamp < 3600000)) {
-                return parsedConfig.data;
-            }
+            cached = JSON.parse(cachedConfig).data || null;
         } catch (e) {
             log('warn', 'Failed to parse cached config', e);
         }
     }
     
-    // Get fresh config from server
+    // Revalidate with the server
     const config = await safeApiCall(
         'restaurant_management.api.kds_display.get_kds_config',
-        {},
+        {
+            kitchen_station: kitchenStation || null,
+            branch_code: branchCode || null,
+            version: cached?.version || null
+        },
         {
             errorMessage: 'Error loading KDS configuration',
-            defaultValue: {
+            defaultValue: cached || {
                 refresh_interval: 10,
                 default_kitchen_station: '',
                 status_color_map: {
@@ -473,8 +481,12 @@ async function loadConfig() {
         }
     );
     
+    if (config?.unchanged && cached) {
+        return cached;
+    }
+    
     // Cache the config
-    localStorage.setItem('kds_config', JSON.stringify({
+    localStorage.setItem(cacheKey, JSON.stringify({
         timestamp: Date.now(),
         data: config
     }));
@@ -693,6 +705,55 @@ async function updateItemStatus(itemId, newStatus) {
     }
 }
 
+/**
+ * Advance every open item of a ticket to its next status in one request
+ * @param {Object} ticket - Ticket returned by get_station_tickets
+ * @returns {Promise<boolean>} Success status
+ */
+async function bumpTicket(ticket) {
+    const items = (ticket.courses || []).flatMap(course => course.items || []);
+    const cooking = items.filter(item => item.status === 'Cooking');
+    const waiting = items.filter(item => item.status === 'Waiting' || item.status === 'Sent to Kitchen');
+
+    // Start the ticket first; once everything is cooking, mark it ready
+    const [targets, newStatus, expectedStatuses] = waiting.length
+        ? [waiting, 'Cooking', ['Waiting', 'Sent to Kitchen']]
+        : [cooking, 'Ready', ['Cooking']];
+
+    if (!targets.length) {
+        return false;
+    }
+
+    try {
+        showLoading();
+
+        const result = await safeApiCall(
+            'restaurant_management.api.kds_display.update_items_status',
+            {
+                item_ids: JSON.stringify(targets.map(item => item.id)),
+                new_status: newStatus,
+                expected_statuses: JSON.stringify(expectedStatuses)
+            },
+            {
+                errorMessage: 'Error updating ticket status',
+                defaultValue: { success: false }
+            }
+        );
+
+        // Refresh even on partial success so conflicts show their current state
+        await refreshQueueData();
+
+        if (!result || !result.success) {
+            const conflicts = (result?.results || []).filter(row => !row.success);
+            showError(`Ticket ${ticket.order_id}: ${conflicts.length || 'some'} item(s) could not be updated`, true);
+            return false;
+        }
+        return true;
+    } finally {
+        hideLoading();
+    }
+}
+
 /**
  * Get status badge element
  * @param {string} status - Item status
@@ -838,6 +899,104 @@ function renderQueueItems(items) {
     }
 }
 
+/**
+ * Render server-grouped tickets in the queue table
+ * @param {Array} tickets - Tickets returned by get_station_tickets
+ */
+function renderTickets(tickets) {
+    const queueContainer = document.getElementById(ELEMENT_IDS.queueItems);
+    if (!queueContainer) {
+        log('error', 'Queue container not found', ELEMENT_IDS.queueItems);
+        return;
+    }
+
+    if (!Array.isArray(tickets) || tickets.length === 0) {
+        renderQueueItems([]);
+        return;
+    }
+
+    queueContainer.innerHTML = '';
+
+    tickets.forEach(ticket => {
+        try {
+            // Ticket header row: table, age coloured by SLA and a single bump action
+            const header = createElement('tr', { className: 'bg-gray-100' });
+            header.style.borderLeft = `6px solid ${ticket.sla_color || '#95a5a6'}`;
+
+            header.appendChild(createElement('td', {
+                className: 'px-6 py-3 font-semibold',
+                textContent: `${ticket.order_id} (${ticket.total_qty || 0})`
+            }));
+            header.appendChild(createElement('td', {
+                className: 'px-6 py-3 text-sm font-semibold',
+                textContent: ticket.table_number || 'Unknown Table'
+            }));
+
+            const ageCell = createElement('td', { className: 'px-6 py-3 text-sm font-medium' });
+            ageCell.appendChild(createElement('span', {
+                textContent: formatTimeInQueue(ticket.age || 0),
+                style: `color: ${ticket.sla_color || 'inherit'}`
+            }));
+            header.appendChild(ageCell);
+
+            header.appendChild(createElement('td', {
+                className: 'px-6 py-3 text-xs text-gray-600',
+                textContent: (ticket.statuses || []).join(', ')
+            }));
+
+            const bumpCell = createElement('td', { className: 'px-6 py-3 text-sm' });
+            bumpCell.appendChild(createElement('button', {
+                textContent: 'Bump Ticket',
+                className: 'py-1 px-3 bg-indigo-500 hover:bg-indigo-600 text-white rounded text-sm font-medium transition',
+                onClick: () => bumpTicket(ticket)
+            }));
+            header.appendChild(bumpCell);
+            queueContainer.appendChild(header);
+
+            (ticket.courses || []).forEach(course => {
+                const courseRow = createElement('tr');
+                courseRow.appendChild(createElement('td', {
+                    colspan: 5,
+                    className: 'px-6 pt-2 text-xs uppercase tracking-wider text-gray-500',
+                    textContent: course.course
+                }));
+                queueContainer.appendChild(courseRow);
+
+                (course.items || []).forEach(item => {
+                    const row = createElement('tr', { className: 'hover:bg-gray-50' });
+
+                    const name = item.qty > 1 ? `${item.qty} × ${item.item_name}` : item.item_name;
+                    const nameCell = createElement('td', {
+                        className: 'px-6 py-2 whitespace-nowrap',
+                        textContent: name || 'Unknown Item'
+                    });
+                    if (item.notes && state.config?.show_item_notes !== false) {
+                        nameCell.appendChild(createElement('div', {
+                            className: 'text-xs text-gray-500',
+                            textContent: item.notes
+                        }));
+                    }
+                    row.appendChild(nameCell);
+                    row.appendChild(createElement('td', { className: 'px-6 py-2' }));
+                    row.appendChild(createElement('td', { className: 'px-6 py-2' }));
+
+                    const statusCell = createElement('td', { className: 'px-6 py-2 whitespace-nowrap' });
+                    statusCell.appendChild(getStatusBadge(item.status));
+                    row.appendChild(statusCell);
+
+                    const actionCell = createElement('td', { className: 'px-6 py-2 whitespace-nowrap text-sm text-gray-500' });
+                    actionCell.appendChild(createActionButton(item));
+                    row.appendChild(actionCell);
+
+                    queueContainer.appendChild(row);
+                });
+            });
+        } catch (error) {
+            log('error', 'Error rendering ticket:', error);
+        }
+    });
+}
+
 /**
  * Get selected values from dropdowns
  * @returns {Object} Selected kitchen station and branch
@@ -849,6 +1008,17 @@ function getSelectedValues() {
     return { kitchenStation, branchCode };
 }
 
+/**
+ * Reload the configuration of the selected station and branch, then its queue
+ */
+async function refreshSelection() {
+    state.config = await loadConfig();
+    if (state.config && state.config.refresh_interval) {
+        state.refreshInterval = Number(state.config.refresh_interval) || 10;
+    }
+    await refreshQueueData();
+}
+
 /**
  * Refresh queue data from server
  */
@@ -877,9 +1047,9 @@ async function refreshQueueData() {
             args.access_token = getAccessToken();
         }
         
-        // Fetch queue items from API
-        const items = await safeApiCall(
-            'restaurant_management.api.kds_display.kds_items',
+        // Fetch tickets, already grouped and prioritised by the server
+        const tickets = await safeApiCall(
+            'restaurant_management.api.kds_display.get_station_tickets',
             args,
             {
                 errorMessage: 'Error fetching queue items',
@@ -887,9 +1057,9 @@ async function refreshQueueData() {
             }
         );
         
-        // Update state and render items
-        state.queueItems = items;
-        renderQueueItems(items);
+        // Update state and render tickets
+        state.tickets = tickets;
+        renderTickets(tickets);
         
         // Reset countdown
         startCountdown();
@@ -1041,8 +1211,8 @@ async function init() {
         }
         
         // Add event listeners for dropdowns
-        document.getElementById(ELEMENT_IDS.kitchenStation)?.addEventListener('change', refreshQueueData);
-        document.getElementById(ELEMENT_IDS.branchCode)?.addEventListener('change', refreshQueueData);
+        document.getElementById(ELEMENT_IDS.kitchenStation)?.addEventListener('change', refreshSelection);
+        document.getElementById(ELEMENT_IDS.branchCode)?.addEventListener('change', refreshSelection);
         
         // Initial data load
         await refreshQueueData();
@@ -4,6 +4,8 @@
 import frappe
 from frappe import _
 
+from restaurant_management.utils.page_context import get_page_data
+
 
 def get_context(context=None):
     """
@@ -13,7 +15,9 @@ def get_context(context=None):
     context = context or {}
     
     try:
-        # Hide this page from navigation elements and search indexing
+        # Hide this page from navigation elements and search indexing.
+        # The rendered page carries the session's CSRF token, so it must not
+        # be cached as a whole; only the data behind it is cached
         context.no_cache = 1
         context.no_index = 1
         context.no_sidebar = 1
@@ -27,64 +31,15 @@ def get_context(context=None):
         # Make CSRF token available to JavaScript - safely handle guest users
         context.csrf_token = getattr(frappe.session, "csrf_token", "") or ""
         
-        # Get meta for optional fields
-        branch_meta = frappe.get_meta("Branch")
-
-        branch_fields = ["name"]
-        if branch_meta.has_field("branch_code"):
-            branch_fields.append("branch_code")
-        else:
-            frappe.log_error(
-                message="'branch_code' field missing in Branch DocType",
-                title="Missing Field"
-            )
-
-        # Get all branches - safely handle errors for guest users
-        try:
-            branches = frappe.get_all(
-                "Branch",
-                fields=branch_fields,
-            ) or []
-            for b in branches:
-                b.setdefault("branch_code", "")
-        except frappe.PermissionError:
-            branches = []
-            context.permission_error = True
+        # Branches and stations come from the cached page shell; tickets
+        # are loaded by the KDS APIs after the page renders
+        page_data = get_page_data("station_display", frappe.form_dict.get("branch"))
+        branches = [frappe._dict(b) for b in page_data["branches"]]
+        kitchen_stations = [frappe._dict(s) for s in page_data["kitchen_stations"]]
         
         # Set default branch (first available or None)
         default_branch = branches[0] if branches else None
         
-        station_meta = frappe.get_meta("Kitchen Station")
-
-        station_fields = ["name"]
-        if station_meta.has_field("station_name"):
-            station_fields.append("station_name")
-        else:
-            frappe.log_error(
-                message="'station_name' field missing in Kitchen Station DocType",
-                title="Missing Field"
-            )
-        if station_meta.has_field("branch"):
-            station_fields.append("branch")
-        else:
-            frappe.log_error(
-                message="'branch' field missing in Kitchen Station DocType",
-                title="Missing Field"
-            )
-
-        # Get all kitchen stations - safely handle errors for guest users
-        try:
-            kitchen_stations = frappe.get_all(
-                "Kitchen Station",
-                fields=station_fields,
-            ) or []
-            for ks in kitchen_stations:
-                ks.setdefault("station_name", "")
-                ks.setdefault("branch", None)
-        except frappe.PermissionError:
-            kitchen_stations = []
-            context.permission_error = True
-        
         # Add data to context
         context.branches = branches
         context.default_branch = default_branch
@@ -98,10 +53,7 @@ def get_context(context=None):
         
         # Handle the case where data is empty
         if not branches and not kitchen_stations:
-            if context.permission_error:
-                context.error_message = _("Permission error: You don't have access to view this data. Please contact your administrator or log in with appropriate permissions.")
-            else:
-                context.error_message = _("No branches or kitchen stations found. Please set up your restaurant configuration first.")
+            context.error_message = _("No branches or kitchen stations found. Please set up your restaurant configuration first.")
         
     except Exception as e:
         frappe.log_error(
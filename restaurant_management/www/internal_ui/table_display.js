@@ -35,8 +35,9 @@ frappe.ready(function() {
       ensureElements();
       showLoading();
       
-      // Load branches
+      // Load branches and the display configuration
       await loadBranches();
+      await loadConfig();
       
       // Set up event listeners
       setupEventListeners();
@@ -103,6 +104,42 @@ frappe.ready(function() {
     }
   }
 
+  // Load display configuration, revalidating the cached copy by version
+  async function loadConfig() {
+    const cacheKey = `table_display_config:${state.selectedBranch}`;
+    let cached = null;
+    try {
+      cached = JSON.parse(localStorage.getItem(cacheKey) || 'null');
+    } catch (error) {
+      console.warn('Failed to parse cached table display config:', error);
+    }
+
+    try {
+      const result = await frappe.call({
+        method: 'restaurant_management.api.table_display.get_table_display_config',
+        args: {
+          branch: state.selectedBranch,
+          version: cached?.version
+        },
+        freeze: false
+      });
+
+      const config = result.message || {};
+      if (!config.unchanged) {
+        cached = config;
+        localStorage.setItem(cacheKey, JSON.stringify(config));
+      }
+    } catch (error) {
+      console.error('Error loading table display config:', error);
+    }
+
+    if (cached) {
+      state.config = Object.assign({}, state.config, cached);
+      state.refreshInterval = Number(state.config.refresh_interval) || state.refreshInterval;
+      state.config.refresh_interval = state.refreshInterval;
+    }
+  }
+
   // Refresh table data
   async function refreshTableData() {
     if (state.isLoading) return;
@@ -182,6 +219,17 @@ frappe.ready(function() {
         `;
       }
       
+      // Show the current or next reservation holding the table
+      let reservationInfo = '';
+      if (table.reservation) {
+        const label = table.reservation.status === 'Seated' ? 'Seated' : 'Reserved';
+        reservationInfo = `
+          <div class="table-reservation">
+            ${label} ${formatTime(table.reservation.reservation_time)} &middot; ${table.reservation.party_size} guests
+          </div>
+        `;
+      }
+      
       return `
         <div class="table-card" data-table-id="${table.name}" data-order-id="${table.current_pos_order || ''}">
           <div class="table-status" style="background-color: ${statusColor};"></div>
@@ -191,6 +239,7 @@ frappe.ready(function() {
           </div>
           <div class="table-branch">${table.branch_code || table.branch || ''}</div>
           ${waiterInfo}
+          ${reservationInfo}
         </div>
       `;
     }).join('');
@@ -203,6 +252,16 @@ frappe.ready(function() {
       elements.branchSelector.addEventListener('change', function() {
         state.selectedBranch = this.value;
         localStorage.setItem('selected_branch', state.selectedBranch);
+        loadConfig().then(() => {
+          refreshTableData();
+          resetRefreshTimer();
+        });
+      });
+    }
+    
+    // Settlements and other bulk table changes push one event per batch
+    if (frappe.realtime && typeof frappe.realtime.on === 'function') {
+      frappe.realtime.on('restaurant_table_update', function() {
         refreshTableData();
         resetRefreshTimer();
       });
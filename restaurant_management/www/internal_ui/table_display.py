@@ -4,6 +4,8 @@
 import frappe
 from frappe import _
 
+from restaurant_management.utils.page_context import get_page_data
+
 
 def get_context(context=None):
     """
@@ -14,7 +16,9 @@ def get_context(context=None):
     context = context or {}
     
     try:
-        # Hide this page from navigation elements and search indexing
+        # Hide this page from navigation elements and search indexing.
+        # The rendered page carries the session's CSRF token, so it must not
+        # be cached as a whole; only the data behind it is cached
         context.no_cache = 1
         context.no_index = 1
         context.no_sidebar = 1
@@ -29,70 +33,19 @@ def get_context(context=None):
         # Make CSRF token available to JavaScript
         context.csrf_token = getattr(frappe.session, 'csrf_token', '')
         
-        # Fetch meta for optional fields
-        branch_meta = frappe.get_meta("Branch")
-        branch_fields = ["name"]
-        if branch_meta.has_field("branch_code"):
-            branch_fields.append("branch_code")
-        else:
-            frappe.log_error(
-                message="'branch_code' field missing in Branch DocType",
-                title="Missing Field",
-            )
-
-        # Get all branches
-        branches = frappe.get_all(
-            "Branch",
-            fields=branch_fields,
-        ) or []
-        for b in branches:
-            b.setdefault("branch_code", "")
+        # Branches come from the cached page shell; table status is loaded
+        # by the table display APIs after the page renders
+        page_data = get_page_data("table_display", frappe.form_dict.get("branch"))
+        branches = [frappe._dict(b) for b in page_data["branches"]]
         
         # Set default branch (first available or None)
         default_branch = branches[0] if branches else None
         
-        # Determine available fields for the Table DocType
-        meta = frappe.get_meta("Table")
-
-        table_fields = ["name"]
-        optional_fields = [
-            "table_number",
-            "seating_capacity",
-            "status",
-            "branch",
-            "current_pos_order",
-        ]
-
-        for field in optional_fields:
-            if meta.has_field(field):
-                if field == "current_pos_order":
-                    table_fields.append(f"{field} as current_order")
-                else:
-                    table_fields.append(field)
-            else:
-                frappe.log_error(
-                    message=f"'{field}' field missing in Table DocType",
-                    title="Missing Field",
-                )
-
-        # Get all tables with relevant fields
-        tables = frappe.get_all(
-            "Table",
-            fields=table_fields
-        ) or []
-
-        # Provide fallback values for tables
-        for table in tables:
-            table.setdefault("table_number", "")
-            table.setdefault("seating_capacity", 0)
-            table.setdefault("status", "")
-            table.setdefault("branch", None)
-            table.setdefault("current_order", "")
-        
         # Add data to context
         context.branches = branches
         context.default_branch = default_branch
-        context.tables = tables
+        context.table_count = page_data["table_count"]
+        context.has_tables = bool(page_data["table_count"])
         context.has_branches = bool(branches)
         
     except Exception as e:
@@ -102,7 +55,8 @@ def get_context(context=None):
         )
         # Provide minimal context in case of error to prevent page crash
         context.branches = []
-        context.tables = []
+        context.table_count = 0
+        context.has_tables = False
         context.has_branches = False
         context.default_branch = None
         context.error_message = _("Unable to load table data. Please check error logs.")
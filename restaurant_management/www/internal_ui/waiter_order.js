@@ -17,9 +17,17 @@ frappe.ready(() => {
     selectedItemTemplate: null,
     variantAttributes: [], // Stores current variant attributes for selection
     loading: false,
-    itemRates: {} // Cache for item rates
+    itemRates: {}, // Cache for item rates
+    variantCatalogue: {}, // Template item code -> attributes and valid variants
+    variantCatalogueVersion: null,
+    pendingSubmission: null, // Submission whose response was lost, retried with the same key
+    offlineQueue: [], // Operations queued while offline, replayed by sync_order_batch
+    syncing: false
   };
 
+  const OFFLINE_QUEUE_KEY = 'waiter_order_offline_queue';
+  const SYNC_INTERVAL_MS = 30000;
+
   // DOM Elements
   const elements = {
     tablesContainer: document.getElementById('tables-container'),
@@ -145,10 +153,12 @@ frappe.ready(() => {
       await Promise.all([
         loadTables(),
         loadItems(),
-        loadItemGroups()
+        loadItemGroups(),
+        loadVariantCatalogue()
       ]);
       renderItemGroupTabs();
       setupEventListeners();
+      setupOfflineSync();
       hideLoading();
     } catch (error) {
       log('error', 'Initialization error:', error);
@@ -210,6 +220,69 @@ frappe.ready(() => {
     }
   };
 
+  // Variant catalogue is kept in localStorage so the picker also works offline
+  const getVariantCatalogueStorageKey = () => `restaurant_variant_catalogue:${state.selectedBranch || 'all'}`;
+
+  const setVariantCatalogue = (catalogue) => {
+    state.variantCatalogueVersion = catalogue.version || null;
+    state.variantCatalogue = {};
+    (catalogue.templates || []).forEach(template => {
+      state.variantCatalogue[template.item_code] = template;
+    });
+  };
+
+  const loadVariantCatalogue = async () => {
+    const storageKey = getVariantCatalogueStorageKey();
+    let stored = null;
+    try {
+      stored = JSON.parse(window.localStorage.getItem(storageKey) || 'null');
+    } catch (error) {
+      stored = null;
+    }
+    setVariantCatalogue(stored || {});
+
+    try {
+      const result = await frappe.call({
+        method: 'restaurant_management.api.waiter_order.get_variant_catalogue',
+        args: {
+          branch_code: state.selectedBranch,
+          version: stored ? stored.version : null
+        },
+        freeze: false
+      });
+
+      const catalogue = result.message;
+      if (catalogue && !catalogue.unchanged) {
+        setVariantCatalogue(catalogue);
+        try {
+          window.localStorage.setItem(storageKey, JSON.stringify(catalogue));
+        } catch (error) {
+          log('warn', 'Unable to store variant catalogue:', error);
+        }
+      }
+    } catch (error) {
+      // Keep whatever catalogue we already have; variants fall back to the server
+      log('warn', 'Error loading variant catalogue:', error);
+    }
+  };
+
+  // Match selected attributes against the catalogue's valid combinations
+  const findCatalogueVariant = (templateCode, attributes) => {
+    const template = state.variantCatalogue[templateCode];
+    if (!template || !template.variants) return null;
+
+    const aliases = {};
+    (template.attributes || []).forEach(attr => {
+      if (attr.field_name) aliases[attr.field_name] = attr.attribute;
+    });
+
+    return template.variants.find(variant =>
+      Object.entries(attributes).every(([key, value]) =>
+        variant.attributes[aliases[key] || key] === value
+      )
+    ) || null;
+  };
+
   // Fetch item rate from server
   const fetchItemRate = async (itemCode) => {
     // Return from cache if available
@@ -291,11 +364,20 @@ frappe.ready(() => {
       const variantIndicator = item.has_variants ? 
         '<div class="variant-indicator"><i class="fa fa-list"></i> Has variants</div>' : '';
       
+      // 86 list: sold out items stay visible but cannot be ordered
+      let availability = '';
+      if (item.sold_out) {
+        availability = `<div class="item-availability">${__('Sold out')}</div>`;
+      } else if (item.remaining_qty !== null && item.remaining_qty !== undefined) {
+        availability = `<div class="item-availability">${__('{0} left', [item.remaining_qty])}</div>`;
+      }
+      
       return `
-        <div class="item-button" data-item-code="${item.item_code}" aria-label="Item: ${item.item_name}${item.has_variants ? ', Has variants' : ''}">
+        <div class="item-button${item.sold_out ? ' sold-out' : ''}" data-item-code="${item.item_code}" aria-label="Item: ${item.item_name}${item.has_variants ? ', Has variants' : ''}${item.sold_out ? ', Sold out' : ''}">
           <div class="item-info">
             <div class="item-name">${item.item_name}</div>
             ${variantIndicator}
+            ${availability}
           </div>
           ${priceDisplay}
         </div>
@@ -542,6 +624,7 @@ frappe.ready(() => {
     updateActionButtons();
     await loadTables();
     await loadItems();
+    await loadVariantCatalogue();
   };
 
   const handleItemSelection = async (event) => {
@@ -553,6 +636,11 @@ frappe.ready(() => {
     
     if (!item) return;
     
+    if (item.sold_out) {
+      frappe.show_alert({ message: __('{0} is sold out', [item.item_name]), indicator: 'red' }, 3);
+      return;
+    }
+    
     if (item.has_variants) {
       // Show variant selection modal
       state.selectedItemTemplate = item;
@@ -600,6 +688,100 @@ frappe.ready(() => {
     }
   };
 
+  // Idempotency key for a submission: a retry of the same payload reuses the
+  // key, so the server returns the first result instead of a duplicate order
+  const getSubmissionKey = (method, orderData) => {
+    const payload = JSON.stringify(orderData);
+    const pending = state.pendingSubmission;
+    if (pending && pending.method === method && pending.payload === payload) {
+      return pending.key;
+    }
+    
+    const key = window.crypto?.randomUUID
+      ? window.crypto.randomUUID()
+      : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    state.pendingSubmission = { method, payload, key };
+    return key;
+  };
+
+  // Offline queue: sends that fail because the connection dropped are kept in
+  // localStorage and replayed in order by one sync_order_batch call once the
+  // tablet is back online. Each operation keeps its idempotency key, so a send
+  // that did reach the server is not applied twice.
+  const isOfflineError = (error) => !navigator.onLine || error?.status === 0 || error?.xhr?.status === 0;
+
+  const saveOfflineQueue = () => {
+    try {
+      window.localStorage.setItem(OFFLINE_QUEUE_KEY, JSON.stringify(state.offlineQueue));
+    } catch (e) {
+      log('warn', 'Could not store offline queue:', e);
+    }
+  };
+
+  const queueOfflineOperation = (operation) => {
+    state.offlineQueue.push(operation);
+    saveOfflineQueue();
+    frappe.show_alert({
+      message: __('Connection lost. The order will be sent when the tablet is back online.'),
+      indicator: 'orange'
+    }, 5);
+  };
+
+  const setupOfflineSync = () => {
+    try {
+      state.offlineQueue = JSON.parse(window.localStorage.getItem(OFFLINE_QUEUE_KEY) || '[]');
+    } catch (e) {
+      state.offlineQueue = [];
+    }
+    
+    window.addEventListener('online', flushOfflineQueue);
+    setInterval(flushOfflineQueue, SYNC_INTERVAL_MS);
+    flushOfflineQueue();
+  };
+
+  const flushOfflineQueue = async () => {
+    if (!state.offlineQueue.length || state.syncing || !navigator.onLine) {
+      return;
+    }
+    
+    state.syncing = true;
+    const operations = [...state.offlineQueue];
+    try {
+      const result = await frappe.call({
+        method: 'restaurant_management.api.waiter_order.sync_order_batch',
+        args: { operations }
+      });
+      const results = result.message?.results || [];
+      
+      // Drop what the server applied and what conflicts with its state;
+      // skipped and failed operations stay queued for the next sync
+      const done = new Set(
+        results.filter(r => ['applied', 'replayed', 'conflict'].includes(r.status)).map(r => r.index)
+      );
+      const synced = operations.filter((op, index) => done.has(index));
+      state.offlineQueue = state.offlineQueue.filter(op => !synced.includes(op));
+      saveOfflineQueue();
+      
+      const conflicts = result.message?.conflicts || [];
+      if (conflicts.length) {
+        frappe.msgprint(__('Some queued orders could not be sent:') + '<br>' +
+          conflicts.map(c => `${operations[c.index]?.table || ''}: ${c.error}`).join('<br>'));
+      } else if (synced.length) {
+        frappe.show_alert({
+          message: __('Queued orders sent to kitchen'),
+          indicator: 'green'
+        }, 5);
+      }
+      if (synced.length) {
+        await loadTables();
+      }
+    } catch (error) {
+      log('warn', 'Offline queue sync failed:', error);
+    } finally {
+      state.syncing = false;
+    }
+  };
+
   const handleSendToKitchen = async () => {
     if (!state.selectedTable) {
       frappe.msgprint(__('Please select a table first'));
@@ -628,11 +810,20 @@ frappe.ready(() => {
       
       const result = await frappe.call({
         method: 'restaurant_management.api.waiter_order.send_order_to_kitchen',
-        args: { order_data: orderData },
+        args: {
+          order_data: orderData,
+          idempotency_key: getSubmissionKey('send_order_to_kitchen', orderData)
+        },
         freeze: true,
         freeze_message: __('Sending order to kitchen...')
       });
       
+      // The server answered: later sends are new submissions, unless the
+      // first attempt is still being processed
+      if (!result.message?.in_progress) {
+        state.pendingSubmission = null;
+      }
+      
       if (result.message && result.message.success) {
         // Mark items as sent
         state.currentOrder.sentItems = [...state.currentOrder.items];
@@ -648,6 +839,19 @@ frappe.ready(() => {
       }
       hideLoading();
     } catch (error) {
+      if (isOfflineError(error) && state.pendingSubmission) {
+        queueOfflineOperation({
+          op: 'create',
+          table: state.selectedTable.name,
+          items: state.currentOrder.items,
+          idempotency_key: state.pendingSubmission.key
+        });
+        state.pendingSubmission = null;
+        state.currentOrder.sentItems = [...state.currentOrder.items];
+        updateActionButtons();
+        hideLoading();
+        return;
+      }
       log('error', 'Error sending order to kitchen:', error);
       frappe.msgprint(__('Failed to send order to kitchen. Error: ' + (error.message || 'Unknown error')));
       hideLoading();
@@ -690,11 +894,18 @@ frappe.ready(() => {
       
       const result = await frappe.call({
         method: 'restaurant_management.api.waiter_order.send_additional_items',
-        args: { order_data: orderData },
+        args: {
+          order_data: orderData,
+          idempotency_key: getSubmissionKey('send_additional_items', orderData)
+        },
         freeze: true,
         freeze_message: __('Sending additional items to kitchen...')
       });
       
+      if (!result.message?.in_progress) {
+        state.pendingSubmission = null;
+      }
+      
       if (result.message && result.message.success) {
         state.currentOrder.sentItems = [...state.currentOrder.items];
         frappe.show_alert({
@@ -707,6 +918,19 @@ frappe.ready(() => {
       }
       hideLoading();
     } catch (error) {
+      if (isOfflineError(error) && state.pendingSubmission) {
+        queueOfflineOperation({
+          op: 'add_items',
+          table: state.selectedTable.name,
+          items: newItems,
+          idempotency_key: state.pendingSubmission.key
+        });
+        state.pendingSubmission = null;
+        state.currentOrder.sentItems = [...state.currentOrder.items];
+        updateActionButtons();
+        hideLoading();
+        return;
+      }
       log('error', 'Error sending additional items:', error);
       frappe.msgprint(__('Failed to send additional items to kitchen. Error: ' + (error.message || 'Unknown error')));
       hideLoading();
@@ -774,6 +998,10 @@ frappe.ready(() => {
     if (!elements.variantItemName || !elements.modalOverlay || !elements.variantModal || !elements.variantAttributes) return;
 
     // Fetch rate for the template item
+    const catalogueTemplate = state.variantCatalogue[item.item_code];
+    if (state.itemRates[item.item_code] === undefined && catalogueTemplate) {
+      state.itemRates[item.item_code] = catalogueTemplate.rate;
+    }
     if (state.itemRates[item.item_code] === undefined) {
       const rate = await fetchItemRate(item.item_code);
       state.itemRates[item.item_code] = rate;
@@ -789,6 +1017,12 @@ frappe.ready(() => {
     elements.modalOverlay.style.display = 'block';
     elements.variantModal.style.display = 'block';
 
+    if (catalogueTemplate && catalogueTemplate.attributes && catalogueTemplate.attributes.length) {
+      state.variantAttributes = catalogueTemplate.attributes;
+      renderVariantAttributes(catalogueTemplate.attributes);
+      return;
+    }
+
     try {
       // Get variant attributes
       const result = await frappe.call({
@@ -825,15 +1059,17 @@ frappe.ready(() => {
     // Create attribute selectors dynamically
     const attributesHtml = attributes.map(attr => {
       const attributeName = attr.field_name || attr.attribute;
-      const options = attr.options.split('\n').map(option =>
+      const attributeId = attr.name || attributeName.replace(/\W+/g, '-');
+      const optionList = Array.isArray(attr.options) ? attr.options : (attr.options || '').split('\n');
+      const options = optionList.filter(option => option.trim()).map(option =>
         `<option value="${option.trim()}">${option.trim()}</option>`
       ).join('');
 
       return `
         <div class="form-group variant-form-group">
-          <label for="attr-${attr.name}">${attributeName}</label>
+          <label for="attr-${attributeId}">${attributeName}</label>
           <select class="form-control variant-attribute" 
-                  id="attr-${attr.name}" 
+                  id="attr-${attributeId}" 
                   data-attribute="${attributeName}" 
                   aria-label="Select ${attributeName}">
             <option value="">Select ${attributeName}</option>
@@ -877,6 +1113,25 @@ frappe.ready(() => {
       return;
     }
     
+    // Resolve locally from the catalogue when possible
+    const localVariant = findCatalogueVariant(state.selectedItemTemplate.item_code, attributes);
+    if (localVariant) {
+      state.itemRates[localVariant.item_code] = localVariant.rate;
+      addItemToOrder({
+        item_code: localVariant.item_code,
+        item_name: localVariant.item_name,
+        variant_of: state.selectedItemTemplate.item_code,
+        rate: localVariant.rate,
+        variant_attributes: attributes
+      });
+      frappe.show_alert({
+        message: __(`Added ${localVariant.item_name} to order`),
+        indicator: 'green'
+      }, 3);
+      closeVariantModal();
+      return;
+    }
+    
     try {
       ensureElements();
       showLoading();